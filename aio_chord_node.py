@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import signal
+import time
+import uuid
+
+import grpc
+
+from aio_node_table import AioNodeTable
+from aio_service import HealthCheckService, GetNodeValueService, NotifyNodeService, HandleDataService, \
+    ClientDataService, data_request, process_multi_data, query_request, aio_channel_pool, rpc_limiter
+from chord_node import RECURSIVE, ITERATIVE, LOOKUP_MODES
+from data_structure import Data, DataTable
+from metrics import metrics, data_type_name, MetricsServer, AioServerMetricsInterceptor
+from pending_requests import PendingRequests
+from service import handle_local_entry
+from storage import Storage, FSYNC_BATCH
+from tracing import tracer
+
+from utils import DataHandlingType as d
+from utils import generate_hash, id_to_bytes, id_from_bytes, short_id, show_value, to_value
+
+from protos.output import chord_pb2, chord_pb2_grpc
+
+"""
+aio_chord_node.py 는 ChordNode 의 asyncio (grpc.aio) 버전입니다.
+
+서버, 다른 노드에게 보내는 요청, stabilize 주기 작업이 모두 하나의 event loop 위에서 동작합니다.
+요청마다 thread 를 만들지 않으므로, 동시에 처리할 수 있는 양은 thread 수가 아니라
+동시에 보내고 있는 RPC 수 (max_outstanding_rpcs) 와 동시에 받고 있는 RPC 수 (max_concurrent_rpcs) 로 제한됩니다.
+"""
+
+
+class AioChordNode:
+
+    def __init__(self, address, lookup_mode: str = RECURSIVE, hop_timeout: float = 1.0, hop_retries: int = 1,
+                 max_outstanding_rpcs: int = 64, max_concurrent_rpcs: int = 256, data_dir: str = None,
+                 fsync: str = FSYNC_BATCH, metrics_port: int = 0, trace_file: str = None, interactive: bool = True,
+                 bootstrap: str = None, fingers_per_cycle: int = 8, leave_on_exit: bool = False):
+        """
+        :param address: 현재 노드의 address (host:port)
+        :param lookup_mode: get, set, delete 요청을 보내는 방식 (RECURSIVE, ITERATIVE)
+        :param hop_timeout: iterative 방식에서 한 노드의 응답을 기다리는 최대 시간 (초)
+        :param hop_retries: iterative 방식에서 응답하지 않는 노드에게 다시 요청하는 횟수
+        :param max_outstanding_rpcs: 다른 노드에게 동시에 보낼 수 있는 최대 RPC 수
+        :param max_concurrent_rpcs: 서버가 동시에 처리하는 최대 RPC 수, 넘으면 RESOURCE_EXHAUSTED 로 거절함
+        :param data_dir: data table 의 WAL 과 snapshot 을 저장할 directory, None 이면 memory 에만 저장함
+        :param fsync: WAL 을 disk 에 반영하는 방식 (storage.FSYNC_MODES)
+        :param metrics_port: Prometheus metrics 를 응답할 HTTP port, 0 이면 사용하지 않음
+        :param trace_file: 요청별 hop 수와 latency 를 기록할 file (JSON lines), None 이면 기록하지 않음
+        :param interactive: True 면 명령어를 입력받음, False 면 SIGTERM 을 받을 때까지 명령어 없이 동작함
+        :param bootstrap: 서버를 시작한 뒤 join 할 노드의 address, None 이면 혼자 ring 을 시작함
+        :param fingers_per_cycle: 한 주기에 갱신하는 finger 의 최대 개수 (NodeTable 참고)
+        :param leave_on_exit: True 면 interactive 가 아닐 때 SIGTERM 을 받으면 data 를 넘기고 ring 에서 나간 뒤 종료함
+        """
+        if lookup_mode not in LOOKUP_MODES:
+            raise ValueError(f'unknown lookup mode: {lookup_mode}')
+        self.server = None
+        self.address = address
+        self.lookup_mode = lookup_mode
+        self.hop_timeout = hop_timeout
+        self.hop_retries = hop_retries
+        self.max_concurrent_rpcs = max_concurrent_rpcs
+        self.interactive = interactive
+        self.bootstrap = bootstrap
+        self.leave_on_exit = leave_on_exit
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        if trace_file is not None:
+            tracer.open(trace_file)
+        rpc_limiter.limit(max_outstanding_rpcs)
+
+        self.data_table = DataTable()
+        self.storage = None
+        if data_dir is not None:
+            self.storage = Storage(data_dir, fsync=fsync)
+            self.storage.recover(self.data_table)
+            self.storage.start()
+        self.node_table = AioNodeTable(generate_hash(self.address), self.address, self.data_table,
+                                       fingers_per_cycle=fingers_per_cycle)
+        self.pending_requests = PendingRequests()
+
+    def trace_path(self):
+        # 다른 노드에게 보내는 요청에 담을 path, trace 를 기록하지 않으면 None
+        return [self.address] if tracer.enabled else None
+
+    async def get(self, key, timeout: float = 5.0):
+        """
+        key 에 해당하는 value 를 가져옵니다. (ChordNode.get 과 같음)
+        :return: value, 값이 없으면 None
+        :raise TimeoutError: timeout 안에 결과가 오지 않은 경우
+        :raise LookupError: iterative 방식에서 담당 노드를 찾지 못한 경우
+        """
+        if self.lookup_mode == ITERATIVE:
+            found, value, _ = await self.iterative_request(key, b"", d.get)
+            return value if found else None
+
+        if self.node_table.is_responsible(key):
+            try:
+                return self.data_table.get(key).value
+            except ValueError:
+                return None
+
+        request_id, future = self.pending_requests.create()
+        nearest_node = self.node_table.find_nearest_alive_node(key)
+        await data_request(self.node_table.cur_node, nearest_node, Data(key, b""), d.get, request_id,
+                           path=self.trace_path())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self.pending_requests.cancel(request_id)
+            raise TimeoutError(f'get request for key:{short_id(key)} is timed out')
+
+    async def iterative_request(self, key, value: bytes, data_handling_type: int, attempts: int = 2):
+        """
+        key 를 담당하는 노드를 iterative 하게 찾은 뒤, 그 노드에게 직접 요청합니다. (ChordNode.iterative_request 와 같음)
+        :return: (key 존재 여부, value, 거쳐간 노드들의 list)
+        :raise LookupError: 담당 노드를 찾지 못했거나, 담당 노드가 요청을 처리하지 못한 경우
+        """
+        started = time.monotonic()
+        for _ in range(attempts):
+            owner, path = await self.node_table.lookup(key, hop_timeout=self.hop_timeout, retries=self.hop_retries)
+            if owner.value == self.address:
+                entry = chord_pb2.KeyValue(data_key=id_to_bytes(key), data_value=value)
+                result = handle_local_entry(self.data_table, entry, data_handling_type)
+                return result.found, result.data_value, path
+
+            reply = await query_request(owner, key, value, data_handling_type, timeout=self.hop_timeout)
+            if reply and not reply.redirect:
+                tracer.record(self.address, uuid.uuid4().hex, data_type_name(data_handling_type), key, ITERATIVE,
+                              len(path) - 1, [node.value for node in path], time.monotonic() - started)
+                return reply.found, reply.data_value, path
+        raise LookupError(f'failed to handle key:{short_id(key)} after {attempts} attempts')
+
+    async def set(self, key, value: bytes):
+        if self.lookup_mode == ITERATIVE:
+            _, _, path = await self.iterative_request(key, value, d.set)
+            logging.info(f"request key:{short_id(key)}'s value is set to {show_value(value)}, stored in {path[-1].value}")
+        elif self.node_table.is_responsible(key):
+            self.data_table.set(key, value)
+            logging.info(f"request key:{short_id(key)}'s value is set to {show_value(value)}, stored in {self.address}")
+        else:
+            nearest_node = self.node_table.find_nearest_alive_node(key)
+            await data_request(self.node_table.cur_node, nearest_node, Data(key, value), d.set, uuid.uuid4().hex,
+                               path=self.trace_path())
+
+    async def delete(self, key):
+        if self.lookup_mode == ITERATIVE:
+            found, _, path = await self.iterative_request(key, b"", d.delete)
+            if found:
+                logging.info(f"request key:{short_id(key)} is deleted from {path[-1].value}")
+            else:
+                logging.info(f"request key:{short_id(key)} is not found")
+        elif self.node_table.is_responsible(key):
+            try:
+                self.data_table.delete(key)
+                logging.info(f"request key:{short_id(key)} is deleted from {self.address}")
+            except ValueError:
+                logging.info(f"request key:{short_id(key)} is not found")
+        else:
+            nearest_node = self.node_table.find_nearest_alive_node(key)
+            await data_request(self.node_table.cur_node, nearest_node, Data(key, b""), d.delete, uuid.uuid4().hex,
+                               path=self.trace_path())
+
+    async def multi_request(self, entries: list, data_handling_type: int) -> list:
+        return await process_multi_data(self.node_table, self.data_table, self.node_table.cur_node, entries,
+                                        data_handling_type)
+
+    async def join(self, address: str) -> bool:
+        # ChordNode.join 과 같음
+        if await self.node_table.join(Data(None, address)):
+            logging.info(f"finishing join node, successor is {self.node_table.successor.value}")
+            return True
+        logging.info(f"failed to join, {address} is not responding")
+        return False
+
+    async def command_handler(self, command):
+        commands = command.split()
+        if not commands:
+            return
+
+        if commands[0] == 'get':
+            key = generate_hash(commands[1])
+            started = time.time()
+            try:
+                value = await self.get(key)
+                elapsed = (time.time() - started) * 1000
+                shown = show_value(value) if value is not None else "not found"
+                logging.info(f"request key:{short_id(key)}'s value is {shown} ({elapsed:.1f}ms)")
+            except TimeoutError as e:
+                logging.info(e)
+
+        elif commands[0] == 'set':
+            # value 에는 ':' 와 공백이 들어갈 수 있으므로, 처음 나오는 ':' 로만 key 와 value 를 나눔
+            key, _, value = command.split(None, 1)[1].partition(":")
+            await self.set(generate_hash(key), to_value(value))
+
+        elif commands[0] == 'delete':
+            await self.delete(generate_hash(commands[1]))
+
+        elif commands[0] == 'mget':
+            keys = {generate_hash(key): key for key in commands[1:]}
+            entries = [chord_pb2.KeyValue(data_key=id_to_bytes(key)) for key in keys]
+            results = await self.multi_request(entries, d.get)
+            values = {id_from_bytes(result.data_key): show_value(result.data_value) for result in results if result.found}
+            for hashed_key, key in keys.items():
+                print(f'{key}: {values.get(hashed_key, "not found")}')
+            print()
+
+        elif commands[0] == 'mset':
+            entries = []
+            for item in commands[1:]:
+                key, _, value = item.partition(":")
+                entries.append(chord_pb2.KeyValue(data_key=id_to_bytes(generate_hash(key)), data_value=to_value(value)))
+            await self.multi_request(entries, d.set)
+            logging.info(f"{len(entries)} keys are set")
+
+        elif commands[0] == 'mdelete':
+            entries = [chord_pb2.KeyValue(data_key=id_to_bytes(generate_hash(key))) for key in commands[1:]]
+            results = await self.multi_request(entries, d.delete)
+            logging.info(f"{sum(result.found for result in results)} of {len(results)} keys are deleted")
+
+        elif commands[0] == 'lookup':
+            key = generate_hash(commands[1])
+            started = time.time()
+            owner, path = await self.node_table.lookup(key, hop_timeout=self.hop_timeout, retries=self.hop_retries)
+            elapsed = (time.time() - started) * 1000
+            print(f'key:{short_id(key)} is stored in {owner.value} ({len(path) - 1} hops, {elapsed:.1f}ms)')
+            print(' -> '.join(node.value for node in path))
+            print()
+
+        elif commands[0] == 'mode':
+            if len(commands) > 1:
+                if commands[1] not in LOOKUP_MODES:
+                    print(f'unknown lookup mode: {commands[1]}, use one of {", ".join(LOOKUP_MODES)}')
+                    return
+                self.lookup_mode = commands[1]
+            print(f'lookup mode: {self.lookup_mode}')
+
+        elif commands[0] == 'join':
+            await self.join(commands[1])
+
+        elif commands[0] == 'disjoin':
+            await self.node_table.leave()
+            await self.server.stop(0)
+            logging.info('left the network')
+
+        elif commands[0] == 'show':
+            self.node_table.log_nodes()
+
+        elif commands[0] == 'summary':
+            self.data_table.summary()
+
+        elif commands[0] == 'pool':
+            stats = aio_channel_pool.stats()
+            print(f"channels: {stats['size']}, hits: {stats['hits']}, misses: {stats['misses']}, "
+                  f"evictions: {stats['evictions']}")
+            stats = rpc_limiter.stats()
+            print(f"outstanding rpcs: {stats['outstanding']}/{stats['max_outstanding']}, peak: {stats['peak']}, "
+                  f"waited: {stats['waited']}")
+            print()
+
+        elif commands[0] == 'detector':
+            stats = self.node_table.failure_detector.stats()
+            print(f"alive: {stats['alive']}, suspect: {stats['suspect']}, dead: {stats['dead']}")
+            print(f"probes: {stats['probes']}, failures: {stats['probe_failures']}, detections: {stats['detections']}")
+            print(f"detection latency avg: {stats['detection_latency_avg']:.2f}s, "
+                  f"max: {stats['detection_latency_max']:.2f}s")
+            print()
+
+        elif commands[0] == 'storage':
+            if self.storage is None:
+                print('storage is not used (run with --data-dir)')
+                return
+            stats = self.storage.stats()
+            print(f"wal segment: {stats['segment']}, records since snapshot: {stats['wal_records']}, "
+                  f"appends: {stats['appends']}, fsyncs: {stats['syncs']}")
+            print(f"snapshots: {stats['snapshots']} (last {stats['last_snapshot_seconds']:.2f}s), "
+                  f"recovered {stats['recovered_records']} records in {stats['recovery_seconds']:.2f}s")
+            print()
+
+        elif commands[0] == 'stats':
+            for line in metrics.report():
+                print(line)
+            print()
+
+        elif commands[0] == 'ft_update':
+            await self.node_table.fix_fingers(len(self.node_table.finger_table.entries))
+
+    async def listen_command(self):
+        # 입력 대기는 event loop 를 막지 않도록 executor 의 thread 하나에서 처리함
+        loop = asyncio.get_running_loop()
+        while not self.node_table.stop_flag:
+            try:
+                command = await loop.run_in_executor(None, input, "> ")
+            except EOFError:
+                return
+            try:
+                await self.command_handler(command)
+            except LookupError as e:
+                logging.info(e)
+
+    async def serve(self):
+        metrics.track_data_table(self.data_table)
+        self.server = grpc.aio.server(maximum_concurrent_rpcs=self.max_concurrent_rpcs,
+                                      interceptors=[AioServerMetricsInterceptor()])
+
+        chord_pb2_grpc.add_HealthCheckerServicer_to_server(HealthCheckService(self.node_table), self.server)
+        chord_pb2_grpc.add_GetNodeValueServicer_to_server(GetNodeValueService(self.node_table), self.server)
+        chord_pb2_grpc.add_NotifyNodeServicer_to_server(NotifyNodeService(self.node_table), self.server)
+        chord_pb2_grpc.add_HandleDataServicer_to_server(
+            HandleDataService(self.node_table, self.data_table, self.pending_requests), self.server)
+        chord_pb2_grpc.add_ClientDataServicer_to_server(ClientDataService(self.node_table, self.data_table), self.server)
+
+        self.server.add_insecure_port(self.address)
+        await self.server.start()
+        logging.info(f'ChordServer (asyncio) is listening on {self.address}')
+
+        if self.metrics_port:
+            self.metrics_server = MetricsServer(self.address.rsplit(':', 1)[0], self.metrics_port)
+            self.metrics_server.start()
+            logging.info(f'metrics are served on http://{self.metrics_server.address}/metrics')
+
+        if self.bootstrap is not None:
+            await self.join(self.bootstrap)
+
+        background = asyncio.ensure_future(self.node_table.run_forever())
+        try:
+            if self.interactive:
+                await self.listen_command()
+            else:
+                # 명령어 없이 동작하는 노드는 SIGTERM 을 받으면 종료함
+                terminated = asyncio.Event()
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, terminated.set)
+                await terminated.wait()
+                if self.leave_on_exit:
+                    await self.node_table.leave()
+                    logging.info('left the network')
+        except KeyboardInterrupt:
+            print('Terminated By User')
+        finally:
+            self.node_table.stop_flag = True
+            background.cancel()
+            await self.server.stop(0)
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+            if self.storage is not None:
+                self.storage.close()
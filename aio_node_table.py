@@ -0,0 +1,266 @@
+import asyncio
+import logging
+
+from data_structure import DataTable, Data
+from failure_detector import FailureDetector
+from metrics import metrics
+from node_table import NodeTable, SUCCESSOR_LIST_LENGTH
+from aio_service import request_node_info, notify_node_info, transfer_request, find_successor_request, \
+    request_successor_list, next_hop_request, node_health_check
+from utils import NodeType as n
+from utils import RING_SIZE
+from utils import in_open_range, in_right_closed_range, short_id
+
+"""
+aio_node_table.py 는 NodeTable 의 asyncio 버전입니다.
+
+routing 에 필요한 계산 (is_responsible, closest_preceding_node 등) 은 NodeTable 의 것을 그대로 사용하고,
+다른 노드와 통신하는 부분만 coroutine 으로 바꿨습니다.
+stabilize, fix_fingers 와 failure detector 는 thread 대신 event loop 위의 task 로 실행됩니다.
+"""
+
+
+class AioFailureDetector(FailureDetector):
+    """
+    FailureDetector 와 같은 상태 table 을 사용하지만, health check 를 thread pool 대신 task 로 동시에 보냅니다.
+    """
+
+    async def probe_all(self):
+        nodes = self.targets()
+        results = await asyncio.gather(*[node_health_check(node, timeout=self.interval) for node in nodes])
+        for node, alive in zip(nodes, results):
+            self.record(node.value, alive)
+
+    async def run_forever(self):
+        while not self.node_table.stop_flag:
+            started = self.clock()
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logging.debug(f'failure detector probe failed: {e}')
+            await asyncio.sleep(max(0.0, self.interval - (self.clock() - started)))
+
+
+class AioNodeTable(NodeTable):
+
+    def __init__(self, ids, address: str, data_table: DataTable, fingers_per_cycle: int = 8,
+                 update_interval: float = 1.0):
+        super().__init__(ids, address, data_table, fingers_per_cycle, update_interval)
+        self.failure_detector = AioFailureDetector(self)
+
+    async def find_successor(self, key):
+        """
+        key 의 successor 를 찾습니다. (NodeTable.find_successor 와 같음)
+        :return: 찾은 노드의 정보, 찾지 못했으면 False
+        """
+        if key == self.cur_node.key:
+            return self.cur_node
+
+        successor = self.first_alive_successor()
+        if in_right_closed_range(key, self.cur_node.key, successor.key):
+            return successor
+
+        next_node = self.closest_preceding_node(key)
+        if next_node is not self.cur_node:
+            found = await find_successor_request(next_node, key)
+            if found:
+                return found
+
+        if successor is self.cur_node:
+            return False
+        return await find_successor_request(successor, key)
+
+    async def lookup(self, key, hop_timeout: float = 1.0, retries: int = 1, max_hops: int = 32):
+        """
+        key 를 담당하는 노드를 iterative 하게 찾습니다. (NodeTable.lookup 과 같음)
+        :return: (담당 노드, 거쳐간 노드들의 list)
+        :raise LookupError: 담당 노드를 찾지 못한 경우
+        """
+        try:
+            node, path = await self._lookup(key, hop_timeout, retries, max_hops)
+        except LookupError:
+            metrics.inc('chord_lookup_failures_total')
+            raise
+        metrics.observe('chord_lookup_hops', len(path) - 1)
+        return node, path
+
+    async def _lookup(self, key, hop_timeout: float, retries: int, max_hops: int):
+        path = [self.cur_node]
+        if self.is_responsible(key):
+            return self.cur_node, path
+
+        failed = set()
+        node = self.find_nearest_alive_node(key)
+        while len(path) <= max_hops:
+            reply = False
+            for _ in range(retries + 1):
+                reply = await next_hop_request(node, key, timeout=hop_timeout)
+                if reply:
+                    break
+
+            if not reply:
+                failed.add(node.value)
+                self.failure_detector.record(node.value, False)
+                node = await self._alternative_hop(path[-1], failed, hop_timeout)
+                continue
+
+            path.append(node)
+            responsible, next_node = reply
+            if responsible:
+                return node, path
+            if next_node.value in failed or next_node.value in [p.value for p in path]:
+                next_node = await self._alternative_hop(node, failed, hop_timeout)
+            node = next_node
+        raise LookupError(f'failed to find the node of key:{short_id(key)} in {max_hops} hops')
+
+    async def _alternative_hop(self, node: Data, failed: set, timeout: float) -> Data:
+        if node.value == self.cur_node.value:
+            candidates = self.successors
+        else:
+            candidates = await request_successor_list(node, timeout=timeout) or []
+        for candidate in candidates:
+            if candidate.value not in failed and candidate.value != self.cur_node.value:
+                return candidate
+        raise LookupError(f'no alive node to continue lookup from {node.value}')
+
+    async def join(self, node: Data) -> bool:
+        """
+        node 가 속해 있는 ring 에 join 합니다. (NodeTable.join 과 같음)
+        :return: join 에 성공하면 True, node 가 응답하지 않으면 False
+        """
+        successor = await find_successor_request(node, self.cur_node.key)
+        if not successor:
+            return False
+        self.predecessor = Data(self.cur_node.key, self.cur_node.value)
+        self.set_successor(successor)
+        await self.stabilize()
+        await self.fix_fingers(len(self.finger_table.entries))
+        return True
+
+    async def leave(self):
+        """
+        ring 에서 나갑니다. (NodeTable.leave 와 같음)
+        """
+        self.stop_flag = True
+        successor = self.first_alive_successor()
+        predecessor = self.predecessor
+        if successor is self.cur_node:
+            return
+
+        await notify_node_info(successor, predecessor, n.predecessor)
+        if predecessor.value != self.cur_node.value:
+            await notify_node_info(predecessor, successor, n.successor)
+
+        receiver = predecessor if predecessor.value != self.cur_node.value else successor
+        if not await self.transfer_range(receiver, self.cur_node.key, self.cur_node.key):
+            logging.info(f'failed to hand off data to {receiver.value}, keep {len(self.data_table)} keys')
+
+    async def transfer_range(self, receiver: Data, start, end) -> bool:
+        """
+        [start, end) 범위의 segment 들을 떼어내서 receiver 에게 넘깁니다. (NodeTable.transfer_range 와 같음)
+        :return: 모두 넘겼으면 True
+        """
+        segments = self.data_table.detach(start, end)
+        entries = [entry for segment in segments for entry in segment.entries]
+        if not entries:
+            return True
+        try:
+            stored = await transfer_request(self.cur_node, receiver, entries)
+        except Exception as e:
+            logging.debug(f'failed to transfer {len(entries)} keys to {receiver.value}, {e}')
+            stored = 0
+        if stored < len(entries):
+            logging.info(f'{receiver.value} stored only {stored}/{len(entries)} keys, retry later')
+            self.data_table.adopt(segments)
+            return False
+        return True
+
+    async def stabilize(self):
+        """
+        successor 와 successor list 를 갱신하고, successor 에게 notify 합니다. (NodeTable.stabilize 와 같음)
+        """
+        successor = self.first_alive_successor()
+        if successor is self.cur_node:
+            candidate = self.predecessor
+        else:
+            candidate = await request_node_info(successor, n.predecessor)
+
+        if candidate and candidate.value != self.cur_node.value and \
+                in_open_range(candidate.key, self.cur_node.key, successor.key):
+            successor = candidate
+
+        if successor is self.cur_node or successor.value == self.cur_node.value:
+            self.set_successor(self.cur_node)
+            self.successors = [self.successor]
+            return
+
+        # notify 와 successor list 요청은 서로 관계가 없으므로 동시에 보냄
+        _, successor_list = await asyncio.gather(
+            notify_node_info(successor, self.cur_node, n.predecessor_candidate),
+            request_successor_list(successor)
+        )
+        if successor_list is False:
+            successor_list = self.successors[1:]
+        successors = [successor]
+        for node in successor_list:
+            if len(successors) >= SUCCESSOR_LIST_LENGTH or node.value == self.cur_node.value:
+                break
+            if node.value not in [s.value for s in successors]:
+                successors.append(node)
+        self.set_successor(successor)
+        self.successors = successors
+
+    async def fix_fingers(self, count: int = None):
+        """
+        finger table 을 조금씩 갱신합니다. (NodeTable.fix_fingers 와 같음)
+        다른 노드에게 물어봐야 하는 finger 들은 동시에 요청합니다.
+        """
+        if count is None:
+            count = self.fingers_per_cycle
+        entries = self.finger_table.entries
+        cur_key = self.cur_node.key
+
+        lookups = dict()  # finger index -> find_successor coroutine
+        for _ in range(len(entries)):
+            if count <= 0:
+                break
+            i = self.next_finger
+            self.next_finger = (self.next_finger + 1) % len(entries)
+            start = (cur_key + (1 << i)) % RING_SIZE
+
+            if in_right_closed_range(start, cur_key, self.successor.key):
+                node = self.successor
+            elif i > 0 and i - 1 not in lookups and entries[i - 1].value != self.cur_node.value and \
+                    in_right_closed_range(start, cur_key, entries[i - 1].key):
+                node = entries[i - 1]
+            else:
+                lookups[i] = self.find_successor(start)
+                count -= 1
+                continue
+            if i != n.successor:
+                entries[i] = node
+
+        nodes = await asyncio.gather(*lookups.values())
+        for i, node in zip(lookups, nodes):
+            if node and i != n.successor:
+                entries[i] = node
+
+    async def handoff_data(self):
+        # 본인의 key 범위 [n, successor) 밖의 data 는, 넘겨줄 노드별 범위의 segment 째로 떼어내서 동시에 넘김
+        await asyncio.gather(*[self.transfer_range(node, start, end) for node, start, end in self.handoff_ranges()])
+
+    async def update_finger_table_info(self):
+        self.log_nodes()
+        while not self.stop_flag:
+            await asyncio.sleep(self.update_interval)
+            try:
+                self.check_predecessor()
+                await self.stabilize()
+                await self.fix_fingers()
+                await self.handoff_data()
+            except Exception as e:
+                logging.info(f'failed to update node table: {e}')
+
+    async def run_forever(self):
+        # failure detector 와 stabilize 주기 작업을 task 로 함께 실행함
+        await asyncio.gather(self.failure_detector.run_forever(), self.update_finger_table_info())
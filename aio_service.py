@@ -0,0 +1,518 @@
+import asyncio
+import logging
+
+import grpc
+from grpc.aio import AioRpcError
+
+from channel_pool import ChannelPool
+from data_structure import Data, DataTable
+from metrics import metrics, data_type_name
+from tracing import tracer, next_path
+from service import handle_local_entry, route_multi_data, transfer_batches
+from service import MULTI_DATA_TIMEOUT, MULTI_DATA_ROUNDS
+from utils import NodeType as n
+from utils import DataHandlingType as d
+from utils import id_to_bytes, id_from_bytes, short_id, show_value
+
+from protos.output import chord_pb2
+from protos.output import chord_pb2_grpc
+
+"""
+aio_service.py 는 service.py 의 asyncio (grpc.aio) 버전입니다.
+
+def (함수) 들은 메시지를 전송하는 coroutine 이고,
+class (클래스) 들은 grpc.aio 서버에 등록하여 해당 메시지를 받는 Servicer 입니다.
+요청을 다른 노드에게 넘길 때 thread 를 만들지 않고 task 를 만들며,
+동시에 보내고 있는 요청 (outstanding RPC) 의 수는 rpc_limiter 로 제한합니다.
+"""
+
+
+class RpcLimiter:
+    """
+    동시에 보내고 있는 RPC 의 수를 제한합니다. 제한을 넘으면 앞선 RPC 가 끝날 때까지 기다립니다.
+    """
+
+    def __init__(self, max_outstanding: int = 64):
+        self.max_outstanding = max_outstanding
+        self.semaphore = None  # event loop 안에서 처음 사용할 때 생성함
+
+        # 통계값
+        self.outstanding = 0
+        self.peak = 0
+        self.waited = 0  # 제한에 걸려서 기다린 RPC 수
+
+    def limit(self, max_outstanding: int):
+        # event loop 가 시작되기 전에 호출해야 함
+        self.max_outstanding = max_outstanding
+        self.semaphore = None
+
+    async def __aenter__(self):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_outstanding)
+        if self.semaphore.locked():
+            self.waited += 1
+        await self.semaphore.acquire()
+        self.outstanding += 1
+        self.peak = max(self.peak, self.outstanding)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.outstanding -= 1
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            'max_outstanding': self.max_outstanding,
+            'outstanding': self.outstanding,
+            'peak': self.peak,
+            'waited': self.waited,
+        }
+
+
+# asyncio 노드에서 공유하는 channel pool 과 RPC limiter
+aio_channel_pool = ChannelPool(channel_factory=grpc.aio.insecure_channel)
+rpc_limiter = RpcLimiter()
+
+# 응답을 기다리지 않는 task 들, 끝나기 전에 garbage collect 되지 않도록 들고 있음
+_background_tasks = set()
+
+
+def spawn(coroutine):
+    """
+    coroutine 을 task 로 실행하고, 결과를 기다리지 않습니다. (service.py 에서 threading.Thread 로 넘기던 요청들)
+    """
+    task = asyncio.ensure_future(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_finish_task)
+    return task
+
+
+def _finish_task(task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.debug(f'background request failed: {task.exception()}')
+
+
+def _remove_dead_channel(address: str, error: AioRpcError):
+    # 연결 자체가 안 되는 경우에만 pool 에서 channel 을 제거함
+    if error.code() == grpc.StatusCode.UNAVAILABLE:
+        aio_channel_pool.remove(address)
+
+
+async def node_health_check(node: Data, timeout: float = 1.0) -> bool:
+    """
+    해당 노드가 살아있는지 확인합니다.
+    :return: 살아있을 시 True, 죽어있을 시 False를 return합니다.
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(node.value, chord_pb2_grpc.HealthCheckerStub)
+            await stub.Check(chord_pb2.HealthCheck(ping=0), timeout=timeout)
+        return True
+    except AioRpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+async def request_node_info(node: Data, which_info: int):
+    """
+    해당 노드에게 그 노드가 가지고 있는 노드들의 정보를 물어봅니다. (service.request_node_info 와 같음)
+    :return: 요청한 노드의 정보가 존재하면 해당 노드의 정보를, param node가 죽었거나 해당 정보가 없으면 False를 return합니다.
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+            response = await stub.GetNodeVal(chord_pb2.NodeDetail(node_address=node.value, which_node=which_info))
+        if not response.node_key:
+            return False
+        return Data(id_from_bytes(response.node_key), response.node_address)
+    except AioRpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+async def notify_node_info(target_node: Data, node_info: Data, which_node: int) -> int:
+    """
+    해당 노드에게, 노드가 가지고 있는 노드들의 정보를 업데이트하라고 지시합니다. (service.notify_node_info 와 같음)
+    :return: 해당 노드가 정보를 잘 받았으면 True(1), 통신에 에러가 나면 False를 return합니다.
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(target_node.value, chord_pb2_grpc.NotifyNodeStub)
+            response = await stub.NotifyNodeChanged(chord_pb2.NodeType(
+                node_key=id_to_bytes(node_info.key), node_address=node_info.value, which_node=which_node
+            ))
+        return response.pong
+    except AioRpcError as e:
+        _remove_dead_channel(target_node.value, e)
+        return False
+
+
+async def find_successor_request(node: Data, key: int, timeout: float = 5.0):
+    """
+    해당 노드에게 key 의 successor 를 찾아달라고 요청합니다. (service.find_successor_request 와 같음)
+    :return: 찾은 노드의 정보를, param node 가 죽었거나 찾지 못했으면 False를 return합니다.
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+            response = await stub.FindSuccessor(chord_pb2.KeyDetail(key=id_to_bytes(key)), timeout=timeout)
+        if not response.node_key:
+            return False
+        return Data(id_from_bytes(response.node_key), response.node_address)
+    except AioRpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+async def request_successor_list(node: Data, timeout: float = None):
+    """
+    해당 노드에게 그 노드의 successor list 를 물어봅니다.
+    :return: successor list (Data 의 list) 를, param node 가 죽었으면 False를 return합니다.
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+            response = await stub.GetSuccessorList(
+                chord_pb2.NodeDetail(node_address=node.value, which_node=n.successor), timeout=timeout)
+        return [Data(id_from_bytes(node_val.node_key), node_val.node_address) for node_val in response.nodes]
+    except AioRpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+async def next_hop_request(node: Data, key: int, timeout: float = 1.0):
+    """
+    iterative lookup 에서, 해당 노드에게 다음으로 물어볼 노드를 요청합니다. (service.next_hop_request 와 같음)
+    :return: (param node 가 key 를 담당하는지 여부, 담당 노드 혹은 다음으로 물어볼 노드의 정보),
+             param node 가 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+            response = await stub.NextHop(chord_pb2.KeyDetail(key=id_to_bytes(key)), timeout=timeout)
+        return response.responsible, Data(id_from_bytes(response.node_key), response.node_address)
+    except AioRpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+async def query_request(node: Data, key: int, value: bytes, data_handling_type: int, timeout: float = 1.0):
+    """
+    key 를 담당하는 노드에게 직접 data 를 요청하고, 처리 결과를 기다립니다. (ClientData.Query)
+    :return: chord_pb2.ClientReply, param node 가 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(node.value, chord_pb2_grpc.ClientDataStub)
+            return await stub.Query(chord_pb2.ClientRequest(
+                data_key=id_to_bytes(key), data_value=value, data_handling_type=data_handling_type
+            ), timeout=timeout)
+    except AioRpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+async def data_request(starter_node: Data, receive_node: Data, data: Data, data_handling_type: int,
+                       request_id: str = "", hops: int = 1, path: list = None, found: bool = False) -> int:
+    """
+    네트워크상의 data를 요청하거나 설정할 때 사용합니다. (service.data_request 와 같음)
+    :return: receive_node 가 값을 잘 처리했으면 0이 return 됨
+    :raise AioRpcError: receive_node 가 응답하지 않는 경우
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
+            response = await stub.GD(chord_pb2.StarterWithData(
+                node_key=id_to_bytes(starter_node.key), node_address=starter_node.value,
+                data_key=id_to_bytes(data.key), data_value=data.value,
+                data_handling_type=data_handling_type, request_id=request_id, hops=hops, path=path, found=found
+            ))
+    except AioRpcError as e:
+        _remove_dead_channel(receive_node.value, e)
+        raise
+    return response.pong
+
+
+async def forward_data_request(receive_node: Data, request) -> int:
+    """
+    받은 data 요청을 그대로 다음 노드에게 전달합니다. (service.forward_data_request 와 같음)
+    :raise AioRpcError: receive_node 가 응답하지 않는 경우
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
+            response = await stub.GD(request)
+    except AioRpcError as e:
+        _remove_dead_channel(receive_node.value, e)
+        raise
+    return response.pong
+
+
+async def multi_data_request(starter_node: Data, receive_node: Data, entries: list, data_handling_type: int,
+                             timeout: float = MULTI_DATA_TIMEOUT):
+    """
+    여러 개의 data 를 한 번에 요청하거나 설정할 때 사용합니다. (service.multi_data_request 와 같음)
+    :return: chord_pb2.MultiDataReply, entries 에 요청한 data 들의 처리 결과와 receive_node 의 key 범위를 담음
+    :raise AioRpcError: receive_node 가 응답하지 않는 경우
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
+            response = await stub.MGD(chord_pb2.StarterWithMultiData(
+                node_key=id_to_bytes(starter_node.key), node_address=starter_node.value,
+                entries=entries, data_handling_type=data_handling_type
+            ), timeout=timeout)
+    except AioRpcError as e:
+        _remove_dead_channel(receive_node.value, e)
+        raise
+    return response
+
+
+async def transfer_request(starter_node: Data, receive_node: Data, entries: list, timeout: float = None) -> int:
+    """
+    여러 개의 data 를 하나의 stream 으로 receive_node 에게 넘깁니다. (service.transfer_request 와 같음)
+    :return: receive_node 가 저장에 성공한 data 의 수
+    :raise AioRpcError: receive_node 가 응답하지 않는 경우
+    """
+    try:
+        async with rpc_limiter:
+            stub = aio_channel_pool.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
+            response = await stub.TransferRange(transfer_batches(starter_node, entries), timeout=timeout)
+    except AioRpcError as e:
+        _remove_dead_channel(receive_node.value, e)
+        raise
+    return response.stored
+
+
+async def process_multi_data(node_table, data_table: DataTable, starter_node: Data, entries: list,
+                             data_handling_type: int, timeout: float = MULTI_DATA_TIMEOUT,
+                             rounds: int = MULTI_DATA_ROUNDS) -> list:
+    """
+    여러 개의 data 요청을 처리합니다. (service.process_multi_data 와 같음)
+    본인이 담당하는 key 는 바로 처리하고, 나머지는 다음으로 보낼 노드별로 묶어서 동시에 요청합니다.
+    redirect 로 돌아온 key 는 알려준 노드별로 다시 묶어서 rounds 번까지 요청합니다.
+    """
+    results, groups = route_multi_data(node_table, data_table, entries, data_handling_type)
+    type_name = data_type_name(data_handling_type)
+
+    for _ in range(rounds):
+        if not groups:
+            break
+        groups = list(groups.values())
+        metrics.inc('chord_forwarded_requests_total', sum(len(group) for _, group in groups), type=type_name)
+        replies = await asyncio.gather(
+            *[multi_data_request(starter_node, node, group, data_handling_type, timeout) for node, group in groups],
+            return_exceptions=True
+        )
+        redirected = dict()
+        for (node, group), reply in zip(groups, replies):
+            if isinstance(reply, AioRpcError):
+                # 다음 노드가 응답하지 않으면, 해당 key 들은 처리하지 못한 것으로 응답함
+                logging.info(f'multi data request failed for {len(group)} keys')
+                results += [chord_pb2.KeyValue(data_key=entry.data_key, found=False) for entry in group]
+                continue
+            elif isinstance(reply, Exception):
+                raise reply
+            pending = {entry.data_key: entry for entry in group}
+            for result in reply.entries:
+                entry = pending.get(result.data_key)
+                if not result.redirect or entry is None:
+                    results.append(result)
+                elif result.redirect == node_table.cur_node.value:
+                    results.append(handle_local_entry(data_table, entry, data_handling_type))
+                else:
+                    redirected.setdefault(result.redirect, (Data(None, result.redirect), []))[1].append(entry)
+        groups = redirected
+
+    if groups:
+        failed = [entry for _, group in groups.values() for entry in group]
+        logging.info(f'multi data request failed for {len(failed)} keys after {rounds} redirects')
+        results += [chord_pb2.KeyValue(data_key=entry.data_key, found=False) for entry in failed]
+    return results
+
+
+class HealthCheckService(chord_pb2_grpc.HealthCheckerServicer):
+    """
+    def node_health_check 를 받는 서버입니다.
+    """
+    def __init__(self, node_table):
+        self.node_table = node_table
+
+    async def Check(self, request, context):
+        return chord_pb2.HealthReply(pong=0)
+
+
+class GetNodeValueService(chord_pb2_grpc.GetNodeValueServicer):
+    """
+    def request_node_info, find_successor_request, request_successor_list, next_hop_request 를 받는 서버입니다.
+    """
+    def __init__(self, node_table):
+        self.node_table = node_table
+
+    async def GetNodeVal(self, request, context):
+        if request.which_node == n.predecessor:
+            node = self.node_table.predecessor
+        else:
+            try:
+                node = self.node_table.finger_table.entries[request.which_node]
+            except IndexError:
+                return chord_pb2.NodeVal()
+        return chord_pb2.NodeVal(node_key=id_to_bytes(node.key), node_address=node.value)
+
+    async def FindSuccessor(self, request, context):
+        node = await self.node_table.find_successor(id_from_bytes(request.key))
+        if node is False:
+            return chord_pb2.NodeVal()
+        return chord_pb2.NodeVal(node_key=id_to_bytes(node.key), node_address=node.value)
+
+    async def GetSuccessorList(self, request, context):
+        return chord_pb2.NodeList(nodes=[
+            chord_pb2.NodeVal(node_key=id_to_bytes(node.key), node_address=node.value)
+            for node in self.node_table.successors
+        ])
+
+    async def NextHop(self, request, context):
+        key = id_from_bytes(request.key)
+        if self.node_table.is_responsible(key):
+            node, responsible = self.node_table.cur_node, True
+        else:
+            node, responsible = self.node_table.find_nearest_alive_node(key), False
+        return chord_pb2.NextHopReply(responsible=responsible, node_key=id_to_bytes(node.key),
+                                      node_address=node.value)
+
+
+class NotifyNodeService(chord_pb2_grpc.NotifyNodeServicer):
+    """
+    def notify_node_info 를 받는 서버입니다.
+    """
+    def __init__(self, node_table):
+        self.node_table = node_table
+
+    async def NotifyNodeChanged(self, request, context):
+        node = Data(id_from_bytes(request.node_key), request.node_address)
+        if request.which_node == n.predecessor:
+            self.node_table.set_predecessor(node)
+        elif request.which_node == n.predecessor_candidate:
+            self.node_table.notify(node)
+        elif request.which_node == n.successor:
+            self.node_table.set_successor(node)
+        else:
+            self.node_table.set_finger(request.which_node, node)
+        return chord_pb2.HealthReply(pong=0)
+
+
+class HandleDataService(chord_pb2_grpc.HandleDataServicer):
+    """
+    def data_request 를 받는 서버입니다.
+    service.HandleDataService 와 같지만, 다음 노드에게 요청을 넘길 때 thread 대신 task 를 만듭니다.
+    """
+    def __init__(self, node_table, data_table: DataTable, pending_requests):
+        self.node_table = node_table
+        self.data_table = data_table
+        self.pending_requests = pending_requests
+
+    async def GD(self, request, context):
+        job_type = request.data_handling_type
+        starter_node = Data(id_from_bytes(request.node_key), request.node_address)
+        # value 는 본인이 사용할 때만 꺼냄, 다음 노드에게 전달만 하는 요청은 value 를 복사하지 않음
+        data = Data(id_from_bytes(request.data_key), None)
+
+        if job_type == d.get_result:
+            data.value = request.data_value
+            metrics.inc('chord_data_requests_total', type='get_result', handling='local')
+            tracer.record(self.node_table.cur_node.value, request.request_id, 'get', data.key, 'recursive',
+                          request.hops, list(request.path) or None, self.pending_requests.elapsed(request.request_id))
+            # 결과를 기다리고 있는 요청이 있으면, 해당 요청에 값을 넘겨줌 (값이 없으면 None)
+            if self.pending_requests.resolve(request.request_id, data.value if request.found else None):
+                return chord_pb2.HealthReply(pong=0)
+            shown = show_value(data.value) if request.found else "not found"
+            logging.info(f"request key:{short_id(data.key)}'s value is {shown}, stored in {starter_node.value}")
+
+        elif self.node_table.is_responsible(data.key):
+            type_name = data_type_name(job_type)
+            metrics.inc('chord_data_requests_total', type=type_name, handling='local')
+            metrics.observe('chord_request_hops', request.hops, type=type_name)
+            path = next_path(request.path, self.node_table.cur_node.value)
+            if job_type != d.get:
+                tracer.record(self.node_table.cur_node.value, request.request_id, type_name, data.key, 'recursive',
+                              request.hops, path)
+            with metrics.timer('chord_data_latency_seconds', type=type_name):
+                if job_type == d.get:
+                    try:
+                        value = self.data_table.get(data.key).value
+                        found = True
+                    except ValueError:
+                        value = b""
+                        found = False
+                        metrics.inc('chord_data_not_found_total', type=type_name)
+                    spawn(data_request(self.node_table.cur_node, starter_node, Data(data.key, value),
+                                       d.get_result, request.request_id, request.hops, path, found))
+                if job_type == d.set:
+                    data.value = request.data_value
+                    self.data_table.set(data)
+                    logging.info(
+                        f"request key:{short_id(data.key)}'s value is set to {show_value(data.value)}, stored in {self.node_table.cur_node.value}")
+                if job_type == d.delete:
+                    self.data_table.delete(data.key)
+                    logging.info(f"request key:{short_id(data.key)} is deleted from {self.node_table.cur_node.value}")
+        else:
+            metrics.inc('chord_data_requests_total', type=data_type_name(job_type), handling='forwarded')
+            metrics.inc('chord_forwarded_requests_total', type=data_type_name(job_type))
+            nearest_node = self.node_table.find_nearest_alive_node(data.key)
+            # 받은 요청의 hop 수와 path 만 바꿔서 그대로 보냄 (value 는 다시 만들지 않음)
+            request.hops += 1
+            if request.path:
+                request.path.append(self.node_table.cur_node.value)
+            spawn(forward_data_request(nearest_node, request))
+        return chord_pb2.HealthReply(pong=0)
+
+    async def MGD(self, request, context):
+        # 본인이 담당하지 않는 key 는 다음 노드에게 보내지 않고 redirect 로 응답함 (service.HandleDataService.MGD 와 같음)
+        results, groups = route_multi_data(self.node_table, self.data_table, request.entries,
+                                           request.data_handling_type)
+        handled = len(results)
+        for node, group in groups.values():
+            results += [chord_pb2.KeyValue(data_key=entry.data_key, redirect=node.value) for entry in group]
+        if len(results) > handled:
+            metrics.inc('chord_data_requests_total', len(results) - handled,
+                        type=data_type_name(request.data_handling_type), handling='redirected')
+        return chord_pb2.MultiDataReply(entries=results, node_key=id_to_bytes(self.node_table.cur_node.key),
+                                        range_end=id_to_bytes(self.node_table.successor.key))
+
+    async def TransferRange(self, request_iterator, context):
+        received, stored, starter_node = 0, 0, None
+        async for batch in request_iterator:
+            starter_node = Data(id_from_bytes(batch.node_key), batch.node_address)
+            results = await process_multi_data(self.node_table, self.data_table, starter_node, batch.entries, d.set)
+            received += len(batch.entries)
+            stored += sum(1 for result in results if result.found)
+        if starter_node is not None:
+            logging.info(f'received {stored}/{received} keys from {starter_node.value}')
+        return chord_pb2.TransferReply(received=received, stored=stored)
+
+
+class ClientDataService(chord_pb2_grpc.ClientDataServicer):
+    """
+    ChordClient 의 요청을 받는 서버입니다. (service.ClientDataService 와 같음)
+    """
+    def __init__(self, node_table, data_table: DataTable):
+        self.node_table = node_table
+        self.data_table = data_table
+
+    async def Query(self, request, context):
+        key = id_from_bytes(request.data_key)
+        if not self.node_table.is_responsible(key):
+            metrics.inc('chord_data_requests_total', type=data_type_name(request.data_handling_type),
+                        handling='redirected')
+            nearest_node = self.node_table.find_nearest_alive_node(key)
+            return chord_pb2.ClientReply(redirect=True, node_key=id_to_bytes(nearest_node.key),
+                                         node_address=nearest_node.value)
+
+        entry = chord_pb2.KeyValue(data_key=request.data_key, data_value=request.data_value)
+        result = handle_local_entry(self.data_table, entry, request.data_handling_type)
+        return chord_pb2.ClientReply(
+            redirect=False, node_key=id_to_bytes(self.node_table.cur_node.key),
+            node_address=self.node_table.cur_node.value,
+            range_end=id_to_bytes(self.node_table.successor.key),
+            data_value=result.data_value if request.data_handling_type == d.get else b"", found=result.found
+        )
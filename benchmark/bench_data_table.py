@@ -0,0 +1,93 @@
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+from data_structure import TableEntry, DataTable
+from utils import generate_hash, in_range, RING_SIZE
+
+"""
+기존 list 기반의 TableEntry 와, dict + SortedKeyIndex 기반의 DataTable 을 비교하는 benchmark 입니다.
+handoff 는 본인의 범위 (ring 의 3/4) 밖의 key 들을 table 에서 빼내는 시간으로,
+TableEntry 는 모든 key 를 확인해서 하나씩 지우고, DataTable 은 해당 범위의 segment 를 떼어냅니다. (detach)
+
+실행 방법 (repository root 에서)
+    python -m benchmark.bench_data_table --sizes 10000 100000
+"""
+
+
+def run(table_class, keys, lookups):
+    table = table_class()
+    result = dict()
+
+    started = time.perf_counter()
+    for key in keys:
+        table.set(key, "value")
+    result['set'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in lookups:
+        table.get(key)
+    result['get'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    count = sum(1 for _ in table.entries)
+    result['iterate'] = time.perf_counter() - started
+    assert count == len(keys)
+
+    started = time.perf_counter()
+    for key in keys[::2]:
+        table.delete(key)
+    result['delete'] = time.perf_counter() - started
+
+    owned_end = RING_SIZE * 3 // 4
+    started = time.perf_counter()
+    if isinstance(table, DataTable):
+        moved = sum(len(segment) for segment in table.detach(owned_end, 0))
+    else:
+        moved_entries = [entry for entry in table.entries if not in_range(entry.key, 0, owned_end)]
+        for entry in moved_entries:
+            table.delete(entry.key)
+        moved = len(moved_entries)
+    result['handoff'] = time.perf_counter() - started
+    result['moved'] = moved
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 json 으로 출력")
+    args = parser.parse_args()
+
+    # TableEntry 는 값을 변경할 때마다 log 를 남기므로, benchmark 중에는 꺼둠
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+
+    results = []
+    for size in args.sizes:
+        keys = [generate_hash(str(i)) for i in range(size)]
+        rng.shuffle(keys)
+        lookups = [rng.choice(keys) for _ in range(args.lookups)]
+        for table_class in (TableEntry, DataTable):
+            result = run(table_class, keys, lookups)
+            result.update(table=table_class.__name__, size=size)
+            results.append(result)
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f'{"table":<12}{"size":>10}{"set":>10}{"get":>10}{"iterate":>10}{"delete":>10}{"handoff":>10}  (seconds)')
+    for r in results:
+        print(f'{r["table"]:<12}{r["size"]:>10}{r["set"]:>10.3f}{r["get"]:>10.3f}{r["iterate"]:>10.3f}'
+              f'{r["delete"]:>10.3f}{r["handoff"]:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+from chord_node import ChordNode, RECURSIVE, ITERATIVE
+from data_structure import Data
+from tracing import tracer
+from utils import DataHandlingType as d
+from utils import generate_hash
+
+"""
+recursive 방식 (요청을 받은 노드가 다음 노드에게 넘김) 과 iterative 방식 (요청한 노드가 NextHop 으로 직접 찾아감) 의
+get latency 와 실패 횟수를 비교하는 benchmark 입니다.
+한 process 안에 노드 여러 개를 띄워서 ring 을 만든 뒤 측정합니다.
+
+실행 방법 (repository root 에서)
+    python -m benchmark.bench_lookup --nodes 8 --keys 200
+    python -m benchmark.bench_lookup --nodes 8 --kill 2   # 일부 노드를 종료시킨 뒤 측정
+    python -m benchmark.bench_lookup --nodes 8 --trace-file traces.jsonl && python -m benchmark.trace_report traces.jsonl --nodes 8
+"""
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def build_ring(ports, host, hop_timeout, hop_retries):
+    nodes = [ChordNode(f'{host}:{port}', hop_timeout=hop_timeout, hop_retries=hop_retries, interactive=False)
+             for port in ports]
+    for node in nodes[1:]:
+        node.node_table.join(Data(None, nodes[0].address))
+
+    # background 갱신을 기다리지 않고, successor 가 더 이상 바뀌지 않을 때까지 stabilize 를 반복한 뒤 finger table 을 채움
+    for _ in range(len(nodes) * 2):
+        successors = [node.node_table.successor.value for node in nodes]
+        for node in nodes:
+            node.node_table.stabilize()
+        if successors == [node.node_table.successor.value for node in nodes]:
+            break
+    for node in nodes:
+        node.node_table.fix_fingers(len(node.node_table.finger_table.entries))
+    return nodes
+
+
+def run(mode, nodes, keys, values, timeout, rng):
+    result = dict(mode=mode, ops=len(keys), ok=0, not_found=0, errors=0)
+    latencies, hops = [], []
+    for key in keys:
+        node = rng.choice(nodes)
+        node.lookup_mode = mode
+        started = time.perf_counter()
+        try:
+            if mode == ITERATIVE:
+                found, value, path = node.iterative_request(key, b"", d.get)
+                value = value if found else None
+                hops.append(len(path) - 1)
+            else:
+                value = node.get(key, timeout=timeout)
+        except (TimeoutError, LookupError):
+            result['errors'] += 1
+            continue
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        if value is None:
+            result['not_found'] += 1
+        elif value == values[key]:
+            result['ok'] += 1
+        else:
+            result['errors'] += 1
+
+    result.update(
+        avg_ms=sum(latencies) / len(latencies), p50_ms=percentile(latencies, 0.5), p99_ms=percentile(latencies, 0.99),
+        avg_hops=sum(hops) / len(hops) if hops else None,
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=200)
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--base-port", type=int, default=52000)
+    parser.add_argument("--kill", type=int, default=0, help="측정 전에 종료시킬 노드 수 (ring 에서 나가지 않고 바로 종료)")
+    parser.add_argument("--timeout", type=float, default=3.0, help="recursive 방식의 get timeout (초)")
+    parser.add_argument("--hop-timeout", type=float, default=0.5, help="iterative 방식의 노드당 timeout (초)")
+    parser.add_argument("--hop-retries", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 json 으로 출력")
+    parser.add_argument("--trace-file", type=str, default=None,
+                        help="요청별 hop 수와 latency 를 기록할 file (benchmark.trace_report 로 분석)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if args.trace_file is not None:
+        tracer.open(args.trace_file)
+    rng = random.Random(args.seed)
+
+    ports = range(args.base_port, args.base_port + args.nodes)
+    nodes = build_ring(ports, args.host, args.hop_timeout, args.hop_retries)
+    try:
+        keys = [generate_hash(f'key-{i}') for i in range(args.keys)]
+        values = {key: f'value-{i}'.encode() for i, key in enumerate(keys)}
+        for key in keys:
+            nodes[0].iterative_request(key, values[key], d.set)
+
+        # 노드를 종료시키면, 그 노드가 가지고 있던 key 는 not_found 가 됨 (replication 이 없으므로)
+        alive = list(nodes)
+        for node in rng.sample(nodes[1:], min(args.kill, len(nodes) - 1)):
+            node.stop()
+            alive.remove(node)
+
+        results = [run(mode, alive, keys, values, args.timeout, rng) for mode in (RECURSIVE, ITERATIVE)]
+    finally:
+        for node in nodes:
+            node.stop()
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f'{"mode":<10}{"ops":>6}{"ok":>6}{"miss":>6}{"error":>6}{"avg":>9}{"p50":>9}{"p99":>9}{"hops":>6}  (ms)')
+    for r in results:
+        hops = f'{r["avg_hops"]:.2f}' if r['avg_hops'] is not None else '-'
+        print(f'{r["mode"]:<10}{r["ops"]:>6}{r["ok"]:>6}{r["not_found"]:>6}{r["errors"]:>6}'
+              f'{r["avg_ms"]:>9.2f}{r["p50_ms"]:>9.2f}{r["p99_ms"]:>9.2f}{hops:>6}')
+
+
+if __name__ == '__main__':
+    main()
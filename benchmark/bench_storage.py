@@ -0,0 +1,87 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from data_structure import DataTable
+from storage import Storage, FSYNC_MODES
+from utils import generate_hash
+
+"""
+storage.Storage 의 fsync 방식별 set 처리량과, 재시작 시 snapshot + WAL 로 복구하는 시간을 측정하는 benchmark 입니다.
+
+실행 방법 (repository root 에서)
+    python -m benchmark.bench_storage --keys 100000
+"""
+
+
+def run(fsync, keys, snapshot_records, path):
+    result = dict(fsync=fsync, keys=len(keys))
+    storage = Storage(path, fsync=fsync, snapshot_records=snapshot_records)
+    table = DataTable()
+    storage.recover(table)
+    storage.start()
+
+    started = time.perf_counter()
+    for i, key in enumerate(keys):
+        table.set(key, f'value-{i}')
+    # 절반은 덮어쓰고 일부는 삭제해서, 복구 시에 WAL 을 순서대로 적용해야 결과가 맞도록 함
+    for key in keys[::2]:
+        table.set(key, 'updated')
+    for key in keys[::10]:
+        table.delete(key)
+    storage.sync()
+    result['write_seconds'] = time.perf_counter() - started
+    result['writes_per_second'] = (len(keys) + len(keys[::2]) + len(keys[::10])) / result['write_seconds']
+    result['snapshots'] = storage.stats()['snapshots']
+    expected = {data.key: data.value for data in table.entries}
+    storage.close()
+
+    # 새로 시작한 것처럼 빈 table 에 복구함
+    recovered = DataTable()
+    restarted = Storage(path, fsync=fsync, snapshot_records=snapshot_records)
+    restarted.recover(recovered)
+    result['recovery_seconds'] = restarted.recovery_seconds
+    result['recovered_records'] = restarted.recovered_records
+    result['consistent'] = expected == {data.key: data.value for data in recovered.entries}
+    restarted.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=100000)
+    parser.add_argument("--snapshot-records", type=int, default=100000)
+    parser.add_argument("--fsync", type=str, nargs="+", choices=FSYNC_MODES, default=['batch', 'none'],
+                        help="always 는 record 마다 fsync 하므로 --keys 를 작게 주는 것을 권장")
+    parser.add_argument("--json", action="store_true", help="결과를 json 으로 출력")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    keys = [generate_hash(str(i)) for i in range(args.keys)]
+
+    results = []
+    for fsync in args.fsync:
+        path = tempfile.mkdtemp(prefix='chord-storage-')
+        try:
+            results.append(run(fsync, keys, args.snapshot_records, os.path.join(path, 'data')))
+        finally:
+            shutil.rmtree(path)
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f'{"fsync":<8}{"keys":>9}{"writes/s":>11}{"snapshots":>11}{"recovery":>10}{"records":>9}  consistent')
+    for r in results:
+        print(f'{r["fsync"]:<8}{r["keys"]:>9}{r["writes_per_second"]:>11.0f}{r["snapshots"]:>11}'
+              f'{r["recovery_seconds"]:>9.2f}s{r["recovered_records"]:>9}  {r["consistent"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+import argparse
+import json
+import logging
+import os
+import random
+import shlex
+import sys
+import tempfile
+import threading
+import time
+
+from benchmark.cluster_bench import Cluster, percentile, preload, routed_request
+from utils import DataHandlingType as d
+from utils import generate_hash
+
+"""
+노드들이 join 하거나 나가는 (churn) 동안에도 client 가 계속 요청을 보낼 때, 요청 성공률과 latency,
+ring 이 다시 안정될 때까지 걸리는 시간 (time-to-stabilize), 잃어버린 data 의 수를 측정하는 benchmark 입니다.
+모든 노드는 localhost 의 process 로 띄웁니다. (benchmark.cluster_bench 의 Cluster 사용)
+
+1. 노드 --nodes 개로 ring 을 만들고, key 들을 저장해둠
+2. --duration 초 동안 client thread 들이 get, set 을 보내고, 동시에 초당 --churn-rate 번 노드를 추가하거나 종료함
+    - 나가는 노드는 --kill-ratio 의 확률로 SIGKILL (crash), 나머지는 SIGTERM 을 받아 disjoin 처럼 data 를 넘기고 나감
+    - 노드 수는 --min-nodes 와 --max-nodes 사이로 유지함
+3. churn 이 끝나고 ring 이 안정되면, 모든 key 를 다시 읽어서 마지막으로 성공한 set 의 값과 비교함 (data loss)
+
+client 들은 key 를 나눠서 가지므로, 한 key 의 올바른 값은 그 key 를 가진 client 가 마지막으로 성공한 set 의 값입니다.
+set 이 실패했으면 그 값이 저장되었는지 알 수 없으므로, 이전 값과 실패한 값 모두 올바른 값으로 봅니다.
+
+실행 방법 (repository root 에서)
+    python -m benchmark.churn_bench --nodes 6 --duration 30 --churn-rate 0.5
+    python -m benchmark.churn_bench --nodes 6 --kill-ratio 1.0 --node-args "--replicas 2 --write-quorum 2"
+"""
+
+PRELOAD_VALUE = b'preload'
+
+
+class ChurnDriver(threading.Thread):
+    """
+    interval 초마다 노드를 추가하거나 종료하고, 각 event 뒤에 ring 이 다시 안정될 때까지 걸린 시간을 기록합니다.
+    """
+
+    def __init__(self, cluster: Cluster, next_port: int, interval: float, kill_ratio: float, min_nodes: int,
+                 max_nodes: int, rng: random.Random, started: float):
+        super().__init__(daemon=True)
+        self.cluster = cluster
+        self.next_port = next_port
+        self.interval = interval
+        self.kill_ratio = kill_ratio
+        self.min_nodes = min_nodes
+        self.max_nodes = max_nodes
+        self.rng = rng
+        self.started = started
+        self.stop_event = threading.Event()
+        self.events = []  # {'time', 'event', 'node', 'nodes', 'stabilize_s'}
+
+    def next_event(self, count: int) -> str:
+        if count <= self.min_nodes:
+            return 'join'
+        if count >= self.max_nodes or self.rng.random() < 0.5:
+            return 'kill' if self.rng.random() < self.kill_ratio else 'leave'
+        return 'join'
+
+    def run(self):
+        # event 처리에 걸린 시간과 상관없이 interval 초 간격으로 event 를 일으킴
+        next_at = time.monotonic() + self.interval
+        while not self.stop_event.wait(max(0.0, next_at - time.monotonic())):
+            next_at += self.interval
+            alive = self.cluster.addresses
+            event = self.next_event(len(alive))
+            at = time.monotonic()
+            try:
+                if event == 'join':
+                    port, self.next_port = self.next_port, self.next_port + 1
+                    address = self.cluster.start_node(port, self.rng.choice(alive))
+                else:
+                    address = self.rng.choice(alive)
+                    self.cluster.stop_node(address, kill=event == 'kill')
+            except RuntimeError as e:
+                logging.warning(f'churn event {event} failed: {e}')
+                continue
+            record = {'time': round(at - self.started, 3), 'event': event, 'node': address,
+                      'nodes': len(self.cluster.addresses), 'stabilize_s': None}
+            self.events.append(record)
+            record['stabilize_s'] = self.wait_stable(at, next_at)
+
+    def wait_stable(self, since: float, until: float):
+        # 다음 event 전에 ring 이 안정되면 event 부터 걸린 시간을, 아니면 None 을 return 함
+        while not self.stop_event.is_set() and time.monotonic() < until:
+            if self.cluster.is_stable():
+                return round(time.monotonic() - since, 3)
+            time.sleep(0.1)
+        return None
+
+
+class ChurnClient(threading.Thread):
+    """
+    본인이 맡은 key 들에 get, set 을 계속 보내고, 요청마다 (시각, type, 성공 여부, latency, 읽은 값이 올바른지) 를 기록합니다.
+    """
+
+    def __init__(self, cluster: Cluster, expected: dict, write_ratio: float, seed: int, timeout: float,
+                 started: float):
+        super().__init__(daemon=True)
+        self.cluster = cluster
+        self.expected = expected  # hashing 된 key -> 올바른 값들의 set
+        self.key_ids = list(expected)
+        self.write_ratio = write_ratio
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.started = started
+        self.stop_event = threading.Event()
+        self.results = []
+
+    def run(self):
+        i = 0
+        while not self.stop_event.is_set():
+            key = self.rng.choice(self.key_ids)
+            write = self.rng.random() < self.write_ratio
+            value = f'{key:x}-{i}'.encode() if write else b""
+            started = time.monotonic()
+            reply, _ = routed_request(self.rng, self.cluster.addresses, key, value, d.set if write else d.get,
+                                      self.timeout)
+            elapsed = time.monotonic() - started
+
+            correct = None
+            if write:
+                # 실패한 set 은 저장되었을 수도 있으므로, 이전 값과 함께 올바른 값으로 봄
+                self.expected[key] = {value} if reply is not None else self.expected[key] | {value}
+            elif reply is not None:
+                correct = reply.found and reply.data_value in self.expected[key]
+            self.results.append((started - self.started, 'set' if write else 'get', reply is not None, elapsed,
+                                 correct))
+            i += 1
+
+
+def verify(cluster: Cluster, expected: dict, timeout: float, seed: int) -> dict:
+    """
+    모든 key 를 읽어서 올바른 값을 가지고 있는지 확인합니다.
+    :return: {'keys', 'missing': 없어진 key 수, 'stale': 다른 값을 가진 key 수, 'errors': 읽지 못한 key 수}
+    """
+    rng = random.Random(seed)
+    missing = stale = errors = 0
+    for key, values in expected.items():
+        reply, _ = routed_request(rng, cluster.addresses, key, b"", d.get, timeout)
+        if reply is None:
+            errors += 1
+        elif not reply.found:
+            missing += 1
+        elif reply.data_value not in values:
+            stale += 1
+    lost = missing + stale + errors
+    return {'keys': len(expected), 'missing': missing, 'stale': stale, 'errors': errors,
+            'loss_ratio': round(lost / len(expected), 4) if expected else 0.0}
+
+
+def summarize_requests(results: list) -> dict:
+    done = [r for r in results if r[2]]
+    reads = [r for r in done if r[1] == 'get']
+    latencies = [r[3] * 1000 for r in done]
+    return {
+        'ops': len(results),
+        'success_rate': round(len(done) / len(results), 4) if results else 0.0,
+        'read_correct_rate': round(sum(1 for r in reads if r[4]) / len(reads), 4) if reads else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.5), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(max(latencies), 3) if latencies else 0.0,
+        },
+    }
+
+
+def timeline(results: list, duration: float) -> list:
+    # 1초 단위로 요청 수와 성공률
+    buckets = [[] for _ in range(int(duration) + 1)]
+    for r in results:
+        buckets[min(int(r[0]), len(buckets) - 1)].append(r)
+    return [{'second': second, 'ops': len(bucket),
+             'success_rate': round(sum(1 for r in bucket if r[2]) / len(bucket), 4) if bucket else None}
+            for second, bucket in enumerate(buckets)]
+
+
+def summarize_events(events: list) -> dict:
+    stabilized = [e['stabilize_s'] for e in events if e['stabilize_s'] is not None]
+    return {
+        'joins': sum(1 for e in events if e['event'] == 'join'),
+        'leaves': sum(1 for e in events if e['event'] == 'leave'),
+        'kills': sum(1 for e in events if e['event'] == 'kill'),
+        'stabilized': len(stabilized),
+        'not_stabilized': len(events) - len(stabilized),
+        'stabilize_s': {
+            'avg': round(sum(stabilized) / len(stabilized), 3) if stabilized else None,
+            'p50': percentile(stabilized, 0.5) if stabilized else None,
+            'max': max(stabilized) if stabilized else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=6, help="처음 ring 의 노드 수")
+    parser.add_argument("--min-nodes", type=int, default=None, help="최소 노드 수, 기본값은 --nodes - 2 (최소 2)")
+    parser.add_argument("--max-nodes", type=int, default=None, help="최대 노드 수, 기본값은 --nodes + 2")
+    parser.add_argument("--duration", type=float, default=30.0, help="churn 과 요청을 계속하는 시간 (초)")
+    parser.add_argument("--churn-rate", type=float, default=0.5, help="초당 노드 추가 / 종료 횟수")
+    parser.add_argument("--kill-ratio", type=float, default=0.5,
+                        help="나가는 노드 중 SIGKILL 로 종료되는 비율, 나머지는 data 를 넘기고 나감")
+    parser.add_argument("--clients", type=int, default=4, help="요청을 보내는 client thread 수")
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="요청 중 set 의 비율 (나머지는 get)")
+    parser.add_argument("--timeout", type=float, default=2.0, help="요청 하나의 timeout (초)")
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--base-port", type=int, default=54000)
+    parser.add_argument("--fingers-per-cycle", type=int, default=32)
+    parser.add_argument("--node-args", type=str, default="", help="노드 process 에 그대로 넘길 인자 (ex. \"--replicas 2\")")
+    parser.add_argument("--log-dir", type=str, default=None, help="노드 log 를 저장할 directory, 없으면 임시 directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 을 저장할 file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    min_nodes = args.min_nodes if args.min_nodes is not None else max(2, args.nodes - 2)
+    max_nodes = args.max_nodes if args.max_nodes is not None else args.nodes + 2
+    log_dir = args.log_dir or tempfile.mkdtemp(prefix='chord-churn-')
+    os.makedirs(log_dir, exist_ok=True)
+    rng = random.Random(args.seed)
+
+    # SIGTERM 을 받은 노드는 disjoin 처럼 data 를 넘기고 나감
+    cluster = Cluster(args.host, range(args.base_port, args.base_port + args.nodes), log_dir,
+                      shlex.split(args.node_args) + ['--leave-on-exit'], args.fingers_per_cycle)
+    key_ids = [generate_hash(f'key-{i}') for i in range(args.keys)]
+    try:
+        cluster.start()
+        cluster.wait_stable()
+        time.sleep(160 / args.fingers_per_cycle + 1)
+        preload(cluster.addresses, key_ids, args.timeout)
+
+        # client 마다 key 를 나눠서 가짐
+        expected = [{key: {PRELOAD_VALUE} for key in key_ids[i::args.clients]} for i in range(args.clients)]
+        started = time.monotonic()
+        driver = ChurnDriver(cluster, args.base_port + args.nodes, 1 / args.churn_rate, args.kill_ratio, min_nodes,
+                             max_nodes, rng, started)
+        clients = [ChurnClient(cluster, keys, args.write_ratio, args.seed * 1000 + i, args.timeout, started)
+                   for i, keys in enumerate(expected)]
+        for thread in [driver, *clients]:
+            thread.start()
+        time.sleep(args.duration)
+        for thread in [driver, *clients]:
+            thread.stop_event.set()
+        for thread in [driver, *clients]:
+            thread.join()
+        duration = time.monotonic() - started
+
+        # churn 이 끝난 뒤 ring 이 안정될 때까지 걸린 시간과, 잃어버린 data
+        try:
+            final_stabilize, unstable = round(cluster.wait_stable(), 3), []
+        except RuntimeError as e:
+            # ex. join 한 직후 successor 가 모두 죽어서 혼자 ring 을 이루게 된 노드
+            logging.warning(e)
+            final_stabilize, unstable = None, cluster.unstable_nodes()
+        data = verify(cluster, {key: values for keys in expected for key, values in keys.items()}, args.timeout,
+                      args.seed)
+    finally:
+        cluster.stop()
+
+    results = sorted((r for client in clients for r in client.results), key=lambda r: r[0])
+    result = {
+        'config': {
+            'nodes': args.nodes, 'min_nodes': min_nodes, 'max_nodes': max_nodes, 'duration': args.duration,
+            'churn_rate': args.churn_rate, 'kill_ratio': args.kill_ratio, 'clients': args.clients,
+            'keys': args.keys, 'write_ratio': args.write_ratio, 'node_args': args.node_args,
+        },
+        'requests': summarize_requests(results),
+        'churn': summarize_events(driver.events),
+        'final_stabilize_s': final_stabilize,
+        'unstable_nodes': unstable,
+        'data': data,
+        'events': driver.events,
+        'timeline': timeline(results, duration),
+        'log_dir': log_dir,
+    }
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+import argparse
+import bisect
+import json
+import logging
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from data_structure import Data
+from service import node_health_check, request_node_info, query_request
+from utils import DataHandlingType as d
+from utils import NodeType as n
+from utils import generate_hash, vnode_address, split_vnode
+
+"""
+localhost 의 port 들에 노드 N 개를 각각 별도의 process (main.py --no-interactive) 로 띄워서 ring 을 만든 뒤,
+get / set / delete 요청을 섞어서 보내고 처리량 (ops/sec), latency (p50, p99), hop 수를 JSON 으로 출력하는 benchmark 입니다.
+release 간의 성능을 비교할 때 같은 설정으로 실행한 결과를 비교합니다.
+
+요청은 client 처럼 임의의 노드에게 ClientData.Query 로 보내고, 담당 노드가 아니면 알려준 노드로 다시 보냅니다. (redirect)
+redirect 되는 노드는 각 노드의 finger table 로 고르므로, hop 수 (redirect 횟수) 로 routing 효율을 볼 수 있습니다.
+
+실행 방법 (repository root 에서)
+    python -m benchmark.cluster_bench --nodes 8 --ops 20000 --mix get=80,set=15,delete=5
+    python -m benchmark.cluster_bench --nodes 8 --distribution zipf --zipf-s 1.1 --output result.json
+    python -m benchmark.cluster_bench --nodes 4 --node-args "--mode aio"
+"""
+
+TYPES = {'get': d.get, 'set': d.set, 'delete': d.delete}
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def parse_mix(text: str) -> dict:
+    """
+    "get=80,set=15,delete=5" 형식의 요청 비율을 {type 이름: 비율} 로 바꿉니다.
+    """
+    mix = dict()
+    for item in text.split(','):
+        name, weight = item.split('=')
+        if name not in TYPES:
+            raise ValueError(f'unknown request type: {name}')
+        mix[name] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise ValueError('request mix must have a positive weight')
+    return mix
+
+
+class KeyChooser:
+    """
+    key 의 index 를 uniform 분포, 혹은 Zipf 분포 (index 가 작을수록 자주 나옴) 로 고릅니다.
+    """
+
+    def __init__(self, keys: int, distribution: str = 'uniform', zipf_s: float = 0.99):
+        self.keys = keys
+        self.cdf = None
+        if distribution == 'zipf':
+            # rank r 의 가중치는 1 / r^s, 누적 분포를 만들어두고 bisect 로 고름
+            total, self.cdf = 0.0, []
+            for rank in range(1, keys + 1):
+                total += 1.0 / rank ** zipf_s
+                self.cdf.append(total)
+            self.cdf = [value / total for value in self.cdf]
+
+    def choose(self, rng: random.Random) -> int:
+        if self.cdf is None:
+            return rng.randrange(self.keys)
+        return min(bisect.bisect_left(self.cdf, rng.random()), self.keys - 1)
+
+
+class Cluster:
+    """
+    노드 process 들을 띄우고 종료합니다. 노드의 log 는 log_dir 의 node-<port>.log 에 저장됩니다.
+    """
+
+    def __init__(self, host: str, ports, log_dir: str, node_args: list = None, fingers_per_cycle: int = 32):
+        self.host = host
+        self.initial_ports = list(ports)
+        self.log_dir = log_dir
+        self.node_args = node_args or []
+        self.fingers_per_cycle = fingers_per_cycle
+        # node_args 에 --vnodes 가 있으면, 노드마다 가상 노드들이 ring 에 참여함
+        parser = argparse.ArgumentParser(add_help=False)
+        parser.add_argument("--vnodes", type=int, default=1)
+        self.vnodes = parser.parse_known_args(self.node_args)[0].vnodes
+        self.processes = dict()  # address -> Popen, 살아있는 노드들
+        self.lock = threading.Lock()
+
+    @property
+    def addresses(self) -> list:
+        with self.lock:
+            return list(self.processes)
+
+    def start(self, timeout: float = 30.0):
+        # 첫 번째 노드가 ring 을 시작하고, 나머지 노드는 첫 번째 노드를 통해 join 함
+        first = None
+        for port in self.initial_ports:
+            address = self.start_node(port, first, timeout)
+            first = first or address
+
+    def start_node(self, port: int, bootstrap: str = None, timeout: float = 30.0) -> str:
+        """
+        노드 process 하나를 띄우고, 요청을 받을 수 있을 때까지 기다립니다.
+        :param bootstrap: join 할 노드의 address, None 이면 혼자 ring 을 시작함
+        :return: 띄운 노드의 address
+        """
+        address = f'{self.host}:{port}'
+        command = [sys.executable, os.path.join(ROOT, 'main.py'), '--host', self.host, '--port', str(port),
+                   '--no-interactive', '--fingers-per-cycle', str(self.fingers_per_cycle), *self.node_args]
+        if bootstrap is not None:
+            command += ['--join', bootstrap]
+        with open(os.path.join(self.log_dir, f'node-{port}.log'), 'a') as log:
+            process = subprocess.Popen(command, cwd=ROOT, stdin=subprocess.DEVNULL, stdout=log,
+                                       stderr=subprocess.STDOUT)
+
+        # 요청을 받을 수 있게 된 뒤에 노드 목록에 추가함
+        deadline = time.monotonic() + timeout
+        while not node_health_check(Data(None, address)):
+            if time.monotonic() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError(f'node {address} did not start in {timeout}s (see {self.log_dir})')
+            time.sleep(0.1)
+        with self.lock:
+            self.processes[address] = process
+        return address
+
+    def stop_node(self, address: str, kill: bool = False):
+        """
+        노드 process 하나를 종료합니다.
+        :param kill: True 면 SIGKILL 로 바로 종료 (crash), False 면 SIGTERM 으로 종료를 요청함
+        """
+        with self.lock:
+            process = self.processes.pop(address)
+        if kill:
+            process.kill()
+        else:
+            process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def unstable_nodes(self) -> list:
+        # successor 나 predecessor 가 key 순서대로 연결되어 있지 않은 노드들 (가상 노드 중 하나라도 어긋나면 포함)
+        ring = sorted((vnode_address(address, i) for address in self.addresses for i in range(self.vnodes)),
+                      key=generate_hash)
+        unstable = []
+        for i, address in enumerate(ring):
+            node = Data(None, address)
+            successor = request_node_info(node, n.successor)
+            predecessor = request_node_info(node, n.predecessor)
+            if not successor or successor.value != ring[(i + 1) % len(ring)] or \
+                    not predecessor or predecessor.value != ring[i - 1]:
+                physical = split_vnode(address)[0]
+                if physical not in unstable:
+                    unstable.append(physical)
+        return unstable
+
+    def is_stable(self) -> bool:
+        return not self.unstable_nodes()
+
+    def wait_stable(self, timeout: float = 60.0):
+        """
+        모든 노드의 successor 와 predecessor 가 key 순서대로 연결될 때까지 기다립니다.
+        :return: 기다린 시간 (초)
+        """
+        started = time.monotonic()
+        while not self.is_stable():
+            if time.monotonic() - started > timeout:
+                raise RuntimeError(f'ring did not stabilize in {timeout}s (see {self.log_dir})')
+            time.sleep(0.2)
+        return time.monotonic() - started
+
+    def stop(self):
+        with self.lock:
+            processes = list(self.processes.values())
+            self.processes = dict()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def routed_request(rng: random.Random, addresses: list, key: int, value: bytes, data_handling_type: int,
+                   timeout: float, max_redirects: int = 32):
+    """
+    임의의 노드부터 시작해서, 담당 노드가 처리할 때까지 redirect 를 따라갑니다.
+    :return: (담당 노드의 응답 chord_pb2.ClientReply, hop 수), 실패하면 응답은 None, hop 수는 redirect 된 횟수
+    """
+    node = Data(None, rng.choice(addresses))
+    for hops in range(max_redirects + 1):
+        reply = query_request(node, key, value, data_handling_type, timeout=timeout)
+        if not reply:
+            return None, hops
+        if not reply.redirect:
+            return reply, hops
+        node = Data(None, reply.node_address)
+    return None, max_redirects
+
+
+class Worker(threading.Thread):
+    """
+    ops 개의 요청을 하나씩 보내고 (closed loop), 요청마다 (type 이름, 성공 여부, key 존재 여부, latency, hop 수) 를 기록합니다.
+    """
+
+    def __init__(self, addresses: list, key_ids: list, chooser: KeyChooser, mix: dict, ops: int, seed: int,
+                 timeout: float):
+        super().__init__(daemon=True)
+        self.addresses = addresses
+        self.key_ids = key_ids
+        self.chooser = chooser
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.ops = ops
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.results = []
+
+    def run(self):
+        for i in range(self.ops):
+            name = self.rng.choices(self.names, self.weights)[0]
+            key = self.key_ids[self.chooser.choose(self.rng)]
+            started = time.monotonic()
+            reply, hops = routed_request(self.rng, self.addresses, key, f'value-{i}'.encode() if name == 'set' else b"",
+                                         TYPES[name], self.timeout)
+            self.results.append((name, reply is not None, reply is not None and reply.found,
+                                 time.monotonic() - started, hops))
+
+
+def preload(addresses: list, key_ids: list, timeout: float, workers: int = 8):
+    # 측정 전에 모든 key 를 한 번씩 set 해둠 (get, delete 가 빈 table 을 읽지 않도록)
+    chunks = [key_ids[i::workers] for i in range(workers)]
+
+    def load(chunk, seed):
+        rng = random.Random(seed)
+        for key in chunk:
+            routed_request(rng, addresses, key, b'preload', d.set, timeout)
+
+    threads = [threading.Thread(target=load, args=(chunk, i), daemon=True) for i, chunk in enumerate(chunks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def summarize(results: list, duration: float) -> dict:
+    def stats(group):
+        ok = [r for r in group if r[1]]
+        latencies = [r[3] * 1000 for r in ok]
+        hops = [r[4] for r in ok]
+        return {
+            'ops': len(group),
+            'errors': len(group) - len(ok),
+            'not_found': sum(1 for r in ok if not r[2]),
+            'ops_per_sec': round(len(ok) / duration, 1) if duration > 0 else 0.0,
+            'latency_ms': {
+                'avg': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                'p50': round(percentile(latencies, 0.5), 3),
+                'p99': round(percentile(latencies, 0.99), 3),
+                'max': round(max(latencies), 3) if latencies else 0.0,
+            },
+            'hops': {
+                'avg': round(sum(hops) / len(hops), 3) if hops else 0.0,
+                'p50': percentile(hops, 0.5),
+                'p99': percentile(hops, 0.99),
+                'max': max(hops) if hops else 0,
+                'histogram': {str(h): c for h, c in sorted(Counter(hops).items())},
+            },
+        }
+
+    summary = stats(results)
+    summary['duration_s'] = round(duration, 3)
+    summary['by_type'] = {name: stats([r for r in results if r[0] == name])
+                          for name in TYPES if any(r[0] == name for r in results)}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--base-port", type=int, default=53000)
+    parser.add_argument("--ops", type=int, default=10000, help="전체 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시에 요청을 보내는 client thread 수")
+    parser.add_argument("--keys", type=int, default=1000, help="사용하는 key 의 수")
+    parser.add_argument("--mix", type=str, default="get=80,set=15,delete=5", help="요청 종류별 비율")
+    parser.add_argument("--distribution", type=str, choices=("uniform", "zipf"), default="uniform",
+                        help="key 를 고르는 분포")
+    parser.add_argument("--zipf-s", type=float, default=0.99, help="Zipf 분포의 지수 (클수록 일부 key 에 몰림)")
+    parser.add_argument("--no-preload", action="store_true", help="측정 전에 key 를 미리 저장하지 않음")
+    parser.add_argument("--timeout", type=float, default=3.0, help="요청 하나의 timeout (초)")
+    parser.add_argument("--fingers-per-cycle", type=int, default=32,
+                        help="노드가 한 주기에 갱신하는 finger 수, 클수록 finger table 이 빨리 채워짐")
+    parser.add_argument("--settle", type=float, default=None,
+                        help="ring 이 안정된 뒤 finger table 이 채워지기를 기다리는 시간 (초), 기본값은 finger table 한 바퀴")
+    parser.add_argument("--node-args", type=str, default="", help="노드 process 에 그대로 넘길 인자 (ex. \"--mode aio\")")
+    parser.add_argument("--log-dir", type=str, default=None, help="노드 log 를 저장할 directory, 없으면 임시 directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 을 저장할 file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    mix = parse_mix(args.mix)
+    log_dir = args.log_dir or tempfile.mkdtemp(prefix='chord-bench-')
+    os.makedirs(log_dir, exist_ok=True)
+    key_ids = [generate_hash(f'key-{i}') for i in range(args.keys)]
+    chooser = KeyChooser(args.keys, args.distribution, args.zipf_s)
+
+    cluster = Cluster(args.host, range(args.base_port, args.base_port + args.nodes), log_dir,
+                      shlex.split(args.node_args), args.fingers_per_cycle)
+    try:
+        cluster.start()
+        stabilize_seconds = cluster.wait_stable()
+        settle = args.settle if args.settle is not None else 160 / args.fingers_per_cycle + 1
+        time.sleep(settle)
+        if not args.no_preload:
+            preload(cluster.addresses, key_ids, args.timeout)
+
+        ops = [args.ops // args.concurrency + (1 if i < args.ops % args.concurrency else 0)
+               for i in range(args.concurrency)]
+        workers = [Worker(cluster.addresses, key_ids, chooser, mix, count, args.seed * 1000 + i, args.timeout)
+                   for i, count in enumerate(ops)]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        duration = time.monotonic() - started
+    finally:
+        cluster.stop()
+
+    result = {
+        'config': {
+            'nodes': args.nodes, 'ops': args.ops, 'concurrency': args.concurrency, 'keys': args.keys,
+            'mix': mix, 'distribution': args.distribution,
+            'zipf_s': args.zipf_s if args.distribution == 'zipf' else None,
+            'node_args': args.node_args, 'fingers_per_cycle': args.fingers_per_cycle,
+        },
+        'stabilize_s': round(stabilize_seconds, 3),
+        **summarize([r for worker in workers for r in worker.results], duration),
+        'log_dir': log_dir,
+    }
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import json
+import logging
+import math
+import random
+import sys
+import time
+
+from benchmark.cluster_bench import percentile
+from simulator import Simulator
+from utils import generate_hash
+
+"""
+gRPC server 없이 한 프로세스 안에서 노드 수천 ~ 수만 개의 ring 을 가상 시계로 실행하고 (simulator.py),
+lookup 의 성공률, 정확도, hop 수와 노드당 메시지 수, churn 이후 ring 이 다시 안정될 때까지 걸린 가상 시간을 JSON 으로 출력합니다.
+routing, stabilize 방식을 바꿨을 때 큰 ring 에서의 동작을 비교하는 용도입니다.
+
+1. --build ideal: stabilize 가 끝난 상태로 ring 을 바로 만듦, --build join: 노드가 --join-interval 간격으로 하나씩 join 함
+2. --warmup 동안 주기 작업만 실행한 뒤, --duration 동안 초당 --lookups 번 lookup 하고 초당 --churn-rate 번 노드를 추가하거나 종료함
+3. 이후 ring 의 모든 successor / predecessor 가 맞을 때까지 (최대 --settle-limit) 주기 작업을 실행함
+
+실행 방법 (repository root 에서)
+    python -m benchmark.ring_sim --nodes 10000 --duration 10
+    python -m benchmark.ring_sim --nodes 2000 --churn-rate 2 --kill-ratio 1.0
+    python -m benchmark.ring_sim --nodes 300 --build join
+"""
+
+
+class Workload:
+    """
+    측정 구간 동안 lookup 과 churn event 를 simulator 의 event queue 에 등록하고, 결과를 모읍니다.
+    """
+
+    def __init__(self, sim: Simulator, rng: random.Random, kill_ratio: float, next_node: int):
+        self.sim = sim
+        self.rng = rng
+        self.kill_ratio = kill_ratio
+        self.next_node = next_node
+        self.lookups = []  # (가상 시각, 찾았는지, hop 수, 맞는 노드인지)
+        self.events = []   # (가상 시각, event, 노드)
+        self.samples = []  # (가상 시각, 노드 수, ring_errors)
+
+    def lookup(self):
+        ok, hops, correct = self.sim.lookup(generate_hash(f'key-{self.rng.getrandbits(64)}'))
+        self.lookups.append((self.sim.clock.now, ok, hops, correct))
+
+    def churn(self):
+        if len(self.sim.nodes) <= 2 or self.rng.random() < 0.5:
+            event, address = 'join', f'node-{self.next_node}:50051'
+            self.next_node += 1
+            if not self.sim.add_node(address, self.sim.random_address()):
+                event = 'join_failed'
+        else:
+            address = self.sim.random_address()
+            event = 'kill' if self.rng.random() < self.kill_ratio else 'leave'
+            if event == 'kill':
+                self.sim.crash(address)
+            else:
+                self.sim.leave(address)
+        self.events.append((self.sim.clock.now, event, address))
+
+    def sample(self):
+        self.samples.append((self.sim.clock.now, len(self.sim.nodes), self.sim.ring_errors()))
+
+
+def summarize_lookups(lookups: list, nodes: int) -> dict:
+    found = [r for r in lookups if r[1]]
+    hops = [r[2] for r in found]
+    return {
+        'lookups': len(lookups),
+        'success_rate': round(len(found) / len(lookups), 4) if lookups else 0.0,
+        'correct_rate': round(sum(1 for r in found if r[3]) / len(lookups), 4) if lookups else 0.0,
+        'hops': {
+            'avg': round(sum(hops) / len(hops), 3) if hops else None,
+            'p50': percentile(hops, 0.5),
+            'p99': percentile(hops, 0.99),
+            'max': max(hops) if hops else None,
+            # finger table 이 맞으면 평균 hop 수는 log2(N) / 2 근처
+            'expected_avg': round(math.log2(nodes) / 2, 3) if nodes > 1 else 0.0,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--build", choices=['ideal', 'join'], default='ideal', help="처음 ring 을 만드는 방법")
+    parser.add_argument("--join-interval", type=float, default=0.1, help="--build join 에서 노드가 join 하는 간격 (가상 시간, 초)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="측정 전에 주기 작업만 실행하는 가상 시간 (초)")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정하는 가상 시간 (초)")
+    parser.add_argument("--lookups", type=float, default=200.0, help="가상 시간 1초당 lookup 수")
+    parser.add_argument("--churn-rate", type=float, default=0.0, help="가상 시간 1초당 노드 추가 / 종료 횟수")
+    parser.add_argument("--kill-ratio", type=float, default=0.5, help="나가는 노드 중 data 를 넘기지 않고 바로 종료되는 비율")
+    parser.add_argument("--settle-limit", type=float, default=120.0, help="측정 이후 ring 이 안정될 때까지 기다리는 최대 가상 시간 (초)")
+    parser.add_argument("--update-interval", type=float, default=1.0)
+    parser.add_argument("--fingers-per-cycle", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 을 저장할 file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+    started = time.monotonic()
+    with Simulator(args.update_interval, args.fingers_per_cycle, args.seed) as sim:
+        addresses = [f'node-{i}:50051' for i in range(args.nodes)]
+        if args.build == 'ideal':
+            sim.build_ring(addresses)
+        else:
+            sim.add_node(addresses[0])
+            for address in addresses[1:]:
+                sim.add_node(address, sim.random_address())
+                sim.run(args.join_interval)
+        built = time.monotonic()
+
+        sim.run(args.warmup)
+        warmup = {'ring_errors': sim.ring_errors(), 'finger_accuracy': round(sim.finger_accuracy(), 4)}
+
+        workload = Workload(sim, rng, args.kill_ratio, args.nodes)
+        for _ in range(int(args.duration * args.lookups)):
+            sim.schedule(rng.uniform(0, args.duration), workload.lookup)
+        if args.churn_rate > 0:
+            for i in range(1, int(args.duration * args.churn_rate) + 1):
+                sim.schedule(i / args.churn_rate, workload.churn)
+        for second in range(1, int(args.duration) + 1):
+            sim.schedule(second, workload.sample)
+        calls = sim.transport.stats()
+        measure_started = sim.clock.now
+        sim.run(args.duration)
+        measured = sim.transport.stats()
+        nodes = len(sim.nodes)
+
+        # churn 이 끝난 뒤, ring 의 모든 successor / predecessor 가 맞을 때까지 걸린 가상 시간
+        settle = 0.0
+        while sim.ring_errors() and settle < args.settle_limit:
+            sim.run(args.update_interval)
+            settle += args.update_interval
+        errors = sim.ring_errors()
+
+        result = {
+            'config': vars(args),
+            'build': {'mode': args.build, 'wall_s': round(built - started, 3), **warmup},
+            'lookup': summarize_lookups(workload.lookups, nodes),
+            'messages': {
+                'per_node_per_s': round((measured['calls'] - calls['calls']) / nodes / args.duration, 2),
+                'failures': measured['failures'] - calls['failures'],
+                'methods': {method: count - calls['methods'].get(method, 0)
+                            for method, count in measured['methods'].items()},
+            },
+            'churn': {
+                'joins': sum(1 for e in workload.events if e[1] == 'join'),
+                'join_failures': sum(1 for e in workload.events if e[1] == 'join_failed'),
+                'leaves': sum(1 for e in workload.events if e[1] == 'leave'),
+                'kills': sum(1 for e in workload.events if e[1] == 'kill'),
+            },
+            'ring_errors': [{'time': round(t - measure_started, 3), 'nodes': count, 'errors': wrong}
+                            for t, count, wrong in workload.samples],
+            'final': {
+                'nodes': len(sim.nodes),
+                'ring_errors': errors,
+                'stabilize_s': settle if not errors else None,
+                'finger_accuracy': round(sim.finger_accuracy(), 4),
+            },
+            'wall_s': round(time.monotonic() - started, 3),
+            'simulated_s': round(sim.clock.now, 3),
+        }
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import json
+import math
+import sys
+from collections import Counter
+
+"""
+노드들이 --trace-file 로 기록한 요청별 trace 를 모아서, 요청 방식 (recursive / iterative) 과 종류 (get / set / delete) 별로
+hop 수와 latency 의 분포를 출력합니다.
+--nodes 로 ring 의 노드 수를 주면, finger table 이 제대로 동작할 때 기대하는 평균 hop 수 (log2(N) / 2) 와 비교합니다.
+
+실행 방법 (repository root 에서)
+    python main.py --port 50051 --trace-file traces-50051.jsonl
+    python -m benchmark.trace_report traces-*.jsonl --nodes 8
+"""
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def load(paths):
+    records = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+    return records
+
+
+def summarize(records):
+    groups = dict()
+    for record in records:
+        groups.setdefault((record['mode'], record['type']), []).append(record)
+
+    results = []
+    for (mode, data_handling_type), group in sorted(groups.items()):
+        hops = [record['hops'] for record in group]
+        latencies = [record['latency_ms'] for record in group if record['latency_ms'] is not None]
+        results.append({
+            'mode': mode,
+            'type': data_handling_type,
+            'requests': len(group),
+            'avg_hops': sum(hops) / len(hops),
+            'p50_hops': percentile(hops, 0.5),
+            'p99_hops': percentile(hops, 0.99),
+            'max_hops': max(hops),
+            'hop_counts': dict(sorted(Counter(hops).items())),
+            'avg_ms': sum(latencies) / len(latencies) if latencies else None,
+            'p50_ms': percentile(latencies, 0.5) if latencies else None,
+            'p99_ms': percentile(latencies, 0.99) if latencies else None,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="+", help="--trace-file 로 기록한 file 들")
+    parser.add_argument("--nodes", type=int, default=0, help="ring 의 노드 수, 주면 기대 hop 수와 비교함")
+    parser.add_argument("--json", action="store_true", help="결과를 json 으로 출력")
+    args = parser.parse_args()
+
+    results = summarize(load(args.files))
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f'{"mode":<10}{"type":<8}{"reqs":>7}{"avg":>7}{"p50":>5}{"p99":>5}{"max":>5}'
+          f'{"avg ms":>9}{"p50 ms":>9}{"p99 ms":>9}')
+    for r in results:
+        latency = ''.join(f'{r[name]:>9.2f}' if r[name] is not None else f'{"-":>9}'
+                          for name in ('avg_ms', 'p50_ms', 'p99_ms'))
+        print(f'{r["mode"]:<10}{r["type"]:<8}{r["requests"]:>7}{r["avg_hops"]:>7.2f}{r["p50_hops"]:>5}'
+              f'{r["p99_hops"]:>5}{r["max_hops"]:>5}{latency}')
+    for r in results:
+        print(f'{r["mode"]} {r["type"]} hops: ' + ', '.join(f'{h}: {c}' for h, c in r['hop_counts'].items()))
+    if args.nodes > 1:
+        print(f'expected avg hops with {args.nodes} nodes: {math.log2(args.nodes) / 2:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import bisect
+import json
+import math
+import random
+import sys
+
+from utils import generate_hash, vnode_address, RING_SIZE
+
+"""
+서버마다 가상 노드 수 (--vnodes) 를 바꿔가며, 각 서버가 담당하는 key 의 비율이 얼마나 고른지 출력합니다.
+서버를 실행하지 않고, 노드들이 실제로 사용하는 address 와 id (generate_hash(host:port#번호)) 로 ring 을 계산합니다.
+
+1. arc: ring 에서 서버의 가상 노드들이 담당하는 범위 ([n, successor)) 를 모두 더한 비율
+2. keys: 임의의 key --keys 개를 hashing 했을 때, 서버에 저장되는 key 의 수
+
+min / max 는 서버 하나가 담당하는 비율, max/mean 이 1 에 가깝고 cv (변동 계수) 가 작을수록 고르게 나뉜 것입니다.
+
+실행 방법 (repository root 에서)
+    python -m benchmark.vnode_balance --nodes 16 --vnodes 1 4 16 64
+    python -m benchmark.vnode_balance --addresses localhost:50051 localhost:50052 localhost:50053 --json
+"""
+
+
+def build_ring(addresses: list, vnodes: int) -> list:
+    # (가상 노드 id, 서버 address) 의 list, id 순서로 정렬됨
+    return sorted((generate_hash(vnode_address(address, i)), address) for address in addresses for i in range(vnodes))
+
+
+def arc_shares(ring: list) -> dict:
+    # 가상 노드 n 은 [n, successor) 범위를 담당함
+    shares = dict()
+    for i, (key, address) in enumerate(ring):
+        successor = ring[(i + 1) % len(ring)][0]
+        arc = (successor - key) % RING_SIZE or RING_SIZE
+        shares[address] = shares.get(address, 0) + arc / RING_SIZE
+    return shares
+
+
+def key_counts(ring: list, keys: list) -> dict:
+    ids = [key for key, _ in ring]
+    counts = dict()
+    for key in keys:
+        # key 보다 작거나 같은 가장 큰 id 의 가상 노드가 담당함 (없으면 ring 의 마지막 노드)
+        address = ring[bisect.bisect_right(ids, key) - 1][1]
+        counts[address] = counts.get(address, 0) + 1
+    return counts
+
+
+def spread(values: list) -> dict:
+    mean = sum(values) / len(values)
+    deviation = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+    return {
+        'min': min(values) / mean / len(values) if mean else 0.0,
+        'max': max(values) / mean / len(values) if mean else 0.0,
+        'max_mean': max(values) / mean if mean else 0.0,
+        'cv': deviation / mean if mean else 0.0,
+    }
+
+
+def summarize(addresses: list, vnodes_list: list, keys: list) -> list:
+    results = []
+    for vnodes in vnodes_list:
+        ring = build_ring(addresses, vnodes)
+        shares = arc_shares(ring)
+        counts = key_counts(ring, keys)
+        results.append({
+            'vnodes': vnodes,
+            'arc': spread([shares.get(address, 0.0) for address in addresses]),
+            'keys': spread([counts.get(address, 0) for address in addresses]),
+            'shares': {address: round(shares.get(address, 0.0), 6) for address in addresses},
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=16, help="서버 수, --host 와 --base-port 부터 차례대로 address 를 만듦")
+    parser.add_argument("--host", type=str, default="localhost")
+    parser.add_argument("--base-port", type=int, default=50051)
+    parser.add_argument("--addresses", type=str, nargs="+", default=None, help="서버 address 들, 주면 --nodes 대신 사용함")
+    parser.add_argument("--vnodes", type=int, nargs="+", default=[1, 4, 16, 64], help="비교할 서버당 가상 노드 수")
+    parser.add_argument("--keys", type=int, default=100000, help="서버별 key 수를 셀 때 사용할 임의의 key 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 json 으로 출력")
+    parser.add_argument("--output", type=str, default=None, help="결과 JSON 을 저장할 file")
+    args = parser.parse_args()
+
+    addresses = args.addresses or [f'{args.host}:{args.base_port + i}' for i in range(args.nodes)]
+    rng = random.Random(args.seed)
+    keys = [generate_hash(f'key-{rng.getrandbits(64)}') for _ in range(args.keys)]
+    results = summarize(addresses, args.vnodes, keys)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f'{len(addresses)} nodes, {args.keys} keys, ideal share {1 / len(addresses):.4f}')
+    print(f'{"vnodes":<8}{"arc min":>9}{"arc max":>9}{"max/mean":>10}{"cv":>7}'
+          f'{"key min":>9}{"key max":>9}{"max/mean":>10}{"cv":>7}')
+    for r in results:
+        row = ''.join(f'{r[kind]["min"]:>9.4f}{r[kind]["max"]:>9.4f}{r[kind]["max_mean"]:>10.2f}{r[kind]["cv"]:>7.3f}'
+                      for kind in ('arc', 'keys'))
+        print(f'{r["vnodes"]:<8}{row}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+
+import grpc
+
+from metrics import instrumented_channel
+from utils import VNODE_METADATA, split_vnode
+
+"""
+channel_pool.py 는 노드 간 gRPC channel 을 재사용하기 위한 pool 입니다.
+
+매 메시지마다 grpc.insecure_channel 을 새로 열고 닫으면, 매번 HTTP/2 연결과 handshake 비용이 발생합니다.
+따라서 peer address 별로 channel 과 stub 을 한 번만 만들어두고, 프로세스 전체에서 공유합니다.
+
+1. LRU: 최대 channel 수를 넘으면 가장 오래 사용하지 않은 channel 을 닫음
+2. idle timeout: 일정 시간 이상 사용하지 않은 channel 은 닫음
+3. remove: 죽은 노드의 channel 은 바로 제거함
+
+1, 2 로 pool 에서 빠진 channel 은, 그 channel 로 보내고 있는 요청 (in-flight) 이 모두 끝난 뒤에 닫습니다.
+stub 의 method 를 호출할 때마다 channel 의 in-flight 수를 세고, 닫힌 channel 의 stub 으로 호출하면 새 channel 로 보냅니다.
+
+가상 노드 address (host:port#번호) 는 서버 address 의 channel 을 함께 사용하고, 요청의 metadata 에 가상 노드 번호를 붙입니다.
+
+channel_factory 로 grpc.aio.insecure_channel 을 넘기면 asyncio 노드에서도 같은 pool 을 사용할 수 있습니다.
+"""
+
+
+class _PooledChannel:
+    def __init__(self, address: str, channel):
+        self.address = address
+        self.channel = channel
+        self.stubs = dict()  # stub class -> _PooledStub
+        self.last_used = time.monotonic()
+        self.in_flight = 0     # 이 channel 로 보내고 있는 요청 수
+        self.evicted = False   # pool 에서 빠졌으면 True, in-flight 요청이 끝나면 닫음
+        self.closed = False
+
+
+class _PooledStub:
+    # stub 의 method 를 호출하는 동안 channel 의 in-flight 수를 세서, 요청 중인 channel 이 닫히지 않게 함
+
+    def __init__(self, pool, pooled: _PooledChannel, stub_class):
+        self.pool = pool
+        self.pooled = pooled
+        self.stub_class = stub_class
+        self.stub = stub_class(pooled.channel)
+
+    def __getattr__(self, method: str):
+        return functools.partial(self._call, method)
+
+    def _call(self, method: str, *args, **kwargs):
+        if not self.pool._acquire(self.pooled):
+            # 이미 닫힌 channel 이면 pool 에서 새 channel 을 받아서 보냄
+            return getattr(self.pool.get_stub(self.pooled.address, self.stub_class), method)(*args, **kwargs)
+        try:
+            result = getattr(self.stub, method)(*args, **kwargs)
+        except BaseException:
+            self.pool._release(self.pooled)
+            raise
+        if inspect.isawaitable(result):
+            # grpc.aio 의 요청은 await 가 끝나야 완료됨
+            return self._wait(result)
+        self.pool._release(self.pooled)
+        return result
+
+    async def _wait(self, call):
+        try:
+            return await call
+        finally:
+            self.pool._release(self.pooled)
+
+
+class _VirtualNodeStub:
+    # 같은 서버의 다른 가상 노드에게 보내는 stub, 모든 요청의 metadata 에 가상 노드 번호를 붙임
+
+    def __init__(self, stub, index: int):
+        self.stub = stub
+        self.metadata = ((VNODE_METADATA, str(index)),)
+
+    def __getattr__(self, method: str):
+        return functools.partial(getattr(self.stub, method), metadata=self.metadata)
+
+
+def _close_channel(channel):
+    closing = channel.close()
+    # grpc.aio 의 channel 은 close 가 coroutine 이므로, 실행 중인 event loop 에서 닫히도록 등록함
+    if asyncio.iscoroutine(closing):
+        asyncio.ensure_future(closing)
+
+
+class ChannelPool:
+
+    def __init__(self, max_size: int = 64, idle_timeout: float = 60.0, channel_factory=grpc.insecure_channel):
+        """
+        :param max_size: pool 에 유지하는 최대 channel 수
+        :param idle_timeout: 이 시간 이상 사용하지 않은 channel 은 닫음 (초)
+        :param channel_factory: address 를 받아 channel 을 만드는 함수
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.channel_factory = channel_factory
+
+        # address -> _PooledChannel, 가장 최근에 사용한 channel 이 맨 뒤에 위치함
+        self.channels = OrderedDict()
+        self.lock = Lock()
+
+        # 통계값
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_stub(self, address: str, stub_class):
+        """
+        address 에 해당하는 channel 로 만든 stub 을 return 합니다.
+        channel 이 없으면 새로 만들고, 있으면 기존 channel 을 재사용합니다.
+
+        :param address: 메시지를 보낼 노드의 address (host:port 나 가상 노드의 host:port#번호)
+        :param stub_class: chord_pb2_grpc 에 정의된 Stub class
+        :return: stub_class 의 객체
+        """
+        address, vnode = split_vnode(address)
+        closing = []
+        with self.lock:
+            now = time.monotonic()
+            closing += self._evict_idle(now)
+
+            pooled = self.channels.get(address)
+            if pooled is None:
+                self.misses += 1
+                pooled = _PooledChannel(address, self.channel_factory(address))
+                self.channels[address] = pooled
+
+                # 최대 크기를 넘으면, 가장 오래 사용하지 않은 channel 부터 닫음
+                while len(self.channels) > self.max_size:
+                    _, evicted = self.channels.popitem(last=False)
+                    closing += self._evict(evicted)
+            else:
+                self.hits += 1
+                self.channels.move_to_end(address)
+            pooled.last_used = now
+
+            stub = pooled.stubs.get(stub_class)
+            if stub is None:
+                stub = _PooledStub(self, pooled, stub_class)
+                pooled.stubs[stub_class] = stub
+
+        # channel close 는 lock 밖에서 처리
+        for pooled_channel in closing:
+            _close_channel(pooled_channel.channel)
+        return _VirtualNodeStub(stub, vnode) if vnode else stub
+
+    def remove(self, address: str):
+        """
+        죽은 노드의 channel 을 pool 에서 제거합니다.
+        """
+        address, _ = split_vnode(address)
+        with self.lock:
+            pooled = self.channels.pop(address, None)
+            if pooled is not None:
+                # 죽은 노드로 보내는 요청은 기다리지 않고 바로 닫음
+                self.evictions += 1
+                pooled.evicted = pooled.closed = True
+        if pooled is not None:
+            logging.debug(f'channel to {address} is removed from pool')
+            _close_channel(pooled.channel)
+
+    def close(self):
+        with self.lock:
+            closing = list(self.channels.values())
+            self.channels.clear()
+            for pooled in closing:
+                pooled.evicted = pooled.closed = True
+        for pooled in closing:
+            _close_channel(pooled.channel)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'size': len(self.channels),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _evict_idle(self, now: float):
+        # lock 을 잡은 상태에서 호출해야 함
+        # OrderedDict 의 앞쪽이 가장 오래 사용하지 않은 channel 이므로, idle 이 아닌 channel 을 만나면 멈춤
+        evicted = []
+        while self.channels:
+            address, pooled = next(iter(self.channels.items()))
+            if now - pooled.last_used < self.idle_timeout:
+                break
+            self.channels.popitem(last=False)
+            evicted += self._evict(pooled)
+        return evicted
+
+    def _evict(self, pooled: _PooledChannel) -> list:
+        # lock 을 잡은 상태에서 호출해야 함, 지금 닫아도 되는 channel 이면 [pooled] 를 return 함
+        # in-flight 요청이 있으면, 마지막 요청이 끝날 때 (_release) 닫음
+        self.evictions += 1
+        pooled.evicted = True
+        if pooled.in_flight:
+            return []
+        pooled.closed = True
+        return [pooled]
+
+    def _acquire(self, pooled: _PooledChannel) -> bool:
+        # 요청을 보내기 전에 호출, 이미 닫힌 channel 이면 False
+        with self.lock:
+            if pooled.closed:
+                return False
+            pooled.in_flight += 1
+            return True
+
+    def _release(self, pooled: _PooledChannel):
+        # 요청이 끝난 뒤에 호출, pool 에서 빠진 channel 의 마지막 요청이면 channel 을 닫음
+        with self.lock:
+            pooled.in_flight -= 1
+            pooled.last_used = time.monotonic()
+            if not pooled.evicted or pooled.in_flight or pooled.closed:
+                return
+            pooled.closed = True
+        _close_channel(pooled.channel)
+
+
+# 프로세스 전체에서 공유하는 channel pool, 모든 RPC 의 요청 수, 실패 수, 시간을 metrics 에 기록함
+channel_pool = ChannelPool(channel_factory=instrumented_channel)
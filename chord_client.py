@@ -0,0 +1,263 @@
+import bisect
+import logging
+import random
+from concurrent import futures
+from threading import Lock
+from typing import Dict, List, Optional, Union
+
+import grpc
+
+from channel_pool import channel_pool
+from data_structure import Data
+from service import multi_data_request
+from utils import DataHandlingType as d
+from utils import generate_hash, in_range, id_to_bytes, id_from_bytes, short_id, to_value
+
+from protos.output import chord_pb2
+from protos.output import chord_pb2_grpc
+
+"""
+chord_client.py 는 다른 프로그램에서 import 해서 DHT 를 사용할 수 있게 해주는 client 입니다.
+
+ChordNode 를 띄우지 않고, ring 의 노드들에게 직접 gRPC 요청을 보냅니다.
+어떤 노드가 어떤 key 범위를 가지고 있는지 cache 해두기 때문에, 대부분의 요청은 한 번에 담당 노드에게 도착합니다.
+replication 을 사용하는 ring 이면, 담당 노드가 알려준 복사본을 가진 노드들에게 get 을 나눠서 보냅니다.
+set, delete 가 write quorum 을 채우지 못하면 RuntimeError 를 raise 합니다.
+value 는 bytes 로 저장되고 bytes 로 돌려받습니다. (str 로 set 하면 utf-8 로 encode 해서 저장함)
+
+사용 예시)
+    client = ChordClient(['localhost:50051'])
+    client.set('hello', 'world')
+    client.get('hello')  # -> b'world'
+"""
+
+
+class RouteCache:
+    """
+    key 범위 [start, end) 와 그 범위를 담당하는 노드의 정보를 start 순으로 정렬해서 가지고 있는 cache 입니다.
+    """
+
+    def __init__(self):
+        self.starts: List[int] = list()
+        self.ranges: List[tuple] = list()  # (start, end, address)
+        self.lock = Lock()
+
+    def lookup(self, key: int):
+        """
+        key 를 담당하는 노드의 address 를 return 합니다.
+        :return: (address, hit), cache 에 없으면 key 에 가장 가까운 앞쪽 노드의 address 와 False 를 return 합니다.
+        """
+        with self.lock:
+            if not self.ranges:
+                return None, False
+            # start 가 key 보다 작거나 같은 것 중 가장 큰 범위 (없으면 ring 이 한 바퀴 돈 것이므로 마지막 범위)
+            start, end, address = self.ranges[bisect.bisect_right(self.starts, key) - 1]
+            return address, in_range(key, start, end)
+
+    def update(self, start: int, end: int, address: str):
+        with self.lock:
+            # 새 범위와 겹치는 기존 범위들은 오래된 정보이므로 제거
+            self.ranges = [r for r in self.ranges if not self._overlaps(r, start, end)]
+            self.ranges.append((start, end, address))
+            self.ranges.sort()
+            self.starts = [r[0] for r in self.ranges]
+
+    def remove_node(self, address: str):
+        with self.lock:
+            self.ranges = [r for r in self.ranges if r[2] != address]
+            self.starts = [r[0] for r in self.ranges]
+
+    def clear(self):
+        with self.lock:
+            self.ranges = list()
+            self.starts = list()
+
+    def __len__(self):
+        return len(self.ranges)
+
+    @staticmethod
+    def _overlaps(cached, start, end):
+        c_start, c_end, _ = cached
+        return in_range(c_start, start, end) or in_range(start, c_start, c_end)
+
+
+class ChordClient:
+
+    def __init__(self, bootstrap_nodes: List[str], timeout: float = 3.0, max_redirects: int = 32):
+        """
+        :param bootstrap_nodes: 처음 요청을 보낼 노드들의 address 목록 (host:port)
+        :param timeout: 한 번의 gRPC 요청에 대한 timeout (초)
+        :param max_redirects: 한 요청에 대해 허용하는 최대 redirect 횟수
+        """
+        if not bootstrap_nodes:
+            raise ValueError('at least one bootstrap node is required')
+        self.bootstrap_nodes = list(bootstrap_nodes)
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.route_cache = RouteCache()
+        self.read_routes: Dict[str, List[str]] = dict()  # 담당 노드 address -> get 에 응답할 수 있는 노드들 (담당 노드 포함)
+
+        # 통계값
+        self.requests = 0
+        self.cache_hits = 0   # cache 된 노드가 바로 처리한 요청 수
+        self.redirects = 0
+        self.replica_reads = 0  # 복사본을 가진 노드가 대신 응답한 get 수
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        key 에 해당하는 value 를 return 합니다. 없으면 None 을 return 합니다.
+        """
+        reply = self._query(generate_hash(key), b"", d.get)
+        return reply.data_value if reply.found else None
+
+    def set(self, key: str, value: Union[bytes, str]):
+        """
+        :raise RuntimeError: 담당 노드가 write quorum 을 채우지 못한 경우
+        """
+        self._check(self._query(generate_hash(key), to_value(value), d.set), key)
+
+    def delete(self, key: str) -> bool:
+        """
+        key 를 삭제합니다.
+        :return: key 가 존재했으면 True, 없었으면 False 를 return 합니다.
+        :raise RuntimeError: 담당 노드가 write quorum 을 채우지 못한 경우
+        """
+        return self._check(self._query(generate_hash(key), b"", d.delete), key).found
+
+    def mget(self, keys: List[str]) -> Dict[str, Optional[bytes]]:
+        """
+        여러 key 의 value 를 한 번에 가져옵니다. 없는 key 의 value 는 None 입니다.
+        """
+        hashed_keys = {generate_hash(key): key for key in keys}
+        entries = [chord_pb2.KeyValue(data_key=id_to_bytes(hashed_key)) for hashed_key in hashed_keys]
+        results = self._multi_query(entries, d.get)
+        values = {key: None for key in keys}
+        for result in results:
+            if result.found:
+                values[hashed_keys[id_from_bytes(result.data_key)]] = result.data_value
+        return values
+
+    def mset(self, items: Dict[str, Union[bytes, str]]):
+        """
+        :raise RuntimeError: write quorum 을 채우지 못한 key 가 있는 경우 (나머지 key 는 저장됨)
+        """
+        entries = [chord_pb2.KeyValue(data_key=id_to_bytes(generate_hash(key)), data_value=to_value(value))
+                   for key, value in items.items()]
+        failed = [result for result in self._multi_query(entries, d.set) if result.error]
+        if failed:
+            raise RuntimeError(f'failed to set {len(failed)} of {len(entries)} keys: {failed[0].error}')
+
+    def stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+            'redirects': self.redirects,
+            'replica_reads': self.replica_reads,
+            'cached_ranges': len(self.route_cache),
+        }
+
+    @staticmethod
+    def _check(reply, key: str):
+        if reply.error:
+            raise RuntimeError(f'failed to handle key:{key}: {reply.error}')
+        return reply
+
+    def _query(self, hashed_key: int, value: bytes, data_handling_type: int):
+        self.requests += 1
+        address, hit = self.route_cache.lookup(hashed_key)
+        if address is None:
+            address = random.choice(self.bootstrap_nodes)
+        elif hit and data_handling_type == d.get and address in self.read_routes:
+            # 담당 노드와 복사본을 가진 노드들 중 하나에게 get 을 보냄
+            address = random.choice(self.read_routes[address])
+
+        request = chord_pb2.ClientRequest(data_key=id_to_bytes(hashed_key), data_value=value,
+                                          data_handling_type=data_handling_type)
+        redirects = 0
+        while redirects <= self.max_redirects:
+            try:
+                stub = channel_pool.get_stub(address, chord_pb2_grpc.ClientDataStub)
+                reply = stub.Query(request, timeout=self.timeout)
+            except grpc.RpcError:
+                # 응답이 없는 노드는 cache 에서 지우고, bootstrap 노드부터 다시 시도
+                logging.debug(f'{address} is not responding, retry from bootstrap node')
+                channel_pool.remove(address)
+                self.route_cache.remove_node(address)
+                self.read_routes = {owner: nodes for owner, nodes in self.read_routes.items()
+                                    if owner != address and address not in nodes}
+                address = random.choice(self.bootstrap_nodes)
+                redirects += 1
+                continue
+
+            if reply.replica:
+                # 복사본을 가진 노드의 응답에는 담당 범위가 없으므로 cache 하지 않음
+                self.replica_reads += 1
+                return reply
+            if not reply.redirect:
+                if hit and redirects == 0:
+                    self.cache_hits += 1
+                self.route_cache.update(id_from_bytes(reply.node_key), id_from_bytes(reply.range_end),
+                                        reply.node_address)
+                if reply.replicas:
+                    self.read_routes[reply.node_address] = list(reply.replicas)
+                return reply
+
+            # redirect 되었다면 cache 가 오래되었거나 없는 것이므로, 알려준 노드로 다시 요청
+            self.redirects += 1
+            redirects += 1
+            address = reply.node_address
+        raise RuntimeError(f'too many redirects for key:{short_id(hashed_key)}')
+
+    def _multi_query(self, entries: list, data_handling_type: int) -> list:
+        # cache 된 담당 노드별로 key 를 묶어서, 노드당 한 번씩만 요청함
+        # 받은 노드가 담당하지 않는 key 는 redirect 로 돌아오므로, 알려준 노드별로 다시 묶어서 요청함
+        groups = dict()
+        for entry in entries:
+            address, _ = self.route_cache.lookup(id_from_bytes(entry.data_key))
+            if address is None:
+                address = random.choice(self.bootstrap_nodes)
+            groups.setdefault(address, []).append(entry)
+
+        client_node = Data(None, "")  # client 는 노드가 아니므로 starter node 정보를 비워서 보냄
+        results = []
+        redirects = 0
+        while groups:
+            self.requests += len(groups)
+            with futures.ThreadPoolExecutor(max_workers=min(len(groups), 16)) as executor:
+                requests = {
+                    executor.submit(multi_data_request, client_node, Data("", address), group, data_handling_type,
+                                    self.timeout): address
+                    for address, group in groups.items()
+                }
+                redirected = dict()
+                for request in futures.as_completed(requests):
+                    address = requests[request]
+                    try:
+                        response = request.result()
+                    except grpc.RpcError:
+                        # 응답이 없는 노드는 cache 에서 지우고, 해당 key 들은 하나씩 다시 요청함
+                        self.route_cache.remove_node(address)
+                        for entry in groups[address]:
+                            reply = self._query(id_from_bytes(entry.data_key), entry.data_value, data_handling_type)
+                            results.append(chord_pb2.KeyValue(data_key=entry.data_key, data_value=reply.data_value,
+                                                              found=reply.found, error=reply.error))
+                        continue
+                    pending = {entry.data_key: entry for entry in groups[address]}
+                    handled = 0
+                    for reply in response.entries:
+                        if reply.redirect and reply.data_key in pending:
+                            redirected.setdefault(reply.redirect, []).append(pending[reply.data_key])
+                        else:
+                            results.append(reply)
+                            handled += 1
+                    # 처리해준 노드가 담당 노드이므로, redirect 를 따라서 찾은 담당 노드도 _query 처럼 cache 함
+                    if handled and response.range_end:
+                        self.route_cache.update(id_from_bytes(response.node_key), id_from_bytes(response.range_end),
+                                                address)
+            groups = redirected
+            if groups:
+                self.redirects += 1
+                redirects += 1
+                if redirects > self.max_redirects:
+                    raise RuntimeError(f'too many redirects for {sum(len(group) for group in groups.values())} keys')
+        return results
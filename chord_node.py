@@ -2,34 +2,147 @@ import grpc
 import threading
 import logging
 import time
+import uuid
 from concurrent import futures
+from concurrent.futures import Future
 
 from node_table import NodeTable
-from service import HealthCheckService, GetNodeValueService, NotifyNodeService, TossMessageService, toss_message, \
-    HandleDataService, data_request
-from data_structure import Data, TableEntry
+from service import HealthCheckService, GetNodeValueService, NotifyNodeService, HandleDataService, \
+    ClientDataService, ReplicaService, data_request, process_multi_data, query_request, handle_local_entry, \
+    virtual_node_servicer, send_flight, WriteQuorumError
+from data_structure import Data, DataTable
+from channel_pool import channel_pool
+from metrics import metrics, data_type_name, MetricsServer, ServerMetricsInterceptor
+from tracing import tracer
+from pending_requests import PendingRequests
+from storage import Storage, FSYNC_BATCH
+from replication import ReplicaCollector, ReplicatedDataTable
+from near_cache import NearCache, LeasedDataTable
+from singleflight import SingleFlight
+from hotkeys import HotKeyDataTable, ReadReplicas
+from key_filter import KeyFilters
 
-from utils import NodeType as n
-from utils import TossMessageType as t
 from utils import DataHandlingType as d
-from utils import generate_hash
+from utils import generate_hash, id_to_bytes, id_from_bytes, short_id, ring_distance, vnode_address, split_vnode
+from utils import show_value, to_value
 
-from protos.output import chord_pb2_grpc
+from protos.output import chord_pb2, chord_pb2_grpc
+
+# get, set, delete 요청을 담당 노드까지 보내는 방식
+# recursive: 요청을 받은 노드가 다음 노드에게 요청을 넘김 (결과는 담당 노드가 get_result 로 보내줌)
+# iterative: 본인이 노드들에게 다음 노드를 물어가며 담당 노드를 찾은 뒤, 담당 노드에게 직접 요청함
+RECURSIVE = 'recursive'
+ITERATIVE = 'iterative'
+LOOKUP_MODES = (RECURSIVE, ITERATIVE)
 
 
 class ChordNode:
 
-    def __init__(self, address):
+    def __init__(self, address, lookup_mode: str = RECURSIVE, hop_timeout: float = 1.0, hop_retries: int = 1,
+                 interactive: bool = True, data_dir: str = None, fsync: str = FSYNC_BATCH, replicas: int = 0,
+                 write_quorum: int = 1, read_quorum: int = 1, metrics_port: int = 0, trace_file: str = None,
+                 bootstrap: str = None, fingers_per_cycle: int = 8, vnodes: int = 1, near_cache: int = 0,
+                 lease: float = 2.0, hot_replicas: int = 0, hot_threshold: float = 100.0, hot_window: float = 10.0,
+                 key_filters: bool = False, filter_interval: float = 2.0):
+        """
+        :param address: 현재 노드의 address (host:port)
+        :param lookup_mode: get, set, delete 요청을 보내는 방식 (RECURSIVE, ITERATIVE)
+        :param hop_timeout: iterative 방식에서 한 노드의 응답을 기다리는 최대 시간 (초)
+        :param hop_retries: iterative 방식에서 응답하지 않는 노드에게 다시 요청하는 횟수
+        :param interactive: True 면 명령어를 입력받고 serve 가 종료될 때까지 return 하지 않음,
+                            False 면 background thread 로만 동작함 (benchmark 등에서 사용)
+        :param data_dir: data table 의 WAL 과 snapshot 을 저장할 directory, None 이면 memory 에만 저장함
+        :param fsync: WAL 을 disk 에 반영하는 방식 (storage.FSYNC_MODES)
+        :param replicas: 복사본을 저장할 successor 의 수, 0 이면 replication 을 사용하지 않음
+        :param write_quorum: write 가 성공하기 위해 저장해야 하는 노드 수 (본인 포함)
+        :param read_quorum: read 시에 값을 읽는 노드 수 (본인 포함)
+        :param metrics_port: Prometheus metrics 를 응답할 HTTP port, 0 이면 사용하지 않음
+        :param trace_file: 요청별 hop 수와 latency 를 기록할 file (JSON lines), None 이면 기록하지 않음
+        :param bootstrap: 서버를 시작한 뒤 join 할 노드의 address, None 이면 혼자 ring 을 시작함
+        :param fingers_per_cycle: 한 주기에 갱신하는 finger 의 최대 개수 (NodeTable 참고)
+        :param vnodes: 이 서버에서 동작하는 가상 노드의 수, 가상 노드마다 ring 위의 id 와 routing 정보 (NodeTable) 를
+                       따로 가지며 data table 과 storage 는 함께 사용함
+        :param near_cache: 다른 노드가 담당하는 key 의 get 결과를 보관하는 near cache 의 크기, 0 이면 사용하지 않음
+        :param lease: near cache 에 값을 보관하는 시간이자, 담당 노드로서 허락하는 최대 lease 시간 (초)
+        :param hot_replicas: 자주 읽히는 key 의 읽기용 복사본을 둘 successor 의 수, 0 이면 복제하지 않음 (hotkeys 명령어로 확인만 함)
+        :param hot_threshold: hot_window 동안 get 이 이만큼 요청되면 읽기용 복사본을 둠
+        :param hot_window: 요청 수를 절반으로 줄이는 주기이자 읽기용 복사본을 사용하는 시간 (초)
+        :param key_filters: True 면 주변 노드들이 가진 key 의 Bloom filter 를 받아두고, 없는 key 의 get 은 담당 노드까지 보내지 않음
+        :param filter_interval: Bloom filter 를 다시 받는 주기 (초), 다른 노드가 추가한 key 를 최대 2배의 시간 동안 없다고 응답할 수 있음
+        """
+        if lookup_mode not in LOOKUP_MODES:
+            raise ValueError(f'unknown lookup mode: {lookup_mode}')
+        if vnodes < 1:
+            raise ValueError(f'vnodes must be at least 1: {vnodes}')
+        if vnodes > 1 and replicas > 0:
+            # successor 들이 같은 서버의 가상 노드일 수 있으므로, 복사본이 다른 서버에 저장된다고 보장할 수 없음
+            raise ValueError('replication is not supported with virtual nodes')
         self.server = None
 
         # 현재 이 서버가 구동되고 있는 port
         self.address = address
 
-        # data table 생성
-        self.data_table = TableEntry()
+        self.lookup_mode = lookup_mode
+        self.hop_timeout = hop_timeout
+        self.hop_retries = hop_retries
+        self.interactive = interactive
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        if trace_file is not None:
+            tracer.open(trace_file)
+
+        # data table 생성, data_dir 이 있으면 disk 에 남아있는 data 를 먼저 복구함
+        self.data_table = DataTable()
+        self.storage = None
+        if data_dir is not None:
+            self.storage = Storage(data_dir, fsync=fsync)
+            self.storage.recover(self.data_table)
+            self.storage.start()
+
+        # 가상 노드마다 node table 생성, 0 번째 가상 노드는 서버의 address 를 그대로 사용함
+        self.node_tables = []
+        for i in range(vnodes):
+            address = vnode_address(self.address, i)
+            self.node_tables.append(NodeTable(generate_hash(address), address, self.data_table,
+                                              fingers_per_cycle=fingers_per_cycle))
+        for table in self.node_tables:
+            table.siblings = [other.cur_node for other in self.node_tables if other is not table]
+        self.node_table = self.node_tables[0]
+        self.bootstrap = bootstrap
+
+        # get, set, delete 를 처리하는 table, replication 을 사용하면 successor 들에게 복사본을 저장함
+        self.replicated_table = None
+        self.replica_collector = None
+        self.store = self.data_table
+        if replicas > 0:
+            self.replicated_table = ReplicatedDataTable(self.node_table, self.data_table, replicas, write_quorum,
+                                                        read_quorum, timeout=hop_timeout)
+            self.replica_collector = ReplicaCollector(self.replicated_table)
+            self.store = self.replicated_table
+
+        # near cache 를 사용하면, 담당 노드로서 lease 를 준 노드들을 기억했다가 값이 바뀌면 Invalidate 를 보냄
+        self.near_cache = None
+        if near_cache > 0:
+            self.near_cache = NearCache(near_cache, lease)
+            self.store = LeasedDataTable(self.store, max_lease=lease, timeout=hop_timeout)
+
+        # 담당 노드로서 처리한 get / set 의 key 를 세고, 자주 읽히는 key 는 successor 들에게 읽기용 복사본을 둠
+        self.hot_keys = HotKeyDataTable(self.store, self.node_table_for, replicas=hot_replicas,
+                                        threshold=hot_threshold, window=hot_window, timeout=hop_timeout)
+        self.store = self.hot_keys
+        # 다른 노드가 보낸 읽기용 복사본과, 복사본을 가진 노드들의 위치
+        self.read_replicas = ReadReplicas(ttl=hot_window)
+
+        # 주변 노드들이 가진 key 의 Bloom filter, 본인의 filter 는 data table 과 복사본으로 만듦
+        self.key_filters = None
+        if key_filters:
+            self.key_filters = KeyFilters(self.node_tables, self.data_table, interval=filter_interval,
+                                          replicated_table=self.replicated_table)
 
-        # node table 생성
-        self.node_table = NodeTable(generate_hash(self.address), self.address, self.data_table)
+        # 결과를 기다리고 있는 get 요청들
+        self.pending_requests = PendingRequests()
+        # 같은 key 의 get 을 하나로 묶음, 결과가 오지 않은 채로 버려진 요청은 기다리는 목록에서 정리함
+        self.flights = SingleFlight(on_abandon=lambda flight: self.pending_requests.cancel(flight.request_id))
 
         # 기능 구현 대기
         self.command_listener = threading.Thread(target=self.listen_command)
@@ -37,89 +150,445 @@ class ChordNode:
         # 작동 시작
         self.serve()
 
+    def is_local(self, node: Data) -> bool:
+        # node 가 이 서버의 가상 노드인지 확인
+        return split_vnode(node.value)[0] == self.address
+
+    def node_table_for(self, key) -> NodeTable:
+        """
+        key 를 담당하는 가상 노드의 node table 을 return 합니다.
+        담당하는 가상 노드가 없으면, ring 위에서 key 바로 앞에 있는 가상 노드 (여기서부터 찾는 것이 가장 가까움) 를 return 합니다.
+        """
+        return min(self.node_tables, key=lambda table: ring_distance(table.cur_node.key, key))
+
+    def drop_cached(self, keys):
+        # 본인이 바꾸는 key 는 담당 노드의 Invalidate 를 기다리지 않고 near cache 에서 바로 지움 (바꾼 값을 바로 읽을 수 있도록)
+        if self.near_cache is not None:
+            for key in keys:
+                self.near_cache.invalidate(key)
+        # 담당 노드의 Bloom filter 에 반영되기 전에도 바꾼 key 를 읽을 수 있도록, 잠시 filter 를 사용하지 않음
+        if self.key_filters is not None:
+            for key in keys:
+                self.key_filters.note_write(key)
+
+    def get_future(self, key: str) -> Future:
+        """
+        key 에 해당하는 value 를 가져오는 요청을 보내고, 결과를 받을 Future 를 return 합니다.
+        Future 의 결과는 value 이며, 값이 없으면 None 입니다.
+
+        :param key: generate_hash 로 hashing 된 key
+        """
+        # 자기 자신이 가지고 있어야 하는 key 이면, 바로 결과를 넣어줌
+        node_table = self.node_table_for(key)
+        if node_table.is_responsible(key):
+            future = Future()
+            try:
+                future.set_result(self.store.get(key).value)
+            except ValueError:
+                future.set_result(None)
+            return future
+
+        # near cache 에 lease 가 남아있는 값이 있으면 담당 노드에게 묻지 않음
+        if self.near_cache is not None:
+            value = self.near_cache.get(key)
+            if value is not None:
+                future = Future()
+                future.set_result(value)
+                return future
+
+        # 담당 노드가 보낸 읽기용 복사본이 있으면 바로 응답함
+        value = self.read_replicas.get(key)
+        if value is not None:
+            future = Future()
+            future.set_result(value)
+            return future
+
+        # 담당 노드의 Bloom filter 에 없는 key 면 담당 노드에게 묻지 않음
+        if self.key_filters is not None and self.key_filters.definitely_absent(key):
+            future = Future()
+            future.set_result(None)
+            return future
+
+        # 같은 key 의 get 이 이미 진행 중이면 새로 보내지 않고 그 결과를 함께 받음
+        # 복사본을 가진 노드들을 알고 있으면, 그 중 하나에게 바로 보냄
+        future = Future()
+        future.flight, leader = self.flights.join(key, future)
+        if leader:
+            send_flight(node_table, self.pending_requests, self.flights, future.flight, path=self.trace_path(),
+                        lease_ms=self.near_cache.lease_ms if self.near_cache else 0,
+                        route=self.read_replicas.route(key))
+        return future
+
+    def trace_path(self):
+        # 다른 노드에게 보내는 요청에 담을 path, trace 를 기록하지 않으면 None
+        return [self.address] if tracer.enabled else None
+
+    def get(self, key: str, timeout: float = 5.0):
+        """
+        key 에 해당하는 value 를 가져올 때까지 기다린 뒤 return 합니다.
+
+        :param key: generate_hash 로 hashing 된 key
+        :param timeout: 결과를 기다리는 최대 시간 (초), iterative 방식에서는 hop_timeout 이 대신 사용됨
+        :return: value, 값이 없으면 None
+        :raise TimeoutError: timeout 안에 결과가 오지 않은 경우
+        :raise LookupError: iterative 방식에서 담당 노드를 찾지 못한 경우
+        """
+        if self.lookup_mode == ITERATIVE:
+            found, value, _ = self.iterative_request(key, b"", d.get)
+            return value if found else None
+
+        future = self.get_future(key)
+        try:
+            return future.result(timeout=timeout)
+        except futures.TimeoutError:
+            self.flights.abandon(future.flight)
+            raise TimeoutError(f'get request for key:{short_id(key)} is timed out')
+
+    def iterative_request(self, key, value: bytes, data_handling_type: int, attempts: int = 2):
+        """
+        key 를 담당하는 노드를 iterative 하게 찾은 뒤, 그 노드에게 직접 요청하고 결과를 기다립니다.
+        찾은 노드가 그 사이에 담당 노드가 아니게 되었거나 응답하지 않으면, attempts 번까지 다시 찾습니다.
+
+        :param key: generate_hash 로 hashing 된 key
+        :param value: set 시에 저장할 value
+        :param data_handling_type: utils.DataHandlingType 의 get, set, delete
+        :return: (key 존재 여부, value, 거쳐간 노드들의 list)
+        :raise LookupError: 담당 노드를 찾지 못했거나, 담당 노드가 요청을 처리하지 못한 경우
+        """
+        started = time.monotonic()
+        node_table = self.node_table_for(key)
+        for _ in range(attempts):
+            owner, path = node_table.lookup(key, hop_timeout=self.hop_timeout, retries=self.hop_retries)
+            if self.is_local(owner):
+                entry = chord_pb2.KeyValue(data_key=id_to_bytes(key), data_value=value)
+                result = handle_local_entry(self.store, entry, data_handling_type)
+                if result.error:
+                    raise LookupError(f'failed to handle key:{short_id(key)}: {result.error}')
+                return result.found, result.data_value, path
+
+            reply = query_request(owner, key, value, data_handling_type, timeout=self.hop_timeout)
+            if reply and not reply.redirect:
+                if reply.error:
+                    raise LookupError(f'failed to handle key:{short_id(key)} in {owner.value}: {reply.error}')
+                tracer.record(self.address, uuid.uuid4().hex, data_type_name(data_handling_type), key, ITERATIVE,
+                              len(path) - 1, [node.value for node in path], time.monotonic() - started)
+                return reply.found, reply.data_value, path
+        raise LookupError(f'failed to handle key:{short_id(key)} after {attempts} attempts')
+
+    def multi_get(self, keys: list) -> dict:
+        """
+        여러 key 의 value 를 한 번에 가져옵니다. 담당 노드별로 묶어서 노드당 한 번씩만 요청합니다.
+
+        :param keys: generate_hash 로 hashing 된 key 들
+        :return: {key: value}, 값이 없는 key 의 value 는 None
+        """
+        entries = [chord_pb2.KeyValue(data_key=id_to_bytes(key)) for key in keys]
+        results = process_multi_data(self.node_table, self.store, self.node_table.cur_node, entries, d.get)
+        return {id_from_bytes(result.data_key): result.data_value if result.found else None for result in results}
+
+    def multi_set(self, items: dict) -> dict:
+        """
+        :param items: {hashing 된 key: value}
+        :return: {key: 저장 여부}, 담당 노드에게 보내지 못했거나 write quorum 을 채우지 못했으면 False
+        """
+        self.drop_cached(items)
+        entries = [chord_pb2.KeyValue(data_key=id_to_bytes(key), data_value=value) for key, value in items.items()]
+        results = process_multi_data(self.node_table, self.store, self.node_table.cur_node, entries, d.set)
+        return {id_from_bytes(result.data_key): result.found for result in results}
+
+    def multi_delete(self, keys: list) -> dict:
+        """
+        :return: {key: 삭제 여부}, key 가 없었으면 False
+        """
+        self.drop_cached(keys)
+        entries = [chord_pb2.KeyValue(data_key=id_to_bytes(key)) for key in keys]
+        results = process_multi_data(self.node_table, self.store, self.node_table.cur_node, entries, d.delete)
+        return {id_from_bytes(result.data_key): result.found for result in results}
+
+    def join(self, address: str) -> bool:
+        """
+        address 의 노드가 속해 있는 ring 에 join 합니다.
+        :return: join 에 성공하면 True, 노드가 응답하지 않으면 False
+        """
+        # 가상 노드마다 따로 join 함
+        for table in self.node_tables:
+            if not table.join(Data(None, address)):
+                logging.info(f"failed to join, {address} is not responding")
+                return False
+            logging.info(f"finishing join node {table.cur_node.value}, successor is {table.successor.value}")
+        return True
+
+    def leave(self):
+        """
+        data 를 predecessor 에게 넘기고, predecessor 와 successor 에게 서로를 알려준 뒤 서버를 종료합니다.
+        replication 을 사용하면 successor 들이 이미 복사본을 가지고 있으므로 data 를 넘기지 않습니다.
+        """
+        # background thread 로 동작하는 가상 노드들의 주기 작업 (handoff 포함) 을 먼저 멈춰야,
+        # 나가는 도중에 가상 노드끼리 data 를 주고받지 않음 (main thread 의 node table 은 leave 에서 멈춤)
+        background = [table for table in self.node_tables if table.is_alive()]
+        for table in background:
+            table.stop_flag = True
+        for table in background:
+            # NodeTable.join 은 ring 에 join 하는 method 이므로, thread 가 끝나기를 기다릴 때는 Thread.join 을 직접 호출함
+            threading.Thread.join(table, table.update_interval)
+
+        # 가상 노드마다 본인의 범위 [n, successor) 를 이어받을 노드 (다른 서버에 있는 가장 가까운 predecessor)
+        # ring 에서 나가면 predecessor 와 successor 가 바뀌므로 먼저 계산해둠
+        tables = {table.cur_node.value: table for table in self.node_tables}
+        spans = []
+        for table in self.node_tables:
+            receiver = table.predecessor
+            for _ in range(len(tables)):
+                if not self.is_local(receiver):
+                    break
+                receiver = tables[receiver.value].predecessor
+            if not self.is_local(receiver):
+                spans.append((receiver, table.cur_node.key, table.successor.key))
+
+        for table in self.node_tables:
+            table.leave(handoff=False)
+        if self.replicated_table is None:
+            # 서버를 먼저 닫아서 더 이상 data 를 받지 않게 한 뒤, 함께 사용하던 data table 을 범위별로 넘김
+            # 이후에 남은 key (담당 범위 밖의 key) 는 한 노드에게 넘기고, 받은 노드가 담당 노드에게 전달함
+            self.server.stop(0)
+            for receiver, start, end in spans:
+                self.node_table.transfer_range(receiver, start, end)
+            receivers = [receiver for receiver, _, _ in spans]
+            if receivers and not self.node_table.transfer_range(receivers[0], self.node_table.cur_node.key,
+                                                                self.node_table.cur_node.key):
+                logging.info(f'failed to hand off data to {receivers[0].value}, keep {len(self.data_table)} keys')
+        self.stop()
+        logging.info('left the network')
+
     # TODO : Get/Set/Remove/Join에 대한 핸들링 추가 및 프로토콜 결정 (우선순위 높음)
     def command_handler(self, command):
         commands = command.split()
 
         if commands[0] == 'get':
-            key = commands[1]
+            key = generate_hash(commands[1])
+            started = time.time()
             try:
-                value = self.data_table.get(key)
-                logging.info(f"request key:{key[:10]}'s value is {value}, stored in {self.address}")
-            except ValueError:
-                # 먼저, 해당하는 finger table이 살아있는지, 죽었으면 그 밑에 노드로 계속 보내는 health check 작업이 필요하다.
-                nearest_node = self.node_table.find_nearest_alive_node(key)
-                data_request(self.node_table.cur_node, nearest_node, Data(key, ""), d.get)
+                value = self.get(key)
+                elapsed = (time.time() - started) * 1000
+                shown = show_value(value) if value is not None else "not found"
+                logging.info(f"request key:{short_id(key)}'s value is {shown} ({elapsed:.1f}ms)")
+            except TimeoutError as e:
+                logging.info(e)
 
         elif commands[0] == 'set':
-            key, value = commands[1].split(":")
-            key = generate_hash(key)
-            # 만약 자기 자신에 넣어야 하면
-            cur_key = self.node_table.cur_node.key
-            successor_key = self.node_table.finger_table.entries[n.successor].key
-
+            # value 에는 ':' 와 공백이 들어갈 수 있으므로, 처음 나오는 ':' 로만 key 와 value 를 나눔
+            key, _, value = command.split(None, 1)[1].partition(":")
+            key, value = generate_hash(key), to_value(value)
+            self.drop_cached([key])
+            if self.lookup_mode == ITERATIVE:
+                _, _, path = self.iterative_request(key, value, d.set)
+                logging.info(f"request key:{short_id(key)}'s value is set to {show_value(value)}, stored in {path[-1].value}")
             # 만약 자기 자신에 넣을 수 있으면 자기 자신에 넣음
-            if cur_key <= key < successor_key or successor_key < cur_key <= key or key < successor_key < cur_key:
-                self.data_table.set(key, value)
-                logging.info(f"request key:{key[:10]}'s value is set to {value}, stored in {self.address}")
+            elif self.node_table_for(key).is_responsible(key):
+                try:
+                    self.store.set(key, value)
+                    logging.info(f"request key:{short_id(key)}'s value is set to {show_value(value)}, stored in {self.address}")
+                except WriteQuorumError as e:
+                    logging.info(f"failed to set key:{short_id(key)}: {e}")
             # 아닐 경우 살아있는 가장 가까운 노드를 찾아서 넣음
             else:
-                nearest_node = self.node_table.find_nearest_alive_node(key)
-                data_request(self.node_table.cur_node, nearest_node, Data(key, value), d.set)
+                node_table = self.node_table_for(key)
+                nearest_node = node_table.find_nearest_alive_node(key)
+                data_request(node_table.cur_node, nearest_node, Data(key, value), d.set, uuid.uuid4().hex,
+                             path=self.trace_path())
 
         elif commands[0] == 'delete':
-            key = commands[1]
-            try:
-                self.data_table.delete(key)
-                logging.info(f"request key:{key[:10]} is deleted from {self.address}")
-            except ValueError:
-                nearest_node = self.node_table.find_nearest_alive_node(key)
-                data_request(self.node_table.cur_node, nearest_node, Data(key, ""), d.delete)
+            key = generate_hash(commands[1])
+            self.drop_cached([key])
+            if self.lookup_mode == ITERATIVE:
+                found, _, path = self.iterative_request(key, b"", d.delete)
+                if found:
+                    logging.info(f"request key:{short_id(key)} is deleted from {path[-1].value}")
+                else:
+                    logging.info(f"request key:{short_id(key)} is not found")
+                return
+            # 자기 자신이 담당하는 key 면 바로 지우고, 아니면 살아있는 가장 가까운 노드에게 넘김
+            node_table = self.node_table_for(key)
+            if node_table.is_responsible(key):
+                try:
+                    self.store.delete(key)
+                    logging.info(f"request key:{short_id(key)} is deleted from {self.address}")
+                except ValueError:
+                    logging.info(f"request key:{short_id(key)} is not found")
+                except WriteQuorumError as e:
+                    logging.info(f"failed to delete key:{short_id(key)}: {e}")
+            else:
+                nearest_node = node_table.find_nearest_alive_node(key)
+                data_request(node_table.cur_node, nearest_node, Data(key, b""), d.delete, uuid.uuid4().hex,
+                             path=self.trace_path())
+
+        elif commands[0] == 'mget':
+            keys = {generate_hash(key): key for key in commands[1:]}
+            values = self.multi_get(list(keys))
+            for hashed_key, key in keys.items():
+                value = values.get(hashed_key)
+                print(f'{key}: {show_value(value) if value is not None else "not found"}')
+            print()
+
+        elif commands[0] == 'mset':
+            items = dict()
+            for item in commands[1:]:
+                key, _, value = item.partition(":")
+                items[generate_hash(key)] = to_value(value)
+            results = self.multi_set(items)
+            logging.info(f"{sum(results.values())} of {len(results)} keys are set")
+
+        elif commands[0] == 'mdelete':
+            results = self.multi_delete([generate_hash(key) for key in commands[1:]])
+            logging.info(f"{sum(results.values())} of {len(results)} keys are deleted")
+
+        elif commands[0] == 'lookup':
+            # key 를 담당하는 노드와, 찾기 위해 거쳐간 노드들을 출력
+            key = generate_hash(commands[1])
+            started = time.time()
+            owner, path = self.node_table_for(key).lookup(key, hop_timeout=self.hop_timeout,
+                                                          retries=self.hop_retries)
+            elapsed = (time.time() - started) * 1000
+            print(f'key:{short_id(key)} is stored in {owner.value} ({len(path) - 1} hops, {elapsed:.1f}ms)')
+            print(' -> '.join(node.value for node in path))
+            print()
+
+        elif commands[0] == 'mode':
+            if len(commands) > 1:
+                if commands[1] not in LOOKUP_MODES:
+                    print(f'unknown lookup mode: {commands[1]}, use one of {", ".join(LOOKUP_MODES)}')
+                    return
+                self.lookup_mode = commands[1]
+            print(f'lookup mode: {self.lookup_mode}')
 
         elif commands[0] == 'join':
-            toss_message(self.node_table.cur_node, Data("", commands[1]), t.join_node)
-            logging.info(f"finishing join node, will update finger table...")
-            toss_message(self.node_table.cur_node, self.node_table.finger_table.entries[n.successor], t.finger_table_setting, 1, t.join_node)
+            self.join(commands[1])
 
         elif commands[0] == 'disjoin':
-            self.server.stop(0)  # HealthCheck를 못 받게 모든 서버 종료
-            self.node_table.stop_flag = True    # health check 송신 종료
-            logging.info('Waiting for other nodes to update their finger tables')
-            time.sleep(10)  # 다른 Node들이 FingerTable을 업데이트할때까지 대기
-            for entry in self.data_table.entries:
-                threading.Thread(
-                    target=data_request,
-                    args=(self.node_table.cur_node, self.node_table.predecessor, entry, d.set)).start()
-            toss_message(self.node_table.cur_node, self.node_table.finger_table.entries[n.successor], t.finger_table_setting, 1, t.left_node)
+            self.leave()
 
         elif commands[0] == 'show':  # 노드 테이블 정보 출력하는 기능 추가
-            self.node_table.log_nodes()
+            for table in self.node_tables:
+                if len(self.node_tables) > 1:
+                    print(f'virtual node {table.cur_node.value} ({short_id(table.cur_node.key)})')
+                table.log_nodes()
 
         elif commands[0] == 'summary':
-            self.data_table.summary()
+            self.store.summary()
+
+        elif commands[0] == 'pool':
+            stats = channel_pool.stats()
+            print(f"channels: {stats['size']}, hits: {stats['hits']}, misses: {stats['misses']}, "
+                  f"evictions: {stats['evictions']}")
+            print()
+
+        elif commands[0] == 'detector':
+            stats = self.node_table.failure_detector.stats()
+            print(f"alive: {stats['alive']}, suspect: {stats['suspect']}, dead: {stats['dead']}")
+            print(f"probes: {stats['probes']}, failures: {stats['probe_failures']}, detections: {stats['detections']}")
+            print(f"detection latency avg: {stats['detection_latency_avg']:.2f}s, "
+                  f"max: {stats['detection_latency_max']:.2f}s")
+            print()
+
+        elif commands[0] == 'storage':
+            if self.storage is None:
+                print('storage is not used (run with --data-dir)')
+                return
+            stats = self.storage.stats()
+            print(f"wal segment: {stats['segment']}, records since snapshot: {stats['wal_records']}, "
+                  f"appends: {stats['appends']}, fsyncs: {stats['syncs']}")
+            print(f"snapshots: {stats['snapshots']} (last {stats['last_snapshot_seconds']:.2f}s), "
+                  f"recovered {stats['recovered_records']} records in {stats['recovery_seconds']:.2f}s")
+            print()
+
+        elif commands[0] == 'replication':
+            if self.replicated_table is None:
+                print('replication is not used (run with --replicas)')
+                return
+            stats = self.replicated_table.stats()
+            print(f"replicas: {stats['replicas']}, write quorum: {stats['write_quorum']}, "
+                  f"read quorum: {stats['read_quorum']}, stored replicas: {stats['replica_entries']}")
+            print(f"writes: {stats['writes']} (quorum failures: {stats['write_quorum_failures']}), "
+                  f"reads: {stats['reads']} (quorum failures: {stats['read_quorum_failures']}), "
+                  f"read repairs: {stats['read_repairs']}")
+            print()
+
+        elif commands[0] == 'cache':
+            if self.near_cache is None:
+                print('near cache is not used (run with --near-cache)')
+                return
+            stats = self.near_cache.stats()
+            leases = self.store.stats()
+            print(f"entries: {stats['entries']}/{stats['capacity']}, lease: {stats['lease']:.2f}s, "
+                  f"hits: {stats['hits']}, misses: {stats['misses']} (hit ratio {stats['hit_ratio']:.3f})")
+            print(f"expired: {stats['expired']}, evictions: {stats['evictions']}, "
+                  f"invalidations received: {stats['invalidations']}")
+            print(f"leases granted: {leases['granted']} (active {leases['active_leases']}), "
+                  f"invalidations sent: {leases['invalidations']} (failures {leases['invalidation_failures']})")
+            print()
+
+        elif commands[0] == 'hotkeys':
+            # 담당 노드로서 많이 요청된 key, count 는 window 마다 절반으로 줄어드는 추정값
+            k = int(commands[1]) if len(commands) > 1 else 10
+            stats = self.hot_keys.hot_stats()
+            print(f"threshold: {stats['threshold']:.0f} gets per {stats['window']:.1f}s, "
+                  f"replicas: {stats['replicas']}, replicated keys: {stats['replicated']}, "
+                  f"pushes: {stats['pushes']} (failures {stats['push_failures']})")
+            print(f"{'key':<12}{'count':>10}{'error':>10}{'gets':>10}{'sets':>10}{'replicas':>10}")
+            for key, count, error, gets, sets, replicas in self.hot_keys.top(k):
+                print(f"{short_id(key):<12}{count:>10.1f}{error:>10.1f}{gets:>10.1f}{sets:>10.1f}{replicas:>10}")
+            print()
+
+        elif commands[0] == 'stats':
+            for line in metrics.report():
+                print(line)
+            print()
 
         elif commands[0] == 'ft_update':
-            toss_message(self.node_table.cur_node, self.node_table.finger_table.entries[0], t.finger_table_setting, 1)
+            # finger table 전체를 한 번에 갱신
+            for table in self.node_tables:
+                table.fix_fingers(len(table.finger_table.entries))
 
     def listen_command(self):
         try:
             while True:
                 command = input("> ")
-                self.command_handler(command)
+                try:
+                    self.command_handler(command)
+                except LookupError as e:
+                    logging.info(e)
         except KeyboardInterrupt:
             print('Terminated By User')
             self.server.stop(0)
+            if self.storage is not None:
+                self.storage.close()
 
     def serve(self):
-        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+        executor = futures.ThreadPoolExecutor(max_workers=10)
+        metrics.track_executor('server', executor)
+        metrics.track_data_table(self.data_table)
+        self.server = grpc.server(executor, interceptors=[ServerMetricsInterceptor()])
 
         # 이 부분이 server에 메시지 핸들러들을 등록시킴
-        chord_pb2_grpc.add_HealthCheckerServicer_to_server(HealthCheckService(self.node_table), self.server)
-        chord_pb2_grpc.add_GetNodeValueServicer_to_server(GetNodeValueService(self.node_table), self.server)
-        chord_pb2_grpc.add_NotifyNodeServicer_to_server(NotifyNodeService(self.node_table), self.server)
-        chord_pb2_grpc.add_TossMessageServicer_to_server(TossMessageService(self.node_table), self.server)
-        chord_pb2_grpc.add_HandleDataServicer_to_server(HandleDataService(self.node_table, self.data_table),
-                                                        self.server)
+        # 가상 노드가 여러 개면, 요청의 metadata 에 있는 가상 노드 번호에 따라 해당 가상 노드의 servicer 가 처리함
+        tables = self.node_tables
+        chord_pb2_grpc.add_HealthCheckerServicer_to_server(
+            virtual_node_servicer([HealthCheckService(table) for table in tables]), self.server)
+        chord_pb2_grpc.add_GetNodeValueServicer_to_server(
+            virtual_node_servicer([GetNodeValueService(table, self.key_filters) for table in tables]), self.server)
+        chord_pb2_grpc.add_NotifyNodeServicer_to_server(
+            virtual_node_servicer([NotifyNodeService(table) for table in tables]), self.server)
+        chord_pb2_grpc.add_HandleDataServicer_to_server(
+            virtual_node_servicer([HandleDataService(table, self.store, self.pending_requests, self.near_cache,
+                                                     self.flights, self.read_replicas, self.key_filters,
+                                                     self.replicated_table)
+                                   for table in tables]),
+            self.server)
+        chord_pb2_grpc.add_ClientDataServicer_to_server(
+            virtual_node_servicer([ClientDataService(table, self.store, self.replicated_table) for table in tables]),
+            self.server)
+        if self.replicated_table is not None:
+            chord_pb2_grpc.add_ReplicaServicer_to_server(ReplicaService(self.replicated_table), self.server)
 
         # 서버 포트 지정 및 서버 시작
         self.server.add_insecure_port(self.address)
@@ -127,6 +596,42 @@ class ChordNode:
 
         logging.info(f'ChordServer is listening on {self.address}')
 
-        # 기능 시작 (thread 구분)
+        if self.metrics_port:
+            self.metrics_server = MetricsServer(self.address.rsplit(':', 1)[0], self.metrics_port)
+            self.metrics_server.start()
+            logging.info(f'metrics are served on http://{self.metrics_server.address}/metrics')
+
+        if self.bootstrap is not None:
+            self.join(self.bootstrap)
+        else:
+            # 혼자 ring 을 시작할 때도 나머지 가상 노드들은 0 번째 가상 노드의 ring 에 join 함
+            for table in self.node_tables[1:]:
+                table.join(self.node_table.cur_node)
+
+        # 기능 시작 (thread 구분), interactive 모드에서는 0 번째 가상 노드의 node table 이 main thread 에서 동작함
+        background = self.node_tables if not self.interactive else self.node_tables[1:]
+        for table in background:
+            table.daemon = True
+            table.start()
+        if self.key_filters is not None:
+            self.key_filters.start()
+        if self.replica_collector is not None:
+            self.replica_collector.start()
+        if not self.interactive:
+            return
         self.command_listener.start()
         self.node_table.run()
+
+    def stop(self):
+        # background 로 동작하는 node table 과 서버를 종료함 (ring 에서 나가지는 않음)
+        for table in self.node_tables:
+            table.stop_flag = True
+        if self.key_filters is not None:
+            self.key_filters.stop_flag = True
+        if self.replica_collector is not None:
+            self.replica_collector.stop_flag = True
+        self.server.stop(0)
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.storage is not None:
+            self.storage.close()
@@ -4,10 +4,13 @@ import bisect
 from typing import List
 from multipledispatch import dispatch
 
+from utils import short_id, show_value, RING_SIZE
+
 
 class Data:
     # 기존의 Node를 Data로 합침 (어차피 DHT에서 모든 값은 key-value로 저장되기 때문에, 이런 방식을 택함)
     lock = Lock()  # 여러 스레드에서 접근할 수 있기 때문에 mutex lock선언
+    __slots__ = ('key', 'value')  # 객체마다 __dict__ 를 만들지 않도록 해서 메모리를 줄임
 
     def __init__(self, key, value):
         self.key = key
@@ -20,11 +23,11 @@ class Data:
         return self.key == other.key
 
     def __str__(self):
-        return f'Key: {self.key}, Value: {self.value}'
+        return f'Key: {short_id(self.key)}, Value: {show_value(self.value)}'
 
-    @dispatch(str, str, int)  # -> 메소드 오버로딩
+    @dispatch(object, object, int)  # -> 메소드 오버로딩
     def update_info(self, key, value, loc: int):
-        logging.info(f'finger_table[{loc}] is updated, {self.key[:10]}:{self.value} to {key[:10]}:{value}')
+        logging.info(f'finger_table[{loc}] is updated, {short_id(self.key)}:{self.value} to {short_id(key)}:{value}')
         with self.lock:  # 값을 변경할 때, 동시 접근이 존재할수도 있으므로, mutex lock을 건 상태에서 진행
             self.__init__(key, value)
 
@@ -33,7 +36,7 @@ class Data:
         key = data.key
         value = data.value
         self.update_info(key, value, loc)  # 에러 날 시 밑부분 주석 제거하고, 이 부분 주석처리할것.
-        logging.info(f'finger_table[{loc}] is updated, {self.key[:10]}:{self.value} to {key[:10]}:{value}')
+        logging.info(f'finger_table[{loc}] is updated, {short_id(self.key)}:{self.value} to {short_id(key)}:{value}')
         # with self.lock:  # 값을 변경할 때, 동시 접근이 존재할수도 있으므로, mutex lock을 건 상태에서 진행
         #     self.__init__(key, value)
 
@@ -74,7 +77,7 @@ class TableEntry:
     def get(self, key):
         return self.entries[self.index(key)]
 
-    @dispatch(str, str)
+    @dispatch(object, object)
     def set(self, key, value):
         try:
             location = self.index(key)
@@ -89,7 +92,7 @@ class TableEntry:
         value = data.value
         self.set(key, value)  # 만약 이 부분에서 오류가 날 시, 적절히 처리해줄 것
 
-    @dispatch(str, str)
+    @dispatch(object, object)
     def append(self, key, value):
         self.entries.append(Data(key, value))
 
@@ -113,3 +116,320 @@ class TableEntry:
             self.entries.sort()
         else:
             raise ValueError('concat_type = "trailing" or "leading" or "sort"')
+
+
+class SortedKeyIndex:
+    """
+    key 들을 정렬된 순서로 가지고 있는 index
+    B+ tree 처럼, 정렬된 key 들을 최대 2 * load 개씩 작은 list (chunk) 로 나누어 가지고 있고,
+    각 chunk 의 최댓값 list (maxes) 로 chunk 를 찾음
+
+    하나의 큰 list 에 bisect.insort 하는 것과 다르게, 삽입/삭제 시 chunk 하나 안에서만 원소를 옮기므로
+    key 가 많아져도 삽입/삭제 비용이 O(log n) 에 가깝게 유지됨
+    """
+
+    def __init__(self, load: int = 512):
+        self.load = load
+        self.chunks: List[list] = list()
+        self.maxes: list = list()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield from chunk
+
+    def add(self, key):
+        self.size += 1
+        if not self.chunks:
+            self.chunks.append([key])
+            self.maxes.append(key)
+            return
+
+        pos = bisect.bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            # 가장 큰 key 면 마지막 chunk 의 뒤에 붙임
+            pos -= 1
+            self.chunks[pos].append(key)
+            self.maxes[pos] = key
+        else:
+            bisect.insort(self.chunks[pos], key)
+
+        # chunk 가 너무 커지면 반으로 나눔
+        chunk = self.chunks[pos]
+        if len(chunk) > 2 * self.load:
+            half = chunk[self.load:]
+            del chunk[self.load:]
+            self.maxes[pos] = chunk[-1]
+            self.chunks.insert(pos + 1, half)
+            self.maxes.insert(pos + 1, half[-1])
+
+    def remove(self, key):
+        pos = bisect.bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            raise ValueError('key not found in index')
+        chunk = self.chunks[pos]
+        i = bisect.bisect_left(chunk, key)
+        if i == len(chunk) or chunk[i] != key:
+            raise ValueError('key not found in index')
+
+        del chunk[i]
+        self.size -= 1
+        if not chunk:
+            del self.chunks[pos]
+            del self.maxes[pos]
+        else:
+            self.maxes[pos] = chunk[-1]
+
+    def split(self, key):
+        """
+        key 보다 크거나 같은 key 들을 떼어내서 새로운 index 로 return 합니다.
+        key 가 들어있는 chunk 하나만 나누고, 나머지 chunk 들은 list 째로 옮깁니다.
+        """
+        upper = SortedKeyIndex(self.load)
+        pos = bisect.bisect_left(self.maxes, key)
+        if pos == len(self.maxes):
+            return upper
+        chunk = self.chunks[pos]
+        i = bisect.bisect_left(chunk, key)
+        if i > 0:
+            # key 가 chunk 의 중간에 있으면, chunk 를 나눠서 뒷부분만 옮김
+            upper.chunks.append(chunk[i:])
+            upper.maxes.append(chunk[-1])
+            del chunk[i:]
+            self.maxes[pos] = chunk[-1]
+            pos += 1
+        upper.chunks += self.chunks[pos:]
+        upper.maxes += self.maxes[pos:]
+        del self.chunks[pos:]
+        del self.maxes[pos:]
+        upper.size = sum(len(chunk) for chunk in upper.chunks)
+        self.size -= upper.size
+        return upper
+
+
+class Segment:
+    """
+    DataTable 의 한 key 범위 [start, end) 에 속하는 data 들
+    key 로 Data 를 찾는 것은 dict 로, key 순서대로 순회하는 것은 SortedKeyIndex 로 처리함
+    end 는 DataTable 에서 떼어낸 (detach) segment 에만 기록되며, table 안에서는 다음 segment 의 start 가 end 임
+    """
+
+    def __init__(self, start: int, end: int = None):
+        self.start = start
+        self.end = end
+        self.data = dict()  # key -> Data
+        self.key_index = SortedKeyIndex()
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def entries(self) -> List[Data]:
+        return [self.data[key] for key in self.key_index]
+
+    def split(self, key) -> 'Segment':
+        # key 보다 크거나 같은 data 를 떼어내서 [key, ...) 범위의 새로운 segment 로 return
+        upper = Segment(key)
+        upper.key_index = self.key_index.split(key)
+        for k in upper.key_index:
+            upper.data[k] = self.data.pop(k)
+        return upper
+
+
+class DataTable:
+    """
+    DataTable 의 data 를 저장하는 sorted map
+    ring 을 여러 key 범위 (Segment) 로 나눠서 저장하며, 각 segment 는 dict 와 SortedKeyIndex 를 가지고 있음
+    segment 의 경계는 노드의 key, successor 의 key 등 ring 의 구간에 맞춰서 나누므로 (split),
+    다른 노드에게 넘겨줄 key 범위는 segment 째로 떼어내거나 (detach) 다시 붙일 수 있음 (adopt)
+
+    TableEntry 와 같은 get / set / delete / summary / concat 을 제공하며,
+    TableEntry 는 list 이므로 삽입/삭제가 O(n) 이지만, DataTable 은 O(log n) 에 처리함
+
+    1. get: key를 가지는 Data 반환
+    2. set: key를 가지는 Data의 value를 변경하거나, 존재하지 않는 경우 Data를 추가
+    3. delete: key를 가지는 Data 삭제
+    4. entries: key 순서대로 정렬된 Data list
+    5. detach: ring 위의 [start, end) 범위의 segment 들을 떼어내서 return
+    6. adopt: detach 한 segment 들을 다시 붙임
+
+    storage (storage.Storage) 가 등록되어 있으면, set / delete / detach 를 적용한 순서대로 WAL 에 기록함
+    insert_listener 가 등록되어 있으면, set / adopt 로 새 key 가 추가될 때마다 key 를 넘겨서 호출함 (key_filter.KeyFilters)
+    """
+
+    def __init__(self):
+        # segments[i] 는 [starts[i], starts[i + 1]) 범위를 가지며, 첫 segment 는 항상 0 부터 시작함
+        self.segments: List[Segment] = [Segment(0)]
+        self.starts = [0]
+        self.size = 0
+        self.lock = Lock()  # 여러 스레드에서 동시에 삽입/삭제할 수 있으므로 mutex lock 선언
+        self.storage = None
+        self.insert_listener = None  # lock 을 잡은 상태에서 호출되므로 오래 걸리는 작업을 하면 안 됨
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self._segment(key).data
+
+    def __iter__(self):
+        # 순회 도중에 다른 스레드가 값을 바꿀 수 있으므로, 현재 상태의 복사본을 순회함
+        return iter(self.entries)
+
+    @property
+    def entries(self) -> List[Data]:
+        with self.lock:
+            return list(self.iter_entries())
+
+    def iter_entries(self):
+        # key 순서대로 Data 를 순회함, lock 을 잡은 상태에서 호출해야 함 (storage 의 snapshot 등)
+        for segment in self.segments:
+            for key in segment.key_index:
+                yield segment.data[key]
+
+    def summary(self):
+        logging.info(f'showing table entry... ')
+        print(f'Number of Entries: {self.size}')
+        for i, entry in enumerate(self.entries):
+            print(i, str(entry))
+        print()
+
+    def _segment(self, key) -> Segment:
+        # lock 을 잡은 상태에서 호출해야 함, detach / adopt 가 starts 와 segments 를 함께 바꾸는 도중이면 다른 segment 를 찾을 수 있음
+        return self.segments[bisect.bisect_right(self.starts, key) - 1]
+
+    def get(self, key):
+        with self.lock:
+            data = self._segment(key).data.get(key)
+        if data is None:
+            raise ValueError('key not found in table')
+        return data
+
+    @dispatch(object, object)
+    def set(self, key, value):
+        with self.lock:
+            if self.storage is not None:
+                self.storage.log_set(key, value)
+            segment = self._segment(key)
+            data = segment.data.get(key)
+            if data is not None:
+                data.value = value
+                return
+            segment.data[key] = Data(key, value)
+            segment.key_index.add(key)
+            self.size += 1
+            if self.insert_listener is not None:
+                self.insert_listener(key)
+
+    @dispatch(object)
+    def set(self, data):
+        self.set(data.key, data.value)
+
+    def delete(self, key):
+        with self.lock:
+            segment = self._segment(key)
+            data = segment.data.pop(key, None)
+            if data is None:
+                raise ValueError('key not found in table')
+            segment.key_index.remove(key)
+            self.size -= 1
+            if self.storage is not None:
+                self.storage.log_delete(key)
+            return data
+
+    def concat(self, new_entries: List[Data], concat_type='sort'):
+        # key 순서는 항상 index 가 유지하므로, concat_type 과 관계없이 하나씩 추가함
+        if concat_type not in ('trailing', 'leading', 'sort'):
+            raise ValueError('concat_type = "trailing" or "leading" or "sort"')
+        for data in new_entries:
+            self.set(data.key, data.value)
+
+    @staticmethod
+    def _linear_ranges(start, end) -> list:
+        # ring 위의 [start, end) 를 0 을 넘어가지 않는 범위들로 나눔, start 와 end 가 같으면 ring 전체
+        if start < end:
+            return [(start, end)]
+        ranges = [(start, RING_SIZE)]
+        if end > 0:
+            ranges.append((0, end))
+        return ranges
+
+    def _split(self, key) -> int:
+        # key 에서 시작하는 segment 가 있도록 나누고, 그 segment 의 index 를 return (lock 을 잡은 상태에서 호출)
+        if key >= RING_SIZE:
+            return len(self.segments)
+        i = bisect.bisect_right(self.starts, key) - 1
+        if self.starts[i] == key:
+            return i
+        self.segments.insert(i + 1, self.segments[i].split(key))
+        self.starts.insert(i + 1, key)
+        return i + 1
+
+    def split(self, key):
+        """
+        key 를 경계로 segment 를 나눕니다. 이미 경계면 아무것도 하지 않습니다.
+        나눌 때는 key 가 속한 segment 의 뒷부분만 옮기므로, 같은 경계로 다시 나누는 것은 O(log n) 입니다.
+        """
+        with self.lock:
+            self._split(key)
+
+    def detach(self, start, end) -> List[Segment]:
+        """
+        ring 위의 [start, end) 범위의 segment 들을 table 에서 떼어내서 return 합니다. (data 를 하나씩 지우지 않음)
+        start 와 end 가 같으면 ring 전체를 떼어냅니다. 비어있는 segment 는 return 하지 않습니다.
+        """
+        detached = []
+        with self.lock:
+            for a, b in self._linear_ranges(start, end):
+                i, j = self._split(a), self._split(b)
+                removed = [segment for segment in self.segments[i:j] if len(segment)]
+                if i == 0:
+                    # 첫 segment 는 항상 0 부터 시작해야 하므로 빈 segment 로 바꿈
+                    self.segments[i:j] = [Segment(0)]
+                    self.starts[i:j] = [0]
+                else:
+                    # 떼어낸 범위는 비어있으므로, 앞 segment 의 범위를 늘려서 합침
+                    del self.segments[i:j]
+                    del self.starts[i:j]
+                if not removed:
+                    continue
+                for k, segment in enumerate(removed):
+                    segment.end = removed[k + 1].start if k + 1 < len(removed) else b
+                self.size -= sum(len(segment) for segment in removed)
+                if self.storage is not None:
+                    self.storage.log_delete_range(a, b)
+                detached += removed
+        return detached
+
+    def adopt(self, segments: List[Segment]):
+        """
+        detach 한 segment 들을 다시 붙입니다. (다른 노드에게 넘기는 데 실패한 경우)
+        segment 의 범위가 table 에서 비어있으면 segment 째로 붙이고, 그 사이에 저장된 key 가 있으면 그 값을 유지합니다.
+        """
+        with self.lock:
+            for segment in segments:
+                i, j = self._split(segment.start), self._split(segment.end)
+                if all(len(current) == 0 for current in self.segments[i:j]):
+                    self.segments[i:j] = [segment]
+                    self.starts[i:j] = [segment.start]
+                    adopted = segment.entries
+                else:
+                    adopted = []
+                    for key in segment.key_index:
+                        target = self._segment(key)
+                        if key not in target.data:
+                            target.data[key] = segment.data[key]
+                            target.key_index.add(key)
+                            adopted.append(segment.data[key])
+                segment.end = None
+                self.size += len(adopted)
+                if self.storage is not None:
+                    for data in adopted:
+                        self.storage.log_set(data.key, data.value)
+                if self.insert_listener is not None:
+                    for data in adopted:
+                        self.insert_listener(data.key)
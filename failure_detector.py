@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from concurrent import futures
+from threading import Lock
+
+from metrics import metrics
+from service import node_health_check
+
+"""
+failure_detector.py 는 주변 노드들의 생존 여부를 background 에서 확인하는 모듈입니다.
+
+finger table, predecessor, successor 들에게 동시에 health check 를 보내고,
+그 결과를 alive / suspect / dead 상태 table 에 저장합니다.
+routing 시에는 health check 를 직접 보내지 않고, 이 table 만 조회합니다.
+"""
+
+ALIVE = 'alive'
+SUSPECT = 'suspect'  # health check 가 실패했지만, 아직 dead 로 판정하기 전
+DEAD = 'dead'
+
+
+class _NodeStatus:
+    def __init__(self, now: float):
+        self.state = ALIVE
+        self.last_alive = now   # 마지막으로 health check 에 성공한 시각
+        self.last_probe = now   # 마지막으로 health check 를 보낸 시각
+        self.failures = 0       # 연속으로 실패한 횟수
+
+
+class FailureDetector(threading.Thread):
+
+    def __init__(self, node_table, interval: float = 1.0, ttl: float = 5.0, dead_threshold: int = 3,
+                 max_workers: int = 8, clock=time.monotonic):
+        """
+        :param node_table: 주변 노드 정보를 가지고 있는 NodeTable
+        :param interval: health check 를 보내는 주기 (초)
+        :param ttl: 이 시간보다 오래된 상태값은 신뢰하지 않음 (초)
+        :param dead_threshold: 연속으로 이 횟수만큼 실패하면 dead 로 판정함
+        :param max_workers: 동시에 보낼 수 있는 health check 수
+        :param clock: 현재 시각을 return 하는 함수
+        """
+        super().__init__(daemon=True)
+        self.node_table = node_table
+        self.interval = interval
+        self.ttl = ttl
+        self.dead_threshold = dead_threshold
+        self.clock = clock
+        self.executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        metrics.track_executor('failure_detector', self.executor)
+
+        # address -> _NodeStatus
+        self.status = dict()
+        self.lock = Lock()
+
+        # 통계값
+        self.probes = 0
+        self.probe_failures = 0
+        self.detections = 0
+        self.detection_latency_sum = 0.0
+        self.detection_latency_max = 0.0
+
+    def targets(self):
+        # 확인해야 할 노드 목록 (finger table, successor 들, predecessor), 본인과 중복 address 는 제외
+        nodes = list(self.node_table.finger_table.entries) + list(self.node_table.successors) + \
+            [self.node_table.predecessor]
+        addresses = dict()
+        for node in nodes:
+            if node.value != self.node_table.cur_node.value and node.value not in addresses:
+                addresses[node.value] = node
+        return list(addresses.values())
+
+    def probe_all(self):
+        nodes = self.targets()
+        results = self.executor.map(node_health_check, nodes)
+        for node, alive in zip(nodes, results):
+            self.record(node.value, alive)
+
+    def record(self, address: str, alive: bool):
+        metrics.inc('chord_health_checks_total', result='alive' if alive else 'failed')
+        now = self.clock()
+        with self.lock:
+            self.probes += 1
+            status = self.status.get(address)
+            if status is None:
+                status = _NodeStatus(now)
+                self.status[address] = status
+            status.last_probe = now
+
+            if alive:
+                if status.state != ALIVE:
+                    logging.info(f'node {address} is alive again')
+                status.state = ALIVE
+                status.last_alive = now
+                status.failures = 0
+                return
+
+            self.probe_failures += 1
+            status.failures += 1
+            if status.failures >= self.dead_threshold:
+                if status.state != DEAD:
+                    # 마지막으로 살아있던 시각부터 dead 판정까지 걸린 시간을 detection latency 로 기록
+                    latency = now - status.last_alive
+                    self.detections += 1
+                    self.detection_latency_sum += latency
+                    self.detection_latency_max = max(self.detection_latency_max, latency)
+                    logging.info(f'node {address} is dead (detected in {latency:.2f}s)')
+                status.state = DEAD
+            else:
+                status.state = SUSPECT
+
+    def state(self, address: str):
+        """
+        address 의 현재 상태를 return 합니다.
+        상태를 모르거나, ttl 보다 오래된 상태값이면 None 을 return 합니다.
+        """
+        with self.lock:
+            status = self.status.get(address)
+            if status is None or self.clock() - status.last_probe > self.ttl:
+                return None
+            return status.state
+
+    def is_alive(self, node) -> bool:
+        """
+        routing 시에 사용하는 생존 여부 확인 함수입니다. 네트워크 통신 없이 메모리에서만 확인합니다.
+        아직 확인하지 못한 노드는 살아있다고 가정하고, 다음 주기에 확인합니다.
+        """
+        if node.value == self.node_table.cur_node.value:
+            return True
+        return self.state(node.value) in (None, ALIVE)
+
+    def stats(self) -> dict:
+        with self.lock:
+            states = [status.state for status in self.status.values()]
+            return {
+                'probes': self.probes,
+                'probe_failures': self.probe_failures,
+                'detections': self.detections,
+                'detection_latency_avg': self.detection_latency_sum / self.detections if self.detections else 0.0,
+                'detection_latency_max': self.detection_latency_max,
+                'alive': states.count(ALIVE),
+                'suspect': states.count(SUSPECT),
+                'dead': states.count(DEAD),
+            }
+
+    def run(self):
+        while not self.node_table.stop_flag:
+            started = self.clock()
+            try:
+                self.probe_all()
+            except Exception as e:  # finger table 이 갱신되는 도중에 순회하면 실패할 수 있음, 다음 주기에 다시 시도
+                logging.debug(f'failure detector probe failed: {e}')
+            time.sleep(max(0.0, self.interval - (self.clock() - started)))
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,366 @@
+import logging
+import random
+import time
+from collections import OrderedDict
+from concurrent import futures
+from threading import Lock
+from typing import List
+
+from multipledispatch import dispatch
+
+from data_structure import Data
+from metrics import metrics
+from service import hot_replica_request
+from utils import short_id, split_vnode
+
+"""
+hotkeys.py 는 자주 요청되는 key (hot key) 를 찾고, 그 key 의 읽기용 복사본을 successor 들에게 두는 기능입니다.
+
+1. SpaceSaving: 담당 노드가 처리한 get / set 의 key 를 정해진 수의 counter 로 세는 sketch, 많이 요청된 상위 key 들을 근사적으로 유지함
+   - window 마다 count 를 절반으로 줄여서, 최근에 많이 요청된 key 가 위에 오게 함
+2. HotKeyDataTable (담당 노드): get / set 을 sketch 에 기록하고, get 이 threshold 를 넘는 key 는 다음 successor 들에게 복사본을 보냄
+   - get 결과에 복사본을 가진 노드들의 address 를 담아서, 요청한 노드가 다음 get 을 그 중 하나에게 바로 보내게 함
+   - set / delete 로 값이 바뀌면 복사본도 바로 바꾸고, 복사본은 ttl (window) 동안만 사용하며 계속 자주 읽히면 다시 보냄
+3. ReadReplicas (다른 노드): 받은 복사본과, get 결과로 알게 된 복사본의 위치 (route) 를 보관함
+
+복사본은 background 로 바꾸므로 잠시 이전 값을 읽을 수 있으며, 바꾸지 못해도 이전 값은 최대 ttl 동안만 사용됩니다.
+"""
+
+# 복사본을 보낼 때 사용하는 executor
+_hot_replica_executor = futures.ThreadPoolExecutor(max_workers=8)
+metrics.track_executor('hot_replica', _hot_replica_executor)
+
+
+class SpaceSaving:
+    """
+    Space-Saving 알고리즘으로 요청이 많은 key 들을 세는 sketch 입니다. (thread safe 하지 않음)
+    counter 가 가득 차면 가장 작은 counter 의 key 를 새 key 로 바꾸고, 이전 count 를 이어받아 error 로 기록합니다.
+    따라서 실제 요청 수는 count 보다 크지 않고, count - error 보다 작지 않습니다.
+    """
+
+    def __init__(self, capacity: int = 128):
+        """
+        :param capacity: 유지하는 counter 의 수, capacity 번째보다 많이 요청된 key 는 놓치지 않음
+        """
+        self.capacity = capacity
+        self.counters = dict()  # key -> [count, error, get 수, set 수]
+
+    def offer(self, key, kind: str) -> float:
+        """
+        :param kind: 'get' 또는 'set'
+        :return: key 의 추정 count
+        """
+        counter = self.counters.get(key)
+        if counter is None:
+            floor = 0.0
+            if len(self.counters) >= self.capacity:
+                victim = min(self.counters, key=lambda k: self.counters[k][0])
+                floor = self.counters.pop(victim)[0]
+            counter = self.counters[key] = [floor, floor, 0.0, 0.0]
+        counter[0] += 1
+        counter[2 if kind == 'get' else 3] += 1
+        return counter[0]
+
+    def estimate(self, key) -> float:
+        counter = self.counters.get(key)
+        return counter[0] if counter is not None else 0.0
+
+    def decay(self, factor: float = 0.5):
+        for counter in self.counters.values():
+            for i in range(4):
+                counter[i] *= factor
+
+    def top(self, k: int) -> list:
+        # (key, count, error, get 수, set 수) 의 list, count 가 큰 순서
+        ranked = sorted(self.counters.items(), key=lambda item: item[1][0], reverse=True)[:k]
+        return [(key, *counter) for key, counter in ranked]
+
+
+class HotKeyDataTable:
+    """
+    DataTable 과 같은 get / set / delete 를 제공하면서, 요청된 key 를 sketch 에 기록하고 hot key 를 successor 들에게 복제하는 table 입니다.
+    HandleDataService, ClientDataService 등에 다른 table 대신 넘겨서 사용하며, 그 외의 속성은 감싼 table 의 것을 사용합니다.
+    """
+
+    def __init__(self, data_table, node_table_for, capacity: int = 128, replicas: int = 0, threshold: float = 100.0,
+                 window: float = 10.0, timeout: float = 1.0, clock=time.monotonic):
+        """
+        :param data_table: 실제로 값을 저장하는 table (DataTable, ReplicatedDataTable, LeasedDataTable)
+        :param node_table_for: key 를 받아 그 key 를 담당하는 가상 노드의 NodeTable 을 return 하는 함수
+        :param capacity: sketch 의 counter 수
+        :param replicas: hot key 의 복사본을 둘 successor 의 수, 0 이면 기록만 하고 복제하지 않음
+        :param threshold: window 동안 get 이 이만큼 요청되면 hot key 로 보고 복제함 (sketch 의 추정 count 기준)
+        :param window: count 를 절반으로 줄이는 주기이자 복사본의 ttl (초)
+        :param timeout: Replicate 의 응답을 기다리는 최대 시간 (초)
+        """
+        self.data_table = data_table
+        self.node_table_for = node_table_for
+        self.replicas = replicas
+        self.threshold = threshold
+        self.window = window
+        self.timeout = timeout
+        self.clock = clock
+
+        self.sketch = SpaceSaving(capacity)
+        self.last_decay = clock()
+        self.replicated = dict()  # key -> ([복사본을 받은 노드], 복사본이 끝나는 시각)
+        self.pushing = set()      # 복사본을 보내는 중인 key
+        self.last_version = 0
+        self.lock = Lock()
+        self.push_lock = Lock()
+
+        # 통계값
+        self.pushes = 0
+        self.push_failures = 0
+
+        metrics.gauge('chord_hot_keys_replicated', lambda: len(self.replicated))
+
+    def __getattr__(self, name):
+        # grant, stats 등 감싼 table 의 기능은 그대로 사용함
+        if name == 'data_table':
+            raise AttributeError(name)
+        return getattr(self.data_table, name)
+
+    def __len__(self):
+        return len(self.data_table)
+
+    def __contains__(self, key):
+        return key in self.data_table
+
+    def __iter__(self):
+        return iter(self.data_table)
+
+    @property
+    def entries(self) -> List[Data]:
+        return self.data_table.entries
+
+    def summary(self):
+        self.data_table.summary()
+
+    def get(self, key):
+        count = self._record(key, 'get')
+        data = self.data_table.get(key)
+        if self.replicas > 0:
+            self._maybe_replicate(key, count)
+        return data
+
+    @dispatch(object, object)
+    def set(self, key, value):
+        # write quorum 을 채우지 못해도 본인의 값은 바뀌었으므로 복사본도 바꿈
+        try:
+            self.data_table.set(key, value)
+        finally:
+            self._record(key, 'set')
+            self._changed(key)
+
+    @dispatch(object)
+    def set(self, data):
+        self.set(data.key, data.value)
+
+    def delete(self, key):
+        try:
+            self.data_table.delete(key)
+        finally:
+            self._changed(key)
+
+    def replica_addresses(self, key) -> list:
+        """
+        :return: key 의 읽기용 복사본을 가진 노드들의 address (담당 노드 포함), 복제하지 않은 key 면 빈 list
+        """
+        with self.lock:
+            replicated = self.replicated.get(key)
+        if replicated is None or replicated[1] <= self.clock():
+            return []
+        return [self.node_table_for(key).cur_node.value] + [node.value for node in replicated[0]]
+
+    def top(self, k: int = 10) -> list:
+        """
+        :return: (key, 추정 count, error, get 수, set 수, 복사본을 가진 successor 수) 의 list, count 가 큰 순서
+        """
+        now = self.clock()
+        with self.lock:
+            self._decay(now)
+            return [(*row, len(self.replicated[row[0]][0]) if row[0] in self.replicated else 0)
+                    for row in self.sketch.top(k)]
+
+    def hot_stats(self) -> dict:
+        with self.lock:
+            return {
+                'capacity': self.sketch.capacity,
+                'replicas': self.replicas,
+                'threshold': self.threshold,
+                'window': self.window,
+                'replicated': len(self.replicated),
+                'pushes': self.pushes,
+                'push_failures': self.push_failures,
+            }
+
+    def _record(self, key, kind: str) -> float:
+        now = self.clock()
+        with self.lock:
+            self._decay(now)
+            return self.sketch.offer(key, kind)
+
+    def _decay(self, now: float):
+        # lock 을 잡은 상태에서 호출해야 함, 지난 window 수만큼 count 를 절반씩 줄임
+        windows = int((now - self.last_decay) / self.window)
+        if windows <= 0:
+            return
+        self.sketch.decay(0.5 ** min(windows, 64))
+        self.last_decay += windows * self.window
+        for key in [key for key, (_, expires) in self.replicated.items() if expires <= now]:
+            del self.replicated[key]
+
+    def _maybe_replicate(self, key, count: float):
+        # 복사본이 있으면 요청한 노드들이 get 을 나눠서 보내므로, 담당 노드가 받는 get 은 (replicas + 1) 분의 1 로 줄어듦
+        # 따라서 이미 복제한 key 는 그만큼 낮은 count 에서도 계속 복제함
+        now = self.clock()
+        with self.lock:
+            replicated = self.replicated.get(key)
+            threshold = self.threshold if replicated is None else self.threshold / (self.replicas + 1)
+            if count < threshold or key in self.pushing:
+                return
+            # 복사본이 끝나기 전에 (ttl 의 절반이 남았을 때) 다시 보냄
+            if replicated is not None and replicated[1] - now > self.window / 2:
+                return
+            self.pushing.add(key)
+        _hot_replica_executor.submit(self._replicate, key)
+
+    def _changed(self, key):
+        # 복제 중인 key 의 값이 바뀌었으면 복사본도 바꿈
+        with self.lock:
+            if key not in self.replicated and key not in self.pushing:
+                return
+        _hot_replica_executor.submit(self._replicate, key)
+
+    def _replicate(self, key):
+        try:
+            with self.lock:
+                replicated = self.replicated.get(key)
+            nodes = replicated[0] if replicated is not None else self._replica_nodes(key)
+            if not nodes:
+                return
+
+            # version 과 값을 함께 읽어야, 나중에 읽은 값이 항상 큰 version 을 가짐
+            with self.push_lock:
+                self.last_version = max(time.time_ns(), self.last_version + 1)
+                version = self.last_version
+                try:
+                    value = self.data_table.get(key).value
+                except ValueError:
+                    value = None
+
+            ttl_ms = int(self.window * 1000)
+            sent = [node for node in nodes if self._send(node, key, value, version, ttl_ms)]
+            with self.lock:
+                if value is None or not sent:
+                    self.replicated.pop(key, None)
+                else:
+                    self.replicated[key] = (sent, self.clock() + self.window)
+        finally:
+            with self.lock:
+                self.pushing.discard(key)
+
+    def _send(self, node: Data, key, value, version: int, ttl_ms: int) -> bool:
+        if hot_replica_request(node, key, value, version, ttl_ms, self.timeout):
+            self.pushes += 1
+            metrics.inc('chord_hot_replica_pushes_total', result='sent')
+            return True
+        self.push_failures += 1
+        metrics.inc('chord_hot_replica_pushes_total', result='failed')
+        logging.debug(f'failed to replicate hot key:{short_id(key)} to {node.value}')
+        return False
+
+    def _replica_nodes(self, key) -> list:
+        # 복사본을 받을 successor 들, 같은 서버의 가상 노드에 두면 요청이 나눠지지 않으므로 서버마다 하나씩만 고름
+        node_table = self.node_table_for(key)
+        servers = {split_vnode(node_table.cur_node.value)[0]}
+        nodes = []
+        for node in node_table.successors:
+            server = split_vnode(node.value)[0]
+            if server in servers or not node_table.failure_detector.is_alive(node):
+                continue
+            servers.add(server)
+            nodes.append(node)
+            if len(nodes) == self.replicas:
+                break
+        return nodes
+
+
+class ReadReplicas:
+    """
+    다른 노드가 보낸 hot key 의 복사본과, get 결과로 알게 된 복사본의 위치 (route) 를 보관합니다.
+    """
+
+    def __init__(self, ttl: float = 10.0, max_routes: int = 1024, clock=time.monotonic):
+        """
+        :param ttl: route 를 사용하는 시간 (초), 담당 노드의 복사본 ttl (window) 과 같게 설정함
+        :param max_routes: 보관하는 route 의 최대 key 수, 넘으면 가장 오래된 key 부터 지움
+        """
+        self.ttl = ttl
+        self.max_routes = max_routes
+        self.clock = clock
+
+        self.copies = dict()          # key -> (value, version, 끝나는 시각), 삭제된 key 는 value 가 None
+        self.routes = OrderedDict()   # key -> ([address], 끝나는 시각)
+        self.lock = Lock()
+
+        # 통계값
+        self.served = 0
+
+        metrics.gauge('chord_hot_replica_copies', lambda: len(self.copies))
+
+    def store(self, key, value, version: int, ttl_ms: int):
+        """
+        담당 노드가 보낸 복사본을 보관합니다. 늦게 도착한 이전 version 은 무시합니다.
+        :param value: 값, 삭제되었으면 None
+        """
+        now = self.clock()
+        with self.lock:
+            current = self.copies.get(key)
+            if current is not None and current[1] > version and current[2] > now:
+                return
+            self.copies[key] = (value, version, now + ttl_ms / 1000)
+            # 끝난 복사본은 받을 때 함께 정리함 (hot key 만 받으므로 많지 않음)
+            for expired in [k for k, (_, _, expires) in self.copies.items() if expires <= now]:
+                del self.copies[expired]
+
+    def get(self, key):
+        """
+        :return: ttl 이 남아있는 복사본의 값, 없거나 삭제되었으면 None
+        """
+        with self.lock:
+            copy = self.copies.get(key)
+            if copy is None or copy[0] is None or copy[2] <= self.clock():
+                return None
+            self.served += 1
+        return copy[0]
+
+    def learn(self, key, addresses: list):
+        # get 결과로 받은 복사본의 위치, ttl 동안 다음 get 을 이 중 하나에게 바로 보냄
+        with self.lock:
+            self.routes[key] = (addresses, self.clock() + self.ttl)
+            self.routes.move_to_end(key)
+            while len(self.routes) > self.max_routes:
+                self.routes.popitem(last=False)
+
+    def route(self, key):
+        """
+        :return: get 을 보낼 노드의 address (복사본을 가진 노드들 중 임의로 고름), 모르면 None
+        """
+        with self.lock:
+            route = self.routes.get(key)
+            if route is None:
+                return None
+            if route[1] <= self.clock():
+                del self.routes[key]
+                return None
+        return random.choice(route[0])
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'copies': len(self.copies),
+                'routes': len(self.routes),
+                'served': self.served,
+            }
@@ -0,0 +1,325 @@
+import logging
+import threading
+import time
+from concurrent import futures
+from threading import Lock
+
+from data_structure import Data
+from metrics import metrics
+from service import key_filter_request, drop_key_filter_request
+from utils import in_range, in_right_closed_range, id_from_bytes, ring_distance, split_vnode
+
+"""
+key_filter.py 는 주변 노드들이 가진 key 의 Bloom filter 를 받아두고, 없는 key 의 get 을 담당 노드까지 보내지 않고 응답하는 기능입니다.
+
+1. 모든 노드는 본인이 가진 key 들 (data table 과 복사본) 로 Bloom filter 를 만들어서, 담당 범위 [n, successor) 와 version 을 함께 응답함 (GetKeyFilter)
+   - key 는 이미 SHA-1 로 hashing 된 값이므로, key 의 bit 들을 나눠서 filter 의 위치로 사용함 (double hashing)
+   - 새 key 가 추가되면 본인의 filter 에 바로 넣고 version 을 올림
+2. 각 노드는 successor 들과 finger table 의 노드들에게 주기적으로 filter 를 받아둠
+3. get 을 만들거나 전달할 때, key 의 담당 범위를 가진 filter 에 key 가 없으면 바로 "없음" 으로 응답함
+   - Bloom filter 는 없는 key 를 있다고 할 수는 있지만 (false positive), 있는 key 를 없다고 하지는 않음
+
+filter 는 받은 시각의 key 들만 알고 있으므로, 아래의 경우에는 filter 를 버리고 담당 노드에게 묻습니다.
+- filter 를 만든 노드에 key 가 추가되거나 담당 범위가 바뀌면, 그 노드가 filter 를 받아간 노드들에게 이전 version 을 버리라고 알림 (DropKeyFilter)
+  알림은 set 에 응답한 뒤에 따로 보내므로, 있는 key 를 없다고 응답하는 경우 (false negative) 가 아래 시간 동안 생길 수 있음
+  - 알림이 도착할 때까지 (GetKeyFilter 와 다른 executor 에서 보내므로, 보통 RPC 한 번의 시간이며 최대 interval)
+  - 알림을 보내지 못하면, 받아둔 filter 를 더 이상 사용하지 않을 때까지 (최대 2 * interval)
+  본인이 set 한 key 는 2 * interval 동안 filter 를 사용하지 않으므로, 이 시간은 다른 노드가 set 한 key 에만 해당함
+- filter 를 만든 노드가 죽었거나, 본인의 routing 정보에서 그 노드와 key 사이에 다른 노드가 있으면 (ring 이 바뀜) 사용하지 않음
+- 받은 지 2 * interval 이 지난 filter 는 사용하지 않음
+
+replication 을 사용하면, 죽은 노드의 범위를 이어받은 노드는 그 key 들을 successor 의 복사본으로만 가지고 있어서 filter 에 넣을 수 없으므로
+main.py 에서 --replicas 와 함께 사용할 수 없게 합니다.
+"""
+
+# key 하나당 사용하는 bit 수와 hash 수, false positive 비율은 약 1%
+BITS_PER_KEY = 10
+HASHES = 5
+
+_HASH_MASK = (1 << 64) - 1
+
+
+class BloomFilter:
+
+    def __init__(self, bits: bytearray, hashes: int = HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self.size = len(bits) * 8
+
+    @classmethod
+    def build(cls, keys, count: int, bits_per_key: int = BITS_PER_KEY, hashes: int = HASHES) -> 'BloomFilter':
+        """
+        :param keys: filter 에 넣을 key 들
+        :param count: key 의 수, filter 의 크기를 정할 때 사용함
+        """
+        bloom = cls(bytearray(max(8, (count * bits_per_key + 7) // 8)), hashes)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key):
+        # key 의 하위 64 bit 와 그 위의 bit 들로 hashes 개의 위치를 만듦 (Kirsch-Mitzenmacher)
+        h1 = key & _HASH_MASK
+        h2 = ((key >> 64) & _HASH_MASK) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class _PeerFilter:
+    # 다른 노드에게 받은 filter 와 그 노드의 담당 범위
+    def __init__(self, node: Data, bloom: BloomFilter, start: int, end: int, version: int, fetched: float):
+        self.node = node
+        self.bloom = bloom
+        self.start = start
+        self.end = end
+        self.version = version
+        self.fetched = fetched
+
+
+class KeyFilters(threading.Thread):
+
+    def __init__(self, node_tables: list, data_table, interval: float = 2.0, max_workers: int = 8,
+                 clock=time.monotonic, replicated_table=None):
+        """
+        :param node_tables: 이 서버의 가상 노드들의 NodeTable, successor 와 finger 의 filter 를 받아둠
+        :param data_table: 본인의 filter 를 만들 data table (가상 노드들이 함께 사용함)
+        :param interval: filter 를 다시 받는 주기 (초), 받은 filter 는 2 * interval 동안만 사용함
+        :param max_workers: 동시에 보낼 수 있는 GetKeyFilter 요청 수, DropKeyFilter 요청 수 (각각)
+        :param replicated_table: 복사본을 가진 ReplicatedDataTable, 있으면 복사본의 key 도 본인의 filter 에 넣음
+        """
+        super().__init__(daemon=True)
+        self.node_tables = node_tables
+        self.data_table = data_table
+        self.replicated_table = replicated_table
+        self.interval = interval
+        self.clock = clock
+        self.executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        metrics.track_executor('key_filter', self.executor)
+        # 버리라는 알림이 응답을 기다리는 GetKeyFilter 뒤에 밀리지 않도록 따로 보냄
+        self.drop_executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        metrics.track_executor('key_filter_drop', self.drop_executor)
+
+        self.peers = dict()      # address -> _PeerFilter
+        self.dropped = dict()    # address -> 버리라고 알려준 version, 이보다 작은 version 의 filter 는 사용하지 않음
+        self.written = dict()    # 본인이 set 한 key -> 시각, 이 key 들은 filter 를 사용하지 않음
+        self.local = None        # (본인의 filter, 만든 시각, 만들 때의 version)
+        self.version = time.time_ns()  # key 가 추가될 때마다 증가함, 다시 시작해도 이전보다 크도록 시각에서 시작함
+        self.added = None        # 본인의 filter 를 만드는 도중에 추가된 key 들
+        self.published = dict()  # 본인 (가상 노드) address -> (start, end, {filter 를 받아간 노드 address: 노드})
+        self.lock = Lock()
+        self.build_lock = Lock()
+        self.stop_flag = False
+
+        # 본인의 filter 에 새 key 를 바로 넣음
+        data_table.insert_listener = self.note_insert
+        if replicated_table is not None:
+            replicated_table.insert_listener = self.note_insert
+
+        # 통계값
+        self.fetches = 0
+        self.fetch_failures = 0
+        self.absent = 0
+
+        metrics.gauge('chord_key_filter_peers', lambda: len(self.peers))
+        metrics.gauge('chord_key_filter_bytes', lambda: sum(len(peer.bloom.bits) for peer in list(self.peers.values())))
+
+    def local_filter(self, owner: str, start: int, end: int, subscriber: Data = None):
+        """
+        본인의 filter 를 return 하고, subscriber 를 filter 를 받아간 노드로 기록합니다.
+        [start, end) 범위에 key 가 추가되거나 범위가 바뀌면 subscriber 에게 filter 를 버리라고 알립니다.
+
+        :param owner: filter 를 보내는 가상 노드의 address
+        :param start: owner 의 담당 범위의 시작
+        :param end: owner 의 담당 범위의 끝
+        :return: (filter 의 bits, hashes, version)
+        """
+        # 요청이 올 때마다 만들지 않도록, 만든 뒤에 추가된 key 는 filter 에 바로 넣고
+        # key 가 추가되었으면 interval 의 절반이 지난 뒤에 크기에 맞춰 다시 만듦
+        now = self.clock()
+        with self.build_lock:
+            with self.lock:
+                local = self.local
+                rebuild = local is None or (local[2] != self.version and now - local[1] > self.interval / 2)
+                if rebuild:
+                    self.added = []
+                    version = self.version
+            if rebuild:
+                keys = [entry.key for entry in self.data_table.entries]
+                if self.replicated_table is not None:
+                    keys += self.replicated_table.replica_keys()
+                bloom = BloomFilter.build(keys, len(keys))
+                with self.lock:
+                    for key in self.added:
+                        bloom.add(key)
+                    self.added = None
+                    self.local = (bloom, now, version)
+
+        drops = []
+        with self.lock:
+            bloom = self.local[0]
+            published = self.published.get(owner)
+            if published is not None and (published[0], published[1]) != (start, end):
+                # 이전 범위로 filter 를 받아간 노드들은 더 이상 그 범위를 믿으면 안 됨
+                self.version += 1
+                drops.append((owner, list(published[2].values())))
+                published = None
+            if published is None:
+                published = self.published[owner] = (start, end, dict())
+            if subscriber is not None and subscriber.value:
+                published[2][subscriber.value] = subscriber
+            result = bytes(bloom.bits), bloom.hashes, self.version
+        self._notify(drops, result[2])
+        return result
+
+    def note_insert(self, key):
+        # data table 이나 복사본에 새 key 가 추가됨 (lock 을 잡은 상태에서 호출되므로 알림은 executor 에서 보냄)
+        drops = []
+        with self.lock:
+            self.version += 1
+            if self.local is not None:
+                self.local[0].add(key)
+            if self.added is not None:
+                self.added.append(key)
+            for owner, (start, end, subscribers) in self.published.items():
+                if subscribers and in_range(key, start, end):
+                    drops.append((owner, list(subscribers.values())))
+                    subscribers.clear()
+            version = self.version
+        self._notify(drops, version)
+
+    def check_ranges(self):
+        # 담당 범위가 바뀐 가상 노드의 filter 를 받아간 노드들에게 버리라고 알림
+        drops = []
+        with self.lock:
+            for table in self.node_tables:
+                owner = table.cur_node.value
+                published = self.published.get(owner)
+                if published is not None and (published[0], published[1]) != (table.cur_node.key, table.successor.key):
+                    del self.published[owner]
+                    self.version += 1
+                    drops.append((owner, list(published[2].values())))
+            version = self.version
+        self._notify(drops, version)
+
+    def drop(self, owner: str, version: int):
+        # owner 가 보낸 DropKeyFilter, version 보다 작은 filter 는 버리고 이후에 받는 것도 사용하지 않음
+        with self.lock:
+            self.dropped[owner] = max(version, self.dropped.get(owner, 0))
+            peer = self.peers.get(owner)
+            if peer is not None and peer.version < version:
+                del self.peers[owner]
+
+    def targets(self) -> dict:
+        # filter 를 받을 노드들 (successor 들과 finger table 의 노드들), 같은 서버의 가상 노드는 제외
+        servers = {split_vnode(table.cur_node.value)[0] for table in self.node_tables}
+        nodes = dict()
+        for table in self.node_tables:
+            for node in table.successors + table.finger_table.entries:
+                if split_vnode(node.value)[0] not in servers and node.value not in nodes:
+                    nodes[node.value] = node
+        return nodes
+
+    def refresh(self):
+        nodes = self.targets()
+        subscriber = self.node_tables[0].cur_node
+        results = self.executor.map(lambda node: key_filter_request(node, subscriber, timeout=self.interval),
+                                    nodes.values())
+        now = self.clock()
+        peers = dict()
+        for address, reply in zip(nodes, results):
+            if reply is False:
+                self.fetch_failures += 1
+                metrics.inc('chord_key_filter_fetches_total', result='failed')
+                continue
+            self.fetches += 1
+            metrics.inc('chord_key_filter_fetches_total', result='fetched')
+            if reply.bits:
+                peers[address] = _PeerFilter(nodes[address], BloomFilter(bytearray(reply.bits), reply.hashes),
+                                             id_from_bytes(reply.start), id_from_bytes(reply.end), reply.version, now)
+        with self.lock:
+            # 이번에 받지 못한 노드의 filter 도 2 * interval 이 지나기 전까지는 사용함
+            for address, peer in self.peers.items():
+                if address not in peers and address in nodes and now - peer.fetched < 2 * self.interval:
+                    peers[address] = peer
+            # 받는 도중에 버리라는 알림이 먼저 도착한 filter 는 사용하지 않음
+            self.peers = {address: peer for address, peer in peers.items()
+                          if peer.version >= self.dropped.get(address, 0)}
+            self.dropped = {address: version for address, version in self.dropped.items() if address in nodes}
+            self.written = {key: at for key, at in self.written.items() if now - at < 2 * self.interval}
+
+    def note_write(self, key):
+        # 본인이 set 한 key 는, 담당 노드의 filter 에 반영될 때까지 filter 를 사용하지 않음
+        with self.lock:
+            self.written[key] = self.clock()
+
+    def definitely_absent(self, key) -> bool:
+        """
+        :return: key 의 담당 범위를 가진 filter 가 key 가 없다고 하면 True, 모르거나 있을 수 있으면 False
+        """
+        now = self.clock()
+        with self.lock:
+            if key in self.written:
+                return False
+            peers = list(self.peers.values())
+        for peer in peers:
+            if now - peer.fetched < 2 * self.interval and in_range(key, peer.start, peer.end):
+                if not self._still_owner(peer, key):
+                    # ring 이 바뀌어서 filter 를 만든 노드가 더 이상 key 를 담당하지 않을 수 있음
+                    with self.lock:
+                        if self.peers.get(peer.node.value) is peer:
+                            del self.peers[peer.node.value]
+                    metrics.inc('chord_key_filter_checks_total', result='stale')
+                    return False
+                if key in peer.bloom:
+                    metrics.inc('chord_key_filter_checks_total', result='maybe')
+                    return False
+                self.absent += 1
+                metrics.inc('chord_key_filter_checks_total', result='absent')
+                return True
+        metrics.inc('chord_key_filter_checks_total', result='unknown')
+        return False
+
+    def _still_owner(self, peer: _PeerFilter, key) -> bool:
+        # filter 를 만든 노드가 살아있고, 본인의 routing 정보에서 그 노드와 key 사이에 다른 노드가 없는지 확인
+        table = min(self.node_tables, key=lambda t: ring_distance(t.cur_node.key, key))
+        if not table.failure_detector.is_alive(peer.node):
+            return False
+        nearest = table.closest_preceding_node(key, inclusive=True)
+        return nearest.key == peer.start or not in_right_closed_range(nearest.key, peer.start, key)
+
+    def _notify(self, drops: list, version: int):
+        for owner, nodes in drops:
+            for node in nodes:
+                self.drop_executor.submit(self._send_drop, node, owner, version)
+
+    def _send_drop(self, node: Data, owner: str, version: int):
+        if drop_key_filter_request(node, owner, version, timeout=self.interval):
+            metrics.inc('chord_key_filter_drops_total', result='sent')
+        else:
+            metrics.inc('chord_key_filter_drops_total', result='failed')
+
+    def stats(self) -> dict:
+        with self.lock:
+            peers = list(self.peers.values())
+        return {
+            'peers': len(peers),
+            'bytes': sum(len(peer.bloom.bits) for peer in peers),
+            'fetches': self.fetches,
+            'fetch_failures': self.fetch_failures,
+            'absent': self.absent,
+        }
+
+    def run(self):
+        while not self.stop_flag:
+            try:
+                self.check_ranges()
+                self.refresh()
+            except Exception as e:
+                logging.info(f'failed to refresh key filters: {e}')
+            time.sleep(self.interval)
@@ -1,6 +1,10 @@
-from chord_node import ChordNode
+from chord_node import ChordNode, LOOKUP_MODES, RECURSIVE
+from storage import FSYNC_MODES, FSYNC_BATCH
+import asyncio
 import logging
 import argparse
+import signal
+import threading
 
 
 def init_parser():
@@ -8,6 +12,47 @@ def init_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument("--host", type=str, default="localhost")
     parser.add_argument("--port", type=str, default="50051")
+    parser.add_argument("--lookup", type=str, choices=LOOKUP_MODES, default=RECURSIVE,
+                        help="get, set, delete 요청을 담당 노드까지 보내는 방식")
+    parser.add_argument("--hop-timeout", type=float, default=1.0, help="iterative 방식에서 한 노드의 응답을 기다리는 시간 (초)")
+    parser.add_argument("--hop-retries", type=int, default=1, help="iterative 방식에서 응답하지 않는 노드에게 다시 요청하는 횟수")
+    parser.add_argument("--mode", type=str, choices=("thread", "aio"), default="thread",
+                        help="thread: 요청마다 thread 를 사용하는 노드, aio: grpc.aio 를 사용하는 asyncio 노드")
+    parser.add_argument("--max-rpcs", type=int, default=64, help="aio 모드에서 다른 노드에게 동시에 보낼 수 있는 최대 RPC 수")
+    parser.add_argument("--data-dir", type=str, default=None,
+                        help="data 를 disk 에 저장할 directory (노드마다 달라야 함), 없으면 memory 에만 저장")
+    parser.add_argument("--replicas", type=int, default=0,
+                        help="복사본을 저장할 successor 의 수, 0 이면 사용하지 않음 (thread 모드, 모든 노드가 같은 값을 사용해야 함)")
+    parser.add_argument("--write-quorum", type=int, default=1, help="write 가 성공하기 위해 저장해야 하는 노드 수 (본인 포함)")
+    parser.add_argument("--read-quorum", type=int, default=1, help="read 시에 값을 읽는 노드 수 (본인 포함)")
+    parser.add_argument("--fsync", type=str, choices=FSYNC_MODES, default=FSYNC_BATCH,
+                        help="WAL 을 disk 에 반영하는 방식 (always: 매번, batch: 주기적으로 모아서, none: OS 에 맡김)")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="Prometheus metrics (/metrics) 를 응답할 HTTP port, 0 이면 사용하지 않음")
+    parser.add_argument("--trace-file", type=str, default=None,
+                        help="get, set, delete 요청별 hop 수와 latency 를 JSON lines 로 기록할 file, 없으면 기록하지 않음")
+    parser.add_argument("--join", type=str, default=None, help="시작한 뒤 join 할 노드의 address (host:port)")
+    parser.add_argument("--no-interactive", action="store_true",
+                        help="명령어를 입력받지 않고 SIGTERM 을 받을 때까지 동작함 (benchmark 등에서 background 로 실행)")
+    parser.add_argument("--leave-on-exit", action="store_true",
+                        help="--no-interactive 일 때 SIGTERM 을 받으면 disjoin 처럼 data 를 넘기고 ring 에서 나간 뒤 종료함")
+    parser.add_argument("--fingers-per-cycle", type=int, default=8, help="한 주기에 갱신하는 finger 의 최대 개수")
+    parser.add_argument("--vnodes", type=int, default=1,
+                        help="이 서버에서 동작하는 가상 노드의 수, 노드마다 담당하는 key 의 양을 고르게 함 (thread 모드만 지원)")
+    parser.add_argument("--near-cache", type=int, default=0,
+                        help="다른 노드가 담당하는 key 의 get 결과를 보관하는 near cache 의 크기, 0 이면 사용하지 않음 (thread 모드만 지원)")
+    parser.add_argument("--lease", type=float, default=2.0,
+                        help="near cache 에 값을 보관하는 시간 (초), 값이 바뀐 것을 모르고 사용할 수 있는 최대 시간")
+    parser.add_argument("--hot-replicas", type=int, default=0,
+                        help="자주 읽히는 key 의 읽기용 복사본을 둘 successor 의 수, 0 이면 복제하지 않음 (thread 모드만 지원)")
+    parser.add_argument("--hot-threshold", type=float, default=100.0,
+                        help="--hot-window 동안 get 이 이만큼 요청된 key 는 읽기용 복사본을 둠")
+    parser.add_argument("--hot-window", type=float, default=10.0,
+                        help="요청 수를 절반으로 줄이는 주기이자 읽기용 복사본을 사용하는 시간 (초)")
+    parser.add_argument("--key-filters", action="store_true",
+                        help="주변 노드들이 가진 key 의 Bloom filter 를 받아두고, 없는 key 의 get 을 담당 노드까지 보내지 않음 (thread 모드만 지원)")
+    parser.add_argument("--filter-interval", type=float, default=2.0,
+                        help="Bloom filter 를 다시 받는 주기 (초), 다른 노드가 추가한 key 를 최대 2배의 시간 동안 없다고 응답할 수 있음")
     return parser
 
 # TODO : logger 추가
@@ -24,8 +69,61 @@ def init_logger():
     log.addHandler(handler)
 
 
+def wait_for_termination(node, leave: bool = False):
+    # --no-interactive 로 실행한 노드는 SIGTERM 이나 Ctrl+C 를 받을 때까지 기다린 뒤 종료함
+    # leave 가 True 면 disjoin 과 같이 ring 에서 나간 뒤 종료함
+    terminated = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: terminated.set())
+    try:
+        while not terminated.wait(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    if leave:
+        node.leave()
+    else:
+        node.stop()
+
+
 if __name__ == '__main__':
     init_logger()
     parser = init_parser()
     args = parser.parse_args()
-    node = ChordNode(args.host + ":" + args.port)
\ No newline at end of file
+    address = args.host + ":" + args.port
+    if args.vnodes < 1:
+        parser.error("--vnodes must be at least 1")
+    if args.vnodes > 1 and args.mode == "aio":
+        parser.error("--vnodes is not supported in aio mode")
+    if args.vnodes > 1 and args.replicas > 0:
+        parser.error("--vnodes can not be used with --replicas")
+    if args.near_cache > 0 and args.mode == "aio":
+        parser.error("--near-cache is not supported in aio mode")
+    if args.hot_replicas > 0 and args.mode == "aio":
+        parser.error("--hot-replicas is not supported in aio mode")
+    if args.replicas > 0 and args.mode == "aio":
+        parser.error("--replicas is not supported in aio mode")
+    if args.key_filters and args.mode == "aio":
+        parser.error("--key-filters is not supported in aio mode")
+    if args.key_filters and args.replicas > 0:
+        # 죽은 노드의 범위를 이어받은 노드는 그 key 들을 filter 에 넣을 수 없어서, 있는 key 를 없다고 응답할 수 있음
+        parser.error("--key-filters can not be used with --replicas")
+    if args.mode == "aio":
+        from aio_chord_node import AioChordNode
+        node = AioChordNode(address, lookup_mode=args.lookup, hop_timeout=args.hop_timeout,
+                            hop_retries=args.hop_retries, max_outstanding_rpcs=args.max_rpcs,
+                            data_dir=args.data_dir, fsync=args.fsync, metrics_port=args.metrics_port,
+                            trace_file=args.trace_file, interactive=not args.no_interactive, bootstrap=args.join,
+                            fingers_per_cycle=args.fingers_per_cycle, leave_on_exit=args.leave_on_exit)
+        asyncio.run(node.serve())
+    else:
+        node = ChordNode(address, lookup_mode=args.lookup, hop_timeout=args.hop_timeout,
+                         hop_retries=args.hop_retries, data_dir=args.data_dir, fsync=args.fsync,
+                         replicas=args.replicas, write_quorum=args.write_quorum, read_quorum=args.read_quorum,
+                         metrics_port=args.metrics_port, trace_file=args.trace_file,
+                         interactive=not args.no_interactive, bootstrap=args.join,
+                         fingers_per_cycle=args.fingers_per_cycle, vnodes=args.vnodes,
+                         near_cache=args.near_cache, lease=args.lease, hot_replicas=args.hot_replicas,
+                         hot_threshold=args.hot_threshold, hot_window=args.hot_window,
+                         key_filters=args.key_filters, filter_interval=args.filter_interval)
+        if args.no_interactive:
+            wait_for_termination(node, leave=args.leave_on_exit)
\ No newline at end of file
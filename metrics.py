@@ -0,0 +1,395 @@
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+
+import grpc
+from grpc.aio import ServerInterceptor as AioServerInterceptor
+
+from utils import DataHandlingType as d
+
+"""
+metrics.py 는 노드의 동작을 숫자로 확인하기 위한 counter, gauge, histogram 을 모아놓은 registry 입니다.
+
+1. counter: 누적 횟수 (RPC 요청 수, error 수, health check 결과 등)
+2. gauge: 현재 값, 읽을 때마다 등록된 함수를 호출해서 계산함 (data table 크기, thread 수 등)
+3. histogram: 값의 분포, 정해진 bucket 별로 누적 횟수를 셈 (latency, hop 수)
+
+같은 이름이라도 label 이 다르면 따로 셈 (ex. chord_rpc_requests_total{side="client",method="HandleData/GD"})
+값은 stats 명령어와, Prometheus text format 으로 응답하는 HTTP endpoint (MetricsServer) 로 확인할 수 있습니다.
+gRPC 요청은 interceptor 로 client, server 양쪽에서 method 별로 기록합니다.
+"""
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+# latency histogram 의 bucket (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# hop 수 histogram 의 bucket
+HOP_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 12, 16, 24, 32)
+
+# 이름 -> (종류, 설명, histogram bucket)
+DEFINITIONS = {
+    'chord_rpc_requests_total': (COUNTER, 'gRPC requests by side (client, server) and method', None),
+    'chord_rpc_errors_total': (COUNTER, 'failed gRPC requests by side, method and status code', None),
+    'chord_rpc_latency_seconds': (HISTOGRAM, 'gRPC request latency by side and method', LATENCY_BUCKETS),
+    'chord_data_requests_total': (COUNTER, 'data requests handled by this node by type and handling', None),
+    'chord_data_not_found_total': (COUNTER, 'get / delete requests for keys that do not exist', None),
+    'chord_data_latency_seconds': (HISTOGRAM, 'latency of handling data requests on the local table', LATENCY_BUCKETS),
+    'chord_forwarded_requests_total': (COUNTER, 'data requests forwarded to another node (recursive)', None),
+    'chord_lookup_hops': (HISTOGRAM, 'hops taken by iterative lookups', HOP_BUCKETS),
+    'chord_request_hops': (HISTOGRAM, 'hops taken by recursive requests until the responsible node', HOP_BUCKETS),
+    'chord_lookup_failures_total': (COUNTER, 'iterative lookups that could not find the owner', None),
+    'chord_health_checks_total': (COUNTER, 'health check outcomes recorded by the failure detector', None),
+    'chord_threads': (GAUGE, 'number of alive threads in the process', None),
+    'chord_executor_workers': (GAUGE, 'threads started by each executor', None),
+    'chord_executor_busy': (GAUGE, 'threads of each executor that are running a task', None),
+    'chord_executor_queue': (GAUGE, 'tasks waiting in the queue of each executor', None),
+    'chord_data_table_keys': (GAUGE, 'number of keys stored in the data table', None),
+    'chord_data_table_segments': (GAUGE, 'number of key range segments in the data table', None),
+    'chord_near_cache_requests_total': (COUNTER, 'near cache lookups by result (hit, miss)', None),
+    'chord_near_cache_entries': (GAUGE, 'values kept in the near cache', None),
+    'chord_near_cache_hit_ratio': (GAUGE, 'near cache hits / lookups since start', None),
+    'chord_near_cache_staleness_bound_seconds': (GAUGE, 'longest time a cached value can be used after it changed', None),
+    'chord_near_cache_leases': (GAUGE, 'unexpired leases granted by this node as the owner', None),
+    'chord_near_cache_invalidations_total': (COUNTER, 'invalidations sent to lease holders by result', None),
+    'chord_near_cache_invalidation_seconds': (HISTOGRAM, 'time from a write until the lease holder dropped the value',
+                                              LATENCY_BUCKETS),
+    'chord_singleflight_requests_total': (COUNTER, 'coalesced gets by side (origin, forward) and result (leader, joined)',
+                                          None),
+    'chord_singleflight_inflight': (GAUGE, 'keys with a get in flight that later gets wait on', None),
+    'chord_hot_keys_replicated': (GAUGE, 'hot keys this node owns that have read replicas on successors', None),
+    'chord_hot_replica_pushes_total': (COUNTER, 'read replica pushes to successors by result (sent, failed)', None),
+    'chord_hot_replica_copies': (GAUGE, 'read replicas of hot keys kept for other owners', None),
+    'chord_key_filter_checks_total': (COUNTER, 'Bloom filter checks before a get by result (absent, maybe, unknown)',
+                                      None),
+    'chord_key_filter_fetches_total': (COUNTER, 'Bloom filters fetched from neighbors by result', None),
+    'chord_key_filter_peers': (GAUGE, 'neighbors whose Bloom filter this node holds', None),
+    'chord_key_filter_bytes': (GAUGE, 'total size of the Bloom filters held from neighbors', None),
+}
+
+DATA_TYPE_NAMES = {d.get: 'get', d.set: 'set', d.delete: 'delete', d.get_result: 'get_result'}
+
+
+def data_type_name(data_handling_type: int) -> str:
+    return DATA_TYPE_NAMES.get(data_handling_type, str(data_handling_type))
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    items = label_key + extra
+    if not items:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in items) + '}'
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        # bucket 의 상한으로 근사한 분위수, 마지막 bucket 을 넘으면 마지막 상한을 return
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+
+    def __init__(self, definitions: dict = None):
+        self.definitions = dict(DEFINITIONS if definitions is None else definitions)
+        self.counters = dict()    # 이름 -> {label key: 값}
+        self.histograms = dict()  # 이름 -> {label key: _Histogram}
+        self.gauges = dict()      # 이름 -> {label key: 값을 return 하는 함수}
+        self.lock = Lock()
+
+    def inc(self, name: str, amount: int = 1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            values = self.counters.setdefault(name, dict())
+            values[key] = values.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            values = self.histograms.setdefault(name, dict())
+            histogram = values.get(key)
+            if histogram is None:
+                histogram = values[key] = _Histogram(self.definitions.get(name, (None, None, LATENCY_BUCKETS))[2])
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        # with 블록이 실행된 시간을 histogram 에 기록함 (예외가 나도 기록함)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def gauge(self, name: str, func, **labels):
+        """
+        읽을 때마다 func() 를 호출해서 값을 계산하는 gauge 를 등록합니다. 같은 이름과 label 이면 교체합니다.
+        """
+        with self.lock:
+            self.gauges.setdefault(name, dict())[_label_key(labels)] = func
+
+    def track_executor(self, name: str, executor):
+        """
+        ThreadPoolExecutor 의 thread 수, 작업 중인 thread 수, 대기 중인 작업 수를 gauge 로 등록합니다.
+        """
+        self.gauge('chord_executor_workers', lambda: len(executor._threads), executor=name)
+        self.gauge('chord_executor_busy', lambda: _busy_threads(executor), executor=name)
+        self.gauge('chord_executor_queue', lambda: executor._work_queue.qsize(), executor=name)
+
+    def track_data_table(self, data_table):
+        self.gauge('chord_data_table_keys', lambda: len(data_table))
+        self.gauge('chord_data_table_segments', lambda: len(data_table.segments))
+
+    def _read_gauges(self) -> dict:
+        with self.lock:
+            gauges = {name: dict(values) for name, values in self.gauges.items()}
+        values = dict()
+        for name, funcs in gauges.items():
+            for key, func in funcs.items():
+                try:
+                    values.setdefault(name, dict())[key] = func()
+                except Exception as e:
+                    logging.debug(f'failed to read gauge {name}: {e}')
+        return values
+
+    def snapshot(self) -> dict:
+        """
+        stats 명령어에서 사용하는 현재 값들
+        :return: {'counters': {이름: {label key: 값}}, 'gauges': {...}, 'histograms': {이름: {label key: (count, sum, p50, p99)}}}
+        """
+        gauges = self._read_gauges()
+        with self.lock:
+            counters = {name: dict(values) for name, values in self.counters.items()}
+            histograms = {
+                name: {key: (h.count, h.sum, h.quantile(0.5), h.quantile(0.99)) for key, h in values.items()}
+                for name, values in self.histograms.items()
+            }
+        return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+    def report(self) -> list:
+        """
+        stats 명령어에서 출력할 줄들을 return 합니다. (histogram 은 count, 평균, p50, p99)
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for kind in ('counters', 'gauges'):
+            for name, values in sorted(snapshot[kind].items()):
+                for key, value in sorted(values.items()):
+                    lines.append(f'{name}{_format_labels(key)}: {value:g}')
+        for name, values in sorted(snapshot['histograms'].items()):
+            for key, (count, total, p50, p99) in sorted(values.items()):
+                average = total / count if count else 0.0
+                lines.append(f'{name}{_format_labels(key)}: count {count}, avg {average:.4g}, '
+                             f'p50 {p50:.4g}, p99 {p99:.4g}')
+        return lines
+
+    def render(self) -> str:
+        """
+        모든 값을 Prometheus text format (version 0.0.4) 으로 return 합니다.
+        """
+        gauges = self._read_gauges()
+        lines = []
+        with self.lock:
+            names = sorted(set(self.counters) | set(self.histograms) | set(gauges))
+            for name in names:
+                description = self.definitions.get(name, (None, name, None))[1]
+                kind = COUNTER if name in self.counters else HISTOGRAM if name in self.histograms else GAUGE
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} {kind}')
+                if kind == COUNTER:
+                    for key, value in sorted(self.counters[name].items()):
+                        lines.append(f'{name}{_format_labels(key)} {value}')
+                elif kind == GAUGE:
+                    for key, value in sorted(gauges[name].items()):
+                        lines.append(f'{name}{_format_labels(key)} {value}')
+                else:
+                    for key, histogram in sorted(self.histograms[name].items()):
+                        cumulative = 0
+                        for bound, count in zip(histogram.buckets, histogram.counts):
+                            cumulative += count
+                            lines.append(f'{name}_bucket{_format_labels(key, (("le", f"{bound:g}"),))} {cumulative}')
+                        lines.append(f'{name}_bucket{_format_labels(key, (("le", "+Inf"),))} {histogram.count}')
+                        lines.append(f'{name}_sum{_format_labels(key)} {histogram.sum}')
+                        lines.append(f'{name}_count{_format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _busy_threads(executor) -> int:
+    # 쉬고 있는 thread 수는 executor 의 idle semaphore 값으로 알 수 있음 (python 3.8 이상)
+    idle = getattr(executor, '_idle_semaphore', None)
+    if idle is None:
+        return 0
+    return max(0, len(executor._threads) - idle._value)
+
+
+def _method_name(full_method: str) -> str:
+    # '/chord.HandleData/GD' -> 'HandleData/GD'
+    service, _, method = full_method.lstrip('/').partition('/')
+    return f'{service.rsplit(".", 1)[-1]}/{method}'
+
+
+def _record_rpc(side: str, method: str, started: float, code):
+    metrics.inc('chord_rpc_requests_total', side=side, method=method)
+    metrics.observe('chord_rpc_latency_seconds', time.perf_counter() - started, side=side, method=method)
+    if code is not None and code != grpc.StatusCode.OK:
+        metrics.inc('chord_rpc_errors_total', side=side, method=method, code=code.name)
+
+
+class ClientMetricsInterceptor(grpc.UnaryUnaryClientInterceptor, grpc.StreamUnaryClientInterceptor):
+    """
+    다른 노드에게 보내는 gRPC 요청을 method 별로 기록하는 interceptor 입니다. (channel_pool 의 channel 에 등록)
+    """
+
+    def _intercept(self, continuation, client_call_details, request):
+        started = time.perf_counter()
+        method = _method_name(client_call_details.method)
+        outcome = continuation(client_call_details, request)
+        # 응답이 오거나 실패했을 때 기록함 (이미 끝난 요청이면 바로 호출됨)
+        outcome.add_done_callback(lambda call: _record_rpc('client', method, started, call.code()))
+        return outcome
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        return self._intercept(continuation, client_call_details, request)
+
+    def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        return self._intercept(continuation, client_call_details, request_iterator)
+
+
+def _wrap_behavior(behavior, method: str):
+    def wrapper(request, context):
+        started = time.perf_counter()
+        code = None
+        try:
+            return behavior(request, context)
+        except Exception:
+            code = grpc.StatusCode.UNKNOWN
+            raise
+        finally:
+            _record_rpc('server', method, started, code)
+    return wrapper
+
+
+def _wrap_async_behavior(behavior, method: str):
+    async def wrapper(request, context):
+        started = time.perf_counter()
+        code = None
+        try:
+            return await behavior(request, context)
+        except Exception:
+            code = grpc.StatusCode.UNKNOWN
+            raise
+        finally:
+            _record_rpc('server', method, started, code)
+    return wrapper
+
+
+def _wrap_handler(handler, method: str, wrap):
+    if handler is None:
+        return None
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(wrap(handler.unary_unary, method),
+                                                   request_deserializer=handler.request_deserializer,
+                                                   response_serializer=handler.response_serializer)
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(wrap(handler.stream_unary, method),
+                                                    request_deserializer=handler.request_deserializer,
+                                                    response_serializer=handler.response_serializer)
+    return handler
+
+
+class ServerMetricsInterceptor(grpc.ServerInterceptor):
+    """
+    다른 노드에게서 받은 gRPC 요청을 method 별로 기록하는 interceptor 입니다. (grpc.server 에 등록)
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        return _wrap_handler(continuation(handler_call_details), _method_name(handler_call_details.method),
+                             _wrap_behavior)
+
+
+class AioServerMetricsInterceptor(AioServerInterceptor):
+    """
+    ServerMetricsInterceptor 의 asyncio 버전입니다. (grpc.aio.server 에 등록)
+    """
+
+    async def intercept_service(self, continuation, handler_call_details):
+        return _wrap_handler(await continuation(handler_call_details), _method_name(handler_call_details.method),
+                             _wrap_async_behavior)
+
+
+def instrumented_channel(address: str):
+    # channel_pool 의 channel_factory 로 사용하는, 요청을 기록하는 channel
+    return grpc.intercept_channel(grpc.insecure_channel(address), ClientMetricsInterceptor())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 요청마다 log 를 남기지 않음
+        pass
+
+
+class MetricsServer(threading.Thread):
+    """
+    http://host:port/metrics 로 Prometheus text format 의 metrics 를 응답하는 HTTP 서버입니다.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 9100):
+        super().__init__(daemon=True)
+        self.httpd = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def address(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'{host}:{port}'
+
+    def run(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# 프로세스 전체에서 공유하는 metrics registry
+metrics = MetricsRegistry()
+metrics.gauge('chord_threads', threading.active_count)
@@ -0,0 +1,271 @@
+import logging
+import time
+from collections import OrderedDict
+from concurrent import futures
+from threading import Lock
+from typing import List
+
+from multipledispatch import dispatch
+
+from data_structure import Data
+from metrics import metrics
+from service import invalidate_request
+from utils import short_id
+
+"""
+near_cache.py 는 인기 있는 key 의 get 이 매번 담당 노드까지 가지 않도록, 다른 노드에서 값을 잠시 보관하는 기능입니다.
+
+1. NearCache (요청하는 노드): get 결과를 담당 노드가 허락한 lease 시간 동안 보관함 (LRU, 최대 capacity 개)
+   - 본인이 만든 get 은 cache 에 있으면 바로 응답하고, 다른 노드의 get 을 전달하다가 cache 에 있으면 대신 응답함
+2. LeasedDataTable (담당 노드): get 결과를 보낼 때 요청한 노드에게 lease 를 주고 기억해두며,
+   set / delete 로 값이 바뀌면 lease 가 남아있는 노드들에게 Invalidate 를 보내서 cache 에서 지우게 함
+
+Invalidate 는 background 로 보내므로 잠시 동안 이전 값을 읽을 수 있으며,
+Invalidate 가 실패하거나 담당 노드가 바뀌어서 lease 를 모르는 경우에도 이전 값은 최대 lease 시간까지만 사용됩니다. (staleness bound)
+"""
+
+# lease 를 이 횟수만큼 허락할 때마다, lease 가 끝난 기록을 정리함
+LEASE_PRUNE_INTERVAL = 1024
+
+# Invalidate 를 보낼 때 사용하는 executor
+_invalidate_executor = futures.ThreadPoolExecutor(max_workers=8)
+metrics.track_executor('invalidate', _invalidate_executor)
+
+
+class NearCache:
+    """
+    담당 노드가 허락한 lease 가 끝날 때까지 get 결과를 보관하는 LRU cache 입니다.
+    """
+
+    def __init__(self, capacity: int = 1024, lease: float = 2.0, clock=time.monotonic):
+        """
+        :param capacity: 보관하는 최대 key 수, 넘으면 가장 오래 사용하지 않은 key 부터 지움
+        :param lease: 담당 노드에게 요청하는 lease 시간 (초), 값이 바뀐 것을 모르고 사용할 수 있는 최대 시간
+        """
+        self.capacity = capacity
+        self.lease = lease
+        self.clock = clock
+
+        # key -> (value, lease 가 끝나는 시각), 가장 최근에 사용한 key 가 맨 뒤에 위치함
+        self.entries = OrderedDict()
+        # key -> Invalidate 를 받은 시각, 그 전에 보낸 get 의 결과는 보관하지 않음 (결과보다 Invalidate 가 먼저 올 수 있음)
+        self.invalidated = OrderedDict()
+        self.lock = Lock()
+
+        # 통계값
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        metrics.gauge('chord_near_cache_entries', lambda: len(self.entries))
+        metrics.gauge('chord_near_cache_hit_ratio', self.hit_ratio)
+        metrics.gauge('chord_near_cache_staleness_bound_seconds', lambda: self.lease)
+
+    @property
+    def lease_ms(self) -> int:
+        return int(self.lease * 1000)
+
+    def get(self, key):
+        """
+        :return: lease 가 남아있는 값, 없으면 None
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= self.clock():
+                del self.entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                result = 'miss'
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                result = 'hit'
+        metrics.inc('chord_near_cache_requests_total', result=result)
+        return None if entry is None else entry[0]
+
+    def put(self, key, value: bytes, lease_ms: int, requested_at: float):
+        """
+        담당 노드가 허락한 lease 동안 값을 보관합니다.
+        lease 는 요청을 보낸 시각부터 계산하므로, 담당 노드가 기억하는 lease 보다 먼저 끝납니다.
+
+        :param requested_at: get 요청을 보낸 시각 (clock 기준)
+        """
+        if lease_ms <= 0 or self.capacity <= 0:
+            return
+        expires = requested_at + lease_ms / 1000
+        with self.lock:
+            invalidated = self.invalidated.get(key)
+            if invalidated is not None and invalidated >= requested_at:
+                return
+            if expires <= self.clock():
+                return
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        # 담당 노드가 Invalidate 를 보냈거나, 본인이 값을 바꾼 경우
+        with self.lock:
+            self.entries.pop(key, None)
+            self.invalidations += 1
+            now = self.clock()
+            self.invalidated[key] = now
+            self.invalidated.move_to_end(key)
+            # lease 시간보다 오래된 기록은 더 이상 필요 없음 (그 전에 보낸 get 의 결과는 이미 lease 가 끝남)
+            while self.invalidated and next(iter(self.invalidated.values())) <= now - self.lease:
+                self.invalidated.popitem(last=False)
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'capacity': self.capacity,
+                'lease': self.lease,
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hit_ratio(),
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+class LeasedDataTable:
+    """
+    DataTable 과 같은 get / set / delete 를 제공하면서, near cache 에 값을 보관 중인 노드들 (lease) 을 기억하는 table 입니다.
+    HandleDataService, ClientDataService 등에 DataTable (혹은 ReplicatedDataTable) 대신 넘겨서 사용합니다.
+    """
+
+    def __init__(self, data_table, max_lease: float = 10.0, timeout: float = 1.0, clock=time.monotonic):
+        """
+        :param data_table: 실제로 값을 저장하는 table (DataTable, ReplicatedDataTable)
+        :param max_lease: 허락하는 최대 lease 시간 (초), 요청한 lease 가 더 길면 줄여서 허락함
+        :param timeout: Invalidate 의 응답을 기다리는 최대 시간 (초)
+        """
+        self.data_table = data_table
+        self.max_lease = max_lease
+        self.timeout = timeout
+        self.clock = clock
+
+        self.leases = dict()  # key -> {lease 를 받은 노드 address: (노드, lease 가 끝나는 시각)}
+        self.lock = Lock()
+
+        # 통계값
+        self.granted = 0
+        self.invalidations = 0
+        self.invalidation_failures = 0
+
+        metrics.gauge('chord_near_cache_leases', self.active_leases)
+
+    # DataTable 과 같은 형태로 사용할 수 있도록, 순회와 출력은 data_table 에 맡김
+    def __len__(self):
+        return len(self.data_table)
+
+    def __contains__(self, key):
+        return key in self.data_table
+
+    def __iter__(self):
+        return iter(self.data_table)
+
+    @property
+    def entries(self) -> List[Data]:
+        return self.data_table.entries
+
+    def summary(self):
+        self.data_table.summary()
+
+    def get(self, key):
+        return self.data_table.get(key)
+
+    @dispatch(object, object)
+    def set(self, key, value):
+        # write quorum 을 채우지 못해도 본인의 값은 바뀌었으므로 Invalidate 를 보냄
+        try:
+            self.data_table.set(key, value)
+        finally:
+            self._invalidate(key)
+
+    @dispatch(object)
+    def set(self, data):
+        self.set(data.key, data.value)
+
+    def delete(self, key):
+        try:
+            self.data_table.delete(key)
+        finally:
+            self._invalidate(key)
+
+    def grant(self, key, holder: Data, lease_ms: int) -> int:
+        """
+        holder 가 key 의 값을 lease 동안 보관하는 것을 허락하고 기억합니다.
+        :return: 허락한 lease 시간 (ms), 0 이면 보관하지 않아야 함
+        """
+        lease_ms = min(lease_ms, int(self.max_lease * 1000))
+        if lease_ms <= 0:
+            return 0
+        now = self.clock()
+        with self.lock:
+            holders = self.leases.setdefault(key, dict())
+            holders[holder.value] = (holder, now + lease_ms / 1000)
+            self.granted += 1
+            # 값이 바뀌지 않은 key 의 lease 도 쌓이지 않도록, 가끔 lease 가 끝난 기록을 정리함
+            if self.granted % LEASE_PRUNE_INTERVAL == 0:
+                self._prune(now)
+        return lease_ms
+
+    def active_leases(self) -> int:
+        now = self.clock()
+        with self.lock:
+            return sum(1 for holders in self.leases.values() for _, expires in holders.values() if expires > now)
+
+    def stats(self) -> dict:
+        return {
+            'max_lease': self.max_lease,
+            'keys': len(self.leases),
+            'active_leases': self.active_leases(),
+            'granted': self.granted,
+            'invalidations': self.invalidations,
+            'invalidation_failures': self.invalidation_failures,
+        }
+
+    def _prune(self, now: float):
+        # lock 을 잡은 상태에서 호출해야 함
+        for key in list(self.leases):
+            holders = {address: lease for address, lease in self.leases[key].items() if lease[1] > now}
+            if holders:
+                self.leases[key] = holders
+            else:
+                del self.leases[key]
+
+    def _invalidate(self, key):
+        # 값이 바뀌었으므로, lease 가 남아있는 노드들에게 cache 에서 지우라고 알림 (lease 가 끝난 노드는 이미 사용하지 않음)
+        now = self.clock()
+        with self.lock:
+            holders = self.leases.pop(key, None)
+        if not holders:
+            return
+        for holder, expires in holders.values():
+            if expires > now:
+                _invalidate_executor.submit(self._send_invalidate, holder, key, now)
+
+    def _send_invalidate(self, holder: Data, key, changed_at: float):
+        if invalidate_request(holder, key, self.timeout):
+            self.invalidations += 1
+            metrics.inc('chord_near_cache_invalidations_total', result='sent')
+            # 값이 바뀐 뒤 holder 의 cache 에서 지워질 때까지 걸린 시간 (이 동안 이전 값을 읽을 수 있음)
+            metrics.observe('chord_near_cache_invalidation_seconds', self.clock() - changed_at)
+        else:
+            # holder 는 lease 가 끝날 때까지 이전 값을 사용할 수 있음
+            self.invalidation_failures += 1
+            metrics.inc('chord_near_cache_invalidations_total', result='failed')
+            logging.debug(f'failed to invalidate key:{short_id(key)} on {holder.value}')
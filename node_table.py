@@ -1,176 +1,442 @@
 import logging
-import math
 import threading
 import time
 
-from data_structure import TableEntry, Data
-from service import request_node_info, node_health_check, notify_node_info, toss_message, data_request
+from data_structure import TableEntry, DataTable, Data
+from failure_detector import FailureDetector
+from metrics import metrics
+from service import request_node_info, notify_node_info, transfer_request, find_successor_request, \
+    request_successor_list, next_hop_request
 from utils import NodeType as n
-from utils import TossMessageType as t
-from utils import DataHandlingType as d
+from utils import HASH_BIT_LENGTH, RING_SIZE
+from utils import in_range, in_open_range, in_right_closed_range, ring_distance, short_id
+
+# successor list 의 길이, successor 가 죽었을 때 다음 successor 로 바로 넘어가기 위해 사용함
+SUCCESSOR_LIST_LENGTH = 3
 
 
 class NodeTable(threading.Thread):
 
-    def __init__(self, ids, address: str, data_table: TableEntry):
-        # generate node table
+    def __init__(self, ids, address: str, data_table: DataTable, fingers_per_cycle: int = 8,
+                 update_interval: float = 1.0, clock=time.monotonic):
+        """
+        :param ids: 현재 노드의 ring identifier
+        :param address: 현재 노드의 address (host:port)
+        :param data_table: 현재 노드가 가지고 있는 data table
+        :param fingers_per_cycle: 한 주기에 다른 노드에게 물어봐서 갱신하는 finger 의 최대 개수
+        :param update_interval: stabilize, fix_fingers 를 실행하는 주기 (초)
+        :param clock: 현재 시각을 return 하는 함수, failure detector 가 사용함 (simulator 에서는 가상 시계)
+        """
         super().__init__()
-        host, port = address.split(":")
 
         # 현재 본인의 노드 정보와, predecessor 는 finger table에 없지만 필요하므로 별도로 선언함
         self.cur_node = Data(ids, address)
+        self.predecessor = Data(ids, address)  # predecessor 를 모르면 본인을 가리킴
 
-        # 현재 네트워크에 존재하는 노드 수를 정의
-        self.network_node_num = 1  # 현재 존재하는 네트워크 노드 수
-
-        # finger table 정의
+        # finger table 정의, finger_table[i] = successor(n + 2^i), finger_table[0] 은 successor
+        # 처음에는 혼자 있는 ring 이므로 모든 finger 가 본인을 가리킴
         self.finger_table = TableEntry()
+        self.finger_table.entries = [Data(ids, address) for _ in range(HASH_BIT_LENGTH)]
 
-        # data table 정의
+        # successor list 정의, successors[0] 은 항상 finger_table[0] 과 같은 노드
+        self.successors = [Data(ids, address)]
+
+        # data table 정의, 본인의 key 를 segment 의 경계로 사용함
         self.data_table = data_table
+        self.data_table.split(ids)
 
         # stop flag 정의
         self.stop_flag = False
 
-        # finger table update cycle 정의
-        self.finger_table_update_cycle = 0
-
-        # 보고서 상, 최초 init은 두 개의 노드가 있는 network이기 때문에, 해당 네트워크를 init해 줌
-        if port == "50051":
-            self.predecessor = Data("0b03a4d8a7d8f8f4c7afae9aeda7d76b431f4cba", host + ":50054")
-            self.finger_table.set("0b03a4d8a7d8f8f4c7afae9aeda7d76b431f4cba", host + ":50054")
-            self.finger_table.entries.append(Data(ids, address))
-            self.network_node_num += 1
-        elif port == "50054":
-            self.predecessor = Data("a09b0ce42948043810a1f2cc7e7079aec7582f29", host + ":50051")
-            self.finger_table.set("t1", "t2")
-            self.finger_table.set("t2", "t1")
-            self.finger_table.entries[n.successor].update_info(self.predecessor, 0)
-            self.finger_table.entries[n.d_successor].update_info(self.cur_node, 1)
-            self.network_node_num += 1
-        else:
-            self.predecessor = Data(ids, address)
-            self.finger_table.set(ids, address)  # 0 - successor
-            self.finger_table.entries.append(Data(ids, address))  # 1 - double successor
-
-    def log_nodes(self):
-        # TODO : TableEntry 클래스의 summary 를 이용해서 처리할 수 있지 않을까?
-        # predecessor를 별도로 관리하기 때문에, predecessor는 따로 로그를 찍어주고
-        logging.info(f'showing data table entry...')
-        print(f'current predecessor is {self.predecessor.key[:10]}:{self.predecessor.value}')
-
-        # 이후에 finger table 값들을 출력함
-        for i, node in enumerate(self.finger_table.entries):
-            print(f'current finger_table[{i}] is {node.key[:10]}:{node.value}')
-        print()
-
-    def find_nearest_alive_node(self, key):
-        alive_node_num = 0
-        alive_node_found = False
+        # fix_fingers 에서 다음에 갱신할 finger 의 index
+        self.next_finger = 0
+        self.fingers_per_cycle = fingers_per_cycle
+        self.update_interval = update_interval
 
-        # 가장 가까운 노드 값 찾기
-        for i in range(len(self.finger_table.entries) - 1):
-            if self.finger_table.entries[i].key > self.finger_table.entries[i + 1].key:
-                if self.finger_table.entries[i].key <= key or key < self.finger_table.entries[i + 1].key:
-                    alive_node_num = i
-                    alive_node_found = True
+        # 주변 노드의 생존 여부를 background 에서 확인하는 failure detector 정의
+        self.failure_detector = FailureDetector(self, clock=clock)
 
-            if self.finger_table.entries[i].key <= key < self.finger_table.entries[i + 1]:
-                alive_node_num = i
-                alive_node_found = True
+        # 같은 서버에서 data table 을 함께 사용하는 다른 가상 노드들 (ChordNode 가 설정함)
+        self.siblings = []
 
-        if self.finger_table.entries[-1] <= key and not alive_node_found:
-            alive_node_num = len(self.finger_table.entries) - 1
+    @property
+    def successor(self) -> Data:
+        return self.finger_table.entries[n.successor]
 
-        # health check를 통해, 죽어있으면 그것보다 앞의 노드를 return
-        for i in range(alive_node_num, -1, -1):
-            if node_health_check(self.finger_table.entries[i]):
-                return self.finger_table.entries[i]
+    def log_nodes(self):
+        # predecessor를 별도로 관리하기 때문에, predecessor는 따로 로그를 찍어주고
+        logging.info(f'showing node table entry...')
+        print(f'current predecessor is {short_id(self.predecessor.key)}:{self.predecessor.value}')
+        for i, node in enumerate(self.successors):
+            print(f'current successor[{i}] is {short_id(node.key)}:{node.value}')
+
+        # 이후에 finger table 값들을 출력함, 같은 노드를 가리키는 finger 들은 묶어서 출력
+        entries = self.finger_table.entries
+        start = 0
+        for i in range(1, len(entries) + 1):
+            if i == len(entries) or entries[i].value != entries[start].value:
+                print(f'current finger_table[{start}:{i}] is {short_id(entries[start].key)}:{entries[start].value}')
+                start = i
+        print()
 
-        # 만약 살아있는 노드가 없으면, 자기 자신을 return
+    def is_responsible(self, key) -> bool:
+        """
+        key 에 해당하는 data 를 본인이 저장해야 하는지 확인합니다.
+        본인의 key 보다 크거나 같으면서, successor 의 key 보다 작을 때 본인에게 저장됩니다.
+        """
+        return in_range(key, self.cur_node.key, self.successor.key)
+
+    def first_alive_successor(self) -> Data:
+        # successor list 에서 살아있는 가장 가까운 successor, 없으면 본인을 return
+        for node in self.successors:
+            if node.value == self.cur_node.value or self.failure_detector.is_alive(node):
+                return node
         return self.cur_node
 
-    def stabilize_successor(self):
-        # 현재 health check를 통해, 제일 먼저 살아있는 successor 검출
-        successor_num = 0
-        for i in range(len(self.finger_table.entries)):
-            if node_health_check(self.finger_table.entries[i]):
-                successor_num = i
-                break
-
-        # 만약 successor가 살아있으면, health check를 그만둠
-        if successor_num == 0:
-            pass
-
-        # 만약 successor가 죽어있으면, 교체하는 작업을 수행
-        else:
-            successor_node = self.finger_table.entries[successor_num]
-            while True:
-                # 1. 현재 최우선적으로 살아있는 노드에게 노드의 predecessor를 물어봄
-                s_predecessor = request_node_info(successor_node, n.predecessor)
-
-                # 2. 내 값과 predecessor의 값을 비교해, 같으면 내 finger table의 값만 수정해줌
-                if s_predecessor.key == self.cur_node.key:
-                    for i in range(successor_num):
-                        self.finger_table.pop(i)
-                        break
-
-                # 3. 만약 내 값이 predecessor의 값보다 앞에 있으면, predecessor의 successor를 자신으로 설정하고, 자신의 successor를 predecessor의
-                # successor로 설정
-                elif self.cur_node.key > s_predecessor.key:
-                    notify_node_info(s_predecessor, self.cur_node, n.successor)
-                    notify_node_info(successor_node, self.cur_node, n.predecessor)
+    def closest_preceding_node(self, key, inclusive: bool = False) -> Data:
+        """
+        finger table 과 successor list 에서, (n, key) 범위에 있는 살아있는 노드 중 key 에 가장 가까운 노드를 찾습니다.
+        inclusive 가 True 면 (n, key] 범위에서 찾습니다. 없으면 본인을 return 합니다.
+        """
+        check_range = in_right_closed_range if inclusive else in_open_range
+        cur_key = self.cur_node.key
+        best, best_distance = self.cur_node, None
+        previous = None
+        for node in self.finger_table.entries + self.successors:
+            # 연속된 finger 들은 대부분 같은 노드를 가리키므로, 바로 앞과 같은 노드는 건너뜀
+            if node.value == previous:
+                continue
+            previous = node.value
+            if node.value == self.cur_node.value or not check_range(node.key, cur_key, key):
+                continue
+            # key 까지 남은 거리가 가장 짧은 살아있는 노드를 선택
+            distance = ring_distance(node.key, key)
+            if (best_distance is None or distance < best_distance) and self.failure_detector.is_alive(node):
+                best, best_distance = node, distance
+        return best
+
+    def find_nearest_alive_node(self, key) -> Data:
+        """
+        key 에 해당하는 data 를 보낼 다음 노드를 찾습니다.
+        key 보다 작거나 같으면서 가장 가까운 살아있는 노드를 return 하고, 없으면 successor 를 return 합니다.
+        """
+        node = self.closest_preceding_node(key, inclusive=True)
+        if node is self.cur_node:
+            return self.first_alive_successor()
+        return node
+
+    def find_successor(self, key):
+        """
+        key 의 successor (key 보다 크거나 같은 첫 번째 노드) 를 찾습니다.
+        본인의 finger table 로 찾을 수 없으면, 가장 가까운 노드에게 재귀적으로 물어봅니다.
+
+        :return: 찾은 노드의 정보, 찾지 못했으면 False
+        """
+        if key == self.cur_node.key:
+            return self.cur_node
+
+        successor = self.first_alive_successor()
+        if in_right_closed_range(key, self.cur_node.key, successor.key):
+            return successor
+
+        next_node = self.closest_preceding_node(key)
+        if next_node is not self.cur_node:
+            found = find_successor_request(next_node, key)
+            if found:
+                return found
+            # lookup 과 같이, 응답하지 않은 노드는 failure detector 에 알려서 이후의 routing 에서 피하게 함
+            self.failure_detector.record(next_node.value, False)
+
+        # 가장 가까운 노드가 응답하지 않으면, successor 에게 물어봄
+        if successor is self.cur_node:
+            return False
+        return find_successor_request(successor, key)
+
+    def lookup(self, key, hop_timeout: float = 1.0, retries: int = 1, max_hops: int = 32):
+        """
+        key 를 담당하는 노드를 iterative 하게 찾습니다.
+        다른 노드에게 요청을 넘기지 않고, 본인이 노드들에게 다음으로 물어볼 노드를 차례대로 물어봅니다. (NextHop)
+        응답하지 않는 노드는 retries 번 다시 물어본 뒤, 이전 노드의 successor list 에서 다른 노드를 골라 이어서 찾습니다.
+
+        :param key: 찾을 data 의 key
+        :param hop_timeout: 한 노드의 응답을 기다리는 최대 시간 (초)
+        :param retries: 응답하지 않는 노드에게 다시 물어보는 횟수
+        :param max_hops: 최대로 거쳐갈 수 있는 노드의 수
+        :return: (담당 노드, 거쳐간 노드들의 list), list 는 본인부터 시작해서 담당 노드로 끝남
+        :raise LookupError: max_hops 안에 담당 노드를 찾지 못했거나, 더 이상 물어볼 노드가 없는 경우
+        """
+        try:
+            node, path = self._lookup(key, hop_timeout, retries, max_hops)
+        except LookupError:
+            metrics.inc('chord_lookup_failures_total')
+            raise
+        metrics.observe('chord_lookup_hops', len(path) - 1)
+        return node, path
+
+    def _lookup(self, key, hop_timeout: float, retries: int, max_hops: int):
+        path = [self.cur_node]
+        if self.is_responsible(key):
+            return self.cur_node, path
+
+        failed = set()
+        node = self.find_nearest_alive_node(key)
+        while len(path) <= max_hops:
+            reply = False
+            for _ in range(retries + 1):
+                reply = next_hop_request(node, key, timeout=hop_timeout)
+                if reply:
                     break
 
-                # 4. 만약 내 값이 predecessor의 값보다 더 앞에 있으면, predecessor에게 predecessor를 물어보는 과정 반복
-                else:
-                    continue
-
-    def finger_table_renew(self):
-        # 네트워크 노드의 개수 차이를 구함
-        # 현재 네트워크에 존재하는 노드의 개수에 따른 finger table node 개수와, 실제 finger table 개수가 맞지 않으면, 순회하는 코드를 사용
-        if int(math.log2(self.network_node_num)) - len(self.finger_table.entries) != 0:
-            toss_message(self.cur_node, self.finger_table.entries[n.successor], t.finger_table_setting, 1)
-            self.finger_table_update_cycle = 0
-
+            if not reply:
+                # 응답하지 않는 노드는 failure detector 에 알려서, 이후의 routing 에서도 피하게 함
+                logging.debug(f'{node.value} did not respond to lookup of key:{short_id(key)}')
+                failed.add(node.value)
+                self.failure_detector.record(node.value, False)
+                node = self._alternative_hop(path[-1], failed, hop_timeout)
+                continue
+
+            path.append(node)
+            responsible, next_node = reply
+            if responsible:
+                return node, path
+
+            # 응답한 노드가 이미 거쳐간 노드나 응답하지 않는 노드를 알려주면, 그 노드의 successor 로 넘어감
+            if next_node.value in failed or next_node.value in [p.value for p in path]:
+                next_node = self._alternative_hop(node, failed, hop_timeout)
+            node = next_node
+        raise LookupError(f'failed to find the node of key:{short_id(key)} in {max_hops} hops')
+
+    def _alternative_hop(self, node: Data, failed: set, timeout: float) -> Data:
+        # node 의 successor list 중 응답하지 않은 노드를 제외한 첫 번째 노드를 return
+        if node.value == self.cur_node.value:
+            candidates = self.successors
         else:
-            self.finger_table_update_cycle += 1
-            return 0
-
-        # 업데이트 이후 데이터 오류 맞춰줌
-        pd_key = self.predecessor.key
-        successor_key = self.finger_table.entries[n.successor].key
+            candidates = request_successor_list(node, timeout=timeout) or []
+        for candidate in candidates:
+            if candidate.value not in failed and candidate.value != self.cur_node.value:
+                return candidate
+        raise LookupError(f'no alive node to continue lookup from {node.value}')
+
+    def set_successor(self, node: Data):
+        if node.value != self.successor.value:
+            logging.info(f'successor is changed to {short_id(node.key)}:{node.value}')
+        self.successors = [node] + [s for s in self.successors[1:] if s.value != node.value]
+        self.finger_table.entries[n.successor] = node
+        # 본인이 담당하는 범위 [n, successor) 가 segment 단위로 나뉘도록 successor 의 key 도 경계로 사용함
+        self.data_table.split(node.key)
+
+    def set_predecessor(self, node: Data):
+        if node.value != self.predecessor.value:
+            logging.info(f'predecessor is changed to {short_id(node.key)}:{node.value}')
+        self.predecessor = node
+
+    def set_finger(self, i: int, node: Data):
+        if i == n.successor:
+            self.set_successor(node)
+        elif 0 < i < len(self.finger_table.entries):
+            self.finger_table.entries[i] = node
+
+    def notify(self, node: Data):
+        """
+        node 가 본인의 predecessor 일 수 있다는 알림을 받았을 때 처리합니다. (Chord 의 notify)
+        현재 predecessor 가 없거나 (본인을 가리키거나) 죽었거나, node 가 더 가까우면 교체합니다.
+        """
+        if node.value == self.cur_node.value:
+            return
+        if self.predecessor.value == self.cur_node.value or \
+                not self.failure_detector.is_alive(self.predecessor) or \
+                in_open_range(node.key, self.predecessor.key, self.cur_node.key):
+            self.set_predecessor(node)
+
+    def join(self, node: Data) -> bool:
+        """
+        node 가 속해 있는 ring 에 join 합니다.
+        node 에게 본인의 successor 를 찾아달라고 요청한 뒤, successor 로 설정합니다.
+        나머지 (predecessor, finger table) 는 stabilize, fix_fingers 가 채워줍니다.
+
+        :return: join 에 성공하면 True, node 가 응답하지 않으면 False
+        """
+        successor = find_successor_request(node, self.cur_node.key)
+        if not successor:
+            return False
+        self.predecessor = Data(self.cur_node.key, self.cur_node.value)
+        self.set_successor(successor)
+        self.stabilize()
+        self.fix_fingers(len(self.finger_table.entries))
+        return True
+
+    def leave(self, handoff: bool = True):
+        """
+        ring 에서 나갑니다.
+        본인의 data 를 predecessor 에게 넘기고, predecessor 와 successor 가 서로를 가리키도록 알려줍니다.
+
+        :param handoff: False 면 data 를 넘기지 않음 (replication 을 사용하면 successor 들이 이미 복사본을 가지고 있음)
+        """
+        self.stop_flag = True
+        successor = self.first_alive_successor()
+        predecessor = self.predecessor
+        if successor is self.cur_node:
+            return
+
+        # predecessor 와 successor 가 서로를 가리키도록 먼저 알려줘야, 넘겨준 data 가 다시 본인에게 오지 않음
+        notify_node_info(successor, predecessor, n.predecessor)
+        if predecessor.value != self.cur_node.value:
+            notify_node_info(predecessor, successor, n.successor)
+
+        # 본인의 key 범위는 predecessor 가 이어받음, predecessor 를 모르면 successor 에게 넘김 (successor 가 알맞은 노드로 전달함)
+        if not handoff:
+            return
+        receiver = predecessor if predecessor.value != self.cur_node.value else successor
+        if not self.transfer_range(receiver, self.cur_node.key, self.cur_node.key):
+            logging.info(f'failed to hand off data to {receiver.value}, keep {len(self.data_table)} keys')
+
+    def transfer_range(self, receiver: Data, start, end) -> bool:
+        """
+        data table 에서 ring 위의 [start, end) 범위의 segment 들을 떼어내서, 하나의 stream (TransferRange) 으로 receiver 에게 넘깁니다.
+        start 와 end 가 같으면 ring 전체를 넘깁니다.
+        일부만 저장되었거나 실패하면 떼어낸 segment 를 다시 붙이므로, 다음에 다시 넘길 수 있습니다. (같은 값을 다시 set 해도 결과는 같음)
+
+        :return: 모두 넘겼으면 True
+        """
+        segments = self.data_table.detach(start, end)
+        entries = [entry for segment in segments for entry in segment.entries]
+        if not entries:
+            return True
+        try:
+            stored = transfer_request(self.cur_node, receiver, entries)
+        except Exception as e:
+            logging.debug(f'failed to transfer {len(entries)} keys to {receiver.value}, {e}')
+            stored = 0
+        if stored < len(entries):
+            logging.info(f'{receiver.value} stored only {stored}/{len(entries)} keys, retry later')
+            self.data_table.adopt(segments)
+            return False
+        return True
+
+    def handoff_ranges(self) -> list:
+        """
+        본인의 key 범위 [n, successor) 밖의 ring 을, data 를 넘겨줄 노드별 범위로 나눕니다.
+        살아있는 노드들의 key 를 경계로 나누므로, 한 범위 안의 key 들은 find_nearest_alive_node 의 결과가 모두 같습니다.
+        data table 을 함께 사용하는 가상 노드 (siblings) 부터 시작하는 범위는 그 가상 노드가 담당하므로 넘기지 않습니다.
+
+        :return: (넘겨줄 노드, start, end) 의 list
+        """
+        cur_key, successor_key = self.cur_node.key, self.successor.key
+        if successor_key == cur_key:
+            return []
+        siblings = {node.value for node in self.siblings}
+        boundaries = {successor_key}
+        for node in self.finger_table.entries + self.successors + self.siblings:
+            if node.value != self.cur_node.value and in_open_range(node.key, successor_key, cur_key) and \
+                    (node.value in siblings or self.failure_detector.is_alive(node)):
+                boundaries.add(node.key)
+        boundaries = sorted(boundaries, key=lambda key: ring_distance(cur_key, key))
+        sibling_keys = {node.key for node in self.siblings}
+
+        ranges = []
+        for start, end in zip(boundaries, boundaries[1:] + [cur_key]):
+            if start in sibling_keys:
+                continue
+            node = self.find_nearest_alive_node(start)
+            if node.value != self.cur_node.value and node.value not in siblings:
+                ranges.append((node, start, end))
+        return ranges
+
+    def stabilize(self):
+        """
+        successor 의 predecessor 를 확인해서, 그 사이에 새로운 노드가 들어왔으면 successor 를 교체하고,
+        successor 에게 본인이 predecessor 일 수 있다고 알려줍니다. 이후 successor list 를 갱신합니다.
+        """
+        successor = self.first_alive_successor()
+        if successor is self.cur_node:
+            # 혼자 있거나 모든 successor 가 죽었으면, predecessor 가 successor 가 될 수 있음
+            candidate = self.predecessor
+        else:
+            candidate = request_node_info(successor, n.predecessor)
+
+        if candidate and candidate.value != self.cur_node.value and \
+                in_open_range(candidate.key, self.cur_node.key, successor.key):
+            successor = candidate
+
+        if successor is self.cur_node or successor.value == self.cur_node.value:
+            self.set_successor(self.cur_node)
+            self.successors = [self.successor]
+            return
+
+        notify_node_info(successor, self.cur_node, n.predecessor_candidate)
+
+        # successor list 갱신: 본인의 successor 와, successor 의 successor list
+        successor_list = request_successor_list(successor)
+        if successor_list is False:
+            successor_list = self.successors[1:]
+        successors = [successor]
+        for node in successor_list:
+            if len(successors) >= SUCCESSOR_LIST_LENGTH or node.value == self.cur_node.value:
+                break
+            if node.value not in [s.value for s in successors]:
+                successors.append(node)
+        self.set_successor(successor)
+        self.successors = successors
+
+    def fix_fingers(self, count: int = None):
+        """
+        finger table 을 조금씩 갱신합니다. finger_table[i] = successor(n + 2^i)
+        다른 노드에게 물어봐야 하는 finger 는 한 주기에 최대 count 개만 갱신하고, 다음 주기에 이어서 갱신합니다.
+        """
+        if count is None:
+            count = self.fingers_per_cycle
+        entries = self.finger_table.entries
         cur_key = self.cur_node.key
 
-        for i in range(len(self.data_table.entries)):
-            data_key = self.data_table.entries[i].key
-            if pd_key <= data_key < cur_key or cur_key < pd_key <= data_key or data_key < cur_key < pd_key:
-                threading.Thread(target=data_request,
-                                 args=(self.cur_node, self.predecessor, self.data_table.entries[i], d.set)
-                                 ).start()
-                self.data_table.delete(cur_key)
-
-            if cur_key < successor_key <= data_key or successor_key <= data_key < cur_key:
-                threading.Thread(target=data_request,
-                                 args=(self.cur_node, self.finger_table.entries[n.successor], self.data_table.entries[i], d.set)
-                                 ).start()
-                self.data_table.delete(cur_key)
+        for _ in range(len(entries)):
+            if count <= 0:
+                break
+            i = self.next_finger
+            self.next_finger = (self.next_finger + 1) % len(entries)
+            start = (cur_key + (1 << i)) % RING_SIZE
+
+            if in_right_closed_range(start, cur_key, self.successor.key):
+                # successor 보다 가까우면 successor 가 finger 임 (통신 필요 없음)
+                node = self.successor
+            elif i > 0 and entries[i - 1].value != self.cur_node.value and \
+                    in_right_closed_range(start, cur_key, entries[i - 1].key):
+                # 이전 finger 보다 가까우면, 이전 finger 가 그대로 finger 임 (통신 필요 없음)
+                node = entries[i - 1]
+            else:
+                node = self.find_successor(start)
+                count -= 1
+            if node and i != n.successor:
+                entries[i] = node
+
+    def check_predecessor(self):
+        # predecessor 가 죽었으면, predecessor 를 모르는 상태 (본인) 로 바꿈
+        if self.predecessor.value != self.cur_node.value and not self.failure_detector.is_alive(self.predecessor):
+            logging.info(f'predecessor {self.predecessor.value} is dead')
+            self.predecessor = Data(self.cur_node.key, self.cur_node.value)
+
+    def handoff_data(self):
+        # 본인의 key 범위 [n, successor) 밖의 data 는, 넘겨줄 노드별 범위의 segment 째로 떼어내서 stream 하나로 넘김
+        # (본인이 담당하는 key 들은 확인하지 않음)
+        for node, start, end in self.handoff_ranges():
+            self.transfer_range(node, start, end)
 
     def update_finger_table_info(self):
         self.log_nodes()
-        while True:
+        while not self.stop_flag:
             # network상에 메시지가 flooding을 막기 위해서 time 간격을 둠
-            time.sleep(3)
-            self.stabilize_successor()
-            self.finger_table_renew()
-
-            # 15초 간격으로 finger table 최신으로 업데이트 (주기 조정 가능)
-            if self.finger_table_update_cycle >= 5:
-                toss_message(self.cur_node, self.finger_table.entries[n.successor], t.finger_table_setting, 1)
-
-            # 만약 disjoin이 일어나면 해당 cycle도 break
-            if self.stop_flag:
-                break
+            time.sleep(self.update_interval)
+            self.update_once()
+
+    def update_once(self):
+        # 한 주기에 실행하는 작업들, simulator 는 thread 없이 가상 시계에 맞춰 직접 호출함
+        try:
+            self.check_predecessor()
+            self.stabilize()
+            self.fix_fingers()
+            self.handoff_data()
+        except Exception as e:
+            logging.info(f'failed to update node table: {e}')
 
     def run(self):
+        self.failure_detector.start()
         self.update_finger_table_info()
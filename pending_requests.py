@@ -0,0 +1,84 @@
+import time
+import uuid
+from concurrent.futures import Future
+from threading import Lock
+
+"""
+pending_requests.py 는 원격 get 요청의 결과를 기다리는 Future 들을 관리합니다.
+
+get 요청을 보낼 때 request id 를 붙여서 보내고, 데이터를 가지고 있는 노드가 get_result 로 응답하면
+같은 request id 를 가진 Future 에 값을 넣어줍니다.
+"""
+
+
+class PendingRequests:
+
+    def __init__(self):
+        # request id -> Future
+        self.futures = dict()
+        # request id -> 요청을 만든 시각 (time.monotonic), trace 에 latency 를 기록할 때 사용
+        self.started = dict()
+        self.lock = Lock()
+
+        # 통계값
+        self.completed = 0
+        self.timeouts = 0
+        self.unmatched = 0  # 이미 timeout 되었거나, 모르는 request id 로 온 결과
+
+    def create(self):
+        """
+        새로운 request id 와, 결과를 받을 Future 를 생성합니다.
+        :return: (request_id, future)
+        """
+        request_id = uuid.uuid4().hex
+        future = Future()
+        with self.lock:
+            self.futures[request_id] = future
+            self.started[request_id] = time.monotonic()
+        return request_id, future
+
+    def elapsed(self, request_id: str):
+        """
+        :return: 요청을 만든 뒤 지난 시간 (초), 기다리고 있는 요청이 아니면 None
+        """
+        with self.lock:
+            started = self.started.get(request_id)
+        return None if started is None else time.monotonic() - started
+
+    def resolve(self, request_id: str, value) -> bool:
+        """
+        request id 에 해당하는 Future 에 결과값을 넣습니다.
+        :return: 기다리고 있는 Future 가 있었으면 True, 없었으면 False 를 return 합니다.
+        """
+        with self.lock:
+            future = self.futures.pop(request_id, None)
+            self.started.pop(request_id, None)
+            if future is None:
+                self.unmatched += 1
+                return False
+            self.completed += 1
+        future.set_result(value)
+        return True
+
+    def fail(self, request_id: str, error: Exception):
+        with self.lock:
+            future = self.futures.pop(request_id, None)
+            self.started.pop(request_id, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def cancel(self, request_id: str):
+        # timeout 된 요청을 정리함
+        with self.lock:
+            self.started.pop(request_id, None)
+            if self.futures.pop(request_id, None) is not None:
+                self.timeouts += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'pending': len(self.futures),
+                'completed': self.completed,
+                'timeouts': self.timeouts,
+                'unmatched': self.unmatched,
+            }
@@ -19,7 +19,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\x0b\x63hord.proto\x12\x05\x63hord\"\x1b\n\x0bHealthCheck\x12\x0c\n\x04ping\x18\x01 \x01(\r\"\x1b\n\x0bHealthReply\x12\x0c\n\x04pong\x18\x01 \x01(\r\"6\n\nNodeDetail\x12\x14\n\x0cnode_address\x18\x01 \x01(\t\x12\x12\n\nwhich_node\x18\x02 \x01(\x05\"1\n\x07NodeVal\x12\x10\n\x08node_key\x18\x01 \x01(\t\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\"F\n\x08NodeType\x12\x10\n\x08node_key\x18\x01 \x01(\t\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\x12\x12\n\nwhich_node\x18\x03 \x01(\x05\"k\n\x07Message\x12\x10\n\x08node_key\x18\x01 \x01(\t\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\x12\x14\n\x0cmessage_type\x18\x03 \x01(\r\x12\x0f\n\x07message\x18\x04 \x01(\r\x12\x11\n\tnode_type\x18\x05 \x01(\r\"{\n\x0fStarterWithData\x12\x10\n\x08node_key\x18\x01 \x01(\t\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\x12\x10\n\x08\x64\x61ta_key\x18\x03 \x01(\t\x12\x12\n\ndata_value\x18\x04 \x01(\t\x12\x1a\n\x12\x64\x61ta_handling_type\x18\x05 \x01(\r2B\n\rHealthChecker\x12\x31\n\x05\x43heck\x12\x12.chord.HealthCheck\x1a\x12.chord.HealthReply\"\x00\x32\x41\n\x0cGetNodeValue\x12\x31\n\nGetNodeVal\x12\x11.chord.NodeDetail\x1a\x0e.chord.NodeVal\"\x00\x32H\n\nNotifyNode\x12:\n\x11NotifyNodeChanged\x12\x0f.chord.NodeType\x1a\x12.chord.HealthReply\"\x00\x32\x39\n\x0bTossMessage\x12*\n\x02TM\x12\x0e.chord.Message\x1a\x12.chord.HealthReply\"\x00\x32@\n\nHandleData\x12\x32\n\x02GD\x12\x16.chord.StarterWithData\x1a\x12.chord.HealthReply\"\x00\x62\x06proto3'
+  serialized_pb=b'\n\x0b\x63hord.proto\x12\x05\x63hord\"\x1b\n\x0bHealthCheck\x12\x0c\n\x04ping\x18\x01 \x01(\r\"\x1b\n\x0bHealthReply\x12\x0c\n\x04pong\x18\x01 \x01(\r\"V\n\tKeyFilter\x12\x0c\n\x04\x62its\x18\x01 \x01(\x0c\x12\x0e\n\x06hashes\x18\x02 \x01(\r\x12\r\n\x05start\x18\x03 \x01(\x0c\x12\x0b\n\x03\x65nd\x18\x04 \x01(\x0c\x12\x0f\n\x07version\x18\x05 \x01(\x04\"9\n\x10KeyFilterVersion\x12\x14\n\x0cnode_address\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\x04\"6\n\nNodeDetail\x12\x14\n\x0cnode_address\x18\x01 \x01(\t\x12\x12\n\nwhich_node\x18\x02 \x01(\x05\"1\n\x07NodeVal\x12\x10\n\x08node_key\x18\x01 \x01(\x0c\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\"\x18\n\tKeyDetail\x12\x0b\n\x03key\x18\x01 \x01(\x0c\")\n\x08NodeList\x12\x1d\n\x05nodes\x18\x01 \x03(\x0b\x32\x0e.chord.NodeVal\"K\n\x0cNextHopReply\x12\x13\n\x0bresponsible\x18\x01 \x01(\x08\x12\x10\n\x08node_key\x18\x02 \x01(\x0c\x12\x14\n\x0cnode_address\x18\x03 \x01(\t\"F\n\x08NodeType\x12\x10\n\x08node_key\x18\x01 \x01(\x0c\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\x12\x12\n\nwhich_node\x18\x03 \x01(\x05\"\xde\x01\n\x0fStarterWithData\x12\x10\n\x08node_key\x18\x01 \x01(\x0c\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\x12\x10\n\x08\x64\x61ta_key\x18\x03 \x01(\x0c\x12\x12\n\ndata_value\x18\x04 \x01(\x0c\x12\x1a\n\x12\x64\x61ta_handling_type\x18\x05 \x01(\r\x12\x12\n\nrequest_id\x18\x06 \x01(\t\x12\x0c\n\x04hops\x18\x07 \x01(\r\x12\x0c\n\x04path\x18\x08 \x03(\t\x12\x10\n\x08lease_ms\x18\t \x01(\r\x12\x10\n\x08replicas\x18\n \x03(\t\x12\r\n\x05\x66ound\x18\x0b \x01(\x08\"b\n\nHotReplica\x12\x10\n\x08\x64\x61ta_key\x18\x01 \x01(\x0c\x12\x12\n\ndata_value\x18\x02 \x01(\x0c\x12\r\n\x05\x66ound\x18\x03 \x01(\x08\x12\x0e\n\x06ttl_ms\x18\x04 \x01(\r\x12\x0f\n\x07version\x18\x05 \x01(\x04\"`\n\x08KeyValue\x12\x10\n\x08\x64\x61ta_key\x18\x01 \x01(\x0c\x12\x12\n\ndata_value\x18\x02 \x01(\x0c\x12\r\n\x05\x66ound\x18\x03 \x01(\x08\x12\x10\n\x08redirect\x18\x04 \x01(\t\x12\r\n\x05\x65rror\x18\x05 \x01(\t\"|\n\x14StarterWithMultiData\x12\x10\n\x08node_key\x18\x01 \x01(\x0c\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\x12 \n\x07\x65ntries\x18\x03 \x03(\x0b\x32\x0f.chord.KeyValue\x12\x1a\n\x12\x64\x61ta_handling_type\x18\x04 \x01(\r\"W\n\x0eMultiDataReply\x12 \n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x0f.chord.KeyValue\x12\x10\n\x08node_key\x18\x02 \x01(\x0c\x12\x11\n\trange_end\x18\x03 \x01(\x0c\"Y\n\rTransferBatch\x12\x10\n\x08node_key\x18\x01 \x01(\x0c\x12\x14\n\x0cnode_address\x18\x02 \x01(\t\x12 \n\x07\x65ntries\x18\x03 \x03(\x0b\x32\x0f.chord.KeyValue\"1\n\rTransferReply\x12\x10\n\x08received\x18\x01 \x01(\x04\x12\x0e\n\x06stored\x18\x02 \x01(\x04\"Q\n\rClientRequest\x12\x10\n\x08\x64\x61ta_key\x18\x01 \x01(\x0c\x12\x12\n\ndata_value\x18\x02 \x01(\x0c\x12\x1a\n\x12\x64\x61ta_handling_type\x18\x03 \x01(\r\"\xaf\x01\n\x0b\x43lientReply\x12\x10\n\x08redirect\x18\x01 \x01(\x08\x12\x10\n\x08node_key\x18\x02 \x01(\x0c\x12\x14\n\x0cnode_address\x18\x03 \x01(\t\x12\x11\n\trange_end\x18\x04 \x01(\x0c\x12\x12\n\ndata_value\x18\x05 \x01(\x0c\x12\r\n\x05\x66ound\x18\x06 \x01(\x08\x12\r\n\x05\x65rror\x18\x07 \x01(\t\x12\x10\n\x08replicas\x18\x08 \x03(\t\x12\x0f\n\x07replica\x18\t \x01(\x08\"T\n\x0cReplicaValue\x12\x10\n\x08\x64\x61ta_key\x18\x01 \x01(\x0c\x12\x12\n\ndata_value\x18\x02 \x01(\x0c\x12\x0f\n\x07version\x18\x03 \x01(\x04\x12\r\n\x05\x66ound\x18\x04 \x01(\x08\x32\x42\n\rHealthChecker\x12\x31\n\x05\x43heck\x12\x12.chord.HealthCheck\x1a\x12.chord.HealthReply\"\x00\x32\xdb\x02\n\x0cGetNodeValue\x12\x31\n\nGetNodeVal\x12\x11.chord.NodeDetail\x1a\x0e.chord.NodeVal\"\x00\x12\x33\n\rFindSuccessor\x12\x10.chord.KeyDetail\x1a\x0e.chord.NodeVal\"\x00\x12\x38\n\x10GetSuccessorList\x12\x11.chord.NodeDetail\x1a\x0f.chord.NodeList\"\x00\x12\x32\n\x07NextHop\x12\x10.chord.KeyDetail\x1a\x13.chord.NextHopReply\"\x00\x12\x35\n\x0cGetKeyFilter\x12\x11.chord.NodeDetail\x1a\x10.chord.KeyFilter\"\x00\x12>\n\rDropKeyFilter\x12\x17.chord.KeyFilterVersion\x1a\x12.chord.HealthReply\"\x00\x32H\n\nNotifyNode\x12:\n\x11NotifyNodeChanged\x12\x0f.chord.NodeType\x1a\x12.chord.HealthReply\"\x00\x32\xaa\x02\n\nHandleData\x12\x32\n\x02GD\x12\x16.chord.StarterWithData\x1a\x12.chord.HealthReply\"\x00\x12;\n\x03MGD\x12\x1b.chord.StarterWithMultiData\x1a\x15.chord.MultiDataReply\"\x00\x12?\n\rTransferRange\x12\x14.chord.TransferBatch\x1a\x14.chord.TransferReply\"\x00(\x01\x12\x34\n\nInvalidate\x12\x10.chord.KeyDetail\x1a\x12.chord.HealthReply\"\x00\x12\x34\n\tReplicate\x12\x11.chord.HotReplica\x1a\x12.chord.HealthReply\"\x00\x32\x41\n\nClientData\x12\x33\n\x05Query\x12\x14.chord.ClientRequest\x1a\x12.chord.ClientReply\"\x00\x32n\n\x07Replica\x12\x32\n\x05Write\x12\x13.chord.ReplicaValue\x1a\x12.chord.HealthReply\"\x00\x12/\n\x04Read\x12\x10.chord.KeyDetail\x1a\x13.chord.ReplicaValue\"\x00\x62\x06proto3'
 )
 
 
@@ -89,6 +89,105 @@ _HEALTHREPLY = _descriptor.Descriptor(
 )
 
 
+_KEYFILTER = _descriptor.Descriptor(
+  name='KeyFilter',
+  full_name='chord.KeyFilter',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='bits', full_name='chord.KeyFilter.bits', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='hashes', full_name='chord.KeyFilter.hashes', index=1,
+      number=2, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='start', full_name='chord.KeyFilter.start', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='end', full_name='chord.KeyFilter.end', index=3,
+      number=4, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='version', full_name='chord.KeyFilter.version', index=4,
+      number=5, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=80,
+  serialized_end=166,
+)
+
+
+_KEYFILTERVERSION = _descriptor.Descriptor(
+  name='KeyFilterVersion',
+  full_name='chord.KeyFilterVersion',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='node_address', full_name='chord.KeyFilterVersion.node_address', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='version', full_name='chord.KeyFilterVersion.version', index=1,
+      number=2, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=168,
+  serialized_end=225,
+)
+
+
 _NODEDETAIL = _descriptor.Descriptor(
   name='NodeDetail',
   full_name='chord.NodeDetail',
@@ -105,8 +204,478 @@ _NODEDETAIL = _descriptor.Descriptor(
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='which_node', full_name='chord.NodeDetail.which_node', index=1,
-      number=2, type=5, cpp_type=1, label=1,
+      name='which_node', full_name='chord.NodeDetail.which_node', index=1,
+      number=2, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=227,
+  serialized_end=281,
+)
+
+
+_NODEVAL = _descriptor.Descriptor(
+  name='NodeVal',
+  full_name='chord.NodeVal',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='node_key', full_name='chord.NodeVal.node_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='node_address', full_name='chord.NodeVal.node_address', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=283,
+  serialized_end=332,
+)
+
+
+_KEYDETAIL = _descriptor.Descriptor(
+  name='KeyDetail',
+  full_name='chord.KeyDetail',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='key', full_name='chord.KeyDetail.key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=334,
+  serialized_end=358,
+)
+
+
+_NODELIST = _descriptor.Descriptor(
+  name='NodeList',
+  full_name='chord.NodeList',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='nodes', full_name='chord.NodeList.nodes', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=360,
+  serialized_end=401,
+)
+
+
+_NEXTHOPREPLY = _descriptor.Descriptor(
+  name='NextHopReply',
+  full_name='chord.NextHopReply',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='responsible', full_name='chord.NextHopReply.responsible', index=0,
+      number=1, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='node_key', full_name='chord.NextHopReply.node_key', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='node_address', full_name='chord.NextHopReply.node_address', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=403,
+  serialized_end=478,
+)
+
+
+_NODETYPE = _descriptor.Descriptor(
+  name='NodeType',
+  full_name='chord.NodeType',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='node_key', full_name='chord.NodeType.node_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='node_address', full_name='chord.NodeType.node_address', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='which_node', full_name='chord.NodeType.which_node', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=480,
+  serialized_end=550,
+)
+
+
+_STARTERWITHDATA = _descriptor.Descriptor(
+  name='StarterWithData',
+  full_name='chord.StarterWithData',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='node_key', full_name='chord.StarterWithData.node_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='node_address', full_name='chord.StarterWithData.node_address', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_key', full_name='chord.StarterWithData.data_key', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_value', full_name='chord.StarterWithData.data_value', index=3,
+      number=4, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_handling_type', full_name='chord.StarterWithData.data_handling_type', index=4,
+      number=5, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='request_id', full_name='chord.StarterWithData.request_id', index=5,
+      number=6, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='hops', full_name='chord.StarterWithData.hops', index=6,
+      number=7, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='path', full_name='chord.StarterWithData.path', index=7,
+      number=8, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='lease_ms', full_name='chord.StarterWithData.lease_ms', index=8,
+      number=9, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='replicas', full_name='chord.StarterWithData.replicas', index=9,
+      number=10, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='found', full_name='chord.StarterWithData.found', index=10,
+      number=11, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=553,
+  serialized_end=775,
+)
+
+
+_HOTREPLICA = _descriptor.Descriptor(
+  name='HotReplica',
+  full_name='chord.HotReplica',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='data_key', full_name='chord.HotReplica.data_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_value', full_name='chord.HotReplica.data_value', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='found', full_name='chord.HotReplica.found', index=2,
+      number=3, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='ttl_ms', full_name='chord.HotReplica.ttl_ms', index=3,
+      number=4, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='version', full_name='chord.HotReplica.version', index=4,
+      number=5, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=777,
+  serialized_end=875,
+)
+
+
+_KEYVALUE = _descriptor.Descriptor(
+  name='KeyValue',
+  full_name='chord.KeyValue',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='data_key', full_name='chord.KeyValue.data_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_value', full_name='chord.KeyValue.data_value', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='found', full_name='chord.KeyValue.found', index=2,
+      number=3, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='redirect', full_name='chord.KeyValue.redirect', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='error', full_name='chord.KeyValue.error', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=877,
+  serialized_end=973,
+)
+
+
+_STARTERWITHMULTIDATA = _descriptor.Descriptor(
+  name='StarterWithMultiData',
+  full_name='chord.StarterWithMultiData',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='node_key', full_name='chord.StarterWithMultiData.node_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='node_address', full_name='chord.StarterWithMultiData.node_address', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='entries', full_name='chord.StarterWithMultiData.entries', index=2,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_handling_type', full_name='chord.StarterWithMultiData.data_handling_type', index=3,
+      number=4, type=13, cpp_type=3, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
@@ -123,30 +692,37 @@ _NODEDETAIL = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=80,
-  serialized_end=134,
+  serialized_start=975,
+  serialized_end=1099,
 )
 
 
-_NODEVAL = _descriptor.Descriptor(
-  name='NodeVal',
-  full_name='chord.NodeVal',
+_MULTIDATAREPLY = _descriptor.Descriptor(
+  name='MultiDataReply',
+  full_name='chord.MultiDataReply',
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
   create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
-      name='node_key', full_name='chord.NodeVal.node_key', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
+      name='entries', full_name='chord.MultiDataReply.entries', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='node_address', full_name='chord.NodeVal.node_address', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
+      name='node_key', full_name='chord.MultiDataReply.node_key', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='range_end', full_name='chord.MultiDataReply.range_end', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
@@ -162,37 +738,37 @@ _NODEVAL = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=136,
-  serialized_end=185,
+  serialized_start=1101,
+  serialized_end=1188,
 )
 
 
-_NODETYPE = _descriptor.Descriptor(
-  name='NodeType',
-  full_name='chord.NodeType',
+_TRANSFERBATCH = _descriptor.Descriptor(
+  name='TransferBatch',
+  full_name='chord.TransferBatch',
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
   create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
-      name='node_key', full_name='chord.NodeType.node_key', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
+      name='node_key', full_name='chord.TransferBatch.node_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='node_address', full_name='chord.NodeType.node_address', index=1,
+      name='node_address', full_name='chord.TransferBatch.node_address', index=1,
       number=2, type=9, cpp_type=9, label=1,
       has_default_value=False, default_value=b"".decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='which_node', full_name='chord.NodeType.which_node', index=2,
-      number=3, type=5, cpp_type=1, label=1,
-      has_default_value=False, default_value=0,
+      name='entries', full_name='chord.TransferBatch.entries', index=2,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
@@ -208,50 +784,75 @@ _NODETYPE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=187,
-  serialized_end=257,
+  serialized_start=1190,
+  serialized_end=1279,
 )
 
 
-_MESSAGE = _descriptor.Descriptor(
-  name='Message',
-  full_name='chord.Message',
+_TRANSFERREPLY = _descriptor.Descriptor(
+  name='TransferReply',
+  full_name='chord.TransferReply',
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
   create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
-      name='node_key', full_name='chord.Message.node_key', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
+      name='received', full_name='chord.TransferReply.received', index=0,
+      number=1, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='node_address', full_name='chord.Message.node_address', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
+      name='stored', full_name='chord.TransferReply.stored', index=1,
+      number=2, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1281,
+  serialized_end=1330,
+)
+
+
+_CLIENTREQUEST = _descriptor.Descriptor(
+  name='ClientRequest',
+  full_name='chord.ClientRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
     _descriptor.FieldDescriptor(
-      name='message_type', full_name='chord.Message.message_type', index=2,
-      number=3, type=13, cpp_type=3, label=1,
-      has_default_value=False, default_value=0,
+      name='data_key', full_name='chord.ClientRequest.data_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='message', full_name='chord.Message.message', index=3,
-      number=4, type=13, cpp_type=3, label=1,
-      has_default_value=False, default_value=0,
+      name='data_value', full_name='chord.ClientRequest.data_value', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='node_type', full_name='chord.Message.node_type', index=4,
-      number=5, type=13, cpp_type=3, label=1,
+      name='data_handling_type', full_name='chord.ClientRequest.data_handling_type', index=2,
+      number=3, type=13, cpp_type=3, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
@@ -268,54 +869,135 @@ _MESSAGE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=259,
-  serialized_end=366,
+  serialized_start=1332,
+  serialized_end=1413,
 )
 
 
-_STARTERWITHDATA = _descriptor.Descriptor(
-  name='StarterWithData',
-  full_name='chord.StarterWithData',
+_CLIENTREPLY = _descriptor.Descriptor(
+  name='ClientReply',
+  full_name='chord.ClientReply',
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
   create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
-      name='node_key', full_name='chord.StarterWithData.node_key', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
+      name='redirect', full_name='chord.ClientReply.redirect', index=0,
+      number=1, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='node_address', full_name='chord.StarterWithData.node_address', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=b"".decode('utf-8'),
+      name='node_key', full_name='chord.ClientReply.node_key', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='data_key', full_name='chord.StarterWithData.data_key', index=2,
+      name='node_address', full_name='chord.ClientReply.node_address', index=2,
       number=3, type=9, cpp_type=9, label=1,
       has_default_value=False, default_value=b"".decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='data_value', full_name='chord.StarterWithData.data_value', index=3,
-      number=4, type=9, cpp_type=9, label=1,
+      name='range_end', full_name='chord.ClientReply.range_end', index=3,
+      number=4, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_value', full_name='chord.ClientReply.data_value', index=4,
+      number=5, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='found', full_name='chord.ClientReply.found', index=5,
+      number=6, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='error', full_name='chord.ClientReply.error', index=6,
+      number=7, type=9, cpp_type=9, label=1,
       has_default_value=False, default_value=b"".decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='data_handling_type', full_name='chord.StarterWithData.data_handling_type', index=4,
-      number=5, type=13, cpp_type=3, label=1,
+      name='replicas', full_name='chord.ClientReply.replicas', index=7,
+      number=8, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='replica', full_name='chord.ClientReply.replica', index=8,
+      number=9, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1416,
+  serialized_end=1591,
+)
+
+
+_REPLICAVALUE = _descriptor.Descriptor(
+  name='ReplicaValue',
+  full_name='chord.ReplicaValue',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='data_key', full_name='chord.ReplicaValue.data_key', index=0,
+      number=1, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data_value', full_name='chord.ReplicaValue.data_value', index=1,
+      number=2, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='version', full_name='chord.ReplicaValue.version', index=2,
+      number=3, type=4, cpp_type=4, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='found', full_name='chord.ReplicaValue.found', index=3,
+      number=4, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -328,17 +1010,34 @@ _STARTERWITHDATA = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=368,
-  serialized_end=491,
+  serialized_start=1593,
+  serialized_end=1677,
 )
 
+_NODELIST.fields_by_name['nodes'].message_type = _NODEVAL
+_STARTERWITHMULTIDATA.fields_by_name['entries'].message_type = _KEYVALUE
+_MULTIDATAREPLY.fields_by_name['entries'].message_type = _KEYVALUE
+_TRANSFERBATCH.fields_by_name['entries'].message_type = _KEYVALUE
 DESCRIPTOR.message_types_by_name['HealthCheck'] = _HEALTHCHECK
 DESCRIPTOR.message_types_by_name['HealthReply'] = _HEALTHREPLY
+DESCRIPTOR.message_types_by_name['KeyFilter'] = _KEYFILTER
+DESCRIPTOR.message_types_by_name['KeyFilterVersion'] = _KEYFILTERVERSION
 DESCRIPTOR.message_types_by_name['NodeDetail'] = _NODEDETAIL
 DESCRIPTOR.message_types_by_name['NodeVal'] = _NODEVAL
+DESCRIPTOR.message_types_by_name['KeyDetail'] = _KEYDETAIL
+DESCRIPTOR.message_types_by_name['NodeList'] = _NODELIST
+DESCRIPTOR.message_types_by_name['NextHopReply'] = _NEXTHOPREPLY
 DESCRIPTOR.message_types_by_name['NodeType'] = _NODETYPE
-DESCRIPTOR.message_types_by_name['Message'] = _MESSAGE
 DESCRIPTOR.message_types_by_name['StarterWithData'] = _STARTERWITHDATA
+DESCRIPTOR.message_types_by_name['HotReplica'] = _HOTREPLICA
+DESCRIPTOR.message_types_by_name['KeyValue'] = _KEYVALUE
+DESCRIPTOR.message_types_by_name['StarterWithMultiData'] = _STARTERWITHMULTIDATA
+DESCRIPTOR.message_types_by_name['MultiDataReply'] = _MULTIDATAREPLY
+DESCRIPTOR.message_types_by_name['TransferBatch'] = _TRANSFERBATCH
+DESCRIPTOR.message_types_by_name['TransferReply'] = _TRANSFERREPLY
+DESCRIPTOR.message_types_by_name['ClientRequest'] = _CLIENTREQUEST
+DESCRIPTOR.message_types_by_name['ClientReply'] = _CLIENTREPLY
+DESCRIPTOR.message_types_by_name['ReplicaValue'] = _REPLICAVALUE
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 HealthCheck = _reflection.GeneratedProtocolMessageType('HealthCheck', (_message.Message,), {
@@ -355,6 +1054,20 @@ HealthReply = _reflection.GeneratedProtocolMessageType('HealthReply', (_message.
   })
 _sym_db.RegisterMessage(HealthReply)
 
+KeyFilter = _reflection.GeneratedProtocolMessageType('KeyFilter', (_message.Message,), {
+  'DESCRIPTOR' : _KEYFILTER,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.KeyFilter)
+  })
+_sym_db.RegisterMessage(KeyFilter)
+
+KeyFilterVersion = _reflection.GeneratedProtocolMessageType('KeyFilterVersion', (_message.Message,), {
+  'DESCRIPTOR' : _KEYFILTERVERSION,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.KeyFilterVersion)
+  })
+_sym_db.RegisterMessage(KeyFilterVersion)
+
 NodeDetail = _reflection.GeneratedProtocolMessageType('NodeDetail', (_message.Message,), {
   'DESCRIPTOR' : _NODEDETAIL,
   '__module__' : 'chord_pb2'
@@ -369,6 +1082,27 @@ NodeVal = _reflection.GeneratedProtocolMessageType('NodeVal', (_message.Message,
   })
 _sym_db.RegisterMessage(NodeVal)
 
+KeyDetail = _reflection.GeneratedProtocolMessageType('KeyDetail', (_message.Message,), {
+  'DESCRIPTOR' : _KEYDETAIL,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.KeyDetail)
+  })
+_sym_db.RegisterMessage(KeyDetail)
+
+NodeList = _reflection.GeneratedProtocolMessageType('NodeList', (_message.Message,), {
+  'DESCRIPTOR' : _NODELIST,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.NodeList)
+  })
+_sym_db.RegisterMessage(NodeList)
+
+NextHopReply = _reflection.GeneratedProtocolMessageType('NextHopReply', (_message.Message,), {
+  'DESCRIPTOR' : _NEXTHOPREPLY,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.NextHopReply)
+  })
+_sym_db.RegisterMessage(NextHopReply)
+
 NodeType = _reflection.GeneratedProtocolMessageType('NodeType', (_message.Message,), {
   'DESCRIPTOR' : _NODETYPE,
   '__module__' : 'chord_pb2'
@@ -376,13 +1110,6 @@ NodeType = _reflection.GeneratedProtocolMessageType('NodeType', (_message.Messag
   })
 _sym_db.RegisterMessage(NodeType)
 
-Message = _reflection.GeneratedProtocolMessageType('Message', (_message.Message,), {
-  'DESCRIPTOR' : _MESSAGE,
-  '__module__' : 'chord_pb2'
-  # @@protoc_insertion_point(class_scope:chord.Message)
-  })
-_sym_db.RegisterMessage(Message)
-
 StarterWithData = _reflection.GeneratedProtocolMessageType('StarterWithData', (_message.Message,), {
   'DESCRIPTOR' : _STARTERWITHDATA,
   '__module__' : 'chord_pb2'
@@ -390,6 +1117,69 @@ StarterWithData = _reflection.GeneratedProtocolMessageType('StarterWithData', (_
   })
 _sym_db.RegisterMessage(StarterWithData)
 
+HotReplica = _reflection.GeneratedProtocolMessageType('HotReplica', (_message.Message,), {
+  'DESCRIPTOR' : _HOTREPLICA,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.HotReplica)
+  })
+_sym_db.RegisterMessage(HotReplica)
+
+KeyValue = _reflection.GeneratedProtocolMessageType('KeyValue', (_message.Message,), {
+  'DESCRIPTOR' : _KEYVALUE,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.KeyValue)
+  })
+_sym_db.RegisterMessage(KeyValue)
+
+StarterWithMultiData = _reflection.GeneratedProtocolMessageType('StarterWithMultiData', (_message.Message,), {
+  'DESCRIPTOR' : _STARTERWITHMULTIDATA,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.StarterWithMultiData)
+  })
+_sym_db.RegisterMessage(StarterWithMultiData)
+
+MultiDataReply = _reflection.GeneratedProtocolMessageType('MultiDataReply', (_message.Message,), {
+  'DESCRIPTOR' : _MULTIDATAREPLY,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.MultiDataReply)
+  })
+_sym_db.RegisterMessage(MultiDataReply)
+
+TransferBatch = _reflection.GeneratedProtocolMessageType('TransferBatch', (_message.Message,), {
+  'DESCRIPTOR' : _TRANSFERBATCH,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.TransferBatch)
+  })
+_sym_db.RegisterMessage(TransferBatch)
+
+TransferReply = _reflection.GeneratedProtocolMessageType('TransferReply', (_message.Message,), {
+  'DESCRIPTOR' : _TRANSFERREPLY,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.TransferReply)
+  })
+_sym_db.RegisterMessage(TransferReply)
+
+ClientRequest = _reflection.GeneratedProtocolMessageType('ClientRequest', (_message.Message,), {
+  'DESCRIPTOR' : _CLIENTREQUEST,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.ClientRequest)
+  })
+_sym_db.RegisterMessage(ClientRequest)
+
+ClientReply = _reflection.GeneratedProtocolMessageType('ClientReply', (_message.Message,), {
+  'DESCRIPTOR' : _CLIENTREPLY,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.ClientReply)
+  })
+_sym_db.RegisterMessage(ClientReply)
+
+ReplicaValue = _reflection.GeneratedProtocolMessageType('ReplicaValue', (_message.Message,), {
+  'DESCRIPTOR' : _REPLICAVALUE,
+  '__module__' : 'chord_pb2'
+  # @@protoc_insertion_point(class_scope:chord.ReplicaValue)
+  })
+_sym_db.RegisterMessage(ReplicaValue)
+
 
 
 _HEALTHCHECKER = _descriptor.ServiceDescriptor(
@@ -399,8 +1189,8 @@ _HEALTHCHECKER = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=493,
-  serialized_end=559,
+  serialized_start=1679,
+  serialized_end=1745,
   methods=[
   _descriptor.MethodDescriptor(
     name='Check',
@@ -425,8 +1215,8 @@ _GETNODEVALUE = _descriptor.ServiceDescriptor(
   index=1,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=561,
-  serialized_end=626,
+  serialized_start=1748,
+  serialized_end=2095,
   methods=[
   _descriptor.MethodDescriptor(
     name='GetNodeVal',
@@ -438,6 +1228,56 @@ _GETNODEVALUE = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='FindSuccessor',
+    full_name='chord.GetNodeValue.FindSuccessor',
+    index=1,
+    containing_service=None,
+    input_type=_KEYDETAIL,
+    output_type=_NODEVAL,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='GetSuccessorList',
+    full_name='chord.GetNodeValue.GetSuccessorList',
+    index=2,
+    containing_service=None,
+    input_type=_NODEDETAIL,
+    output_type=_NODELIST,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='NextHop',
+    full_name='chord.GetNodeValue.NextHop',
+    index=3,
+    containing_service=None,
+    input_type=_KEYDETAIL,
+    output_type=_NEXTHOPREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='GetKeyFilter',
+    full_name='chord.GetNodeValue.GetKeyFilter',
+    index=4,
+    containing_service=None,
+    input_type=_NODEDETAIL,
+    output_type=_KEYFILTER,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='DropKeyFilter',
+    full_name='chord.GetNodeValue.DropKeyFilter',
+    index=5,
+    containing_service=None,
+    input_type=_KEYFILTERVERSION,
+    output_type=_HEALTHREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_GETNODEVALUE)
 
@@ -451,8 +1291,8 @@ _NOTIFYNODE = _descriptor.ServiceDescriptor(
   index=2,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=628,
-  serialized_end=700,
+  serialized_start=2097,
+  serialized_end=2169,
   methods=[
   _descriptor.MethodDescriptor(
     name='NotifyNodeChanged',
@@ -470,55 +1310,131 @@ _sym_db.RegisterServiceDescriptor(_NOTIFYNODE)
 DESCRIPTOR.services_by_name['NotifyNode'] = _NOTIFYNODE
 
 
-_TOSSMESSAGE = _descriptor.ServiceDescriptor(
-  name='TossMessage',
-  full_name='chord.TossMessage',
+_HANDLEDATA = _descriptor.ServiceDescriptor(
+  name='HandleData',
+  full_name='chord.HandleData',
   file=DESCRIPTOR,
   index=3,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=702,
-  serialized_end=759,
+  serialized_start=2172,
+  serialized_end=2470,
   methods=[
   _descriptor.MethodDescriptor(
-    name='TM',
-    full_name='chord.TossMessage.TM',
+    name='GD',
+    full_name='chord.HandleData.GD',
     index=0,
     containing_service=None,
-    input_type=_MESSAGE,
+    input_type=_STARTERWITHDATA,
+    output_type=_HEALTHREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='MGD',
+    full_name='chord.HandleData.MGD',
+    index=1,
+    containing_service=None,
+    input_type=_STARTERWITHMULTIDATA,
+    output_type=_MULTIDATAREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='TransferRange',
+    full_name='chord.HandleData.TransferRange',
+    index=2,
+    containing_service=None,
+    input_type=_TRANSFERBATCH,
+    output_type=_TRANSFERREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='Invalidate',
+    full_name='chord.HandleData.Invalidate',
+    index=3,
+    containing_service=None,
+    input_type=_KEYDETAIL,
+    output_type=_HEALTHREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='Replicate',
+    full_name='chord.HandleData.Replicate',
+    index=4,
+    containing_service=None,
+    input_type=_HOTREPLICA,
     output_type=_HEALTHREPLY,
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
 ])
-_sym_db.RegisterServiceDescriptor(_TOSSMESSAGE)
+_sym_db.RegisterServiceDescriptor(_HANDLEDATA)
 
-DESCRIPTOR.services_by_name['TossMessage'] = _TOSSMESSAGE
+DESCRIPTOR.services_by_name['HandleData'] = _HANDLEDATA
 
 
-_HANDLEDATA = _descriptor.ServiceDescriptor(
-  name='HandleData',
-  full_name='chord.HandleData',
+_CLIENTDATA = _descriptor.ServiceDescriptor(
+  name='ClientData',
+  full_name='chord.ClientData',
   file=DESCRIPTOR,
   index=4,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=761,
-  serialized_end=825,
+  serialized_start=2472,
+  serialized_end=2537,
   methods=[
   _descriptor.MethodDescriptor(
-    name='GD',
-    full_name='chord.HandleData.GD',
+    name='Query',
+    full_name='chord.ClientData.Query',
     index=0,
     containing_service=None,
-    input_type=_STARTERWITHDATA,
+    input_type=_CLIENTREQUEST,
+    output_type=_CLIENTREPLY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+])
+_sym_db.RegisterServiceDescriptor(_CLIENTDATA)
+
+DESCRIPTOR.services_by_name['ClientData'] = _CLIENTDATA
+
+
+_REPLICA = _descriptor.ServiceDescriptor(
+  name='Replica',
+  full_name='chord.Replica',
+  file=DESCRIPTOR,
+  index=5,
+  serialized_options=None,
+  create_key=_descriptor._internal_create_key,
+  serialized_start=2539,
+  serialized_end=2649,
+  methods=[
+  _descriptor.MethodDescriptor(
+    name='Write',
+    full_name='chord.Replica.Write',
+    index=0,
+    containing_service=None,
+    input_type=_REPLICAVALUE,
     output_type=_HEALTHREPLY,
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='Read',
+    full_name='chord.Replica.Read',
+    index=1,
+    containing_service=None,
+    input_type=_KEYDETAIL,
+    output_type=_REPLICAVALUE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
-_sym_db.RegisterServiceDescriptor(_HANDLEDATA)
+_sym_db.RegisterServiceDescriptor(_REPLICA)
 
-DESCRIPTOR.services_by_name['HandleData'] = _HANDLEDATA
+DESCRIPTOR.services_by_name['Replica'] = _REPLICA
 
 # @@protoc_insertion_point(module_scope)
@@ -84,6 +84,31 @@ class GetNodeValueStub(object):
                 request_serializer=chord__pb2.NodeDetail.SerializeToString,
                 response_deserializer=chord__pb2.NodeVal.FromString,
                 )
+        self.FindSuccessor = channel.unary_unary(
+                '/chord.GetNodeValue/FindSuccessor',
+                request_serializer=chord__pb2.KeyDetail.SerializeToString,
+                response_deserializer=chord__pb2.NodeVal.FromString,
+                )
+        self.GetSuccessorList = channel.unary_unary(
+                '/chord.GetNodeValue/GetSuccessorList',
+                request_serializer=chord__pb2.NodeDetail.SerializeToString,
+                response_deserializer=chord__pb2.NodeList.FromString,
+                )
+        self.NextHop = channel.unary_unary(
+                '/chord.GetNodeValue/NextHop',
+                request_serializer=chord__pb2.KeyDetail.SerializeToString,
+                response_deserializer=chord__pb2.NextHopReply.FromString,
+                )
+        self.GetKeyFilter = channel.unary_unary(
+                '/chord.GetNodeValue/GetKeyFilter',
+                request_serializer=chord__pb2.NodeDetail.SerializeToString,
+                response_deserializer=chord__pb2.KeyFilter.FromString,
+                )
+        self.DropKeyFilter = channel.unary_unary(
+                '/chord.GetNodeValue/DropKeyFilter',
+                request_serializer=chord__pb2.KeyFilterVersion.SerializeToString,
+                response_deserializer=chord__pb2.HealthReply.FromString,
+                )
 
 
 class GetNodeValueServicer(object):
@@ -96,6 +121,36 @@ class GetNodeValueServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def FindSuccessor(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetSuccessorList(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def NextHop(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetKeyFilter(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DropKeyFilter(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GetNodeValueServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -104,6 +159,31 @@ def add_GetNodeValueServicer_to_server(servicer, server):
                     request_deserializer=chord__pb2.NodeDetail.FromString,
                     response_serializer=chord__pb2.NodeVal.SerializeToString,
             ),
+            'FindSuccessor': grpc.unary_unary_rpc_method_handler(
+                    servicer.FindSuccessor,
+                    request_deserializer=chord__pb2.KeyDetail.FromString,
+                    response_serializer=chord__pb2.NodeVal.SerializeToString,
+            ),
+            'GetSuccessorList': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetSuccessorList,
+                    request_deserializer=chord__pb2.NodeDetail.FromString,
+                    response_serializer=chord__pb2.NodeList.SerializeToString,
+            ),
+            'NextHop': grpc.unary_unary_rpc_method_handler(
+                    servicer.NextHop,
+                    request_deserializer=chord__pb2.KeyDetail.FromString,
+                    response_serializer=chord__pb2.NextHopReply.SerializeToString,
+            ),
+            'GetKeyFilter': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetKeyFilter,
+                    request_deserializer=chord__pb2.NodeDetail.FromString,
+                    response_serializer=chord__pb2.KeyFilter.SerializeToString,
+            ),
+            'DropKeyFilter': grpc.unary_unary_rpc_method_handler(
+                    servicer.DropKeyFilter,
+                    request_deserializer=chord__pb2.KeyFilterVersion.FromString,
+                    response_serializer=chord__pb2.HealthReply.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'chord.GetNodeValue', rpc_method_handlers)
@@ -132,6 +212,91 @@ class GetNodeValue(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def FindSuccessor(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.GetNodeValue/FindSuccessor',
+            chord__pb2.KeyDetail.SerializeToString,
+            chord__pb2.NodeVal.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetSuccessorList(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.GetNodeValue/GetSuccessorList',
+            chord__pb2.NodeDetail.SerializeToString,
+            chord__pb2.NodeList.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def NextHop(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.GetNodeValue/NextHop',
+            chord__pb2.KeyDetail.SerializeToString,
+            chord__pb2.NextHopReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetKeyFilter(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.GetNodeValue/GetKeyFilter',
+            chord__pb2.NodeDetail.SerializeToString,
+            chord__pb2.KeyFilter.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def DropKeyFilter(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.GetNodeValue/DropKeyFilter',
+            chord__pb2.KeyFilterVersion.SerializeToString,
+            chord__pb2.HealthReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
 
 class NotifyNodeStub(object):
     """각 노드에게 노드의 변경 정보 알려줌
@@ -197,8 +362,9 @@ class NotifyNode(object):
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
 
-class TossMessageStub(object):
-    """노드에게 메시지 전송
+class HandleDataStub(object):
+    """Get, Set, Disjoin시 Set 시, Node 에게 정보를 보내는 부분
+    보내고 만약 요청을 처리해야 하는 노드면 별도로 요청을 처리하고, 아니면 그냥 잘 처리했다는 HealthReply
     """
 
     def __init__(self, channel):
@@ -207,44 +373,110 @@ class TossMessageStub(object):
         Args:
             channel: A grpc.Channel.
         """
-        self.TM = channel.unary_unary(
-                '/chord.TossMessage/TM',
-                request_serializer=chord__pb2.Message.SerializeToString,
+        self.GD = channel.unary_unary(
+                '/chord.HandleData/GD',
+                request_serializer=chord__pb2.StarterWithData.SerializeToString,
+                response_deserializer=chord__pb2.HealthReply.FromString,
+                )
+        self.MGD = channel.unary_unary(
+                '/chord.HandleData/MGD',
+                request_serializer=chord__pb2.StarterWithMultiData.SerializeToString,
+                response_deserializer=chord__pb2.MultiDataReply.FromString,
+                )
+        self.TransferRange = channel.stream_unary(
+                '/chord.HandleData/TransferRange',
+                request_serializer=chord__pb2.TransferBatch.SerializeToString,
+                response_deserializer=chord__pb2.TransferReply.FromString,
+                )
+        self.Invalidate = channel.unary_unary(
+                '/chord.HandleData/Invalidate',
+                request_serializer=chord__pb2.KeyDetail.SerializeToString,
+                response_deserializer=chord__pb2.HealthReply.FromString,
+                )
+        self.Replicate = channel.unary_unary(
+                '/chord.HandleData/Replicate',
+                request_serializer=chord__pb2.HotReplica.SerializeToString,
                 response_deserializer=chord__pb2.HealthReply.FromString,
                 )
 
 
-class TossMessageServicer(object):
-    """노드에게 메시지 전송
+class HandleDataServicer(object):
+    """Get, Set, Disjoin시 Set 시, Node 에게 정보를 보내는 부분
+    보내고 만약 요청을 처리해야 하는 노드면 별도로 요청을 처리하고, 아니면 그냥 잘 처리했다는 HealthReply
     """
 
-    def TM(self, request, context):
+    def GD(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def MGD(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def TransferRange(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Invalidate(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
-def add_TossMessageServicer_to_server(servicer, server):
+    def Replicate(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_HandleDataServicer_to_server(servicer, server):
     rpc_method_handlers = {
-            'TM': grpc.unary_unary_rpc_method_handler(
-                    servicer.TM,
-                    request_deserializer=chord__pb2.Message.FromString,
+            'GD': grpc.unary_unary_rpc_method_handler(
+                    servicer.GD,
+                    request_deserializer=chord__pb2.StarterWithData.FromString,
+                    response_serializer=chord__pb2.HealthReply.SerializeToString,
+            ),
+            'MGD': grpc.unary_unary_rpc_method_handler(
+                    servicer.MGD,
+                    request_deserializer=chord__pb2.StarterWithMultiData.FromString,
+                    response_serializer=chord__pb2.MultiDataReply.SerializeToString,
+            ),
+            'TransferRange': grpc.stream_unary_rpc_method_handler(
+                    servicer.TransferRange,
+                    request_deserializer=chord__pb2.TransferBatch.FromString,
+                    response_serializer=chord__pb2.TransferReply.SerializeToString,
+            ),
+            'Invalidate': grpc.unary_unary_rpc_method_handler(
+                    servicer.Invalidate,
+                    request_deserializer=chord__pb2.KeyDetail.FromString,
+                    response_serializer=chord__pb2.HealthReply.SerializeToString,
+            ),
+            'Replicate': grpc.unary_unary_rpc_method_handler(
+                    servicer.Replicate,
+                    request_deserializer=chord__pb2.HotReplica.FromString,
                     response_serializer=chord__pb2.HealthReply.SerializeToString,
             ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
-            'chord.TossMessage', rpc_method_handlers)
+            'chord.HandleData', rpc_method_handlers)
     server.add_generic_rpc_handlers((generic_handler,))
 
 
  # This class is part of an EXPERIMENTAL API.
-class TossMessage(object):
-    """노드에게 메시지 전송
+class HandleData(object):
+    """Get, Set, Disjoin시 Set 시, Node 에게 정보를 보내는 부분
+    보내고 만약 요청을 처리해야 하는 노드면 별도로 요청을 처리하고, 아니면 그냥 잘 처리했다는 HealthReply
     """
 
     @staticmethod
-    def TM(request,
+    def GD(request,
             target,
             options=(),
             channel_credentials=None,
@@ -254,16 +486,84 @@ class TossMessage(object):
             wait_for_ready=None,
             timeout=None,
             metadata=None):
-        return grpc.experimental.unary_unary(request, target, '/chord.TossMessage/TM',
-            chord__pb2.Message.SerializeToString,
+        return grpc.experimental.unary_unary(request, target, '/chord.HandleData/GD',
+            chord__pb2.StarterWithData.SerializeToString,
             chord__pb2.HealthReply.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def MGD(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.HandleData/MGD',
+            chord__pb2.StarterWithMultiData.SerializeToString,
+            chord__pb2.MultiDataReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
-class HandleDataStub(object):
-    """Get, Set, Disjoin시 Set 시, Node 에게 정보를 보내는 부분
-    보내고 만약 요청을 처리해야 하는 노드면 별도로 요청을 처리하고, 아니면 그냥 잘 처리했다는 HealthReply
+    @staticmethod
+    def TransferRange(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/chord.HandleData/TransferRange',
+            chord__pb2.TransferBatch.SerializeToString,
+            chord__pb2.TransferReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Invalidate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.HandleData/Invalidate',
+            chord__pb2.KeyDetail.SerializeToString,
+            chord__pb2.HealthReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Replicate(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.HandleData/Replicate',
+            chord__pb2.HotReplica.SerializeToString,
+            chord__pb2.HealthReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+
+class ClientDataStub(object):
+    """client 가 ring 에 직접 get, set, delete 를 요청하는 부분
+    요청을 받은 노드가 해당 key 를 가지고 있으면 바로 처리하고, 아니면 다음으로 요청해야 할 노드를 알려줌 (redirect)
     """
 
     def __init__(self, channel):
@@ -272,46 +572,129 @@ class HandleDataStub(object):
         Args:
             channel: A grpc.Channel.
         """
-        self.GD = channel.unary_unary(
-                '/chord.HandleData/GD',
-                request_serializer=chord__pb2.StarterWithData.SerializeToString,
+        self.Query = channel.unary_unary(
+                '/chord.ClientData/Query',
+                request_serializer=chord__pb2.ClientRequest.SerializeToString,
+                response_deserializer=chord__pb2.ClientReply.FromString,
+                )
+
+
+class ClientDataServicer(object):
+    """client 가 ring 에 직접 get, set, delete 를 요청하는 부분
+    요청을 받은 노드가 해당 key 를 가지고 있으면 바로 처리하고, 아니면 다음으로 요청해야 할 노드를 알려줌 (redirect)
+    """
+
+    def Query(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ClientDataServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'Query': grpc.unary_unary_rpc_method_handler(
+                    servicer.Query,
+                    request_deserializer=chord__pb2.ClientRequest.FromString,
+                    response_serializer=chord__pb2.ClientReply.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'chord.ClientData', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class ClientData(object):
+    """client 가 ring 에 직접 get, set, delete 를 요청하는 부분
+    요청을 받은 노드가 해당 key 를 가지고 있으면 바로 처리하고, 아니면 다음으로 요청해야 할 노드를 알려줌 (redirect)
+    """
+
+    @staticmethod
+    def Query(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.ClientData/Query',
+            chord__pb2.ClientRequest.SerializeToString,
+            chord__pb2.ClientReply.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+
+class ReplicaStub(object):
+    """key 를 담당하는 노드가, 본인의 successor 들에게 data 의 복사본 (replica) 을 저장하거나 읽을 때 사용하는 부분
+    version 이 더 큰 값이 최신 값이며, found 가 false 이면서 version 이 있으면 삭제된 key 임 (tombstone)
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.Write = channel.unary_unary(
+                '/chord.Replica/Write',
+                request_serializer=chord__pb2.ReplicaValue.SerializeToString,
                 response_deserializer=chord__pb2.HealthReply.FromString,
                 )
+        self.Read = channel.unary_unary(
+                '/chord.Replica/Read',
+                request_serializer=chord__pb2.KeyDetail.SerializeToString,
+                response_deserializer=chord__pb2.ReplicaValue.FromString,
+                )
 
 
-class HandleDataServicer(object):
-    """Get, Set, Disjoin시 Set 시, Node 에게 정보를 보내는 부분
-    보내고 만약 요청을 처리해야 하는 노드면 별도로 요청을 처리하고, 아니면 그냥 잘 처리했다는 HealthReply
+class ReplicaServicer(object):
+    """key 를 담당하는 노드가, 본인의 successor 들에게 data 의 복사본 (replica) 을 저장하거나 읽을 때 사용하는 부분
+    version 이 더 큰 값이 최신 값이며, found 가 false 이면서 version 이 있으면 삭제된 key 임 (tombstone)
     """
 
-    def GD(self, request, context):
+    def Write(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def Read(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
-def add_HandleDataServicer_to_server(servicer, server):
+
+def add_ReplicaServicer_to_server(servicer, server):
     rpc_method_handlers = {
-            'GD': grpc.unary_unary_rpc_method_handler(
-                    servicer.GD,
-                    request_deserializer=chord__pb2.StarterWithData.FromString,
+            'Write': grpc.unary_unary_rpc_method_handler(
+                    servicer.Write,
+                    request_deserializer=chord__pb2.ReplicaValue.FromString,
                     response_serializer=chord__pb2.HealthReply.SerializeToString,
             ),
+            'Read': grpc.unary_unary_rpc_method_handler(
+                    servicer.Read,
+                    request_deserializer=chord__pb2.KeyDetail.FromString,
+                    response_serializer=chord__pb2.ReplicaValue.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
-            'chord.HandleData', rpc_method_handlers)
+            'chord.Replica', rpc_method_handlers)
     server.add_generic_rpc_handlers((generic_handler,))
 
 
  # This class is part of an EXPERIMENTAL API.
-class HandleData(object):
-    """Get, Set, Disjoin시 Set 시, Node 에게 정보를 보내는 부분
-    보내고 만약 요청을 처리해야 하는 노드면 별도로 요청을 처리하고, 아니면 그냥 잘 처리했다는 HealthReply
+class Replica(object):
+    """key 를 담당하는 노드가, 본인의 successor 들에게 data 의 복사본 (replica) 을 저장하거나 읽을 때 사용하는 부분
+    version 이 더 큰 값이 최신 값이며, found 가 false 이면서 version 이 있으면 삭제된 key 임 (tombstone)
     """
 
     @staticmethod
-    def GD(request,
+    def Write(request,
             target,
             options=(),
             channel_credentials=None,
@@ -321,8 +704,25 @@ class HandleData(object):
             wait_for_ready=None,
             timeout=None,
             metadata=None):
-        return grpc.experimental.unary_unary(request, target, '/chord.HandleData/GD',
-            chord__pb2.StarterWithData.SerializeToString,
+        return grpc.experimental.unary_unary(request, target, '/chord.Replica/Write',
+            chord__pb2.ReplicaValue.SerializeToString,
             chord__pb2.HealthReply.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def Read(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/chord.Replica/Read',
+            chord__pb2.KeyDetail.SerializeToString,
+            chord__pb2.ReplicaValue.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
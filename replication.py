@@ -0,0 +1,367 @@
+import logging
+import threading
+import time
+from concurrent import futures
+from threading import Lock
+from typing import List
+
+from multipledispatch import dispatch
+
+from data_structure import Data, DataTable
+from metrics import metrics
+from node_table import SUCCESSOR_LIST_LENGTH
+from service import WriteQuorumError, replica_write_request, replica_read_request, request_node_info
+from utils import NodeType as n
+from utils import in_range, short_id
+
+"""
+replication.py 는 key 를 담당하는 노드가 data 의 복사본 (replica) 을 successor 들에게 저장해두는 기능입니다.
+
+1. write: 담당 노드가 본인에게 저장한 뒤, 다음 r 개의 successor 에게 동시에 복사본을 보내고,
+          본인을 포함해서 write_quorum 개의 노드가 저장하면 성공으로 처리함 (나머지는 background 에서 계속 보냄)
+2. read: 본인의 값과 successor 들의 복사본을 합쳐서 read_quorum 개의 값을 읽고, version 이 가장 큰 값을 return 함
+         successor 는 매번 돌아가며 고르므로, 여러 복사본에 read 가 분산됨
+         오래된 값을 가지고 있던 노드에게는 최신 값을 다시 보냄 (read repair)
+         read_quorum 이 1 이면 get 결과에 복사본을 가진 노드들을 알려주고, 요청한 노드는 다음 get 을 그 중 하나에게 보냄
+         복사본을 가진 노드는 담당 노드에게 묻지 않고 복사본으로 응답하므로, background 로 보내는 중인 최신 값 대신 이전 값을 읽을 수 있음
+3. 담당 노드가 죽으면 그 key 범위는 predecessor 가 이어받는데, predecessor 의 successor 들이 곧 복사본을 가진 노드들이므로
+   bulk copy 없이 read 할 때 복사본에서 값을 가져와 본인에게 저장함 (본인에게 값이 없으면 항상 successor 에게도 물어봄)
+
+version 은 담당 노드가 write 할 때마다 부여하는 시각 기반의 증가하는 값이며, 삭제도 version 을 가진 tombstone 으로 남김
+write_quorum 을 채우지 못하면 WriteQuorumError 를 raise 하고, 요청한 쪽에는 실패로 응답함 (본인에게는 저장되어 있음)
+
+ReplicaCollector 가 주기적으로 복사본을 정리함
+- ring 이 바뀌어서 본인이 더 이상 복사본을 가질 필요가 없는 key (r 번째 predecessor 부터 본인의 범위 끝까지 밖의 key) 는 지움
+- TOMBSTONE_TTL 보다 오래된 tombstone 은 지움, 그 뒤에 이전 값을 가진 복사본이 read repair 되면 삭제된 값이 다시 보일 수 있음
+"""
+
+# tombstone 을 남겨두는 시간 (초)
+TOMBSTONE_TTL = 600.0
+
+# replica 요청을 동시에 보낼 때 사용하는 executor
+_replica_executor = futures.ThreadPoolExecutor(max_workers=16)
+metrics.track_executor('replica', _replica_executor)
+
+
+class ReplicatedDataTable:
+    """
+    DataTable 과 같은 get / set / delete 를 제공하면서, 값을 successor 들에게 복제하는 table 입니다.
+    HandleDataService, ClientDataService 등에 DataTable 대신 넘겨서 사용합니다.
+    """
+
+    def __init__(self, node_table, data_table: DataTable, replicas: int = 2, write_quorum: int = 2,
+                 read_quorum: int = 1, timeout: float = 1.0):
+        """
+        :param node_table: successor list 를 가지고 있는 NodeTable
+        :param data_table: 본인이 담당하는 data 를 저장하는 table
+        :param replicas: 복사본을 저장할 successor 의 수 (r), 본인을 포함하면 r + 1 개의 노드에 저장됨
+        :param write_quorum: write 가 성공하기 위해 저장해야 하는 노드 수 (본인 포함)
+        :param read_quorum: read 시에 값을 읽는 노드 수 (본인 포함)
+        :param timeout: replica 요청의 응답을 기다리는 최대 시간 (초)
+        """
+        if not 0 < replicas <= SUCCESSOR_LIST_LENGTH:
+            raise ValueError(f'replicas must be between 1 and {SUCCESSOR_LIST_LENGTH}')
+        if not (0 < write_quorum <= replicas + 1 and 0 < read_quorum <= replicas + 1):
+            raise ValueError('write_quorum and read_quorum must be between 1 and replicas + 1')
+        self.node_table = node_table
+        self.data_table = data_table
+        self.replicas = replicas
+        self.write_quorum = write_quorum
+        self.read_quorum = read_quorum
+        self.timeout = timeout
+
+        self.versions = dict()         # data table 에 있는 key -> version
+        self.replica_entries = dict()  # 다른 노드의 복사본과 tombstone, key -> (version, value), 삭제된 key 는 value 가 None
+        self.last_version = 0
+        self.read_cursor = 0           # read 할 successor 를 돌아가며 고르기 위한 값
+        self.lock = Lock()
+        self.insert_listener = None    # 값이 있는 복사본이 새로 생길 때 key 를 넘겨서 호출함 (key_filter.KeyFilters)
+
+        # 통계값
+        self.writes = 0
+        self.reads = 0
+        self.write_quorum_failures = 0
+        self.read_quorum_failures = 0
+        self.read_repairs = 0
+
+    # DataTable 과 같은 형태로 사용할 수 있도록, 순회와 출력은 data_table 에 맡김
+    def __len__(self):
+        return len(self.data_table)
+
+    def __contains__(self, key):
+        return key in self.data_table
+
+    def __iter__(self):
+        return iter(self.data_table)
+
+    @property
+    def entries(self) -> List[Data]:
+        return self.data_table.entries
+
+    def summary(self):
+        self.data_table.summary()
+        print(f'Number of Replicas: {len(self.replica_entries)}')
+        print()
+
+    def get(self, key):
+        """
+        read_quorum 개의 노드에서 값을 읽어서, version 이 가장 큰 값을 return 합니다.
+        :raise ValueError: 값이 없거나 삭제된 key 인 경우
+        """
+        with self.lock:
+            self.reads += 1
+        version, value = self.local_version(key)
+
+        # 본인에게 값이 없으면, 담당 노드가 바뀌었을 수 있으므로 최소 한 개의 복사본은 확인함
+        need = self.read_quorum - 1
+        if version == 0:
+            need = max(need, 1)
+
+        responses = []  # (node, version, value)
+        if need > 0:
+            nodes = self._replica_nodes()
+            if nodes:
+                self.read_cursor = (self.read_cursor + 1) % len(nodes)
+                nodes = nodes[self.read_cursor:] + nodes[:self.read_cursor]
+            while len(responses) < need and nodes:
+                batch, nodes = nodes[:need - len(responses)], nodes[need - len(responses):]
+                results = _replica_executor.map(lambda node: replica_read_request(node, key, self.timeout), batch)
+                for node, result in zip(batch, results):
+                    if result is not False:
+                        found, remote_version, remote_value = result
+                        responses.append((node, remote_version, remote_value if found else None))
+            if len(responses) < self.read_quorum - 1:
+                with self.lock:
+                    self.read_quorum_failures += 1
+                logging.info(f'read quorum is not reached for key:{short_id(key)}')
+
+        newest_version, newest_value = version, value
+        for _, remote_version, remote_value in responses:
+            if remote_version > newest_version:
+                newest_version, newest_value = remote_version, remote_value
+
+        # 오래된 값을 가진 노드에게 최신 값을 다시 저장함 (read repair)
+        if newest_version > version:
+            self._count_repair()
+            self._apply_local(key, newest_version, newest_value)
+        for node, remote_version, _ in responses:
+            if remote_version < newest_version:
+                self._count_repair()
+                _replica_executor.submit(replica_write_request, node, key, newest_value or b"", newest_version,
+                                         newest_value is not None, self.timeout)
+
+        if newest_value is None:
+            raise ValueError('key not found in table')
+        return Data(key, newest_value)
+
+    @dispatch(object, object)
+    def set(self, key, value):
+        """
+        :raise WriteQuorumError: write_quorum 개의 노드에 저장하지 못한 경우 (본인에게는 저장됨)
+        """
+        if not self._write(key, value):
+            raise WriteQuorumError(f'write quorum is not reached for key:{short_id(key)}')
+
+    @dispatch(object)
+    def set(self, data):
+        self.set(data.key, data.value)
+
+    def delete(self, key):
+        """
+        key 를 삭제하고, 삭제된 것을 successor 들에게도 알립니다. (tombstone)
+        :raise ValueError: 본인에게 key 가 없었던 경우 (successor 들에게는 알림)
+        :raise WriteQuorumError: 삭제를 write_quorum 개의 노드에 반영하지 못한 경우 (본인에게서는 삭제됨)
+        """
+        found = key in self.data_table
+        written = self._write(key, None)
+        if not found:
+            raise ValueError('key not found in table')
+        if not written:
+            raise WriteQuorumError(f'write quorum is not reached for key:{short_id(key)}')
+
+    def replica_get(self, key):
+        """
+        다른 노드의 복사본으로 get 에 응답할 때 사용합니다. 담당 노드에게 묻지 않습니다.
+        :return: 복사본의 value, 복사본이 없거나 삭제된 key 이거나 read_quorum 이 1 이 아니면 None
+        """
+        # read_quorum 개의 노드에서 읽어야 하면 복사본 하나로 응답하지 않고 담당 노드에게 넘김 (R + W > N 유지)
+        if self.read_quorum > 1:
+            return None
+        with self.lock:
+            return self.replica_entries.get(key, (0, None))[1]
+
+    def read_addresses(self) -> list:
+        """
+        :return: 복사본으로 get 에 응답할 수 있는 노드들의 address (본인 포함), read_quorum 이 1 이 아니면 빈 list
+        """
+        # read_quorum 개의 노드에서 읽어야 하면, 담당 노드가 모아서 읽어야 하므로 나눠서 받지 않음
+        if self.read_quorum > 1:
+            return []
+        return [self.node_table.cur_node.value] + [node.value for node in self._replica_nodes()]
+
+    def local_version(self, key):
+        """
+        본인이 가지고 있는 key 의 (version, value) 를 return 합니다. 삭제된 key 는 value 가 None 입니다.
+        모르는 key 면 (0, None) 을 return 합니다.
+        """
+        with self.lock:
+            try:
+                return self.versions.get(key, 0), self.data_table.get(key).value
+            except ValueError:
+                # 본인에게 없으면 복사본이나 tombstone 을 확인함
+                return self.replica_entries.get(key, (0, None))
+
+    def apply_replica(self, key, version: int, value):
+        """
+        다른 노드가 보낸 복사본을 저장합니다. 가지고 있는 version 보다 클 때만 저장합니다.
+        """
+        with self.lock:
+            current = self.replica_entries.get(key)
+            if current is None or version > current[0]:
+                self.replica_entries[key] = (version, value)
+                if self.insert_listener is not None and value is not None and (current is None or current[1] is None):
+                    self.insert_listener(key)
+
+    def replica_keys(self) -> list:
+        # 값이 있는 복사본의 key 들 (tombstone 제외)
+        with self.lock:
+            return [key for key, (_, value) in self.replica_entries.items() if value is not None]
+
+    def collect(self) -> int:
+        """
+        더 이상 필요 없는 복사본과 오래된 tombstone, data table 에서 빠진 key 의 version 을 지웁니다.
+        본인은 r 번째 predecessor 부터 본인의 범위 끝 (successor) 까지의 key 만 복사본으로 가지고 있으면 됩니다.
+        predecessor 들을 모두 알지 못하면 (응답이 없거나, ring 을 한 바퀴 돌면) 범위 밖의 복사본은 지우지 않습니다.
+
+        :return: 지운 복사본과 tombstone 의 수
+        """
+        start = self._replicated_start()
+        end = self.node_table.successor.key
+        expired = time.time_ns() - int(TOMBSTONE_TTL * 1e9)
+        with self.lock:
+            before = len(self.replica_entries)
+            self.replica_entries = {
+                key: (version, value) for key, (version, value) in self.replica_entries.items()
+                if (start is None or in_range(key, start, end)) and (value is not None or version > expired)
+            }
+            removed = before - len(self.replica_entries)
+            self.versions = {key: version for key, version in self.versions.items() if key in self.data_table}
+        if removed:
+            logging.info(f'removed {removed} replicas and tombstones')
+        return removed
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'replicas': self.replicas,
+                'write_quorum': self.write_quorum,
+                'read_quorum': self.read_quorum,
+                'writes': self.writes,
+                'reads': self.reads,
+                'write_quorum_failures': self.write_quorum_failures,
+                'read_quorum_failures': self.read_quorum_failures,
+                'read_repairs': self.read_repairs,
+                'replica_entries': len(self.replica_entries),
+            }
+
+    def _count_repair(self):
+        with self.lock:
+            self.read_repairs += 1
+
+    def _replicated_start(self):
+        # r 번째 predecessor 의 key, 모르면 None
+        cur_address = self.node_table.cur_node.value
+        node = self.node_table.predecessor
+        for _ in range(self.replicas - 1):
+            if node.value == cur_address:
+                return None
+            node = request_node_info(node, n.predecessor)
+            if not node:
+                return None
+        return None if node.value == cur_address else node.key
+
+    def _next_version(self) -> int:
+        with self.lock:
+            self.last_version = max(time.time_ns(), self.last_version + 1)
+            return self.last_version
+
+    def _replica_nodes(self) -> list:
+        # 복사본을 저장할 successor 들 (본인과 죽은 노드는 제외)
+        cur_address = self.node_table.cur_node.value
+        return [node for node in self.node_table.successors[:self.replicas]
+                if node.value != cur_address and self.node_table.failure_detector.is_alive(node)]
+
+    def _apply_local(self, key, version: int, value):
+        # 본인이 담당하는 key 면 data table 에, 아니면 복사본으로 저장함
+        if not self.node_table.is_responsible(key):
+            self.apply_replica(key, version, value)
+            return
+        if version <= self.local_version(key)[0]:
+            return
+        if value is None:
+            # 삭제된 key 는 data table 에서 지우고, version 은 tombstone 으로 남겨둠
+            with self.lock:
+                self.versions.pop(key, None)
+                self.replica_entries[key] = (version, None)
+            try:
+                self.data_table.delete(key)
+            except ValueError:
+                pass
+        else:
+            with self.lock:
+                self.versions[key] = version
+                self.replica_entries.pop(key, None)
+            self.data_table.set(key, value)
+
+    def _write(self, key, value) -> bool:
+        """
+        본인에게 저장한 뒤 successor 들에게 복사본을 보내고, write_quorum 개의 노드가 저장할 때까지 기다립니다.
+        :return: write_quorum 을 채웠으면 True
+        """
+        with self.lock:
+            self.writes += 1
+        version = self._next_version()
+        self._apply_local(key, version, value)
+
+        requests = [
+            _replica_executor.submit(replica_write_request, node, key, value or b"", version, value is not None,
+                                     self.timeout)
+            for node in self._replica_nodes()
+        ]
+        acks = 1
+        if acks < self.write_quorum and requests:
+            try:
+                for request in futures.as_completed(requests, timeout=self.timeout):
+                    if request.result():
+                        acks += 1
+                    if acks >= self.write_quorum:
+                        break
+            except futures.TimeoutError:
+                pass
+        if acks < self.write_quorum:
+            with self.lock:
+                self.write_quorum_failures += 1
+            logging.info(f'write quorum is not reached for key:{short_id(key)} ({acks}/{self.write_quorum})')
+            return False
+        return True
+
+
+class ReplicaCollector(threading.Thread):
+    """
+    ReplicatedDataTable.collect 를 주기적으로 실행합니다.
+    ring 이 바뀐 뒤 (predecessor 가 바뀌면) 다음 주기에 범위 밖의 복사본이 정리됩니다.
+    """
+
+    def __init__(self, replicated_table: ReplicatedDataTable, interval: float = 10.0):
+        super().__init__(daemon=True)
+        self.replicated_table = replicated_table
+        self.interval = interval
+        self.stop_flag = False
+
+    def run(self):
+        while not self.stop_flag:
+            time.sleep(self.interval)
+            try:
+                self.replicated_table.collect()
+            except Exception as e:
+                logging.info(f'failed to collect replicas: {e}')
@@ -1,16 +1,16 @@
-import math
-from typing import Tuple
-
 import grpc
 import threading
 import logging
-from data_structure import Data, TableEntry
+from concurrent import futures
+from data_structure import Data, DataTable
 from utils import NodeType as n
-from utils import TossMessageType as t
 from utils import DataHandlingType as d
+from utils import id_to_bytes, id_from_bytes, short_id, show_value, generate_hash, VNODE_METADATA
 
-from grpc._channel import _InactiveRpcError
-
+import transport
+from metrics import metrics, data_type_name
+from singleflight import RemoteWaiter
+from tracing import tracer, next_path
 from protos.output import chord_pb2
 from protos.output import chord_pb2_grpc
 
@@ -20,9 +20,24 @@ chord.proto에 따라 정의된 규격들이 있습니다.
 
 def (함수) 들은, 메시지를 전송하는 함수이고,
 class (클래스) 들은, Servicer에 등록하여 해당 메시지를 받는 대기 서버입니다.
+메시지 전송 시에는 transport 에서 stub 을 가져와 사용합니다. (기본값은 peer 별로 channel 을 재사용하는 channel_pool)
+요청이 실패하면 grpc.RpcError 가 발생하며, transport 를 바꿔도 같은 방식으로 처리합니다.
 """
 
 
+class WriteQuorumError(Exception):
+    """
+    write 를 write_quorum 개의 노드에 저장하지 못한 경우입니다. (replication.py)
+    담당 노드에는 저장되었으며, 나머지 복사본은 background 에서 계속 보냅니다.
+    """
+
+
+def _remove_dead_channel(address: str, error: grpc.RpcError):
+    # 연결 자체가 안 되는 경우에만 pool 에서 channel 을 제거함
+    if error.code() == grpc.StatusCode.UNAVAILABLE:
+        transport.remove(address)
+
+
 def node_health_check(node: Data) -> bool:
     """
     해당 노드가 살아있는지 확인하는 함수입니다.
@@ -30,11 +45,11 @@ def node_health_check(node: Data) -> bool:
     :return: 살아있을 시 True, 죽어있을 시 False를 return합니다.
     """
     try:
-        with grpc.insecure_channel(node.value) as channel:
-            stub = chord_pb2_grpc.HealthCheckerStub(channel)
-            response = stub.Check(chord_pb2.HealthCheck(ping=0))
+        stub = transport.get_stub(node.value, chord_pb2_grpc.HealthCheckerStub)
+        response = stub.Check(chord_pb2.HealthCheck(ping=0))
         return True
-    except _InactiveRpcError:
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
         return False
 
 
@@ -50,13 +65,13 @@ def request_node_info(node: Data, which_info: int):
     """
     # which_info는 utils.NodeType 의 명세를 따름
     try:
-        with grpc.insecure_channel(node.value) as channel:
-            stub = chord_pb2_grpc.GetNodeValueStub(channel)
-            response = stub.GetNodeVal(chord_pb2.NodeDetail(node_address=node.value, which_node=which_info))
-        if response.node_key == "0":
+        stub = transport.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+        response = stub.GetNodeVal(chord_pb2.NodeDetail(node_address=node.value, which_node=which_info))
+        if not response.node_key:
             return False
-        return Data(response.node_key, response.node_address)
-    except _InactiveRpcError:
+        return Data(id_from_bytes(response.node_key), response.node_address)
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
         return False
 
 
@@ -73,42 +88,218 @@ def notify_node_info(target_node: Data, node_info: Data, which_node: int) -> int
     """
     # change_type 는 utils.NodeType 의 명세를 따름
     try:
-        with grpc.insecure_channel(target_node.value) as channel:
-            stub = chord_pb2_grpc.NotifyNodeStub(channel)
-            response = stub.NotifyNodeChanged(chord_pb2.NodeType(
-                node_key=node_info.key, node_address=node_info.value, which_node=which_node
-            ))
+        stub = transport.get_stub(target_node.value, chord_pb2_grpc.NotifyNodeStub)
+        response = stub.NotifyNodeChanged(chord_pb2.NodeType(
+            node_key=id_to_bytes(node_info.key), node_address=node_info.value, which_node=which_node
+        ))
         return response.pong
-    except _InactiveRpcError:
+    except grpc.RpcError as e:
+        _remove_dead_channel(target_node.value, e)
         return False
 
 
-def toss_message(starter_node: Data, receive_node: Data, message_type: int, message: int = 0, node_type: int = 0) -> int:
+def find_successor_request(node: Data, key: int, timeout: float = 5.0):
     """
-    toss_message로, 주로 노드들에게 정보를 보낼 때 사용합니다.
-    현재는 join, disjoin, update finger table시에 사용합니다.
+    해당 노드에게 key 의 successor (key 보다 크거나 같은 첫 번째 노드) 를 찾아달라고 요청합니다.
+    요청을 받은 노드는 본인의 finger table 을 이용해 재귀적으로 찾아서 응답합니다.
 
-    :param starter_node: 이 toss message 를 최초로 보낸 노드의 정보입니다.
-    :param receive_node: 현재 이 toss message 를 받을 노드의 정보입니다.
-    :param message_type: 메시지의 타입입니다. utils.py의 _TossMessageType의 명세를 따릅니다.
-    :param message: 전달할 메시지입니다. 현재는 finger table 업데이트 시에, node를 카운팅하는 데 사용합니다.
-    :param node_type: 세부 노드 정보입니다. 현재는 finger table 업데이트 시에, join, djsjoin을 구분하는 데 사용합니다.
-    :return: 메시지를 성공적으로 전달했으면 1 (True), 실패했으면 0 (False)을 return합니다.
+    :param node: 요청을 보낼 노드입니다.
+    :param key: successor 를 찾을 ring identifier 입니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: 찾은 노드의 정보를, param node 가 죽었거나 찾지 못했으면 False를 return합니다.
     """
-    # message_type 는 utils.TossMessageType 의 명세를 따름
     try:
-        with grpc.insecure_channel(receive_node.value) as channel:
-            stub = chord_pb2_grpc.TossMessageStub(channel)
-            response = stub.TM(chord_pb2.Message(
-                node_key=starter_node.key, node_address=starter_node.value,
-                message_type=message_type, message=message, node_type=node_type
-            ))
-        return response.pong
-    except _InactiveRpcError:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+        response = stub.FindSuccessor(chord_pb2.KeyDetail(key=id_to_bytes(key)), timeout=timeout)
+        if not response.node_key:
+            return False
+        return Data(id_from_bytes(response.node_key), response.node_address)
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def request_successor_list(node: Data, timeout: float = None):
+    """
+    해당 노드에게 그 노드의 successor list 를 물어봅니다.
+
+    :param node: successor list 를 물어볼 노드입니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다. None 이면 기다릴 수 있는 만큼 기다립니다.
+    :return: successor list (Data 의 list) 를, param node 가 죽었으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+        response = stub.GetSuccessorList(chord_pb2.NodeDetail(node_address=node.value, which_node=n.successor),
+                                         timeout=timeout)
+        return [Data(id_from_bytes(node_val.node_key), node_val.node_address) for node_val in response.nodes]
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def next_hop_request(node: Data, key: int, timeout: float = 1.0):
+    """
+    iterative lookup 에서, 해당 노드에게 key 를 담당하는 노드를 찾으려면 다음으로 누구에게 물어봐야 하는지 요청합니다.
+    find_successor_request 와 다르게, 요청을 받은 노드는 다른 노드에게 요청을 넘기지 않고 바로 응답합니다.
+
+    :param node: 요청을 보낼 노드입니다.
+    :param key: 찾을 data 의 key 입니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: (param node 가 key 를 담당하는지 여부, 담당 노드 혹은 다음으로 물어볼 노드의 정보),
+             param node 가 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+        response = stub.NextHop(chord_pb2.KeyDetail(key=id_to_bytes(key)), timeout=timeout)
+        return response.responsible, Data(id_from_bytes(response.node_key), response.node_address)
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def key_filter_request(node: Data, subscriber: Data, timeout: float = 1.0):
+    """
+    해당 노드에게 그 노드가 가진 key 들의 Bloom filter 와 담당 범위를 물어봅니다. (GetNodeValue.GetKeyFilter)
+
+    :param node: filter 를 물어볼 노드입니다.
+    :param subscriber: filter 를 받을 노드입니다. param node 는 key 가 추가되면 이 노드에게 filter 를 버리라고 알려줍니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: chord_pb2.KeyFilter (filter 를 사용하지 않는 노드면 bits 가 비어있음), param node 가 죽었으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+        return stub.GetKeyFilter(chord_pb2.NodeDetail(node_address=subscriber.value), timeout=timeout)
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def drop_key_filter_request(node: Data, owner_address: str, version: int, timeout: float = 1.0) -> bool:
+    """
+    filter 를 받아간 노드에게, version 보다 작은 본인의 filter 를 버리라고 알립니다. (GetNodeValue.DropKeyFilter)
+
+    :param node: filter 를 받아간 노드입니다.
+    :param owner_address: filter 를 만든 노드 (본인) 의 address 입니다.
+    :param version: 본인의 filter 의 현재 version 입니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: param node 가 받았으면 True, 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.GetNodeValueStub)
+        stub.DropKeyFilter(chord_pb2.KeyFilterVersion(node_address=owner_address, version=version), timeout=timeout)
+        return True
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def query_request(node: Data, key: int, value: bytes, data_handling_type: int, timeout: float = 1.0):
+    """
+    key 를 담당하는 노드에게 직접 data 를 요청하고, 처리 결과를 기다립니다. (ClientData.Query)
+
+    :param node: 요청을 보낼 노드입니다.
+    :param key: 요청하는 data 의 key 입니다.
+    :param value: set 시에 저장할 value 입니다.
+    :param data_handling_type: utils.py의 _DataHandlingType 의 get, set, delete 를 따릅니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: chord_pb2.ClientReply, param node 가 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.ClientDataStub)
+        return stub.Query(chord_pb2.ClientRequest(
+            data_key=id_to_bytes(key), data_value=value, data_handling_type=data_handling_type
+        ), timeout=timeout)
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def invalidate_request(node: Data, key: int, timeout: float = 1.0) -> bool:
+    """
+    key 의 값을 near cache 에 보관 중인 노드에게, 값이 바뀌었으니 cache 에서 지우라고 알립니다. (HandleData.Invalidate)
+
+    :param node: lease 를 받아간 노드입니다.
+    :param key: 값이 바뀐 data 의 key 입니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: param node 가 지웠으면 True, 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.HandleDataStub)
+        stub.Invalidate(chord_pb2.KeyDetail(key=id_to_bytes(key)), timeout=timeout)
+        return True
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def hot_replica_request(node: Data, key: int, value, version: int, ttl_ms: int, timeout: float = 1.0) -> bool:
+    """
+    자주 읽히는 key 의 읽기용 복사본을 해당 노드에게 저장합니다. (HandleData.Replicate)
+
+    :param node: 복사본을 저장할 successor 입니다.
+    :param key: data 의 key 입니다.
+    :param value: data 의 value 입니다. 삭제되었으면 None 이며, 받은 노드는 복사본을 지웁니다.
+    :param version: 담당 노드가 보낼 때마다 증가하는 값입니다.
+    :param ttl_ms: 복사본을 사용할 수 있는 시간 (ms) 입니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: param node 가 저장했으면 True, 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.HandleDataStub)
+        stub.Replicate(chord_pb2.HotReplica(
+            data_key=id_to_bytes(key), data_value=value or b"", found=value is not None, ttl_ms=ttl_ms, version=version
+        ), timeout=timeout)
+        return True
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def replica_write_request(node: Data, key: int, value: bytes, version: int, found: bool = True,
+                          timeout: float = 1.0) -> bool:
+    """
+    해당 노드에게 data 의 복사본 (replica) 을 저장하라고 요청합니다.
+
+    :param node: replica 를 저장할 노드입니다.
+    :param key: data 의 key 입니다.
+    :param value: data 의 value 입니다. found 가 False 면 무시됩니다.
+    :param version: data 의 version 입니다. 받은 노드는 가지고 있는 version 보다 클 때만 저장합니다.
+    :param found: False 면 삭제된 key (tombstone) 를 저장합니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: param node 가 잘 받았으면 True, 응답하지 않으면 False를 return합니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.ReplicaStub)
+        stub.Write(chord_pb2.ReplicaValue(data_key=id_to_bytes(key), data_value=value, version=version, found=found),
+                   timeout=timeout)
+        return True
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
         return False
 
 
-def data_request(starter_node: Data, receive_node: Data, data: Data, data_handling_type: int) -> int:
+def replica_read_request(node: Data, key: int, timeout: float = 1.0):
+    """
+    해당 노드가 가지고 있는 data 의 복사본 (replica) 을 읽습니다.
+
+    :param node: replica 를 읽을 노드입니다.
+    :param key: data 의 key 입니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: (존재 여부, version, value), param node 가 응답하지 않으면 False를 return합니다.
+             key 를 모르면 version 이 0 입니다.
+    """
+    try:
+        stub = transport.get_stub(node.value, chord_pb2_grpc.ReplicaStub)
+        response = stub.Read(chord_pb2.KeyDetail(key=id_to_bytes(key)), timeout=timeout)
+        return response.found, response.version, response.data_value
+    except grpc.RpcError as e:
+        _remove_dead_channel(node.value, e)
+        return False
+
+
+def data_request(starter_node: Data, receive_node: Data, data: Data, data_handling_type: int,
+                 request_id: str = "", hops: int = 1, path: list = None, lease_ms: int = 0,
+                 replicas: list = None, found: bool = False) -> int:
     """
     네트워크상의 data를 요청하거나 설정할 때 사용합니다.
 
@@ -116,18 +307,295 @@ def data_request(starter_node: Data, receive_node: Data, data: Data, data_handli
     :param receive_node: 현재 이 data_request 를 받을 노드의 정보입니다.
     :param data: 요청하는 데이터입니다. 일반적으로 set 시에만 Data 클래스 내부의 모든 정보가 필요하며, get 이나 remove 시 value 는 비어도 됩니다.
     :param data_handling_type: 메시지의 요청을 구분하는 변수입니다. utils.py의 _DataHandlingType 를 따릅니다.
+    :param request_id: 요청을 구분하는 id 입니다. get 요청과 get_result 를 짝지을 때도 사용합니다.
+    :param hops: receive_node 가 받으면 몇 번째로 전달된 것인지 (요청을 만든 노드가 보낼 때 1), get_result 시에는 담당 노드까지의 hop 수입니다.
+    :param path: 지금까지 거쳐간 노드들의 address 입니다. trace 를 기록하지 않으면 None 입니다.
+    :param lease_ms: get 시에는 near cache 에 보관하려는 시간, get_result 시에는 담당 노드가 허락한 lease 시간 (ms) 입니다.
+    :param replicas: get_result 시에, 자주 읽히는 key 면 읽기용 복사본을 가진 노드들의 address 입니다.
+    :param found: get_result 시에, key 가 있으면 True 입니다. value 가 비어 있어도 key 가 있을 수 있습니다.
     :return: receive_node 가 값을 잘 처리했으면 0이 return 됨
     """
-    with grpc.insecure_channel(receive_node.value) as channel:
-        stub = chord_pb2_grpc.HandleDataStub(channel)
+    try:
+        stub = transport.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
         response = stub.GD(chord_pb2.StarterWithData(
-            node_key=starter_node.key, node_address=starter_node.value,
-            data_key=data.key, data_value=data.value,
-            data_handling_type=data_handling_type
+            node_key=id_to_bytes(starter_node.key), node_address=starter_node.value,
+            data_key=id_to_bytes(data.key), data_value=data.value,
+            data_handling_type=data_handling_type, request_id=request_id, hops=hops, path=path, lease_ms=lease_ms,
+            replicas=replicas, found=found
         ))
+    except grpc.RpcError as e:
+        # 기존과 같이 예외는 호출한 쪽으로 전달하되, 죽은 노드의 channel 은 정리함
+        _remove_dead_channel(receive_node.value, e)
+        raise
+    return response.pong
+
+
+def forward_data_request(receive_node: Data, request) -> int:
+    """
+    다른 노드에게 받은 data 요청 (chord_pb2.StarterWithData) 을 그대로 다음 노드에게 전달합니다.
+    value 를 꺼내서 새 메시지를 만들지 않으므로, 큰 value 를 전달할 때도 Python 에서 value 를 복사하지 않습니다.
+
+    :param receive_node: 현재 이 요청을 받을 노드의 정보입니다.
+    :param request: 받은 요청입니다. hops, path 는 호출한 쪽에서 바꿔둬야 합니다.
+    :return: receive_node 가 값을 잘 처리했으면 0이 return 됨
+    """
+    try:
+        stub = transport.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
+        response = stub.GD(request)
+    except grpc.RpcError as e:
+        _remove_dead_channel(receive_node.value, e)
+        raise
     return response.pong
 
 
+def send_flight(node_table, pending_requests, flights, flight, path: list = None, lease_ms: int = 0,
+                route: str = None):
+    """
+    flight (singleflight.py) 를 만든 노드가 key 의 get 을 보내고, 결과가 오면 flight 의 모든 waiter 에게 나눠줍니다.
+    get 은 이 노드가 만든 요청으로 보내므로, 결과도 이 노드로 돌아옵니다.
+
+    :param path: 요청에 담을 path, trace 를 기록하지 않으면 None
+    :param lease_ms: near cache 에 보관하려는 시간 (ms)
+    :param route: key 의 읽기용 복사본을 가진 노드의 address (hotkeys.py), 있으면 먼저 그 노드에게 보냄
+    """
+    request_id, future = pending_requests.create()
+    flight.request_id = request_id
+    future.add_done_callback(lambda result: _land_flight(node_table.cur_node, flights, flight, result))
+    try:
+        if route is not None:
+            try:
+                data_request(node_table.cur_node, Data(generate_hash(route), route), Data(flight.key, b""), d.get,
+                             request_id, path=path, lease_ms=lease_ms)
+                return
+            except grpc.RpcError:
+                # 복사본을 가진 노드가 응답하지 않으면 기존처럼 담당 노드를 찾아서 보냄
+                logging.debug(f'read replica {route} is not available')
+        nearest_node = node_table.find_nearest_alive_node(flight.key)
+        data_request(node_table.cur_node, nearest_node, Data(flight.key, b""), d.get, request_id,
+                     path=path, lease_ms=lease_ms)
+    except Exception as e:
+        pending_requests.fail(request_id, e)
+
+
+def _land_flight(cur_node: Data, flights, flight, result):
+    # 이 노드에서 get 을 기다리는 Future 에는 결과를 넣고, 다른 노드가 만든 요청에는 get 결과를 보냄
+    remote = []
+    for waiter in flights.finish(flight):
+        if not isinstance(waiter, RemoteWaiter):
+            if result.exception() is not None:
+                waiter.set_exception(result.exception())
+            else:
+                waiter.set_result(result.result())
+        elif result.exception() is None:
+            remote.append(waiter)
+    if not remote:
+        return
+    # 요청이 이 노드까지 온 hop 수와 path 를 담음 (near cache 에서 대신 응답한 경우와 같음)
+    # 요청한 노드는 담당 노드에게 lease 를 받지 않았으므로 이 값을 보관하지 않음
+    value = result.result()
+    data = Data(flight.key, value if value is not None else b"")
+    threading.Thread(target=_send_flight_results, args=(cur_node, remote, data, value is not None)).start()
+
+
+def _send_flight_results(cur_node: Data, waiters: list, data: Data, found: bool):
+    for waiter in waiters:
+        # 결과를 받지 못한 노드는 timeout 되므로, 보내지 못해도 나머지 waiter 에게 계속 보냄
+        try:
+            data_request(cur_node, waiter.starter_node, data, d.get_result, waiter.request_id, waiter.hops,
+                         waiter.path, found=found)
+        except grpc.RpcError:
+            logging.debug(f'failed to send coalesced get result to {waiter.starter_node.value}')
+
+
+# multi data 요청의 응답을 기다리는 최대 시간 (초) 과, redirect 된 key 를 다시 요청하는 최대 횟수
+MULTI_DATA_TIMEOUT = 5.0
+MULTI_DATA_ROUNDS = 16
+
+
+def multi_data_request(starter_node: Data, receive_node: Data, entries: list, data_handling_type: int,
+                       timeout: float = MULTI_DATA_TIMEOUT):
+    """
+    여러 개의 data 를 한 번에 요청하거나 설정할 때 사용합니다.
+    data_request 와 다르게, receive_node 가 key 들을 처리할 때까지 기다린 뒤 결과를 return 합니다.
+    receive_node 가 담당하지 않는 key 는 처리하지 않고, 결과의 redirect 에 다음으로 요청할 노드의 address 를 담아서 돌려줍니다.
+
+    :param starter_node: 이 요청을 최초로 보낸 노드의 정보입니다.
+    :param receive_node: 현재 이 요청을 받을 노드의 정보입니다.
+    :param entries: 요청하는 chord_pb2.KeyValue 들입니다. set 시에만 data_value 가 필요합니다.
+    :param data_handling_type: 메시지의 요청을 구분하는 변수입니다. utils.py의 _DataHandlingType 를 따릅니다.
+    :param timeout: 응답을 기다리는 최대 시간 (초) 입니다.
+    :return: chord_pb2.MultiDataReply, entries 에 요청한 data 들의 처리 결과와 receive_node 의 key 범위를 담습니다.
+    """
+    try:
+        stub = transport.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
+        response = stub.MGD(chord_pb2.StarterWithMultiData(
+            node_key=id_to_bytes(starter_node.key), node_address=starter_node.value,
+            entries=entries, data_handling_type=data_handling_type
+        ), timeout=timeout)
+    except grpc.RpcError as e:
+        _remove_dead_channel(receive_node.value, e)
+        raise
+    return response
+
+
+# TransferRange 로 data 를 넘길 때, 한 batch 에 담는 data 의 최대 개수와 최대 크기 (byte)
+# gRPC 의 기본 최대 메시지 크기 (4MB) 보다 충분히 작게 나눔
+TRANSFER_BATCH_SIZE = 512
+TRANSFER_BATCH_BYTES = 1 << 20
+
+
+def transfer_batches(starter_node: Data, entries: list, batch_size: int = TRANSFER_BATCH_SIZE,
+                     batch_bytes: int = TRANSFER_BATCH_BYTES):
+    """
+    넘길 data 들을 chord_pb2.TransferBatch 로 나눠서 하나씩 만들어 줍니다. (generator)
+    gRPC 가 보낼 수 있을 때 다음 batch 를 가져가므로, 전체 data 를 한 번에 메시지로 만들지 않습니다.
+    """
+    batch, size = [], 0
+    for entry in entries:
+        key_value = chord_pb2.KeyValue(data_key=id_to_bytes(entry.key), data_value=entry.value)
+        batch.append(key_value)
+        size += key_value.ByteSize()
+        if len(batch) >= batch_size or size >= batch_bytes:
+            yield chord_pb2.TransferBatch(node_key=id_to_bytes(starter_node.key), node_address=starter_node.value,
+                                          entries=batch)
+            batch, size = [], 0
+    if batch:
+        yield chord_pb2.TransferBatch(node_key=id_to_bytes(starter_node.key), node_address=starter_node.value,
+                                      entries=batch)
+
+
+def transfer_request(starter_node: Data, receive_node: Data, entries: list, timeout: float = None) -> int:
+    """
+    여러 개의 data 를 하나의 stream 으로 receive_node 에게 넘깁니다. (join, disjoin 시의 key 범위 이동)
+    data 는 batch 로 나눠서 보내고, 보내는 속도는 gRPC (HTTP/2) 의 flow control 에 맞춰집니다.
+    receive_node 는 모든 batch 를 저장한 뒤에 한 번만 응답합니다.
+
+    :param starter_node: data 를 넘기는 노드 (본인) 의 정보입니다.
+    :param receive_node: data 를 받을 노드의 정보입니다.
+    :param entries: 넘길 Data 들입니다.
+    :param timeout: 전체 전송을 기다리는 최대 시간 (초) 입니다. None 이면 기다릴 수 있는 만큼 기다립니다.
+    :return: receive_node 가 저장에 성공한 data 의 수
+    """
+    try:
+        stub = transport.get_stub(receive_node.value, chord_pb2_grpc.HandleDataStub)
+        response = stub.TransferRange(transfer_batches(starter_node, entries), timeout=timeout)
+    except grpc.RpcError as e:
+        _remove_dead_channel(receive_node.value, e)
+        raise
+    return response.stored
+
+
+# multi data 요청을 다음 노드들에게 동시에 보낼 때 사용하는 executor
+_multi_data_executor = futures.ThreadPoolExecutor(max_workers=16)
+metrics.track_executor('multi_data', _multi_data_executor)
+
+
+def route_multi_data(node_table, data_table: DataTable, entries: list, data_handling_type: int):
+    """
+    본인이 담당하는 key 는 바로 처리하고, 나머지는 다음으로 요청할 노드별로 묶습니다. 다른 노드에게 요청하지는 않습니다.
+
+    :return: (처리 결과 chord_pb2.KeyValue 의 list, {다음 노드 address: (다음 노드, KeyValue 들)})
+    """
+    results = []
+    groups = dict()
+
+    for entry in entries:
+        key = id_from_bytes(entry.data_key)
+        nearest_node = None
+        if not node_table.is_responsible(key):
+            nearest_node = node_table.find_nearest_alive_node(key)
+
+        # 다음으로 보낼 노드가 없으면 (살아있는 노드가 없으면) 본인이 처리함
+        if nearest_node is None or nearest_node.value == node_table.cur_node.value:
+            results.append(handle_local_entry(data_table, entry, data_handling_type))
+        else:
+            groups.setdefault(nearest_node.value, (nearest_node, []))[1].append(entry)
+    return results, groups
+
+
+def process_multi_data(node_table, data_table: DataTable, starter_node: Data, entries: list,
+                       data_handling_type: int, timeout: float = MULTI_DATA_TIMEOUT,
+                       rounds: int = MULTI_DATA_ROUNDS) -> list:
+    """
+    여러 개의 data 요청을 처리합니다. (요청을 만든 노드, 혹은 TransferRange 로 data 를 받은 노드에서 호출)
+    본인이 담당하는 key 는 바로 처리하고, 나머지는 다음으로 보낼 노드별로 묶어서 노드당 한 번씩만 요청합니다.
+    받은 노드가 담당하지 않는 key 는 redirect 로 돌아오므로, 알려준 노드별로 다시 묶어서 rounds 번까지 요청합니다.
+    MGD 를 받은 노드는 다른 노드에게 요청하지 않으므로, executor 의 작업이 다른 노드의 응답을 기다리며 쌓이지 않습니다.
+
+    :param timeout: 한 번의 요청 (MGD) 을 기다리는 최대 시간 (초)
+    :param rounds: redirect 를 따라가는 최대 횟수, 넘으면 해당 key 들은 처리하지 못한 것으로 응답함
+    :return: 요청한 data 들의 처리 결과 (chord_pb2.KeyValue 의 list)
+    """
+    results, groups = route_multi_data(node_table, data_table, entries, data_handling_type)
+    type_name = data_type_name(data_handling_type)
+
+    for _ in range(rounds):
+        if not groups:
+            break
+        metrics.inc('chord_forwarded_requests_total', sum(len(group) for _, group in groups.values()),
+                    type=type_name)
+        requests = {
+            _multi_data_executor.submit(multi_data_request, starter_node, node, group, data_handling_type,
+                                        timeout): group
+            for node, group in groups.values()
+        }
+        groups = dict()
+        for request in futures.as_completed(requests):
+            group = requests[request]
+            try:
+                replies = request.result().entries
+            except grpc.RpcError:
+                # 다음 노드가 응답하지 않으면, 해당 key 들은 처리하지 못한 것으로 응답함
+                logging.info(f'multi data request failed for {len(group)} keys')
+                results += [chord_pb2.KeyValue(data_key=entry.data_key, found=False) for entry in group]
+                continue
+            pending = {entry.data_key: entry for entry in group}
+            for reply in replies:
+                entry = pending.get(reply.data_key)
+                if not reply.redirect or entry is None:
+                    results.append(reply)
+                elif reply.redirect == node_table.cur_node.value:
+                    # 다른 노드가 본인을 담당 노드로 알고 있으면, 기존처럼 본인이 처리함
+                    results.append(handle_local_entry(data_table, entry, data_handling_type))
+                else:
+                    groups.setdefault(reply.redirect, (Data(None, reply.redirect), []))[1].append(entry)
+
+    if groups:
+        failed = [entry for _, group in groups.values() for entry in group]
+        logging.info(f'multi data request failed for {len(failed)} keys after {rounds} redirects')
+        results += [chord_pb2.KeyValue(data_key=entry.data_key, found=False) for entry in failed]
+    return results
+
+
+def handle_local_entry(data_table: DataTable, entry, data_handling_type: int):
+    """
+    본인이 담당하는 key 에 대한 요청 (chord_pb2.KeyValue) 을 본인의 data table 에서 처리합니다.
+    :return: 처리 결과 (chord_pb2.KeyValue), get, delete 시 key 가 없으면 found 가 False 입니다.
+             set, delete 가 write quorum 을 채우지 못하면 found 가 False 이고, error 에 이유를 담습니다.
+    """
+    result = chord_pb2.KeyValue(data_key=entry.data_key)
+    key = id_from_bytes(entry.data_key)
+    type_name = data_type_name(data_handling_type)
+    metrics.inc('chord_data_requests_total', type=type_name, handling='local')
+    with metrics.timer('chord_data_latency_seconds', type=type_name):
+        try:
+            if data_handling_type == d.get:
+                result.data_value = data_table.get(key).value
+            elif data_handling_type == d.set:
+                data_table.set(key, entry.data_value)
+                result.data_value = entry.data_value
+            elif data_handling_type == d.delete:
+                data_table.delete(key)
+            result.found = True
+        except ValueError:
+            result.found = False
+            metrics.inc('chord_data_not_found_total', type=type_name)
+        except WriteQuorumError as e:
+            result.found = False
+            result.error = str(e)
+    return result
+
+
 class HealthCheckService(chord_pb2_grpc.HealthCheckerServicer):
     """
     def node_health_check 를 받는 서버입니다.
@@ -142,25 +610,66 @@ class HealthCheckService(chord_pb2_grpc.HealthCheckerServicer):
 
 class GetNodeValueService(chord_pb2_grpc.GetNodeValueServicer):
     """
-    def request_node_info 를 받는 서버입니다.
+    def request_node_info, find_successor_request, request_successor_list, next_hop_request 를 받는 서버입니다.
     """
-    def __init__(self, node_table):
+    def __init__(self, node_table, key_filters=None):
+        """
+        :param key_filters: 본인의 Bloom filter 를 만드는 KeyFilters, None 이면 빈 filter 를 응답함
+        """
         self.node_table = node_table
+        self.key_filters = key_filters
 
     def GetNodeVal(self, request, context):
         if request.which_node == n.predecessor:
             return chord_pb2.NodeVal(
-                node_key=self.node_table.predecessor.key, node_address=self.node_table.predecessor.value
+                node_key=id_to_bytes(self.node_table.predecessor.key), node_address=self.node_table.predecessor.value
             )
         else:
             try:
                 node_data = self.node_table.finger_table.entries[request.which_node]
                 key = node_data.key
                 value = node_data.value
-                return chord_pb2.NodeVal(node_key=key, node_address=value)
+                return chord_pb2.NodeVal(node_key=id_to_bytes(key), node_address=value)
             except IndexError:
-                return chord_pb2.NodeVal(node_key="0", node_address="0")
-
+                # 해당 정보가 없으면 빈 NodeVal 을 보냄
+                return chord_pb2.NodeVal()
+
+    def FindSuccessor(self, request, context):
+        node = self.node_table.find_successor(id_from_bytes(request.key))
+        if node is False:
+            return chord_pb2.NodeVal()
+        return chord_pb2.NodeVal(node_key=id_to_bytes(node.key), node_address=node.value)
+
+    def GetSuccessorList(self, request, context):
+        return chord_pb2.NodeList(nodes=[
+            chord_pb2.NodeVal(node_key=id_to_bytes(node.key), node_address=node.value)
+            for node in self.node_table.successors
+        ])
+
+    def NextHop(self, request, context):
+        key = id_from_bytes(request.key)
+
+        # 본인이 담당하는 key 면 본인을, 아니면 살아있는 가장 가까운 노드를 알려줌 (다른 노드에게 요청을 넘기지 않음)
+        if self.node_table.is_responsible(key):
+            node, responsible = self.node_table.cur_node, True
+        else:
+            node, responsible = self.node_table.find_nearest_alive_node(key), False
+        return chord_pb2.NextHopReply(responsible=responsible, node_key=id_to_bytes(node.key),
+                                      node_address=node.value)
+
+    def GetKeyFilter(self, request, context):
+        if self.key_filters is None:
+            return chord_pb2.KeyFilter()
+        start, end = self.node_table.cur_node.key, self.node_table.successor.key
+        bits, hashes, version = self.key_filters.local_filter(self.node_table.cur_node.value, start, end,
+                                                              Data(None, request.node_address))
+        return chord_pb2.KeyFilter(bits=bits, hashes=hashes, start=id_to_bytes(start), end=id_to_bytes(end),
+                                   version=version)
+
+    def DropKeyFilter(self, request, context):
+        if self.key_filters is not None:
+            self.key_filters.drop(request.node_address, request.version)
+        return chord_pb2.HealthReply(pong=0)
 
 
 class NotifyNodeService(chord_pb2_grpc.NotifyNodeServicer):
@@ -171,228 +680,367 @@ class NotifyNodeService(chord_pb2_grpc.NotifyNodeServicer):
         self.node_table = node_table
 
     def NotifyNodeChanged(self, request, context):
+        node = Data(id_from_bytes(request.node_key), request.node_address)
         if request.which_node == n.predecessor:
-            self.node_table.predecessor.update_info(request.node_key, request.node_address, -1)
+            self.node_table.set_predecessor(node)
+        elif request.which_node == n.predecessor_candidate:
+            self.node_table.notify(node)
+        elif request.which_node == n.successor:
+            self.node_table.set_successor(node)
         else:
-            try:
-                # 먼저, 요청하는 인덱스가 존재한다면 해당 인덱스의 값을 업데이트합니다.
-                self.node_table.finger_table.entries[request.which_node].update_info(
-                    request.node_key, request.node_address, request.which_node
-                )
-
-            # 만약 인덱스가 존재하지 않을 경우, 빈 만큼 dummy 값을 넣어준 뒤에, 해당 값을 업데이트해줍니다.
-            except IndexError:
-                # 실제 들어가야하는 인덱스번호
-                index = request.which_node
-
-                # Finger Table 길이
-                fingers = len(self.node_table.finger_table.entries)
-
-                # 괴리율만큼 dummy 값을 넣어줌
-                while fingers != index:
-                    self.node_table.finger_table.append("Dummy", "Dummy")
-                    index += 1
-
-                # 해당 값을 append
-                self.node_table.finger_table.append(request.node_key, request.node_address)
-
-            finally:
-                return chord_pb2.HealthReply(pong=0)
+            self.node_table.set_finger(request.which_node, node)
+        return chord_pb2.HealthReply(pong=0)
 
 
-class TossMessageService(chord_pb2_grpc.TossMessageServicer):
+class HandleDataService(chord_pb2_grpc.HandleDataServicer):
     """
-    def toss_message 를 받는 서버입니다.
+    def data_request, multi_data_request, transfer_request 를 받는 서버입니다.
     """
-    def __init__(self, node_table):
+    def __init__(self, node_table, data_table: DataTable, pending_requests, near_cache=None, flights=None,
+                 read_replicas=None, key_filters=None, replicated_table=None):
+        """
+        :param near_cache: get 결과를 보관하는 NearCache, None 이면 사용하지 않음
+        :param flights: 같은 key 의 get 을 묶는 SingleFlight, None 이면 묶지 않음
+        :param read_replicas: hot key 의 읽기용 복사본을 보관하는 ReadReplicas, None 이면 사용하지 않음
+        :param key_filters: 주변 노드들의 Bloom filter 를 가진 KeyFilters, None 이면 사용하지 않음
+        :param replicated_table: 복사본을 가진 ReplicatedDataTable, 있으면 복사본으로도 get 에 응답함
+        """
         self.node_table = node_table
+        self.data_table = data_table
+        self.pending_requests = pending_requests
+        self.near_cache = near_cache
+        self.flights = flights
+        self.read_replicas = read_replicas
+        self.key_filters = key_filters
+        self.replicated_table = replicated_table
+
+    def get(self, starter_node: Data, req_data: Data, request_id: str, hops: int = 1, path: list = None,
+            lease_ms: int = 0):
+        # 요청한 노드가 near cache 에 보관하려고 하면, 값을 읽기 전에 lease 를 먼저 기록해야
+        # 그 사이에 값이 바뀌어도 Invalidate 를 보낼 수 있음 (lease 를 기록하는 table 이 아니면 보관하지 않게 함)
+        if lease_ms and hasattr(self.data_table, 'grant'):
+            lease_ms = self.data_table.grant(req_data.key, starter_node, lease_ms)
+        else:
+            lease_ms = 0
+        try:
+            value = self.data_table.get(req_data.key).value
+            found = True
+        except ValueError:
+            value = b""
+            found = False
+            metrics.inc('chord_data_not_found_total', type='get')
+        # 자주 읽히는 key 면, 요청한 노드가 다음 get 을 복사본을 가진 노드들에게 나눠서 보내도록 위치를 알려줌
+        # hot key 가 아니어도, 복사본을 가진 successor 들이 get 에 응답할 수 있으면 그 위치를 알려줌
+        replicas = None
+        if found and hasattr(self.data_table, 'replica_addresses'):
+            replicas = self.data_table.replica_addresses(req_data.key)
+        if found and not replicas and self.replicated_table is not None:
+            replicas = self.replicated_table.read_addresses()
+
+        # get 결과에는 요청이 담당 노드까지 온 hop 수와 path 를 그대로 담아서, 요청을 만든 노드가 trace 를 기록하게 함
+        threading.Thread(
+            target=data_request,
+            args=(
+                self.node_table.cur_node,
+                starter_node,  # Finger Table 구현되면 수정 필요
+                Data(req_data.key, value),
+                d.get_result,
+                request_id,
+                hops,
+                path,
+                lease_ms if found else 0,
+                replicas,
+                found)
+        ).start()
 
-    def notify_new_node_income(self, new_node: Data):
-        # 본인이 새로운 노드를 추가해야 할 때 -> 본인의 successor 로 추가해야 할 때 처리방식
-
-        # 1. 현재 본인의 기존 successor 에게, 새로운 노드가 predecessor 라고 알려줌
-        notify_node_info(self.node_table.finger_table.entries[n.successor], new_node, n.predecessor)
-
-        # 2. 새 노드의 predecessor 를 본인으로,
-        #    새 노드의 successor 를 본인의 기존 successor 로,
-        #    새 노드의 double_successor 를 본인의 기존 double_successor 로 설정함
-        #    추후에 finger table 을 사용할 때는, 반복문을 돌면서 그냥 finger table 자체를 할당해주면 됨.
-        notify_node_info(new_node, self.node_table.cur_node, n.predecessor)
-        notify_node_info(new_node, self.node_table.finger_table.entries[n.successor], n.successor)
-        notify_node_info(new_node, self.node_table.finger_table.entries[n.d_successor], n.d_successor)
+    def GD(self, request, context):
+        job_type = request.data_handling_type
+        starter_node = Data(id_from_bytes(request.node_key), request.node_address)
+        # value 는 본인이 사용할 때만 꺼냄, 다음 노드에게 전달만 하는 요청은 value 를 복사하지 않음
+        data = Data(id_from_bytes(request.data_key), None)
 
-        # 3. 본인의 double successor 를 기존 successor 로, successor 를 새로운 노드로 업데이트
-        self.node_table.finger_table.entries[n.d_successor].update_info(
-            self.node_table.finger_table.entries[n.succssor].key, self.node_table.finger_table.entries[n.successor].value,
-            n.d_successor
-        )
-        self.node_table.finger_table.entries[n.successor].update_info(new_node, n.successor)
-
-        # 4. 본인의 predecessor 에게, double successor 가 새로운 노드임을 알려줌
-        threading.Thread(target=notify_node_info,
-                         args=(
-                             self.node_table.predecessor, new_node, n.finger_table(1),)
-                         ).start()
-
-    def TM(self, request, context):
-        logging.debug(f'Toss Message received from {request.node_address}')
-        if request.message_type == t.join_node:
-            # 만약 join일 시, finger table 에서의 insert 위치를 찾아본다.
-
-            # 1. 본인의 key값보다 크고, successor (finger_table[0]) 의 key 값보다 작은 경우는, 내가 추가한다.
-            if self.node_table.cur_node.key < request.node_key < self.node_table.finger_table.entries[n.successor].key or \
-                    self.node_table.finger_table.entries[n.successor].key < self.node_table.cur_node.key < request.node_key:
-                logging.info(f'Now Adding {request.node_address}...')
-                self.notify_new_node_income(new_node=Data(request.node_key, request.node_address))
-            # 2. 아닐 경우에는, 노드 테이블을 순회하면서 적절히 보낼 위치를 찾는다.
-            # -> 일단 지금은, 바로 successor 에게 넘긴다. (finger table 의 속성을 변경하는 작업이 필요함)
-            else:
-                logging.info(
-                    f'Passing {request.node_address}`s message to {self.node_table.finger_table.entries[n.successor].value}')
-                threading.Thread(target=toss_message,
-                                 args=(
-                                     Data(request.node_key, request.node_address),
-                                     self.node_table.finger_table.entries[n.successor],
-                                     request.message_type)
-                                 ).start()
-            return chord_pb2.HealthReply(pong=0)
-
-        # 만약에 메시지 타입이 finger table을 업데이트하는 메시지라면
-        if request.message_type == t.finger_table_setting:
-            logging.debug(f'received finger table update message : {request.node_key}. {request.node_address}, {request.message}')
-
-            # 만약 받은 요청의 node key와 자신의 key가 같다면 (순회를 마쳤다면)
-            if request.node_key == self.node_table.cur_node.key:
-                logging.debug("finished receiving update message")
-
-                # 현재 네트워크의 노드 수를 갱신해준 후 종료
-                self.node_table.node_network_num = request.message
+        # 만약 get 한 값이 들어왔을 때
+        if job_type == d.get_result:
+            data.value = request.data_value
+            metrics.inc('chord_data_requests_total', type='get_result', handling='local')
+            tracer.record(self.node_table.cur_node.value, request.request_id, 'get', data.key, 'recursive',
+                          request.hops, list(request.path) or None, self.pending_requests.elapsed(request.request_id))
+
+            # 담당 노드가 lease 를 허락했으면 near cache 에 보관함, lease 는 요청을 보낸 시각부터 계산함
+            elapsed = self.pending_requests.elapsed(request.request_id)
+            if self.near_cache is not None and request.lease_ms and elapsed is not None:
+                self.near_cache.put(data.key, data.value, request.lease_ms,
+                                    self.near_cache.clock() - elapsed)
+            if self.read_replicas is not None and request.replicas:
+                self.read_replicas.learn(data.key, list(request.replicas))
+
+            # 결과를 기다리고 있는 요청이 있으면, 해당 요청에 값을 넘겨줌 (값이 없으면 None)
+            if self.pending_requests.resolve(request.request_id, data.value if request.found else None):
                 return chord_pb2.HealthReply(pong=0)
 
-            # 만약 받은 요청의 node_type가 join_node 라면 (새로운 node가 join되었으면)
-            if request.node_type == t.join_node:
+            # 실제 get 한 값들을 보여줌, 값이 없으면 not found를 출력함
+            shown = show_value(data.value) if request.found else 'not found'
+            logging.info(f"request key:{short_id(data.key)}'s value is {shown}, stored in {starter_node.value}")
 
-                # 현재 노드의 네트워크에 존재하는 노드개수 변수를 1 증가시킴
-                self.node_table.node_network_num += 1
+        # 만약 자신의 data table에 접근해야 하는 값이라면
+        elif self.node_table.is_responsible(data.key):
+            type_name = data_type_name(job_type)
+            metrics.inc('chord_data_requests_total', type=type_name, handling='local')
+            metrics.observe('chord_request_hops', request.hops, type=type_name)
+            path = next_path(request.path, self.node_table.cur_node.value)
+            if job_type != d.get:
+                # get 은 결과를 받은 노드가 latency 와 함께 기록함
+                tracer.record(self.node_table.cur_node.value, request.request_id, type_name, data.key, 'recursive',
+                              request.hops, path)
+            with metrics.timer('chord_data_latency_seconds', type=type_name):
+                if job_type == d.get:
+                    self.get(starter_node, data, request.request_id, request.hops, path, request.lease_ms)
+                # set, delete 는 결과를 보내지 않으므로, 처리하지 못하면 담당 노드에서 기록함
+                try:
+                    if job_type == d.set:
+                        data.value = request.data_value
+                        self.data_table.set(data)
+                        logging.info(
+                            f"request key:{short_id(data.key)}'s value is set to {show_value(data.value)}, stored in {self.node_table.cur_node.value}")
+                    if job_type == d.delete:
+                        self.data_table.delete(data.key)
+                        logging.info(f"request key:{short_id(data.key)} is deleted from {self.node_table.cur_node.value}")
+                except ValueError:
+                    metrics.inc('chord_data_not_found_total', type=type_name)
+                    logging.info(f"request key:{short_id(data.key)} is not found")
+                except WriteQuorumError as e:
+                    logging.info(f"failed to {type_name} key:{short_id(data.key)}: {e}")
+        elif job_type == d.get and self.reply_from_cache(starter_node, data.key, request):
+            # 전달하는 도중에 near cache 에 값이 있어서 담당 노드 대신 응답함
+            metrics.inc('chord_data_requests_total', type='get', handling='near_cache')
+        elif job_type == d.get and self.reply_from_replica(starter_node, data.key, request):
+            # hot key 의 읽기용 복사본이나 replication 의 복사본을 가지고 있어서 담당 노드 대신 응답함
+            metrics.inc('chord_data_requests_total', type='get', handling='read_replica')
+        elif job_type == d.get and self.key_filters is not None and self.key_filters.definitely_absent(data.key):
+            # 담당 노드의 Bloom filter 에 없는 key 이므로, 담당 노드까지 보내지 않고 없다고 응답함
+            metrics.inc('chord_data_requests_total', type='get', handling='filtered')
+            metrics.inc('chord_data_not_found_total', type='get')
+            self.reply(starter_node, data.key, b"", request, found=False)
+        elif job_type == d.get and self.coalesce_get(starter_node, data.key, request):
+            # 같은 key 의 get 이 몰려서, 이 노드가 대신 보낸 하나의 get 결과를 나눠받음
+            metrics.inc('chord_data_requests_total', type='get', handling='coalesced')
+        else:
+            metrics.inc('chord_data_requests_total', type=data_type_name(job_type), handling='forwarded')
+            metrics.inc('chord_forwarded_requests_total', type=data_type_name(job_type))
 
-            # 만약 받은 요청의 node_type가 left_node 라면 (노드가 나간다면)
-            if request.node_type == t.left_node:
+            # 살아있는 가장 가까운 노드를 찾음
+            nearest_node = self.node_table.find_nearest_alive_node(data.key)
 
-                # 현재 노드의 네트워크에 존재하는 노드개수 변수를 1 감소시킴
-                self.node_table.node_network_num -= 1
+            # 받은 요청의 hop 수와 path 만 바꿔서 그 노드에게 그대로 보낸 뒤 종료 (value 는 다시 만들지 않음)
+            request.hops += 1
+            if request.path:
+                request.path.append(self.node_table.cur_node.value)
+            threading.Thread(target=forward_data_request, args=(nearest_node, request)).start()
+        return chord_pb2.HealthReply(pong=0)
 
-                logging.debug("sending update message complete, pass to successor")
-                threading.Thread(target=toss_message,
-                                 args=(
-                                     Data(request.node_key, request.node_address),
-                                     self.node_table.finger_table.entries[n.successor],
-                                     request.message_type,
-                                     request.message)
-                                 ).start()
-                return chord_pb2.HealthReply(pong=0)
+    def reply_from_cache(self, starter_node: Data, key, request) -> bool:
+        """
+        near cache 에 key 의 값이 있으면 요청한 노드에게 get 결과를 보냅니다.
+        요청한 노드는 담당 노드에게 lease 를 받지 않았으므로 이 값을 보관하지 않습니다. (lease_ms 는 0)
 
+        :return: 응답했으면 True, cache 에 없으면 False
+        """
+        value = self.near_cache.get(key) if self.near_cache is not None else None
+        if value is None:
+            return False
+        self.reply(starter_node, key, value, request)
+        return True
 
+    def reply_from_replica(self, starter_node: Data, key, request) -> bool:
+        """
+        담당 노드가 보낸 hot key 의 복사본이나 (read_quorum 이 1 일 때) replication 의 복사본이 있으면 요청한 노드에게 get 결과를 보냅니다.
+        :return: 응답했으면 True, 복사본이 없으면 False
+        """
+        value = self.read_replicas.get(key) if self.read_replicas is not None else None
+        if value is None and self.replicated_table is not None:
+            value = self.replicated_table.replica_get(key)
+        if value is None:
+            return False
+        self.reply(starter_node, key, value, request)
+        return True
 
-            cur_node_num = int(request.message)
-            cur_finger_table_num = math.log2(cur_node_num)
+    def reply(self, starter_node: Data, key, value: bytes, request, found: bool = True):
+        # 담당 노드 대신 응답함, 요청이 이 노드까지 온 hop 수와 path 를 담음
+        threading.Thread(
+            target=data_request,
+            args=(
+                self.node_table.cur_node,
+                starter_node,
+                Data(key, value),
+                d.get_result,
+                request.request_id,
+                request.hops,
+                next_path(request.path, self.node_table.cur_node.value)),
+            kwargs={'found': found}
+        ).start()
 
-            # 만약 현재 메시지 수가 2의 배수라면 (1 포함)
-            if cur_finger_table_num - int(cur_finger_table_num) == 0:
+    def coalesce_get(self, starter_node: Data, key, request) -> bool:
+        """
+        같은 key 의 get 을 짧은 시간 안에 여러 번 전달하게 되면, 이 노드가 하나의 get 만 보내고 결과를 요청한 노드들에게 나눠줍니다.
+        요청한 노드는 담당 노드에게 lease 를 받지 않았으므로 이 값을 보관하지 않습니다. (lease_ms 는 0)
 
-                # 원본에게 finger table을 업데이트하도록 설정
-                # 이 요청이 끝나야 계속 가도록 설정
-                is_starter_node_alive = notify_node_info(
-                    self.node_table.cur_node,
-                    Data(request.node_key, request.node_address),
-                    int(cur_finger_table_num)
-                )
-                logging.debug(f"send res : {is_starter_node_alive}")
+        :return: 묶었으면 True, 그냥 전달해야 하면 False
+        """
+        if self.flights is None:
+            return False
+        cur_node = self.node_table.cur_node
+        waiter = RemoteWaiter(starter_node, request.request_id, request.hops, next_path(request.path, cur_node.value))
+        flight, leader = self.flights.join_forwarded(key, waiter)
+        if flight is None:
+            return False
+        if leader:
+            threading.Thread(
+                target=send_flight,
+                args=(self.node_table, self.pending_requests, self.flights, flight,
+                      [cur_node.value] if request.path else None,
+                      self.near_cache.lease_ms if self.near_cache is not None else 0,
+                      self.read_replicas.route(key) if self.read_replicas is not None else None)
+            ).start()
+        return True
 
-                # 만약 원본 노드가 응답이 없으면 (연결이 끊겼으면), 메시지를 끊음
-                if is_starter_node_alive is False:
-                    logging.debug(f"starter node network error, will end toss message here")
-                    return chord_pb2.HealthReply(pong=0)
+    def Invalidate(self, request, context):
+        # 담당 노드가 보낸 Invalidate, 값이 바뀌었으므로 near cache 에서 지움
+        if self.near_cache is not None:
+            self.near_cache.invalidate(id_from_bytes(request.key))
+        return chord_pb2.HealthReply(pong=0)
 
-            # 만약 어떤 사유로 노드 네트워크를 4번 이상 순회했는데도 여전히 돈다면, 네트워크가 끊어짐을 알림
-            if cur_node_num > 4 * self.node_table.node_network_num:
-                logging.info("CRITICAL! network is corrupted. end this toss message")
-                return chord_pb2.HealthReply(pong=0)
+    def Replicate(self, request, context):
+        # 담당 노드가 보낸 hot key 의 읽기용 복사본
+        if self.read_replicas is not None:
+            self.read_replicas.store(id_from_bytes(request.data_key), request.data_value if request.found else None,
+                                     request.version, request.ttl_ms)
+        return chord_pb2.HealthReply(pong=0)
+
+    def MGD(self, request, context):
+        # 본인이 담당하지 않는 key 는 다음 노드에게 보내지 않고, 요청한 노드가 다시 보내도록 redirect 로 응답함
+        starter_node = Data(id_from_bytes(request.node_key), request.node_address)
+        results, groups = route_multi_data(self.node_table, self.data_table, request.entries,
+                                           request.data_handling_type)
+        handled = len(results)
+        for node, group in groups.values():
+            results += [chord_pb2.KeyValue(data_key=entry.data_key, redirect=node.value) for entry in group]
+        if len(results) > handled:
+            metrics.inc('chord_data_requests_total', len(results) - handled,
+                        type=data_type_name(request.data_handling_type), handling='redirected')
+        logging.debug(f'handled {handled}/{len(results)} keys of multi data request from {starter_node.value}')
+        # 요청한 쪽이 redirect 되지 않은 key 들의 담당 노드를 기억할 수 있도록 본인의 key 범위를 담음
+        return chord_pb2.MultiDataReply(
+            entries=results, node_key=id_to_bytes(self.node_table.cur_node.key),
+            range_end=id_to_bytes(self.node_table.finger_table.entries[n.successor].key)
+        )
 
-            # 자신이 처리할 일이 끝났으면, 이 요청을 그대로 자신의 successor에게 전송
-            logging.debug("sending update message complete, pass to successor")
-            threading.Thread(target=toss_message,
-                             args=(
-                                 Data(request.node_key, request.node_address),
-                                 self.node_table.finger_table.entries[n.successor],
-                                 request.message_type,
-                                 request.message + 1)
-                             ).start()
-            return chord_pb2.HealthReply(pong=0)
+    def TransferRange(self, request_iterator, context):
+        # batch 를 받는 대로 저장하고, 본인이 담당하지 않는 key 는 MGD 로 담당 노드에게 넘김
+        received, stored, starter_node = 0, 0, None
+        for batch in request_iterator:
+            starter_node = Data(id_from_bytes(batch.node_key), batch.node_address)
+            results = process_multi_data(self.node_table, self.data_table, starter_node, batch.entries, d.set)
+            received += len(batch.entries)
+            stored += sum(1 for result in results if result.found)
+        if starter_node is not None:
+            logging.info(f'received {stored}/{received} keys from {starter_node.value}')
+        return chord_pb2.TransferReply(received=received, stored=stored)
 
 
-class HandleDataService(chord_pb2_grpc.HandleDataServicer):
+class ClientDataService(chord_pb2_grpc.ClientDataServicer):
     """
-    def data_request 를 받는 서버입니다.
+    ChordClient 의 요청을 받는 서버입니다.
+    본인이 처리해야 하는 key 면 바로 처리하고, 아니면 다음으로 요청할 노드를 알려줍니다.
     """
-    def __init__(self, node_table, data_table: TableEntry):
+    def __init__(self, node_table, data_table: DataTable, replicated_table=None):
+        """
+        :param replicated_table: 복사본을 가진 ReplicatedDataTable, 있으면 복사본으로도 get 에 응답함
+        """
         self.node_table = node_table
         self.data_table = data_table
+        self.replicated_table = replicated_table
+
+    def Query(self, request, context):
+        key = id_from_bytes(request.data_key)
+
+        # 담당하지 않는 key 라도 복사본이 있으면 get 에 바로 응답함 (read_quorum 이 1 일 때만, client 가 cache 하지 않도록 replica 로 표시)
+        if not self.node_table.is_responsible(key) and request.data_handling_type == d.get \
+                and self.replicated_table is not None:
+            value = self.replicated_table.replica_get(key)
+            if value is not None:
+                metrics.inc('chord_data_requests_total', type='get', handling='read_replica')
+                return chord_pb2.ClientReply(redirect=False, replica=True,
+                                             node_key=id_to_bytes(self.node_table.cur_node.key),
+                                             node_address=self.node_table.cur_node.value, data_value=value, found=True)
+
+        # 본인이 처리할 key 가 아니면, 살아있는 가장 가까운 노드로 redirect
+        if not self.node_table.is_responsible(key):
+            metrics.inc('chord_data_requests_total', type=data_type_name(request.data_handling_type),
+                        handling='redirected')
+            nearest_node = self.node_table.find_nearest_alive_node(key)
+            return chord_pb2.ClientReply(redirect=True, node_key=id_to_bytes(nearest_node.key),
+                                         node_address=nearest_node.value)
+
+        reply = chord_pb2.ClientReply(
+            redirect=False, node_key=id_to_bytes(self.node_table.cur_node.key),
+            node_address=self.node_table.cur_node.value,
+            range_end=id_to_bytes(self.node_table.finger_table.entries[n.successor].key)
+        )
+        entry = chord_pb2.KeyValue(data_key=request.data_key, data_value=request.data_value)
+        result = handle_local_entry(self.data_table, entry, request.data_handling_type)
+        reply.data_value = result.data_value if request.data_handling_type == d.get else b""
+        reply.found = result.found
+        reply.error = result.error
+        # 복사본을 가진 successor 들도 get 에 응답할 수 있으면, client 가 다음 get 을 나눠서 보내도록 알려줌
+        if request.data_handling_type == d.get and result.found and self.replicated_table is not None:
+            reply.replicas.extend(self.replicated_table.read_addresses())
+        return reply
+
+
+class ReplicaService(chord_pb2_grpc.ReplicaServicer):
+    """
+    def replica_write_request, replica_read_request 를 받는 서버입니다.
+    """
+    def __init__(self, replicated_table):
+        # replication.ReplicatedDataTable
+        self.replicated_table = replicated_table
 
-    def get(self, starter_node: Data, req_data: Data):
-        try:
-            value = self.data_table.get(req_data.key).value
-        except ValueError:
-            value = ""
+    def Write(self, request, context):
+        self.replicated_table.apply_replica(id_from_bytes(request.data_key), request.version,
+                                            request.data_value if request.found else None)
+        return chord_pb2.HealthReply(pong=0)
 
-        threading.Thread(
-            target=data_request,
-            args=(
-                self.node_table.cur_node,
-                starter_node,  # Finger Table 구현되면 수정 필요
-                Data(req_data.key, value),
-                d.get_result)
-        ).start()
+    def Read(self, request, context):
+        version, value = self.replicated_table.local_version(id_from_bytes(request.key))
+        return chord_pb2.ReplicaValue(data_key=request.key, data_value=value or b"", version=version,
+                                      found=value is not None)
 
-    def GD(self, request, context):
-        job_type = request.data_handling_type
-        starter_node = Data(request.node_key, request.node_address)
-        data = Data(request.data_key, request.data_value)
 
-        cur_key = self.node_table.cur_node.key
-        successor_key = self.node_table.finger_table.entries[n.successor].key
+def vnode_index(context) -> int:
+    # 요청을 받을 가상 노드의 번호, metadata 가 없으면 0 번째 가상 노드 (서버의 address) 로 보낸 요청임
+    for key, value in context.invocation_metadata():
+        if key == VNODE_METADATA:
+            return int(value)
+    return 0
 
-        # 만약 get 한 값이 들어왔을 때
-        if job_type == d.get_result:
 
-            # 값이 없으면 not found를 출력하게끔 한 뒤
-            if data.value == "":
-                data.value = "not found"
+class VirtualNodeServicer:
+    """
+    한 서버에서 동작하는 가상 노드들의 servicer 를 하나로 묶어서 서버에 등록합니다.
+    요청의 metadata 에 있는 가상 노드 번호 (channel_pool 이 붙여서 보냄) 에 해당하는 servicer 로 요청을 넘깁니다.
+    """
+    def __init__(self, servicers: list):
+        self.servicers = servicers
 
-            # 실제 get 한 값들을 보여줌
-            logging.info(f"request key:{data.key[:10]}'s value is {data.value}, stored in {starter_node.value}")
+    def __getattr__(self, method: str):
+        def dispatch(request, context):
+            index = vnode_index(context)
+            if index >= len(self.servicers):
+                context.abort(grpc.StatusCode.UNAVAILABLE, f'virtual node {index} does not exist')
+            return getattr(self.servicers[index], method)(request, context)
+        return dispatch
 
-        # 만약 자신의 data table에 접근해야 하는 값이라면
-        elif cur_key <= data.key < successor_key or successor_key < cur_key <= data.key or data.key < successor_key < cur_key:
-            if job_type == d.get:
-                self.get(starter_node, data)
-            if job_type == d.set:
-                self.data_table.set(data)
-                logging.info(
-                    f"request key:{data.key[:10]}'s value is set to {data.value}, stored in {self.node_table.cur_node.value}")
-            if job_type == d.delete:
-                self.data_table.delete(data.key)
-                logging.info(f"request key:{data.key[:10]} is deleted from {self.node_table.cur_node.value}")
-        else:
-            # 살아있는 가장 가까운 노드를 찾음
-            nearest_node = self.node_table.find_nearest_alive_node(data.key)
 
-            # 그 노드에게 이 정보를 보낸 뒤 종료
-            threading.Thread(
-                target=data_request,
-                args=(
-                    starter_node,
-                    nearest_node,  # Finger Table 구현되면 수정 필요
-                    data,
-                    job_type)
-            ).start()
-        return chord_pb2.HealthReply(pong=0)
+def virtual_node_servicer(servicers: list):
+    # 가상 노드가 하나면 servicer 를 그대로 등록함
+    return servicers[0] if len(servicers) == 1 else VirtualNodeServicer(servicers)
@@ -0,0 +1,207 @@
+import bisect
+import heapq
+import itertools
+import random
+
+import transport
+from data_structure import DataTable
+from node_table import NodeTable, SUCCESSOR_LIST_LENGTH
+from pending_requests import PendingRequests
+from service import HealthCheckService, GetNodeValueService, NotifyNodeService, HandleDataService, \
+    node_health_check
+from transport import InProcessTransport
+from utils import HASH_BIT_LENGTH, RING_SIZE
+from utils import generate_hash
+
+"""
+simulator.py 는 gRPC server 와 thread 없이, 한 프로세스 안에서 수천 ~ 수만 개의 NodeTable 을 실행하는 simulator 입니다.
+
+1. 노드 간 메시지는 InProcessTransport 로 servicer 를 직접 호출하므로, 실제 노드와 같은 service.py, node_table.py 코드가 동작함
+2. 시간은 가상 시계 (SimClock) 를 사용하며, 각 노드의 주기 작업 (health check, stabilize, fix_fingers, handoff) 은
+   event queue 에 등록된 시각에 차례대로 실행됨
+3. 실제 ring 의 상태 (살아있는 노드들의 key) 를 알고 있으므로, lookup 결과와 successor / predecessor / finger 가 맞는지 확인할 수 있음
+
+사용 방법
+    with Simulator(fingers_per_cycle=8) as sim:
+        sim.build_ring([f'node-{i}' for i in range(10000)])
+        sim.run(10.0)
+        ok, hops, correct = sim.lookup(generate_hash('key'))
+"""
+
+
+class SimClock:
+    """
+    simulator 의 가상 시계, 호출하면 현재 가상 시각 (초) 을 return 합니다.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Simulator:
+
+    def __init__(self, update_interval: float = 1.0, fingers_per_cycle: int = 8, seed: int = 0):
+        """
+        :param update_interval: 노드마다 health check, stabilize, fix_fingers 를 실행하는 주기 (가상 시간, 초)
+        :param fingers_per_cycle: 한 주기에 다른 노드에게 물어봐서 갱신하는 finger 의 최대 개수
+        """
+        self.update_interval = update_interval
+        self.fingers_per_cycle = fingers_per_cycle
+        self.rng = random.Random(seed)
+        self.clock = SimClock()
+        self.transport = InProcessTransport()
+        self.previous_transport = None
+
+        # address -> NodeTable, 살아있는 노드들
+        self.nodes = dict()
+        # 살아있는 노드들의 key (정렬됨) 와 key -> address, lookup 결과를 확인하기 위한 실제 ring 의 상태
+        self.ring = []
+        self.addresses = dict()
+
+        # (시각, 순서, 함수, 인자), 같은 시각이면 먼저 등록한 event 부터 실행
+        self.events = []
+        self.sequence = itertools.count()
+
+    def __enter__(self):
+        # 이 simulator 가 실행되는 동안 service.py 의 모든 메시지는 InProcessTransport 로 보냄
+        self.previous_transport = transport.use(self.transport)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        transport.use(self.previous_transport)
+        for node in self.nodes.values():
+            node.stop_flag = True
+
+    def schedule(self, delay: float, callback, *args):
+        heapq.heappush(self.events, (self.clock.now + delay, next(self.sequence), callback, args))
+
+    def run(self, duration: float):
+        """
+        가상 시간으로 duration 초 동안, 그 사이에 등록된 event 들을 시각 순서대로 실행합니다.
+        """
+        until = self.clock.now + duration
+        while self.events and self.events[0][0] <= until:
+            at, _, callback, args = heapq.heappop(self.events)
+            self.clock.now = at
+            callback(*args)
+        self.clock.now = until
+
+    def _create_node(self, address: str) -> NodeTable:
+        key = generate_hash(address)
+        data_table = DataTable()
+        node = NodeTable(key, address, data_table, self.fingers_per_cycle, self.update_interval, clock=self.clock)
+        self.transport.register(address, HealthCheckService(node), GetNodeValueService(node),
+                                NotifyNodeService(node), HandleDataService(node, data_table, PendingRequests()))
+        self.nodes[address] = node
+        bisect.insort(self.ring, key)
+        self.addresses[key] = address
+
+        # 모든 노드의 주기 작업이 같은 시각에 몰리지 않도록 시작 시각을 흩어놓음
+        self.schedule(self.rng.uniform(0, self.update_interval), self._update, node)
+        return node
+
+    def _update(self, node: NodeTable):
+        if node.stop_flag:
+            return
+        # FailureDetector.probe_all 과 같은 health check 를 thread pool 없이 차례대로 보냄
+        detector = node.failure_detector
+        for target in detector.targets():
+            detector.record(target.value, node_health_check(target))
+        node.update_once()
+        self.schedule(self.update_interval, self._update, node)
+
+    def add_node(self, address: str, bootstrap: str = None) -> bool:
+        """
+        노드를 추가하고, bootstrap 노드를 통해 ring 에 join 합니다. bootstrap 이 None 이면 혼자 ring 을 시작합니다.
+        :return: join 에 성공하면 True, 실패하면 노드를 다시 제거하고 False
+        """
+        node = self._create_node(address)
+        if bootstrap is None or node.join(self.nodes[bootstrap].cur_node):
+            return True
+        self.crash(address)
+        return False
+
+    def build_ring(self, addresses: list):
+        """
+        노드들을 join 과정 없이, stabilize 와 fix_fingers 가 모두 끝난 상태로 만듭니다.
+        노드 수만 개를 하나씩 join 시키면 오래 걸리므로, 큰 ring 의 routing 과 churn 을 볼 때 사용합니다.
+        """
+        nodes = [self._create_node(address) for address in addresses]
+        nodes.sort(key=lambda node: node.cur_node.key)
+        for i, node in enumerate(nodes):
+            node.set_predecessor(nodes[i - 1].cur_node)
+            successors = []
+            for k in range(1, min(SUCCESSOR_LIST_LENGTH, len(nodes) - 1) + 1):
+                successors.append(nodes[(i + k) % len(nodes)].cur_node)
+            successors = successors or [node.cur_node]
+            node.set_successor(successors[0])
+            node.successors = successors
+            for j in range(1, HASH_BIT_LENGTH):
+                node.finger_table.entries[j] = self.nodes[self.successor_of(node.cur_node.key + (1 << j))].cur_node
+
+    def crash(self, address: str):
+        # 노드가 data 를 넘기지 않고 바로 종료됨, 이후에 이 노드로 보낸 메시지는 모두 실패함
+        node = self.nodes.pop(address)
+        node.stop_flag = True
+        self.transport.unregister(address)
+        self.ring.remove(node.cur_node.key)
+        del self.addresses[node.cur_node.key]
+
+    def leave(self, address: str):
+        # disjoin 처럼 predecessor 와 successor 에게 알리고 data 를 넘긴 뒤 종료됨
+        self.nodes[address].leave()
+        self.crash(address)
+
+    def random_address(self) -> str:
+        return self.addresses[self.rng.choice(self.ring)]
+
+    def successor_of(self, key) -> str:
+        # key 보다 크거나 같은 첫 번째 노드 (finger 의 정답)
+        i = bisect.bisect_left(self.ring, key % RING_SIZE)
+        return self.addresses[self.ring[i % len(self.ring)]]
+
+    def owner_of(self, key) -> str:
+        # key 를 담당하는 노드, 노드 n 은 [n, successor) 범위를 담당함
+        i = bisect.bisect_right(self.ring, key % RING_SIZE) - 1
+        return self.addresses[self.ring[i]]
+
+    def lookup(self, key, start: str = None):
+        """
+        start 노드 (None 이면 임의의 노드) 에서 key 를 담당하는 노드를 iterative 하게 찾습니다. (NodeTable.lookup)
+        :return: (찾았는지, hop 수, 찾은 노드가 실제로 key 를 담당하는 노드인지)
+        """
+        node = self.nodes[start or self.random_address()]
+        try:
+            owner, path = node.lookup(key)
+        except LookupError:
+            return False, None, False
+        return True, len(path) - 1, owner.value == self.owner_of(key)
+
+    def ring_errors(self) -> int:
+        """
+        successor 나 predecessor 가 실제 ring 과 다른 노드의 수, 0 이면 ring 이 안정된 상태입니다.
+        """
+        errors = 0
+        for i, key in enumerate(self.ring):
+            node = self.nodes[self.addresses[key]]
+            successor = self.ring[(i + 1) % len(self.ring)]
+            predecessor = self.ring[i - 1]
+            if node.successor.key != successor or node.predecessor.key != predecessor:
+                errors += 1
+        return errors
+
+    def finger_accuracy(self, sample: int = 100) -> float:
+        """
+        임의로 고른 sample 개 노드의 finger 중, 실제 successor(n + 2^i) 를 가리키는 finger 의 비율을 return 합니다.
+        """
+        keys = self.rng.sample(self.ring, min(sample, len(self.ring)))
+        correct = total = 0
+        for key in keys:
+            entries = self.nodes[self.addresses[key]].finger_table.entries
+            for i, entry in enumerate(entries):
+                correct += entry.value == self.successor_of(key + (1 << i))
+                total += 1
+        return correct / total if total else 1.0
@@ -0,0 +1,136 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from metrics import metrics
+
+"""
+singleflight.py 는 같은 key 에 대해 동시에 들어온 get 들을 하나의 요청으로 묶는 기능입니다.
+
+인기 있는 key 의 값이 없거나 cache 가 비었을 때 get 이 한꺼번에 몰리면 (thundering herd), 모두 따로 담당 노드까지 요청을 보냅니다.
+이미 진행 중인 요청 (flight) 이 있으면 새 요청을 보내지 않고 기다리는 목록 (waiter) 에 추가하고,
+결과가 오면 모든 waiter 에게 나눠줍니다.
+
+1. 요청을 만든 노드: get 을 기다리는 Future 들이 waiter 가 됨
+2. 전달하는 노드: 요청을 만든 노드와 request id (RemoteWaiter) 가 waiter 가 되며, 본인이 대신 요청을 보내고 결과를 각자에게 보냄
+   - 결과가 담당 노드에서 요청한 노드로 바로 가는 기존 방식보다 한 번 더 전달되므로,
+     같은 key 의 get 을 window 안에 두 번 이상 전달할 때만 묶음
+"""
+
+
+class RemoteWaiter:
+    # 다른 노드가 만든 get 요청, 결과를 받으면 starter_node 에게 request_id 로 get 결과를 보냄
+
+    def __init__(self, starter_node, request_id: str, hops: int, path: list = None):
+        self.starter_node = starter_node
+        self.request_id = request_id
+        self.hops = hops
+        self.path = path
+
+
+class Flight:
+    # 진행 중인 하나의 요청과, 그 결과를 기다리는 waiter 들
+
+    def __init__(self, key, started: float):
+        self.key = key
+        self.started = started
+        self.waiters = []
+        self.request_id = None
+
+
+class SingleFlight:
+
+    def __init__(self, timeout: float = 5.0, window: float = 0.1, on_abandon=None, clock=time.monotonic):
+        """
+        :param timeout: 이 시간이 지나도 결과가 오지 않은 flight 는 버리고, 이후의 요청은 새로 보냄 (초)
+        :param window: 전달하는 노드에서, 같은 key 의 get 을 이 시간 안에 다시 전달하게 되면 묶기 시작함 (초)
+        :param on_abandon: flight 를 버릴 때 호출하는 함수, 결과를 기다리던 request id 를 정리할 때 사용함
+        """
+        self.timeout = timeout
+        self.window = window
+        self.on_abandon = on_abandon
+        self.clock = clock
+
+        self.flights = dict()          # key -> Flight
+        self.forwarded = OrderedDict()  # key -> 마지막으로 그냥 전달한 시각, 오래된 것부터 앞에 위치함
+        self.lock = Lock()
+
+        # 통계값
+        self.leaders = 0
+        self.joined = 0
+        self.abandoned = 0
+
+        metrics.gauge('chord_singleflight_inflight', lambda: len(self.flights))
+
+    def join(self, key, waiter, side: str = 'origin'):
+        """
+        key 의 flight 가 진행 중이면 waiter 를 추가하고, 없으면 waiter 로 새 flight 를 만듭니다.
+        :param side: metrics 에 기록할 위치 (요청을 만든 노드 origin, 전달하는 노드 forward)
+        :return: (flight, 새로 만들었는지), 새로 만든 쪽이 실제 요청을 보내고 결과가 오면 finish 를 호출해야 함
+        """
+        now = self.clock()
+        abandoned = None
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None and now - flight.started > self.timeout:
+                abandoned, flight = flight, None
+                self.abandoned += 1
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight(key, now)
+                self.leaders += 1
+            else:
+                self.joined += 1
+            flight.waiters.append(waiter)
+        if abandoned is not None and self.on_abandon is not None:
+            self.on_abandon(abandoned)
+        metrics.inc('chord_singleflight_requests_total', side=side, result='leader' if leader else 'joined')
+        return flight, leader
+
+    def join_forwarded(self, key, waiter):
+        """
+        전달하는 노드에서 사용하며, flight 가 진행 중이면 waiter 를 추가합니다.
+        flight 가 없으면, window 안에 같은 key 를 전달한 적이 있을 때만 새 flight 를 만들고, 아니면 전달한 시각만 기록합니다.
+        :return: (flight, 새로 만들었는지), 묶지 않고 그냥 전달해야 하면 (None, False)
+        """
+        now = self.clock()
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None or now - flight.started > self.timeout:
+                last = self.forwarded.get(key)
+                self.forwarded[key] = now
+                self.forwarded.move_to_end(key)
+                while self.forwarded and next(iter(self.forwarded.values())) < now - self.window:
+                    self.forwarded.popitem(last=False)
+                if last is None or now - last > self.window:
+                    return None, False
+        return self.join(key, waiter, side='forward')
+
+    def finish(self, flight: Flight) -> list:
+        """
+        flight 의 결과가 왔을 때 호출하며, 결과를 나눠줄 waiter 들을 return 합니다.
+        이미 버린 flight 여도 waiter 들은 그대로 return 합니다. (늦게 온 결과도 전달함)
+        """
+        with self.lock:
+            if self.flights.get(flight.key) is flight:
+                del self.flights[flight.key]
+            return list(flight.waiters)
+
+    def abandon(self, flight: Flight):
+        # 결과를 기다리다 timeout 된 flight, 이후의 요청은 새로 보냄
+        with self.lock:
+            if self.flights.get(flight.key) is not flight:
+                return
+            del self.flights[flight.key]
+            self.abandoned += 1
+        if self.on_abandon is not None:
+            self.on_abandon(flight)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'inflight': len(self.flights),
+                'leaders': self.leaders,
+                'joined': self.joined,
+                'abandoned': self.abandoned,
+            }
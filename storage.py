@@ -0,0 +1,300 @@
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from threading import Lock
+
+from utils import HASH_BYTE_LENGTH
+from utils import id_to_bytes, id_from_bytes
+
+"""
+storage.py 는 DataTable 의 변경 내역을 disk 에 남겨서, 노드가 재시작되어도 data 를 복구할 수 있게 해주는 모듈입니다.
+
+1. WAL (write-ahead log): set, delete 를 적용할 때마다 log 파일 끝에 record 를 추가함
+    - fsync 는 매번 (always), 일정 주기마다 모아서 (batch), 혹은 OS 에 맡김 (none)
+2. snapshot: WAL 이 일정 크기 이상 쌓이면, 현재 table 전체를 snapshot 파일로 저장하고 이전 WAL 을 지움
+    - 새 WAL segment 로 바꾼 시점의 table 을 저장하므로, snapshot + 이후 segment 들만 있으면 복구됨
+    - 임시 파일에 쓴 뒤 rename 하므로, 쓰는 도중에 죽어도 이전 snapshot 이 남아있음
+3. recover: 시작할 때 최신 snapshot 을 읽고, 그 이후의 WAL segment 들을 순서대로 다시 적용함
+    - 마지막 record 가 덜 쓰였거나 (crash) crc 가 맞지 않으면, 그 뒤는 버림
+
+record 형식: [payload 길이 (4 byte)][payload 의 crc32 (4 byte)][payload]
+payload 형식: [op (1 byte)][key (HASH_BYTE_LENGTH byte)][value (bytes 그대로)]
+    - OP_DELETE_RANGE 는 key 에 범위의 시작, value 에 범위의 끝 (16진수 문자열) 을 기록함
+"""
+
+OP_SET = 1
+OP_DELETE = 2
+OP_DELETE_RANGE = 3  # 다른 노드에게 넘겨준 key 범위 [start, end) 를 한 번에 지움
+
+FSYNC_ALWAYS = 'always'
+FSYNC_BATCH = 'batch'
+FSYNC_NONE = 'none'
+FSYNC_MODES = (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NONE)
+
+_HEADER = struct.Struct('>II')
+_SNAPSHOT_MAGIC = b'CHSN'
+_SNAPSHOT_HEADER = struct.Struct('>4sQQ')  # magic, 이 snapshot 이후에 적용할 첫 WAL segment 번호, record 수
+_WAL_PREFIX = 'wal-'
+_SNAPSHOT_PREFIX = 'snapshot-'
+
+
+def _encode(op: int, key, value: bytes) -> bytes:
+    payload = b''.join((bytes([op]), id_to_bytes(key), value))
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_records(file):
+    """
+    file 에서 record 를 하나씩 읽어서 (op, key, value) 를 return 합니다.
+    덜 쓰였거나 crc 가 맞지 않는 record 를 만나면 멈추고, 그 위치를 file 의 현재 위치로 남겨둡니다.
+    """
+    while True:
+        position = file.tell()
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            file.seek(position)
+            return
+        length, crc = _HEADER.unpack(header)
+        payload = file.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc or length < 1 + HASH_BYTE_LENGTH:
+            file.seek(position)
+            return
+        key = id_from_bytes(payload[1:1 + HASH_BYTE_LENGTH])
+        yield payload[0], key, payload[1 + HASH_BYTE_LENGTH:]
+
+
+def _fsync_directory(path: str):
+    # rename, 파일 생성/삭제가 disk 에 반영되도록 directory 도 fsync 함 (지원하지 않는 OS 는 무시)
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Storage(threading.Thread):
+
+    def __init__(self, path: str, fsync: str = FSYNC_BATCH, sync_interval: float = 0.05,
+                 snapshot_records: int = 100000):
+        """
+        :param path: WAL 과 snapshot 을 저장할 directory, 없으면 생성함
+        :param fsync: WAL 을 disk 에 반영하는 방식 (FSYNC_ALWAYS, FSYNC_BATCH, FSYNC_NONE)
+        :param sync_interval: FSYNC_BATCH 일 때 모아서 fsync 하는 주기 (초)
+        :param snapshot_records: WAL 에 이 개수 이상의 record 가 쌓이면 snapshot 을 만듦
+        """
+        super().__init__(daemon=True)
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f'unknown fsync mode: {fsync}')
+        self.path = path
+        self.fsync = fsync
+        self.sync_interval = sync_interval
+        self.snapshot_records = snapshot_records
+        os.makedirs(path, exist_ok=True)
+
+        self.data_table = None
+        self.wal = None
+        self.segment = 0          # 현재 쓰고 있는 WAL segment 번호
+        self.segment_records = 0  # 마지막 snapshot 이후로 WAL 에 쌓인 record 수
+        self.dirty = False        # 마지막 fsync 이후로 쓴 record 가 있는지
+        self.lock = Lock()        # WAL 파일에 대한 lock, snapshot 중에는 data_table.lock 을 먼저 잡음
+        self.stop_flag = False
+
+        # 통계값
+        self.appends = 0
+        self.syncs = 0
+        self.snapshots = 0
+        self.last_snapshot_seconds = 0.0
+        self.recovered_records = 0
+        self.recovery_seconds = 0.0
+
+    def _segments(self, prefix: str):
+        # prefix 로 시작하는 파일들의 번호를 오름차순으로 return
+        numbers = []
+        for name in os.listdir(self.path):
+            if name.startswith(prefix) and not name.endswith('.tmp'):
+                try:
+                    numbers.append(int(name[len(prefix):].split('.')[0]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def _wal_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'{_WAL_PREFIX}{segment:08d}.log')
+
+    def _snapshot_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'{_SNAPSHOT_PREFIX}{segment:08d}.dat')
+
+    def recover(self, data_table):
+        """
+        최신 snapshot 과 그 이후의 WAL 을 data_table 에 적용한 뒤, 이후의 변경 내역을 기록하기 시작합니다.
+        data_table 의 storage 로 본인을 등록하므로, 이 함수를 부른 뒤에는 set, delete 가 WAL 에 기록됩니다.
+        """
+        started = time.perf_counter()
+        self.data_table = data_table
+        records = 0
+
+        # 읽을 수 있는 가장 최신 snapshot 부터 적용함 (덜 쓰인 snapshot 은 건너뜀)
+        first_segment = 0
+        for snapshot in reversed(self._segments(_SNAPSHOT_PREFIX)):
+            loaded = self._load_snapshot(snapshot, data_table)
+            if loaded is not None:
+                first_segment, records = snapshot, loaded
+                break
+
+        segments = [segment for segment in self._segments(_WAL_PREFIX) if segment >= first_segment]
+        for segment in segments:
+            with open(self._wal_path(segment), 'r+b') as file:
+                for op, key, value in _read_records(file):
+                    self._apply(data_table, op, key, value)
+                    records += 1
+                    self.segment_records += 1
+                # crash 로 덜 쓰인 마지막 record 는 잘라냄 (이후의 record 가 그 뒤에 이어서 쓰이지 않도록)
+                file.truncate()
+
+        self.segment = segments[-1] if segments else first_segment
+        self.wal = open(self._wal_path(self.segment), 'ab')
+        self.recovered_records = records
+        self.recovery_seconds = time.perf_counter() - started
+        data_table.storage = self
+        if records:
+            logging.info(f'recovered {len(data_table)} keys from {records} records in {self.recovery_seconds:.2f}s')
+
+    @staticmethod
+    def _apply(data_table, op, key, value):
+        if op == OP_SET:
+            data_table.set(key, value)
+        elif op == OP_DELETE:
+            try:
+                data_table.delete(key)
+            except ValueError:
+                pass
+        elif op == OP_DELETE_RANGE:
+            data_table.detach(key, int(value.decode('ascii'), 16))
+
+    def _load_snapshot(self, segment: int, data_table):
+        try:
+            with open(self._snapshot_path(segment), 'rb') as file:
+                magic, _, count = _SNAPSHOT_HEADER.unpack(file.read(_SNAPSHOT_HEADER.size))
+                if magic != _SNAPSHOT_MAGIC:
+                    return None
+                records = list(_read_records(file))
+        except (OSError, struct.error):
+            return None
+        if len(records) != count:
+            logging.info(f'snapshot {segment} is incomplete, skip it')
+            return None
+        for op, key, value in records:
+            self._apply(data_table, op, key, value)
+        return count
+
+    def log_set(self, key, value: bytes):
+        # data_table.lock 을 잡은 상태에서 호출됨, table 에 적용된 순서대로 WAL 에 기록됨
+        self._append(_encode(OP_SET, key, value))
+
+    def log_delete(self, key):
+        self._append(_encode(OP_DELETE, key, b''))
+
+    def log_delete_range(self, start, end):
+        self._append(_encode(OP_DELETE_RANGE, start, f'{end:x}'.encode('ascii')))
+
+    def _append(self, record: bytes):
+        with self.lock:
+            self.wal.write(record)
+            self.appends += 1
+            self.segment_records += 1
+            if self.fsync == FSYNC_ALWAYS:
+                self._sync()
+            else:
+                self.dirty = True
+
+    def _sync(self):
+        # self.lock 을 잡은 상태에서 호출해야 함
+        self.wal.flush()
+        if self.fsync != FSYNC_NONE:
+            os.fsync(self.wal.fileno())
+            self.syncs += 1
+        self.dirty = False
+
+    def sync(self):
+        with self.lock:
+            if self.dirty:
+                self._sync()
+
+    def snapshot(self):
+        """
+        현재 table 을 snapshot 으로 저장하고, snapshot 에 포함된 이전 WAL segment 들을 지웁니다.
+        table 을 복사하고 새 WAL segment 로 바꾸는 동안만 set, delete 가 멈추고, 파일 쓰기는 그 뒤에 합니다.
+        """
+        started = time.perf_counter()
+        with self.data_table.lock:
+            with self.lock:
+                self._sync()
+                self.wal.close()
+                self.segment += 1
+                self.wal = open(self._wal_path(self.segment), 'ab')
+                self.segment_records = 0
+            entries = [(data.key, data.value) for data in self.data_table.iter_entries()]
+
+        path = self._snapshot_path(self.segment)
+        with open(path + '.tmp', 'wb') as file:
+            file.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, self.segment, len(entries)))
+            for key, value in entries:
+                file.write(_encode(OP_SET, key, value))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+        _fsync_directory(self.path)
+
+        # 새 snapshot 이 disk 에 반영된 뒤에, 이전 snapshot 과 WAL 을 지움
+        for segment in self._segments(_SNAPSHOT_PREFIX):
+            if segment < self.segment:
+                os.remove(self._snapshot_path(segment))
+        for segment in self._segments(_WAL_PREFIX):
+            if segment < self.segment:
+                os.remove(self._wal_path(segment))
+
+        self.snapshots += 1
+        self.last_snapshot_seconds = time.perf_counter() - started
+        logging.debug(f'snapshot of {len(entries)} keys is written in {self.last_snapshot_seconds:.2f}s')
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'segment': self.segment,
+                'wal_records': self.segment_records,
+                'appends': self.appends,
+                'syncs': self.syncs,
+                'snapshots': self.snapshots,
+                'last_snapshot_seconds': self.last_snapshot_seconds,
+                'recovered_records': self.recovered_records,
+                'recovery_seconds': self.recovery_seconds,
+            }
+
+    def close(self):
+        # 진행 중인 snapshot 이 끝날 때까지 기다린 뒤 WAL 을 닫음
+        self.stop_flag = True
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+        with self.lock:
+            if self.wal is not None and not self.wal.closed:
+                self._sync()
+                self.wal.close()
+
+    def run(self):
+        # batch 로 fsync 하고, WAL 이 충분히 쌓이면 snapshot 을 만듦
+        while not self.stop_flag:
+            time.sleep(self.sync_interval)
+            try:
+                self.sync()
+                if self.segment_records >= self.snapshot_records:
+                    self.snapshot()
+            except (OSError, ValueError) as e:  # close 된 뒤에 호출되면 ValueError 가 날 수 있음
+                logging.info(f'failed to write storage: {e}')
@@ -0,0 +1,78 @@
+import json
+import logging
+import time
+from threading import Lock
+
+"""
+tracing.py 는 get, set, delete 요청이 담당 노드까지 몇 번 전달되었는지 (hop) 와 걸린 시간을 file 에 기록합니다.
+
+요청을 만든 노드는 request id 와 본인의 address 를 path 에 넣어서 보내고, 요청을 넘기는 노드는 hop 수를 1 늘리고
+본인의 address 를 path 에 추가합니다. 담당 노드는 set, delete 를 처리할 때, 요청을 만든 노드는 get 결과를 받을 때
+한 줄에 하나의 JSON 으로 trace 를 기록하므로, 여러 노드의 file 을 합쳐서 routing 효율을 분석할 수 있습니다.
+
+기록하는 값
+    time: 기록한 시각 (unix time), node: 기록한 노드, request_id, type: get / set / delete,
+    key: data key (hex), mode: recursive / iterative, hops, path, latency_ms: 요청을 만든 노드에서 잰 시간 (모르면 null)
+"""
+
+
+class RequestTracer:
+
+    def __init__(self):
+        self.file = None
+        self.lock = Lock()
+        self.records = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.file is not None
+
+    def open(self, path: str):
+        """
+        trace 를 기록할 file 을 엽니다. 이미 있는 file 이면 뒤에 이어서 씁니다.
+        """
+        self.close()
+        # 노드가 갑자기 종료되어도 기록한 줄은 남도록 줄 단위로 flush 함
+        self.file = open(path, 'a', buffering=1)
+        logging.info(f'request traces are written to {path}')
+
+    def record(self, node: str, request_id: str, data_handling_type: str, key: int, mode: str, hops: int,
+               path: list = None, latency: float = None):
+        """
+        :param node: 기록하는 노드의 address
+        :param key: data 의 key (hashing 된 값)
+        :param hops: 요청을 만든 노드부터 담당 노드까지 전달된 횟수
+        :param path: 거쳐간 노드들의 address, 모르면 None
+        :param latency: 요청을 만든 노드에서 잰 시간 (초), 모르면 None
+        """
+        if self.file is None:
+            return
+        line = json.dumps({
+            'time': time.time(), 'node': node, 'request_id': request_id, 'type': data_handling_type,
+            'key': format(key, 'x'), 'mode': mode, 'hops': hops, 'path': path,
+            'latency_ms': None if latency is None else round(latency * 1000, 3),
+        })
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(line + '\n')
+            self.records += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def next_path(path, address: str):
+    """
+    요청을 넘길 때 보낼 path 를 return 합니다. trace 를 기록하지 않는 요청 (path 가 비어있음) 이면 None 입니다.
+    """
+    if not path:
+        return None
+    return list(path) + [address]
+
+
+# 프로세스 전체에서 공유하는 tracer, open 하기 전에는 아무것도 기록하지 않음
+tracer = RequestTracer()
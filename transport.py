@@ -0,0 +1,175 @@
+import functools
+from collections import Counter
+from threading import Lock
+
+import grpc
+
+from channel_pool import channel_pool
+from protos.output import chord_pb2_grpc
+
+"""
+transport.py 는 service.py 의 함수들이 다른 노드에게 메시지를 보낼 때 사용할 transport 를 정합니다.
+
+transport 는 get_stub(address, stub_class) 와 remove(address) 를 가진 객체이며, 프로세스 전체에서 하나를 사용합니다.
+1. channel_pool (기본값): peer 별로 재사용되는 gRPC channel 로 만든 stub 을 return 함
+2. InProcessTransport: 같은 프로세스에 등록된 servicer 의 method 를 직접 호출하는 stub 을 return 함
+    gRPC server 없이 노드 수천 개를 한 프로세스에서 실행할 때 (simulator.py) 사용합니다.
+
+InProcessTransport 는 gRPC 와 같은 방식으로 실패를 알려주므로 (grpc.RpcError), service.py 의 함수들은 그대로 동작합니다.
+"""
+
+_transport = channel_pool
+
+
+def use(transport):
+    """
+    이후의 모든 메시지를 transport 로 보냅니다.
+    :return: 이전에 사용하던 transport
+    """
+    global _transport
+    previous, _transport = _transport, transport
+    return previous
+
+
+def current():
+    return _transport
+
+
+def get_stub(address: str, stub_class):
+    return _transport.get_stub(address, stub_class)
+
+
+def remove(address: str):
+    _transport.remove(address)
+
+
+class TransportError(grpc.RpcError):
+    """
+    InProcessTransport 에서 요청이 실패했을 때 발생하는 error 입니다. gRPC 의 _InactiveRpcError 처럼 code() 를 가집니다.
+    """
+
+    def __init__(self, code: grpc.StatusCode, details: str = ''):
+        super().__init__(details)
+        self._code = code
+        self._details = details
+
+    def code(self) -> grpc.StatusCode:
+        return self._code
+
+    def details(self) -> str:
+        return self._details
+
+
+class _AbortError(TransportError):
+    # servicer 가 context.abort 로 직접 실패를 알린 경우
+    pass
+
+
+class _InProcessContext:
+    # servicer 에게 넘겨주는 grpc.ServicerContext 대신 사용하는 객체, servicer 들이 사용하는 method 만 구현함
+
+    def __init__(self, peer: str):
+        self._peer = peer
+
+    def peer(self) -> str:
+        return self._peer
+
+    def invocation_metadata(self):
+        return ()
+
+    def is_active(self) -> bool:
+        return True
+
+    def time_remaining(self):
+        return None
+
+    def abort(self, code: grpc.StatusCode, details: str):
+        raise _AbortError(code, details)
+
+
+class _InProcessStub:
+
+    def __init__(self, transport, address: str, service: str):
+        self.transport = transport
+        self.address = address
+        self.service = service
+
+    def __getattr__(self, method: str):
+        return functools.partial(self.transport.call, self.address, self.service, method)
+
+
+def _service_name(cls) -> str:
+    # chord_pb2_grpc 의 HealthCheckerStub, HealthCheckerServicer -> HealthChecker
+    for suffix in ('Stub', 'Servicer'):
+        if cls.__name__.endswith(suffix):
+            return cls.__name__[:-len(suffix)]
+    raise ValueError(f'{cls.__name__} is not a gRPC stub or servicer')
+
+
+class InProcessTransport:
+    """
+    address 별로 등록된 servicer 를 직접 호출하는 transport 입니다.
+    등록되지 않은 address (종료된 노드) 로 보낸 요청은 UNAVAILABLE, servicer 에서 발생한 exception 은 UNKNOWN 으로 실패합니다.
+    """
+
+    def __init__(self):
+        # address -> {service 이름: servicer}
+        self.servers = dict()
+        self.lock = Lock()
+
+        # 통계값
+        self.calls = Counter()  # method 이름 -> 요청 수
+        self.failures = 0
+
+    def register(self, address: str, *servicers):
+        """
+        address 에서 servicers 가 요청을 받도록 등록합니다. (gRPC 의 add_XXXServicer_to_server 와 같은 역할)
+        """
+        services = dict()
+        for servicer in servicers:
+            base = next(cls for cls in type(servicer).__mro__ if cls.__module__ == chord_pb2_grpc.__name__)
+            services[_service_name(base)] = servicer
+        with self.lock:
+            self.servers[address] = services
+
+    def unregister(self, address: str):
+        # 노드가 종료된 것처럼, 이후에 address 로 오는 요청은 모두 실패함
+        with self.lock:
+            self.servers.pop(address, None)
+
+    def get_stub(self, address: str, stub_class):
+        return _InProcessStub(self, address, _service_name(stub_class))
+
+    def remove(self, address: str):
+        # 닫을 channel 이 없음
+        pass
+
+    def call(self, address: str, service: str, method: str, request, timeout: float = None, metadata=None):
+        with self.lock:
+            self.calls[method] += 1
+            servicer = self.servers.get(address, {}).get(service)
+        if servicer is None:
+            self._fail()
+            raise TransportError(grpc.StatusCode.UNAVAILABLE, f'{address} is not reachable')
+        try:
+            return getattr(servicer, method)(request, _InProcessContext(address))
+        except _AbortError:
+            self._fail()
+            raise
+        except Exception as e:
+            # gRPC server 처럼, 처리 도중에 발생한 exception 은 요청한 쪽에 UNKNOWN 으로 알려줌
+            self._fail()
+            raise TransportError(grpc.StatusCode.UNKNOWN, f'{type(e).__name__}: {e}')
+
+    def _fail(self):
+        with self.lock:
+            self.failures += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'nodes': len(self.servers),
+                'calls': sum(self.calls.values()),
+                'failures': self.failures,
+                'methods': dict(self.calls),
+            }
@@ -17,39 +17,23 @@ class _NodeType(object):
     def predecessor(self):
         return -1
 
-    def finger_table(self, i):
-        return i
-
-    @constant
-    def successor(self):
-        return 1
-
-    @constant
-    def d_successor(self):
-        return 2
-
-
-class _TossMessageType(object):
     @constant
-    def join_node(self):
+    def predecessor_candidate(self):
         """
-        network에 최초로 join할 때 쓰는 규격입니다.
+        predecessor 일 수도 있는 노드를 알려줄 때 쓰는 규격입니다. (Chord 의 notify)
+        받은 노드는 해당 노드가 현재 predecessor 보다 가까울 때만 predecessor 를 교체합니다.
         """
-        return 1
+        return -2
 
-    @constant
-    def finger_table_setting(self):
+    def finger_table(self, i):
         """
-        노드의 finger table을 업데이트 할 때 쓰는 규격입니다.
+        finger_table[i] 는 successor(n + 2^i) 입니다.
         """
-        return 2
+        return i
 
     @constant
-    def left_node(self):
-        """
-        network에서 나갈 때 쓰는 규격입니다. (djsjoin)
-        """
-        return 3
+    def successor(self):
+        return 0
 
 
 class _DataHandlingType(object):
@@ -83,16 +67,135 @@ class _DataHandlingType(object):
 
 
 NodeType = _NodeType()
-TossMessageType = _TossMessageType()
 DataHandlingType = _DataHandlingType()
 
-HASH_BIT_LENGTH = 32
+# ring identifier 의 bit 수, SHA-1 의 digest 길이와 같음
+# data 는 key 의 hash 값으로 저장되므로, bit 수를 줄이면 서로 다른 key 가 같은 id 를 가질 수 있음
+HASH_BIT_LENGTH = 160
+HASH_BYTE_LENGTH = HASH_BIT_LENGTH // 8
+RING_SIZE = 1 << HASH_BIT_LENGTH
 
 
-def generate_hash(address: str):
+def generate_hash(address: str) -> int:
+    """
+    address 나 key 를 ring 위의 identifier (0 이상 RING_SIZE 미만의 정수) 로 바꿉니다.
+    """
     hasher = hashlib.sha1()
     hasher.update(address.encode())
-    return hasher.hexdigest()
+    return int.from_bytes(hasher.digest(), 'big') >> (160 - HASH_BIT_LENGTH)
+
+
+# 한 서버에서 여러 가상 노드를 실행할 때, 가상 노드의 address 는 '서버 address#번호' 형식을 사용함
+# 가상 노드에게 보내는 요청은 서버 address 로 보내고, 번호는 gRPC metadata 로 보냄
+VNODE_SEPARATOR = '#'
+VNODE_METADATA = 'chord-vnode'
+
+
+def vnode_address(address: str, index: int) -> str:
+    """
+    address 의 서버에서 동작하는 index 번째 가상 노드의 address 입니다. 0 번째 가상 노드는 서버의 address 를 그대로 사용합니다.
+    가상 노드의 ring identifier 는 generate_hash(vnode_address(address, index)) 입니다.
+    """
+    return address if index == 0 else f'{address}{VNODE_SEPARATOR}{index}'
+
+
+def split_vnode(address: str):
+    """
+    :return: (서버의 address, 가상 노드 번호), 가상 노드 address 가 아니면 번호는 0
+    """
+    physical, _, index = address.partition(VNODE_SEPARATOR)
+    return physical, int(index) if index else 0
+
+
+def id_to_bytes(key) -> bytes:
+    """
+    ring identifier 를 gRPC 메시지로 보내기 위한 HASH_BYTE_LENGTH 길이의 bytes 로 바꿉니다.
+    key 가 없으면 (None) 빈 bytes 를 return 합니다.
+    """
+    if key is None:
+        return b''
+    return key.to_bytes(HASH_BYTE_LENGTH, 'big')
+
+
+def id_from_bytes(raw: bytes):
+    """
+    gRPC 메시지로 받은 bytes 를 ring identifier 로 바꿉니다. 빈 bytes 면 None 을 return 합니다.
+    """
+    if not raw:
+        return None
+    return int.from_bytes(raw, 'big')
+
+
+def short_id(key) -> str:
+    # log 출력용, identifier 의 앞 10자리 hex 값
+    if key is None:
+        return 'None'
+    if isinstance(key, int):
+        return f'{key:0{HASH_BYTE_LENGTH * 2}x}'[:10]
+    return str(key)[:10]
+
+
+def to_value(value) -> bytes:
+    """
+    저장할 value 를 bytes 로 바꿉니다. value 는 노드 사이에서 bytes 그대로 전달되고 저장되며, decode 하지 않습니다.
+    str 은 utf-8 로 encode 하고, bytes 는 복사하지 않고 그대로 return 합니다.
+    bytearray, memoryview 는 한 번 bytes 로 복사함 (gRPC 메시지의 bytes field 는 bytes 만 받고, 저장된 값이 바뀌지 않게 함)
+    """
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode('utf-8')
+    return bytes(value)
+
+
+def show_value(value, limit: int = 64) -> str:
+    # log 출력용, utf-8 문자열이면 그대로 (limit 자 까지), 아니면 크기만 출력
+    if value is None or isinstance(value, str):
+        return str(value)
+    try:
+        text = bytes(value).decode('utf-8')
+    except UnicodeDecodeError:
+        return f'<{len(value)} bytes>'
+    return text if len(text) <= limit else f'{text[:limit]}... ({len(value)} bytes)'
+
+
+def in_range(key, start, end) -> bool:
+    """
+    ring 위에서 key 가 [start, end) 범위에 있는지 확인합니다.
+    start 와 end 가 같으면 ring 전체를 의미합니다. (노드가 하나뿐인 경우)
+    """
+    if start < end:
+        return start <= key < end
+    if end < start:
+        return start <= key or key < end
+    return True
+
+
+def in_open_range(key, start, end) -> bool:
+    """
+    ring 위에서 key 가 (start, end) 범위에 있는지 확인합니다.
+    start 와 end 가 같으면 start 를 제외한 ring 전체를 의미합니다.
+    """
+    if start < end:
+        return start < key < end
+    return start < key or key < end
+
+
+def in_right_closed_range(key, start, end) -> bool:
+    """
+    ring 위에서 key 가 (start, end] 범위에 있는지 확인합니다.
+    start 와 end 가 같으면 ring 전체를 의미합니다.
+    """
+    if start < end:
+        return start < key <= end
+    if end < start:
+        return start < key or key <= end
+    return True
+
+
+def ring_distance(start, end) -> int:
+    # ring 위에서 시계 방향으로 start 부터 end 까지의 거리
+    return (end - start) % RING_SIZE
 
 
 # TODO: try-catch 시에 raw stack trace 출력 안 하고 error code랑 message만 출력 (우선순위 낮음)